@@ -0,0 +1,356 @@
+# agent-server/benchmarks/loadtest.py
+"""
+오프라인 end-to-end 부하 테스트 (성능 변경마다 돌리는 회귀 기준)
+
+구성
+  - OpenAI: benchmarks/openai_stub.py (별도 스레드의 로컬 HTTP 서버, 지연 분포 설정 가능)
+  - Firestore: REPO_BACKEND=memory (coach_agent/services/memory_firestore.py; 실제 Repo / 체크포인터 코드 그대로)
+    --backend sqlite 면 임시 디렉터리의 SQLite 파일 (coach_agent/services/sqlite_repo.py / sqlite_checkpointer.py)
+  - RAG: benchmarks/rag_stub.py (search_cbt_corpus 의 임베딩 / Pinecone 만 교체)
+  - FastAPI 앱(main.server)은 같은 프로세스·같은 이벤트 루프에서 httpx ASGITransport 로 호출
+    → 그래프 / 체크포인터 / Repo 래퍼 / 미들웨어 등 서버 코드는 실제와 동일하게 실행
+
+시나리오 (가상 사용자 N명 동시 실행)
+  /session/init → /chat("__init__") → /chat(사용자 발화) 반복 (is_ended 또는 --max-turns 까지)
+  --sessions 만큼 반복 (주간 상담 완료 후에는 GENERAL 세션)
+
+리포트
+  - 처리량 (req/s, 턴/s), 엔드포인트별 p50 / p95 / p99 / max 지연, 에러 수
+  - Firestore 읽기/쓰기 수 (턴당, 작업별 상위 항목)
+  - 이벤트 루프 블로킹: 주기적으로 sleep 한 태스크가 늦게 깨어난 시간 (합계 / 최대 / p99)
+  - --save-baseline / --compare 로 이전 결과와 비교 (회귀 시 exit code 1)
+
+실행 (agent-server 디렉터리에서):
+    python -m benchmarks.loadtest --users 20 --llm-latency lognormal:600,0.4
+    python -m benchmarks.loadtest --users 20 --llm-latency 0 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.loadtest --users 20 --llm-latency 0 --compare benchmarks/baseline.json
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+USER_MESSAGES = [
+    "요즘 퇴근하고 나면 스트레스 때문에 자꾸 쇼핑 앱을 열게 돼요.",
+    "어제도 필요 없는 옷을 세 벌이나 샀어요. 사고 나면 잠깐 기분이 좋아져요.",
+    "사기 직전에는 '이 정도는 나한테 주는 보상이지'라는 생각이 들어요.",
+    "카드값 보면 후회하는데 또 반복하게 되네요.",
+    "다음에는 장바구니에 담고 하루 기다려 보는 걸 해볼게요.",
+    "그때 감정은 불안이랑 허무함이 섞여 있었던 것 같아요.",
+]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, int(round(q / 100 * len(values) + 0.5)) - 1))
+    return values[idx]
+
+
+# ---------------------------------------------------------------
+# 이벤트 루프 블로킹 측정
+# ---------------------------------------------------------------
+class LoopLagMonitor:
+    """interval 마다 깨어나도록 sleep 하고, 늦게 깨어난 만큼을 루프가 막혀 있던 시간으로 기록"""
+
+    def __init__(self, interval_ms: float = 10.0, threshold_ms: float = 5.0) -> None:
+        self.interval = interval_ms / 1000
+        self.threshold_ms = threshold_ms
+        self.lags_ms: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags_ms.append(max(0.0, (loop.time() - expected) * 1000))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def report(self) -> Dict[str, Any]:
+        blocked = [lag for lag in self.lags_ms if lag >= self.threshold_ms]
+        return {
+            "samples": len(self.lags_ms),
+            "blocked_events": len(blocked),
+            "blocked_ms_total": round(sum(blocked), 1),
+            "lag_ms_p99": round(_percentile(self.lags_ms, 99), 2),
+            "lag_ms_max": round(max(self.lags_ms, default=0.0), 2),
+        }
+
+
+# ---------------------------------------------------------------
+# 환경 구성 (앱 import 전에 호출)
+# ---------------------------------------------------------------
+def prepare_environment(args: argparse.Namespace) -> Dict[str, Any]:
+    from benchmarks.openai_stub import LatencyModel, StubBehavior, start_in_thread
+
+    behavior = StubBehavior(
+        LatencyModel.parse(args.llm_latency, args.seed),
+        criteria_met_prob=args.criteria_met_prob,
+        offtopic_rate=args.offtopic_rate,
+        seed=args.seed,
+    )
+    base_url = start_in_thread(behavior)
+
+    workdir = tempfile.mkdtemp(prefix="coach_loadtest_")
+    os.environ["OPENAI_API_KEY"] = "sk-loadtest"
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_BASE"] = base_url
+    os.environ["LANGSMITH_TRACING"] = "false"
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    os.environ["REPO_BACKEND"] = args.backend
+    os.environ["SQLITE_PATH"] = os.path.join(workdir, "coach_agent.db")
+    os.environ["REPO_CACHE_SNAPSHOT_INVALIDATION"] = "false"
+    os.environ["MESSAGE_QUEUE_SPILL_PATH"] = os.path.join(workdir, "message_spill.jsonl")
+    os.environ.setdefault("TRACE_EXPORTER", "none")
+    os.environ["TRACE_JSONL_PATH"] = os.path.join(workdir, "traces.jsonl")
+
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    if src not in sys.path:
+        sys.path.insert(0, src)
+
+    from benchmarks import rag_stub
+    rag_stub.install(LatencyModel.parse(args.embed_latency, args.seed), LatencyModel.parse(args.pinecone_latency, args.seed))
+    return {"behavior": behavior, "base_url": base_url, "workdir": workdir}
+
+
+# ---------------------------------------------------------------
+# 가상 사용자
+# ---------------------------------------------------------------
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.turns = 0
+        self.sessions_ended = 0
+
+    async def call(self, client, endpoint: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            res = await client.post(endpoint, json=payload)
+        except Exception as e:
+            self.latencies[endpoint].append(time.perf_counter() - started)
+            self.errors[endpoint] += 1
+            print(f"   ❌ [LoadTest] {endpoint} 예외: {e}")
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        if res.status_code != 200:
+            self.errors[endpoint] += 1
+            print(f"   ❌ [LoadTest] {endpoint} {res.status_code}: {res.text[:200]}")
+            return None
+        return res.json()
+
+
+async def run_user(client, rec: Recorder, user_index: int, args: argparse.Namespace) -> None:
+    rng = random.Random((args.seed or 0) * 1000 + user_index)
+    user_id = f"loadtest-user-{user_index:04d}"
+    for _ in range(args.sessions):
+        init = await rec.call(client, "/session/init", {"user_id": user_id})
+        if not init:
+            return
+        base = {"user_id": user_id, "thread_id": init["thread_id"], "session_type": init["session_type"]}
+
+        message = "__init__"
+        for _turn in range(args.max_turns):
+            res = await rec.call(client, "/chat", {**base, "message": message})
+            rec.turns += 1
+            if not res:
+                break
+            if res.get("is_ended"):
+                rec.sessions_ended += 1
+                break
+            message = rng.choice(USER_MESSAGES)
+            if args.think_ms:
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_ms / 1000)
+
+
+# ---------------------------------------------------------------
+# 리포트 / 회귀 비교
+# ---------------------------------------------------------------
+def build_report(rec: Recorder, lag: LoopLagMonitor, elapsed: float, env: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    endpoints = {}
+    total = 0
+    for endpoint, values in sorted(rec.latencies.items()):
+        total += len(values)
+        endpoints[endpoint] = {
+            "count": len(values),
+            "errors": rec.errors.get(endpoint, 0),
+            "p50_ms": round(_percentile(values, 50) * 1000, 1),
+            "p95_ms": round(_percentile(values, 95) * 1000, 1),
+            "p99_ms": round(_percentile(values, 99) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+        }
+    behavior = env["behavior"]
+    from coach_agent.services.memory_firestore import MEMORY_STORE
+    fs = MEMORY_STORE.stats()  # backend=sqlite 면 모두 0 (Firestore 호출 없음)
+    return {
+        "config": {
+            "backend": args.backend,
+            "users": args.users,
+            "sessions": args.sessions,
+            "max_turns": args.max_turns,
+            "llm_latency": args.llm_latency,
+            "embed_latency": args.embed_latency,
+            "pinecone_latency": args.pinecone_latency,
+            "think_ms": args.think_ms,
+            "seed": args.seed,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "turns": rec.turns,
+        "turns_per_s": round(rec.turns / elapsed, 2) if elapsed else 0.0,
+        "sessions_ended": rec.sessions_ended,
+        "endpoints": endpoints,
+        "event_loop": lag.report(),
+        "llm_stub": {"requests": behavior.requests, "tool_calls": dict(behavior.tool_calls)},
+        "firestore": {
+            "documents": fs["documents"],
+            "reads": fs["reads"],
+            "writes": fs["writes"],
+            "reads_per_turn": round(fs["reads"] / rec.turns, 1) if rec.turns else 0.0,
+            "writes_per_turn": round(fs["writes"] / rec.turns, 1) if rec.turns else 0.0,
+            "by_operation": fs["by_operation"],
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    cfg = report["config"]
+    print("\n📊 [LoadTest] 결과")
+    print(f"   backend={cfg.get('backend', 'memory')} users={cfg['users']} sessions={cfg['sessions']} llm={cfg['llm_latency']} "
+          f"embed={cfg['embed_latency']} pinecone={cfg['pinecone_latency']}")
+    print(f"   elapsed={report['elapsed_s']}s requests={report['requests']} "
+          f"throughput={report['throughput_rps']} req/s turns={report['turns']} ({report['turns_per_s']}/s) "
+          f"ended={report['sessions_ended']}")
+    print(f"   {'endpoint (ms)':<16}{'count':>7}{'err':>5}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for endpoint, s in report["endpoints"].items():
+        print(f"   {endpoint:<16}{s['count']:>7}{s['errors']:>5}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+    lag = report["event_loop"]
+    print(f"   event loop: blocked {lag['blocked_ms_total']}ms in {lag['blocked_events']} events "
+          f"(lag p99={lag['lag_ms_p99']}ms, max={lag['lag_ms_max']}ms)")
+    print(f"   llm stub: {report['llm_stub']}")
+    fs = report["firestore"]
+    print(f"   firestore: reads={fs['reads']} ({fs['reads_per_turn']}/turn) writes={fs['writes']} "
+          f"({fs['writes_per_turn']}/turn) docs={fs['documents']}")
+    for op, c in list(fs["by_operation"].items())[:8]:
+        print(f"      {op:<36} calls={c['calls']:<6} reads={c['reads']:<6} writes={c['writes']}")
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """허용 범위(tolerance, 비율)를 넘게 나빠진 항목 목록"""
+    regressions = []
+    base_rps, rps = baseline.get("throughput_rps", 0), report["throughput_rps"]
+    if base_rps and rps < base_rps * (1 - tolerance):
+        regressions.append(f"throughput {rps} < baseline {base_rps}")
+    for endpoint, base in baseline.get("endpoints", {}).items():
+        cur = report["endpoints"].get(endpoint)
+        if not cur:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if base[key] and cur[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{endpoint} {key} {cur[key]} > baseline {base[key]}")
+        if cur["errors"] > base.get("errors", 0):
+            regressions.append(f"{endpoint} errors {cur['errors']} > baseline {base.get('errors', 0)}")
+    base_block = baseline.get("event_loop", {}).get("blocked_ms_total", 0)
+    block = report["event_loop"]["blocked_ms_total"]
+    if block > max(base_block * (1 + tolerance), base_block + 50):
+        regressions.append(f"event loop blocked {block}ms > baseline {base_block}ms")
+    return regressions
+
+
+async def run(args: argparse.Namespace, env: Dict[str, Any]) -> Dict[str, Any]:
+    import httpx
+    import main  # 환경 구성 이후에 import (FirestoreRepo 등이 import 시점에 클라이언트를 만듦)
+
+    app = main.server
+    rec = Recorder()
+    lag = LoopLagMonitor(interval_ms=args.lag_interval_ms, threshold_ms=args.lag_threshold_ms)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            lag.start()
+            started = time.perf_counter()
+            await asyncio.gather(*(run_user(client, rec, i, args) for i in range(args.users)))
+            elapsed = time.perf_counter() - started
+            await lag.stop()
+    return build_report(rec, lag, elapsed, env, args)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="CBT Coach Agent 오프라인 부하 테스트")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory", help="저장소 (memory: in-memory Firestore, sqlite: 임시 디렉터리의 SQLite 파일)")
+    parser.add_argument("--users", type=int, default=10, help="동시 가상 사용자 수")
+    parser.add_argument("--sessions", type=int, default=1, help="사용자당 세션 수")
+    parser.add_argument("--max-turns", type=int, default=20, help="세션당 최대 /chat 횟수")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="턴 사이 사용자 대기 시간 (평균)")
+    parser.add_argument("--llm-latency", default="lognormal:600,0.4", help="0 | fixed:ms | uniform:lo,hi | lognormal:median,sigma")
+    parser.add_argument("--embed-latency", default="fixed:15")
+    parser.add_argument("--pinecone-latency", default="fixed:40")
+    parser.add_argument("--criteria-met-prob", type=float, default=0.35)
+    parser.add_argument("--offtopic-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0)
+    parser.add_argument("--lag-threshold-ms", type=float, default=5.0)
+    parser.add_argument("--json-out", default=None, help="리포트를 JSON 파일로 저장")
+    parser.add_argument("--save-baseline", default=None, help="이번 결과를 기준값으로 저장")
+    parser.add_argument("--compare", default=None, help="기준값 JSON 과 비교 (회귀 시 exit 1)")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="회귀 판정 허용 비율")
+    parser.add_argument("--quiet", action="store_true", help="서버 디버그 출력 숨김")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    env = prepare_environment(args)
+    print(f"🚀 [LoadTest] OpenAI stub={env['base_url']} users={args.users} (workdir={env['workdir']})")
+
+    if args.quiet:
+        import contextlib
+        import io
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = asyncio.run(run(args, env))
+    else:
+        report = asyncio.run(run(args, env))
+    print_report(report)
+
+    for path in (args.json_out, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"   💾 저장: {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("   🚨 [LoadTest] 기준값 대비 회귀:")
+            for r in regressions:
+                print(f"      - {r}")
+            return 1
+        print(f"   ✅ [LoadTest] 기준값 대비 회귀 없음 (tolerance={args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# agent-server/benchmarks/node_concurrency.py
+"""
+동시 턴 처리량 비교: 동기 노드(invoke, 이전) vs async 노드(ainvoke, 현재)
+
+주간 상담 COUNSEL 한 턴이 부르는 외부 호출 순서를 그대로 재현한다.
+  HandleOffTopic(LLM) → CounselPrepare(RAG 쿼리 3개) → TechniqueSelector(LLM) → TechniqueApplier(LLM) → Summarizer(LLM)
+  - sync : 노드마다 동기 함수(.invoke / search_cbt_corpus 순차 호출)를 run_in_executor 로 실행
+           (LangGraph 가 async 그래프에서 동기 노드를 실행하는 방식 -> 기본 스레드 풀 크기 = min(32, CPU + 4) 만큼만 동시 진행)
+  - async: .ainvoke + asearch_cbt_corpus (RAG 쿼리는 동시에) -> 스레드 풀을 거치지 않음 (RAG 만 스레드)
+  - LLM / 임베딩 / Pinecone 은 loadtest 와 같은 오프라인 대역 (benchmarks/openai_stub.py, rag_stub.py)
+
+동시 사용자 수(--users)별로 초당 턴 수와 턴 지연(p50 / p95)을 비교한다.
+그래프 / 체크포인터까지 포함한 end-to-end 수치는 loadtest 로 확인.
+
+실행: python -m benchmarks.node_concurrency [--users 1 8 32 128] [--turns 3] [--llm-latency fixed:300]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+from benchmarks.loadtest import _percentile, prepare_environment
+
+RAG_QUERIES = [
+    "CBT technique for goal: 충동 소비 직전의 자동사고 알아차리기",
+    "CBT interventions for: identify_automatic_thoughts / emotion_labeling",
+    "User situation: 퇴근하고 나면 스트레스 때문에 자꾸 쇼핑 앱을 열게 돼요.",
+]
+
+
+def _turn_messages():
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    offtopic = [SystemMessage(content="ON_TOPIC / OFF_TOPIC 판별"), HumanMessage(content=RAG_QUERIES[2])]
+    selector = [SystemMessage(content="candidate_techniques with meta: [{'id': 'identifying_automatic_thoughts'}]"),
+                HumanMessage(content=RAG_QUERIES[2])]
+    applier = [SystemMessage(content="success_criteria: [{'criterion_id': 'identify_thought'}]"),
+               HumanMessage(content=RAG_QUERIES[2])]
+    summary = [SystemMessage(content="대화 요약"), HumanMessage(content=RAG_QUERIES[2])]
+    return offtopic, selector, applier, summary
+
+
+async def sync_turn() -> None:
+    """이전: 동기 노드 5개 (노드마다 스레드 풀 작업 하나)"""
+    from langchain_core.runnables.config import run_in_executor
+    from coach_agent.rag.search import search_cbt_corpus
+    from coach_agent.services.llm import CHAT_LLM, LLM_CHAIN, TECHNIQUE_SELECTOR
+
+    offtopic, selector, applier, summary = _turn_messages()
+    await run_in_executor(None, CHAT_LLM.invoke, offtopic)
+    await run_in_executor(None, lambda: [search_cbt_corpus(query=q, top_k=4) for q in RAG_QUERIES])
+    await run_in_executor(None, TECHNIQUE_SELECTOR.invoke, selector)
+    await run_in_executor(None, LLM_CHAIN.invoke, applier)
+    await run_in_executor(None, CHAT_LLM.invoke, summary)
+
+
+async def async_turn() -> None:
+    """현재: async 노드 (ainvoke / RAG 쿼리 동시 실행)"""
+    from coach_agent.rag.search import asearch_cbt_corpus
+    from coach_agent.services.llm import CHAT_LLM, LLM_CHAIN, TECHNIQUE_SELECTOR
+
+    offtopic, selector, applier, summary = _turn_messages()
+    await CHAT_LLM.ainvoke(offtopic)
+    await asyncio.gather(*(asearch_cbt_corpus(query=q, top_k=4) for q in RAG_QUERIES))
+    await TECHNIQUE_SELECTOR.ainvoke(selector)
+    await LLM_CHAIN.ainvoke(applier)
+    await CHAT_LLM.ainvoke(summary)
+
+
+async def run_level(mode: str, users: int, turns: int) -> Dict[str, Any]:
+    turn = sync_turn if mode == "sync" else async_turn
+    latencies: List[float] = []
+
+    async def user() -> None:
+        for _ in range(turns):
+            start = time.perf_counter()
+            await turn()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    elapsed = time.perf_counter() - started
+    return {
+        "turns": len(latencies),
+        "elapsed_s": round(elapsed, 2),
+        "turns_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+    }
+
+
+async def run(users_list: List[int], turns: int) -> Dict[str, Any]:
+    await async_turn()  # 클라이언트 / 커넥션 준비 (측정 제외)
+    await sync_turn()
+    report: Dict[str, Any] = {"executor_workers": min(32, (os.cpu_count() or 1) + 4), "levels": {}}
+    for users in users_list:
+        report["levels"][str(users)] = {mode: await run_level(mode, users, turns) for mode in ("sync", "async")}
+    return report
+
+
+def print_report(report: Dict[str, Any], args: argparse.Namespace) -> None:
+    print(f"\n🧵 [NodeConcurrency] llm={args.llm_latency} embed={args.embed_latency} pinecone={args.pinecone_latency} "
+          f"turns/user={args.turns} (기본 스레드 풀 {report['executor_workers']}개)")
+    print(f"   {'users':>6}  {'mode':<6}{'turns/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'speedup':>9}")
+    for users, rows in report["levels"].items():
+        base = rows["sync"]["turns_per_s"]
+        for mode, r in rows.items():
+            speedup = r["turns_per_s"] / base if base else 0.0
+            print(f"   {users:>6}  {mode:<6}{r['turns_per_s']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{speedup:>8.2f}x")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="동기 노드 vs async 노드 동시 턴 처리량 비교")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 32, 128], help="동시 사용자 수 (여러 개 가능)")
+    parser.add_argument("--turns", type=int, default=3, help="사용자당 턴 수")
+    parser.add_argument("--llm-latency", default="fixed:300", help="0 | fixed:ms | uniform:lo,hi | lognormal:median,sigma")
+    parser.add_argument("--embed-latency", default="fixed:15")
+    parser.add_argument("--pinecone-latency", default="fixed:40")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json-out", default=None, help="결과를 JSON 파일로 저장")
+    args = parser.parse_args(argv)
+
+    # loadtest 와 같은 대역 구성 (OpenAI stub 서버 + RAG stub)
+    prepare_environment(argparse.Namespace(
+        llm_latency=args.llm_latency, embed_latency=args.embed_latency, pinecone_latency=args.pinecone_latency,
+        seed=args.seed, criteria_met_prob=0.35, offtopic_rate=0.0, backend="memory",
+    ))
+    report = asyncio.run(run(args.users, args.turns))
+    print_report(report, args)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"   💾 저장: {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+# agent-server/benchmarks/openai_stub.py
+"""
+부하 테스트용 로컬 OpenAI 호환 서버 (POST /v1/chat/completions)
+
+- 실제 OpenAI 대신 응답 지연을 분포로 흉내 낸다 (fixed / uniform / lognormal)
+- tools 가 있으면 (with_structured_output(..., method="function_calling")) 스키마에 맞는 tool call 을 돌려준다
+    · CounselorTurn: 프롬프트의 success_criteria 에서 criterion_id 를 읽어 criteria_evaluations 채움
+      (criteria_met_prob 확률로 met=True → 모두 충족되면 suggest_end_session=True)
+    · TechniqueSelection: 프롬프트의 후보 기법 목록 중 첫 번째 id
+    · FusedCounselTurn: TechniqueSelection + CounselorTurn (선택 필드가 앞에 오도록)
+    · 그 밖의 스키마: JSON schema 의 required 필드를 타입별 기본값으로 채움
+- tools 가 없으면 일반 텍스트 (off-topic 판별 프롬프트에는 ON_TOPIC / OFF_TOPIC)
+- stream=true 면 SSE chunk 로 나눠서 전송
+
+단독 실행:
+    python -m benchmarks.openai_stub --port 8399 --latency lognormal:600,0.4
+    → OPENAI_BASE_URL=http://127.0.0.1:8399/v1 로 서버 실행
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+COUNSELOR_REPLY = "그 상황에서 어떤 생각이 가장 먼저 떠올랐는지 조금 더 이야기해 줄 수 있을까요?"
+GENERAL_REPLY = "좋은 질문이에요. 충동 소비가 올라올 때는 잠시 멈추고 지금 느끼는 감정을 먼저 적어보는 것이 도움이 돼요."
+
+_CRITERION_RE = re.compile(r"'criterion_id':\s*'([^']+)'")
+_CANDIDATES_MARKER = "candidate_techniques with meta"
+_TECHNIQUE_ID_RE = re.compile(r"'id':\s*'([^']+)'")
+
+
+class LatencyModel:
+    """
+    지연 분포 (밀리초)
+      "0" | "fixed:300" | "uniform:200,800" | "lognormal:600,0.4" (중앙값, sigma)
+    """
+
+    def __init__(self, kind: str = "fixed", a: float = 0.0, b: float = 0.0, seed: Optional[int] = None) -> None:
+        self.kind = kind
+        self.a = a
+        self.b = b
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "LatencyModel":
+        spec = (spec or "0").strip()
+        kind, _, params = spec.partition(":")
+        if not params:
+            return cls("fixed", float(kind), seed=seed)
+        values = [float(x) for x in params.split(",")]
+        if kind == "fixed":
+            return cls("fixed", values[0], seed=seed)
+        if kind in ("uniform", "lognormal"):
+            return cls(kind, values[0], values[1] if len(values) > 1 else 0.0, seed=seed)
+        raise ValueError(f"알 수 없는 지연 분포: {spec}")
+
+    def sample_ms(self) -> float:
+        if self.kind == "uniform":
+            return self._rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return self._rng.lognormvariate(math.log(max(self.a, 1e-3)), self.b)
+        return self.a
+
+    async def sleep(self) -> None:
+        ms = self.sample_ms()
+        if ms > 0:
+            await asyncio.sleep(ms / 1000)
+
+    def describe(self) -> str:
+        if self.kind == "fixed":
+            return f"fixed:{self.a:g}ms"
+        return f"{self.kind}:{self.a:g},{self.b:g}"
+
+
+class StubBehavior:
+    def __init__(self, latency: LatencyModel, criteria_met_prob: float = 0.35, offtopic_rate: float = 0.0,
+                 stream_chunk_chars: int = 8, stream_interval_ms: float = 15.0, seed: Optional[int] = None) -> None:
+        self.latency = latency
+        self.criteria_met_prob = criteria_met_prob
+        self.offtopic_rate = offtopic_rate
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_interval_ms = stream_interval_ms
+        self._rng = random.Random(seed)
+        # 통계
+        self.requests = 0
+        self.tool_calls: Dict[str, int] = {}
+
+    # --- 응답 내용 ---
+    def _prompt_text(self, messages: List[Dict[str, Any]]) -> str:
+        parts = []
+        for m in messages:
+            content = m.get("content")
+            if isinstance(content, list):
+                content = " ".join(str(c.get("text", "")) for c in content if isinstance(c, dict))
+            parts.append(str(content or ""))
+        return "\n".join(parts)
+
+    def _default_for(self, schema: Dict[str, Any], defs: Dict[str, Any]) -> Any:
+        if "$ref" in schema:
+            return self._default_for(defs.get(schema["$ref"].rsplit("/", 1)[-1], {}), defs)
+        if "anyOf" in schema:
+            return None
+        t = schema.get("type")
+        if "default" in schema:
+            return schema["default"]
+        if t == "string":
+            return (schema.get("enum") or ["stub"])[0]
+        if t in ("integer", "number"):
+            return 0
+        if t == "boolean":
+            return False
+        if t == "array":
+            return []
+        if t == "object":
+            props = schema.get("properties", {})
+            return {k: self._default_for(v, defs) for k, v in props.items() if k in schema.get("required", [])}
+        return None
+
+    def tool_arguments(self, name: str, parameters: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        if name == "CounselorTurn":
+            ids = list(dict.fromkeys(_CRITERION_RE.findall(prompt)))
+            evals = [{"criterion_id": cid, "met": self._rng.random() < self.criteria_met_prob, "reason": "stub"} for cid in ids]
+            done = bool(evals) and all(e["met"] for e in evals)
+            return {
+                "response_text": COUNSELOR_REPLY,
+                "reasoning": "stub: 자동사고 탐색 질문",
+                "progress_delta": None,
+                "criteria_evaluations": evals,
+                "suggest_end_session": done,
+                "session_goals_met": done,
+            }
+        if name == "TechniqueSelection":
+            _, _, tail = prompt.partition(_CANDIDATES_MARKER)
+            found = _TECHNIQUE_ID_RE.search(tail)
+            return {
+                "technique_id": found.group(1) if found else "identifying_automatic_thoughts",
+                "micro_goal": "이번 턴 안에 최근 충동 소비 상황 하나와 그때의 자동사고를 말하게 하기",
+                "reason": "stub",
+            }
+        if name == "FusedCounselTurn":
+            return {**self.tool_arguments("TechniqueSelection", parameters, prompt),
+                    **self.tool_arguments("CounselorTurn", parameters, prompt)}
+        return self._default_for(parameters, parameters.get("$defs", {}))
+
+    def build_message(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        messages = body.get("messages") or []
+        prompt = self._prompt_text(messages)
+        tools = body.get("tools") or []
+        if tools:
+            choice = body.get("tool_choice")
+            wanted = choice.get("function", {}).get("name") if isinstance(choice, dict) else None
+            tool = next((t for t in tools if t.get("function", {}).get("name") == wanted), tools[0])["function"]
+            args = self.tool_arguments(tool["name"], tool.get("parameters") or {}, prompt)
+            self.tool_calls[tool["name"]] = self.tool_calls.get(tool["name"], 0) + 1
+            return {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "function",
+                    "function": {"name": tool["name"], "arguments": json.dumps(args, ensure_ascii=False)},
+                }],
+            }
+        if "ON_TOPIC" in prompt and "OFF_TOPIC" in prompt:
+            text = "OFF_TOPIC" if self._rng.random() < self.offtopic_rate else "ON_TOPIC"
+        elif "요약" in prompt:
+            text = "사용자는 스트레스를 받을 때 온라인 쇼핑으로 기분을 푸는 패턴을 확인했다."
+        else:
+            text = GENERAL_REPLY
+        return {"role": "assistant", "content": text}
+
+    @staticmethod
+    def _usage(prompt: str, message: Dict[str, Any]) -> Dict[str, int]:
+        out = message.get("content") or "".join(tc["function"]["arguments"] for tc in message.get("tool_calls", []))
+        # 대략적인 토큰 수 (한국어 약 2자 / 토큰)
+        prompt_tokens, completion_tokens = max(1, len(prompt) // 2), max(1, len(out) // 2)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+
+def create_app(behavior: StubBehavior) -> FastAPI:
+    app = FastAPI(title="OpenAI stub (load test)")
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        return {"ok": True, "requests": behavior.requests, "tool_calls": behavior.tool_calls,
+                "latency": behavior.latency.describe()}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        behavior.requests += 1
+        await behavior.latency.sleep()
+
+        model = body.get("model", "stub")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        message = behavior.build_message(body)
+        usage = behavior._usage(behavior._prompt_text(body.get("messages") or []), message)
+        finish_reason = "tool_calls" if message.get("tool_calls") else "stop"
+
+        if not body.get("stream"):
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+
+        async def event_stream():
+            def chunk(delta: Dict[str, Any], finish: Optional[str] = None, with_usage: bool = False) -> str:
+                payload: Dict[str, Any] = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                }
+                if with_usage:
+                    payload["choices"] = []
+                    payload["usage"] = usage
+                return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            if message.get("tool_calls"):
+                tc = message["tool_calls"][0]
+                yield chunk({"tool_calls": [{"index": 0, "id": tc["id"], "type": "function",
+                                             "function": {"name": tc["function"]["name"], "arguments": ""}}]})
+                args = tc["function"]["arguments"]
+                step = behavior.stream_chunk_chars * 4
+                for i in range(0, len(args), step):
+                    yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": args[i:i + step]}}]})
+                    await asyncio.sleep(behavior.stream_interval_ms / 1000)
+            else:
+                text = message["content"]
+                for i in range(0, len(text), behavior.stream_chunk_chars):
+                    yield chunk({"content": text[i:i + behavior.stream_chunk_chars]})
+                    await asyncio.sleep(behavior.stream_interval_ms / 1000)
+            yield chunk({}, finish_reason)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk({}, with_usage=True)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    return app
+
+
+def start_in_thread(behavior: StubBehavior, host: str = "127.0.0.1", port: int = 0) -> str:
+    """별도 스레드(별도 이벤트 루프)에서 stub 서버 실행 → base_url 반환 (부하 대상 서버의 루프와 분리)"""
+    import socket
+    import uvicorn
+
+    if port == 0:
+        with socket.socket() as s:
+            s.bind((host, 0))
+            port = s.getsockname()[1]
+    config = uvicorn.Config(create_app(behavior), host=host, port=port, log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, name="openai-stub", daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError("OpenAI stub 서버를 시작하지 못했습니다.")
+        time.sleep(0.02)
+    return f"http://{host}:{port}/v1"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="로컬 OpenAI 호환 stub 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8399)
+    parser.add_argument("--latency", default="lognormal:600,0.4", help="0 | fixed:ms | uniform:lo,hi | lognormal:median,sigma")
+    parser.add_argument("--criteria-met-prob", type=float, default=0.35)
+    parser.add_argument("--offtopic-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+    behavior = StubBehavior(LatencyModel.parse(args.latency, args.seed), args.criteria_met_prob,
+                            args.offtopic_rate, seed=args.seed)
+    print(f"🤖 [OpenAI Stub] http://{args.host}:{args.port}/v1 (latency={behavior.latency.describe()})")
+    uvicorn.run(create_app(behavior), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# agent-server/benchmarks/rag_stub.py
+"""
+부하 테스트용 RAG 대역: search_cbt_corpus 의 임베딩 모델 / Pinecone 벡터스토어만 교체
+
+- search_cbt_corpus 본체(메트릭·트레이스 구간 포함)는 그대로 실행되고,
+  HuggingFace 모델 로딩과 Pinecone 네트워크 호출만 지연 분포를 따르는 대역으로 바뀐다.
+- 실제 코드처럼 동기 호출이므로 sleep 도 동기 (이벤트 루프에서 부르면 그대로 루프를 막음)
+"""
+from __future__ import annotations
+import time
+from typing import List
+
+from langchain_core.documents import Document
+
+from benchmarks.openai_stub import LatencyModel
+
+SNIPPETS = [
+    "인지행동치료(CBT)에서는 상황-자동사고-감정-행동의 연결을 찾아 충동 소비의 고리를 끊는다.",
+    "자동사고 기록지는 소비 직전의 생각을 적어 근거와 반대 근거를 비교하게 한다.",
+    "충동이 올라올 때 10분 미루기는 감정의 파도가 지나가게 하는 행동 실험이다.",
+    "보상 소비는 스트레스 상황에서 부정적 감정을 빠르게 줄이려는 회피 전략으로 볼 수 있다.",
+    "가치 명료화는 장기 목표와 현재 소비 행동의 불일치를 인식하도록 돕는다.",
+]
+
+
+class FakeEmbeddings:
+    def __init__(self, latency: LatencyModel, dim: int = 384) -> None:
+        self.latency = latency
+        self.dim = dim
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency.sample_ms() / 1000)
+        return [0.0] * self.dim
+
+
+class FakeVectorStore:
+    def __init__(self, latency: LatencyModel) -> None:
+        self.latency = latency
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        time.sleep(self.latency.sample_ms() / 1000)
+        return [Document(page_content=SNIPPETS[i % len(SNIPPETS)], metadata={"stub": True}) for i in range(k)]
+
+
+def install(embed_latency: LatencyModel, pinecone_latency: LatencyModel) -> None:
+    from coach_agent.rag import search
+
+    embeddings = FakeEmbeddings(embed_latency)
+    vectorstore = FakeVectorStore(pinecone_latency)
+    search._get_embeddings = lambda: embeddings
+    search._get_vectorstore = lambda: vectorstore
@@ -0,0 +1,190 @@
+# agent-server/benchmarks/serde_bench.py
+"""
+체크포인트 직렬화 형식 비교 (services/serde.py)
+
+주간 상담 세션(기본 10턴 / 30턴)의 실제 State 모양 체크포인트를 만들어
+형식별 인코딩 / 디코딩 시간과 저장 바이트를 비교한다.
+  - json(legacy)  : 예전 LangChainSerializer (lc_dumps JSON 텍스트)
+  - json / msgpack / msgpack+zstd : CheckpointSerializer (형식 태그 포함)
+
+측정 항목
+  - final: 마지막 턴 체크포인트 1개의 bytes / encode / decode (중앙값)
+  - session_bytes: 턴마다 체크포인트 1개씩 저장했을 때 세션 전체 누적 bytes
+    (메시지 히스토리가 매 체크포인트에 다시 들어가므로 턴 수의 제곱에 비례)
+
+실행: python -m benchmarks.serde_bench [--turns 10 30] [--repeat 50] [--json-out result.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langgraph.checkpoint.base import empty_checkpoint  # noqa: E402
+
+USER_LINES = [
+    "요즘 회사에서 발표만 생각하면 가슴이 두근거리고 잠도 잘 안 와요.",
+    "팀장님이 제 보고서를 보고 한숨을 쉬셨는데, 제가 무능하다고 생각하시는 것 같아요.",
+    "주말에도 계속 일 생각이 나서 제대로 쉬지를 못했어요. 친구 약속도 취소했고요.",
+    "생각해보니 지난번 발표는 그렇게 나쁘지 않았던 것 같기도 해요.",
+    "숙제로 했던 생각 기록지를 써봤는데, 자동적 사고가 생각보다 많더라고요.",
+]
+AI_LINES = [
+    "발표를 앞두고 가슴이 두근거리고 잠들기 어려우셨군요. 그런 상황이라면 누구라도 긴장될 수 있어요. "
+    "그 순간 머릿속에 가장 먼저 떠오른 생각은 무엇이었나요? 떠오른 그대로 적어보면 도움이 될 거예요.",
+    "팀장님의 한숨을 보고 '내가 무능하다고 생각하시는구나'라는 생각이 드셨네요. 이 생각을 뒷받침하는 증거와 "
+    "반대되는 증거를 하나씩 나눠서 살펴보면 어떨까요? 예를 들어 최근에 칭찬을 받았던 적이 있었는지 떠올려 보세요.",
+    "쉬는 시간에도 일 생각이 계속 났다면 많이 지치셨을 것 같아요. 이번 주에는 하루 30분이라도 "
+    "온전히 나를 위한 활동을 계획해보는 것은 어떨까요? 작은 활동이라도 기분 변화를 기록해보면 좋아요.",
+    "좋은 발견이에요. 처음 떠올린 생각과 지금 다시 본 사실 사이에 차이가 있네요. 이렇게 균형 잡힌 시각으로 "
+    "다시 바라보는 연습이 이번 주의 핵심이에요. 지금 기분은 0에서 100 중 어느 정도인가요?",
+]
+
+
+def _ai_message(text: str, turn: int) -> AIMessage:
+    # ChatOpenAI 응답과 같은 메타데이터 (체크포인트 크기에 큰 비중)
+    prompt_tokens = 1800 + 120 * turn
+    return AIMessage(
+        content=text,
+        id=f"run-{uuid.uuid4()}-0",
+        response_metadata={
+            "token_usage": {
+                "completion_tokens": 180, "prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens + 180,
+                "completion_tokens_details": {"accepted_prediction_tokens": 0, "audio_tokens": 0,
+                                              "reasoning_tokens": 64, "rejected_prediction_tokens": 0},
+                "prompt_tokens_details": {"audio_tokens": 0, "cached_tokens": 1024},
+            },
+            "model_name": "gpt-5-mini-2025-08-07",
+            "system_fingerprint": None,
+            "id": f"chatcmpl-{uuid.uuid4().hex[:29]}",
+            "service_tier": "default",
+            "finish_reason": "stop",
+            "logprobs": None,
+        },
+        usage_metadata={"input_tokens": prompt_tokens, "output_tokens": 180, "total_tokens": prompt_tokens + 180,
+                        "input_token_details": {"audio": 0, "cache_read": 1024},
+                        "output_token_details": {"audio": 0, "reasoning": 64}},
+    )
+
+
+def build_session_checkpoints(turns: int, seed: int = 7) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """턴마다 (checkpoint, metadata) 하나씩: 주간 상담 WeeklySubGraph 가 끝난 시점의 State 모양"""
+    rng = random.Random(seed)
+    messages: List[Any] = [_ai_message("안녕하세요, 민지님! 지난 한 주는 어떻게 지내셨나요?", 0)]
+    technique_history: List[Dict[str, Any]] = []
+    out = []
+    for turn in range(1, turns + 1):
+        messages.append(HumanMessage(content=rng.choice(USER_LINES), id=str(uuid.uuid4())))
+        messages.append(_ai_message(rng.choice(AI_LINES), turn))
+        technique_history.append({"turn": turn, "technique_id": rng.choice(["T_COG_RESTRUCT", "T_BEHAV_ACT", "T_SOCRATIC"]),
+                                  "micro_goal": "자동적 사고 찾기", "reason": "사용자가 부정적 자동 사고를 보고함"})
+
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {
+            "messages": list(messages),
+            "session_type": "WEEKLY",
+            "user_id": "user-0001",
+            "user_nickname": "민지",
+            "current_week": 3,
+            "phase": "COUNSEL",
+            "weekly_turn_count": turn,
+            "turn_index": turn,
+            "agenda": "자동적 사고와 인지 왜곡 알아차리기",
+            "session_goal": "W3_GOAL",
+            "core_task_tags": ["thought_record", "cognitive_distortion"],
+            "allowed_techniques": ["T_COG_RESTRUCT", "T_BEHAV_ACT", "T_SOCRATIC", "T_PSYCHOEDU"],
+            "success_criteria": [{"criterion_id": f"C{i}", "description": "사용자가 자동적 사고를 한 가지 이상 보고한다"} for i in range(4)],
+            "criteria_status": {f"C{i}": i < turn // 3 for i in range(4)},
+            "technique_history": list(technique_history),
+            "selected_technique_id": technique_history[-1]["technique_id"],
+            "rag_snippets": ["인지 재구성은 자동적 사고를 확인하고, 그 생각의 근거를 검토하는 과정이다. " * 3] * 3,
+            "summary": "",
+            # datetime 값은 예전 JSON 형식이 복원하지 못하므로(not_implemented) 비교용 체크포인트에서는 제외
+            "counsel_completed_at": None,
+        }
+        version = f"{turn * 8:032d}.0.{rng.random()}"
+        checkpoint["channel_versions"] = {k: version for k in checkpoint["channel_values"]}
+        checkpoint["versions_seen"] = {node: {"messages": version} for node in ("LoadState", "LoadProtocol", "WeeklySubGraph", "UpdateProgress")}
+        metadata = {"source": "loop", "step": turn * 4, "parents": {}, "user_id": "user-0001",
+                    "thread_id": "thread-0001", "trace_id": uuid.uuid4().hex}
+        out.append((checkpoint, metadata))
+    return out
+
+
+def _timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run(turns_list: List[int], repeat: int) -> Dict[str, Any]:
+    from coach_agent.services.checkpointer import LangChainSerializer
+    from coach_agent.services.serde import CheckpointSerializer
+
+    serializers = {
+        "json(legacy)": LangChainSerializer(),
+        "json": CheckpointSerializer("json"),
+        "msgpack": CheckpointSerializer("msgpack"),
+        "msgpack+zstd": CheckpointSerializer("msgpack+zstd"),
+    }
+    report: Dict[str, Any] = {}
+    for turns in turns_list:
+        session = build_session_checkpoints(turns)
+        final_cp, final_mt = session[-1]
+        rows = {}
+        for name, ser in serializers.items():
+            blob = ser.dumps(final_cp)
+            assert ser.loads(blob)["channel_values"]["messages"][-1].content == final_cp["channel_values"]["messages"][-1].content
+            rows[name] = {
+                "bytes": len(blob) + len(ser.dumps(final_mt)),
+                "encode_ms": round(_timed(lambda: ser.dumps(final_cp), repeat) * 1000, 3),
+                "decode_ms": round(_timed(lambda: ser.loads(blob), repeat) * 1000, 3),
+                "session_bytes": sum(len(ser.dumps(cp)) + len(ser.dumps(mt)) for cp, mt in session),
+            }
+        report[f"{turns}_turns"] = rows
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    for key, rows in report.items():
+        base = rows["json(legacy)"]
+        print(f"\n📦 [SerdeBench] 주간 세션 {key.replace('_turns', '')}턴")
+        print(f"   {'format':<14}{'bytes':>10}{'ratio':>8}{'encode ms':>11}{'decode ms':>11}{'session bytes':>15}")
+        for name, r in rows.items():
+            ratio = r["bytes"] / base["bytes"] if base["bytes"] else 0
+            print(f"   {name:<14}{r['bytes']:>10}{ratio:>8.2f}{r['encode_ms']:>11}{r['decode_ms']:>11}{r['session_bytes']:>15}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="체크포인트 직렬화 형식 비교")
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 30], help="세션 턴 수 (여러 개 가능)")
+    parser.add_argument("--repeat", type=int, default=50, help="시간 측정 반복 횟수 (중앙값)")
+    parser.add_argument("--json-out", default=None, help="결과를 JSON 파일로 저장")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("REPO_BACKEND", "memory")  # checkpointer 모듈 import 시 Firestore 자격 증명 불필요
+    report = run(args.turns, args.repeat)
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"   💾 저장: {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
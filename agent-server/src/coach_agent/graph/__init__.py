@@ -2,8 +2,9 @@
 
 from coach_agent.graph.weekly.builder import build_weekly_subgraph
 from coach_agent.graph.general.builder import build_general_subgraph
-from coach_agent.graph.main.builder import build_main_graph
-from coach_agent.services.checkpointer import firestore_checkpointer
+from coach_agent.graph.main.builder import build_main_graph, resolve_durability
+from coach_agent.services.checkpointer import checkpointer
+from coach_agent.settings import settings
 
 
 # 1) 서브그래프들 먼저 컴파일
@@ -14,7 +15,10 @@ general_app = build_general_subgraph()
 app = build_main_graph(
     weekly_app=weekly_app,
     general_app=general_app,
-    checkpointer=firestore_checkpointer,
+    checkpointer=checkpointer,
 )
 
-__all__ = ["app", "weekly_app", "general_app"]
+# 3) 실행 시 넘길 체크포인트 저장 시점 (settings.CHECKPOINT_DURABILITY)
+durability = resolve_durability(settings.CHECKPOINT_DURABILITY)
+
+__all__ = ["app", "weekly_app", "general_app", "durability"]
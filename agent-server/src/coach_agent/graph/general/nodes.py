@@ -4,14 +4,14 @@ from __future__ import annotations
 from typing import Dict, Any, List, Optional
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from coach_agent.graph.state import State
-from coach_agent.services import REPO
-from coach_agent.rag.search import search_cbt_corpus
+from coach_agent.services import ASYNC_REPO
+from coach_agent.rag.search import asearch_cbt_corpus
 from coach_agent.services.llm import CHAT_LLM
 from coach_agent.utils.protocol_loader import load_homework_block_for_week
 from coach_agent.prompts.identity import PERSONA
 
 # --- init ----
-def init_general_state(state: State) -> Dict[str, Any]:
+async def init_general_state(state: State) -> Dict[str, Any]:
     """
     General 상담 모드 진입 시 1회 실행되는 초기화 노드.
     Dict/Object 호환성 확보
@@ -103,7 +103,7 @@ def _build_homework_context_from_protocol(state: State) -> str:
     )
 
 # node
-def generate_general_answer(state: State) -> Dict[str, Any]:
+async def generate_general_answer(state: State) -> Dict[str, Any]:
     """
     General 상담의 답변을 생성
     """
@@ -111,7 +111,7 @@ def generate_general_answer(state: State) -> Dict[str, Any]:
     current_turn = state.general_turn_count or 0
     messages = state.messages
     
-    program_status = REPO.get_user(state.user_id).get("program_status", "active")
+    program_status = (await ASYNC_REPO.get_user(state.user_id)).get("program_status", "active")
     print(f"🔍 [General] User Status Directly Fetched: {program_status}") # 값이 없으면 기본값 "active"
     # ---------------------------------------------------------
     # 1. 마지막 메시지 가져오기
@@ -155,7 +155,7 @@ def generate_general_answer(state: State) -> Dict[str, Any]:
 
     # 2-2. 컨텍스트 준비 (과거 세션 요약 + 숙제 + RAG)
     # 과거 세션 요약 불러오기
-    summaries = REPO.get_past_summaries(user_id=state.user_id, current_week=state.current_week or 1)
+    summaries = await ASYNC_REPO.get_past_summaries(user_id=state.user_id, current_week=state.current_week or 1)
     past_summary_text = ""
     if summaries:
         # 요약 텍스트 포맷팅
@@ -165,13 +165,14 @@ def generate_general_answer(state: State) -> Dict[str, Any]:
               f", 내용 샘플: '{summary_lines[0][:50]}...'")
         
     # 숙제 불러오기 (상담 프로그램 진행 중인 사용자에 한함)
+    homework_ctx = ""
     if program_status == "active": # 상담 프로그램 진행 중인 사용자에 한함, 프로그램 종료 시 불러오지 않음.
         homework_ctx = _build_homework_context_from_protocol(state)
     
     # RAG 자료 검색
     rag_snippets = []
     try:
-        rag_docs = search_cbt_corpus(question_text, top_k=3)
+        rag_docs = await asearch_cbt_corpus(question_text, top_k=3)
         for doc in rag_docs:
             content = getattr(doc, "page_content", None)
             if content is None and isinstance(doc, dict):
@@ -214,7 +215,7 @@ def generate_general_answer(state: State) -> Dict[str, Any]:
     # 2-4. LLM 실행
     print("🔍 [General] LLM 호출 시작...")
     try:
-        ai_msg = CHAT_LLM.invoke(prompt_messages)
+        ai_msg = await CHAT_LLM.ainvoke(prompt_messages)
     except Exception as e:
         print(f"🔍 [General] ❌ LLM 에러: {e}")
         return {
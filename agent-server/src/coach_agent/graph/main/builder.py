@@ -7,7 +7,23 @@ from coach_agent.graph.main.load_state import load_state
 from coach_agent.graph.main.update_progress import update_progress
 from coach_agent.graph.main.load_protocol import load_protocol
 from coach_agent.graph.main.session_ended import session_ended
-from coach_agent.services.checkpointer import firestore_checkpointer
+from coach_agent.services.checkpointer import checkpointer as default_checkpointer
+
+# 체크포인트 저장 시점 (graph.ainvoke / astream 의 durability 인자; 서브그래프도 같은 값을 이어받음)
+#   - sync:  슈퍼스텝(LoadState, LoadProtocol, SubGraph 안의 각 노드 ...)마다 저장이 끝난 뒤 다음 스텝 진행
+#            -> 프로세스가 죽어도 마지막으로 끝난 스텝부터 이어서 실행 가능
+#   - async: 슈퍼스텝마다 저장하되 다음 스텝과 동시에 백그라운드로 (프로세스가 죽으면 마지막 스텝 몇 개는 유실될 수 있음)
+#   - exit:  턴이 끝날 때(정상 종료 / 노드 예외 모두) 한 번만 저장
+#            -> 노드 예외로 멈춘 턴은 끝난 노드의 결과까지 저장되어 이어서 실행 가능
+#            -> 턴 도중 프로세스가 죽으면 그 턴은 저장되지 않음 (스레드는 이전 턴 상태 그대로, 재시도하면 처음부터 다시)
+DURABILITY_MODES = ("sync", "async", "exit")
+
+
+def resolve_durability(mode: str) -> str:
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"지원하지 않는 CHECKPOINT_DURABILITY 입니다: {mode!r} (가능: {', '.join(DURABILITY_MODES)})")
+    return mode
+
 
 def build_main_graph(weekly_app, general_app, checkpointer=None):
     """
@@ -17,6 +33,7 @@ def build_main_graph(weekly_app, general_app, checkpointer=None):
     - session_type을 초기화(init_session_type)하고,
     - route_session으로 WEEKLY/GENERAL 중 하나를 선택,
     - 해당 SubGraph를 한 턴 실행한다.
+    - 체크포인트 저장 시점(durability)은 컴파일이 아니라 실행 인자로 정한다 (DURABILITY_MODES 참고)
     """
     
     builder = StateGraph(State)
@@ -53,6 +70,6 @@ def build_main_graph(weekly_app, general_app, checkpointer=None):
 
     # langgraph API (langgraph dev servver)로 테스트 시 사용자정의 checkpointer 사용 금지
     # app = builder.compile() 
-    app = builder.compile(checkpointer=firestore_checkpointer)
+    app = builder.compile(checkpointer=checkpointer or default_checkpointer)
     
     return app
@@ -40,6 +40,7 @@ def load_protocol(state: State) -> Dict[str, Any]:
             "session_goal": protocol.get("session_goal"),
             "core_task_tags": protocol.get("core_task_tags"),
             "allowed_techniques": protocol.get("allowed_techniques"),
+            "counsel_mode": protocol.get("counsel_mode"),
             "success_criteria": protocol.get("success_criteria"),
             "constraints": protocol.get("constraints"),
             "homework": protocol.get("homework")
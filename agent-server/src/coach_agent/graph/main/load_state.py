@@ -5,7 +5,7 @@ from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import HumanMessage
 from coach_agent.utils._days_since import _days_since
 from coach_agent.graph.state import State
-from coach_agent.services import REPO
+from coach_agent.services import ASYNC_REPO
 from coach_agent.configuration import Configuration
 
 def _extract_last_user_message(messages: list) -> Optional[str]:
@@ -22,7 +22,7 @@ def _extract_last_user_message(messages: list) -> Optional[str]:
                 return item.get("text", "")
     return None
 
-def load_state(state: State, config: RunnableConfig) -> dict:
+async def load_state(state: State, config: RunnableConfig) -> dict:
     print("\n   [Nodes: LoadState] 시작") # [DEBUG]
     
     # 1. Config & 기본 정보 설정
@@ -31,7 +31,7 @@ def load_state(state: State, config: RunnableConfig) -> dict:
     now_utc = datetime.now(timezone.utc)
 
     # 2. 유저 정보 로드
-    user_data = REPO.get_user(user_id)
+    user_data = await ASYNC_REPO.get_user(user_id)
     
     # 3. 마지막 사용자 메시지 추출
     raw_last_user_message = _extract_last_user_message(state.messages)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Dict, Any
 from datetime import datetime, timezone
 from coach_agent.graph.state import State
-from coach_agent.services import REPO
+from coach_agent.services import ASYNC_REPO
 from coach_agent.utils.protocol_loader import load_protocol_spec
 
 def apply_weekly_protocol_to_state(state: State, week: int) -> State:
@@ -12,7 +12,7 @@ def apply_weekly_protocol_to_state(state: State, week: int) -> State:
     State 에 반영한 새 인스턴스를 반환.
 
     - current_week, session_goal, core_task_tags, allowed_techniques,
-      blocked_techniques, constraints, agenda, homework 를 채움.
+      blocked_techniques, counsel_mode, constraints, agenda, homework 를 채움.
     - criteria_status 는 여기서 건드리지 않고, 나중에 다른 노드에서 갱신.
     """
     proto = load_protocol_spec(week)
@@ -23,13 +23,14 @@ def apply_weekly_protocol_to_state(state: State, week: int) -> State:
             "core_task_tags": proto["core_task_tags"],
             "allowed_techniques": proto["allowed_techniques"],
             "blocked_techniques": proto["blocked_techniques"],
+            "counsel_mode": proto["counsel_mode"],
             "constraints": proto["constraints"],
             "agenda": proto["agenda"],
             "homework": proto["homework"],
             "success_criteria": proto["success_criteria"],
         }
     
-def update_progress(state: State) -> Dict[str, Any]:
+async def update_progress(state: State) -> Dict[str, Any]:
     """
     Dynamic COUNSEL 루프에서 한 턴이 끝난 뒤,
     세션 진행 상태를 갱신하고 DB에 기록하는 노드.
@@ -41,7 +42,7 @@ def update_progress(state: State) -> Dict[str, Any]:
     2) DB 업데이트 (Last Seen, Progress)
        - 항상: user.last_seen_at 업데이트
        - WEEKLY일 때:
-         - REPO.update_progress(user_id, week, exit_hit=state.exit) 호출
+         - ASYNC_REPO.update_progress(user_id, week, exit_hit=state.exit) 호출
          - 만약 이번 턴에 exit == True 이면:
              · 요약 텍스트를 세션 도큐먼트에 저장 (save_session_summary)
              · mark_session_as_completed(user_id, week, completed_at)를 호출하여
@@ -79,11 +80,11 @@ def update_progress(state: State) -> Dict[str, Any]:
         # 2-1) 항상: 유저 last_seen_at 업데이트
         try:
             # FirestoreRepo에 정의된 헬퍼 사용
-            if hasattr(REPO, "last_seen_touch"):
-                REPO.last_seen_touch(user_id)
+            if hasattr(ASYNC_REPO, "last_seen_touch"):
+                await ASYNC_REPO.last_seen_touch(user_id)
             else:
                 # fallback: upsert_user 직접 호출
-                REPO.upsert_user(user_id, {"last_seen_at": now})
+                await ASYNC_REPO.upsert_user(user_id, {"last_seen_at": now})
         except Exception as e:
             print(f"[update_progress] last_seen_at 업데이트 중 오류: {e}")
 
@@ -91,13 +92,13 @@ def update_progress(state: State) -> Dict[str, Any]:
         if session_type == "WEEKLY":
             # A. 매 턴 -> 진행 상태(progress) 업데이트
             try:
-                REPO.update_progress(user_id=user_id, week=current_week, exit_hit=state.exit,)
+                await ASYNC_REPO.update_progress(user_id=user_id, week=current_week, exit_hit=state.exit,)
                 print(
                     f"[update_progress] [{current_week}주차] "
                     f"진행 상태 업데이트 (exit_hit={state.exit})"
                 )
             except Exception as e:
-                print(f"[update_progress] REPO.update_progress 호출 중 오류: {e}")
+                print(f"[update_progress] ASYNC_REPO.update_progress 호출 중 오류: {e}")
 
             # B. 세션 종료(Exit) 시 -> exit node에서 생성한 최종 요약 저장 및 세션 완료 처리
             if state.exit:
@@ -106,8 +107,8 @@ def update_progress(state: State) -> Dict[str, Any]:
                 
                 # 1) 요약 저장
                 try:
-                    if hasattr(REPO, "save_session_summary"):
-                        REPO.save_session_summary(
+                    if hasattr(ASYNC_REPO, "save_session_summary"):
+                        await ASYNC_REPO.save_session_summary(
                             user_id=user_id,
                             week=current_week,
                             summary_text=final_summary,
@@ -118,13 +119,13 @@ def update_progress(state: State) -> Dict[str, Any]:
                         )
                 except Exception as e:
                     print(
-                        f"[update_progress] REPO.save_session_summary 호출 중 오류: {e}"
+                        f"[update_progress] ASYNC_REPO.save_session_summary 호출 중 오류: {e}"
                     )
 
                 # 2) 세션 완료 + 주차 진급 <- REPO.last_weekly_session_completed_at 를 통해 수행
                 try:
-                    if hasattr(REPO, "mark_session_as_completed"):
-                        REPO.mark_session_as_completed(
+                    if hasattr(ASYNC_REPO, "mark_session_as_completed"):
+                        await ASYNC_REPO.mark_session_as_completed(
                             user_id=user_id,
                             week=current_week,
                             completed_at=now,
@@ -132,7 +133,7 @@ def update_progress(state: State) -> Dict[str, Any]:
                         print(f"[update_progress] [{current_week}주차] mark_session_as_completed 호출 완료 (주차 진급 포함)")
                 except Exception as e:
                     print(
-                        f"[update_progress] REPO.mark_session_as_completed 호출 중 오류: {e}"
+                        f"[update_progress] ASYNC_REPO.mark_session_as_completed 호출 중 오류: {e}"
                     )
                 
 
@@ -72,6 +72,14 @@ class State(BaseModel):
         default_factory=list,
         description="이번 주차에서 사용하지 않기로 한 CBT 기법 ID 목록."
     )
+    counsel_mode: str = Field(
+        default="split",
+        description=(
+            "COUNSEL 턴 실행 방식 (프로토콜 counsel_mode). "
+            "'split': TechniqueSelector → TechniqueApplier (LLM 2회), "
+            "'fused': FusedCounsel 한 번의 호출로 기법 선택 + 상담 발화."
+        ),
+    )
     constraints: Dict[str, Any] = Field(
         default_factory=dict,
         description=(
@@ -145,6 +153,13 @@ class State(BaseModel):
         default=None,
         description="이번 COUNSEL 턴에서 달성하고자 하는 구체적인 micro goal."
     )
+    needs_technique_applier: bool = Field(
+        default=False,
+        description=(
+            "FusedCounsel 이 발화 없이 기법만 정했는지 여부 (기법 유지 턴 / catalog 대체).\n"
+            "True 면 TechniqueApplier 노드에서 발화를 작성. FusedCounsel 실행마다 다시 설정된다."
+        ),
+    )
 
     active_strategy: Optional[str] = Field(
         default=None,
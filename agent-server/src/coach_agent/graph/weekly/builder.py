@@ -1,14 +1,19 @@
 # app/graph/weekly/build.py
+from typing import Optional
 from langgraph.graph import StateGraph, START, END
 from coach_agent.graph.state import State
+from coach_agent.settings import settings
 from coach_agent.graph.weekly.offtopic import handle_offtopic
 from coach_agent.graph.weekly.greeting_nodes import greeting
-from coach_agent.graph.weekly.counsel_nodes import llm_technique_selector, llm_technique_applier, counsel_prepare, summarize_and_filter_message
+from coach_agent.graph.weekly.counsel_nodes import llm_technique_selector, llm_technique_applier, llm_fused_counsel, counsel_prepare, summarize_and_filter_message
 from coach_agent.graph.weekly.exit_nodes import exit_node
 from coach_agent.graph.weekly.extra_nodes import should_end_session, init_weekly_state, route_phase_node
-from coach_agent.graph.weekly.edge import route_phase, route_exit, after_offtopic_router
+from coach_agent.graph.weekly.edge import route_phase, route_exit, after_offtopic_router, route_after_init, after_speculative_router, route_counsel_mode, route_after_fused
+from coach_agent.graph.weekly.speculative import speculative_counsel
 
-def build_weekly_subgraph():
+def build_weekly_subgraph(speculative: Optional[bool] = None):
+    if speculative is None:
+        speculative = settings.WEEKLY_SPECULATIVE_COUNSEL
     builder = StateGraph(State)
 
     # ======= nodes ========
@@ -20,12 +25,37 @@ def build_weekly_subgraph():
     builder.add_node("CounselPrepare", counsel_prepare)
     builder.add_node("TechniqueSelector", llm_technique_selector)
     builder.add_node("TechniqueApplier", llm_technique_applier)
+    # 프로토콜 counsel_mode: fused 일 때 TechniqueSelector + TechniqueApplier 대신 (LLM 1회)
+    builder.add_node("FusedCounsel", llm_fused_counsel)
     builder.add_node("Summarizer", summarize_and_filter_message)
     builder.add_node("Exit", exit_node)
+    if speculative:
+        # 오프토픽 판별 + CounselPrepare / TechniqueSelector 동시 실행 (graph/weekly/speculative.py)
+        builder.add_node("SpeculativeCounsel", speculative_counsel)
 
     # ====== edges =======
     builder.add_edge(START, "Init")
-    builder.add_edge("Init","HandleOffTopic")
+    if speculative:
+        builder.add_conditional_edges(
+            "Init",
+            route_after_init,
+            {
+                "SpeculativeCounsel": "SpeculativeCounsel",
+                "HandleOffTopic": "HandleOffTopic"
+            }
+        )
+        builder.add_conditional_edges(
+            "SpeculativeCounsel",
+            after_speculative_router,
+            {
+                "TechniqueApplier": "TechniqueApplier",
+                "FusedCounsel": "FusedCounsel",
+                "Exit": "Exit",
+                "__end__": END
+            }
+        )
+    else:
+        builder.add_edge("Init","HandleOffTopic")
     builder.add_conditional_edges(
         "HandleOffTopic",
         after_offtopic_router,
@@ -46,7 +76,14 @@ def build_weekly_subgraph():
     # greeting path
     builder.add_edge("Greeting", "CounselPrepare")
     # counsel path
-    builder.add_edge("CounselPrepare","TechniqueSelector")
+    builder.add_conditional_edges(
+        "CounselPrepare",
+        route_counsel_mode,
+        {
+            "TechniqueSelector": "TechniqueSelector",
+            "FusedCounsel": "FusedCounsel"
+        }
+    )
     builder.add_conditional_edges(
         "TechniqueSelector",
         lambda x: x.phase,
@@ -56,6 +93,15 @@ def build_weekly_subgraph():
         }
     )
     builder.add_edge("TechniqueApplier", "Summarizer")
+    builder.add_conditional_edges(
+        "FusedCounsel",
+        route_after_fused,
+        {
+            "TechniqueApplier": "TechniqueApplier",
+            "Summarizer": "Summarizer",
+            "Exit": "Exit"
+        }
+    )
     builder.add_edge("Summarizer", "ShouldEndSession")
     builder.add_conditional_edges(
         "ShouldEndSession",
@@ -1,20 +1,37 @@
 # coach_agent/graph/counsel_nodes.py
 
 from __future__ import annotations
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from langchain_core.messages import BaseMessage, AIMessage, SystemMessage, HumanMessage, RemoveMessage
 from coach_agent.graph.state import State
 from coach_agent.prompts.identity import PERSONA
-from coach_agent.services.llm import TECHNIQUE_SELECTOR, LLM_CHAIN, CHAT_LLM
+from coach_agent.services.llm import TECHNIQUE_SELECTOR, LLM_CHAIN, CHAT_LLM, FUSED_COUNSELOR
 from coach_agent.utils.protocol_loader import load_techniques_catalog
 from coach_agent.utils.metrics import score_input_quality
-from coach_agent.rag.search import search_cbt_corpus
-import time
+from coach_agent.rag.search import asearch_cbt_corpus
+import asyncio
 import functools
+import inspect
+import time
 
 # === 응답 시간 측정 helper ===
 def measure_time(func):
-    """함수 실행 시간을 측정하여 출력하는 데코레이터"""
+    """함수 실행 시간을 측정하여 출력하는 데코레이터 (async 노드는 await 까지 포함해 측정)"""
+    def _report(start_time: float) -> None:
+        duration = time.time() - start_time
+        print(f"⏱️ [End] Node: {func.__name__} took {duration:.4f} seconds\n")
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.time()
+            print(f"\n⏱️ [Start] Node: {func.__name__}")
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _report(start_time)
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         start_time = time.time()
@@ -23,9 +40,7 @@ def measure_time(func):
             result = func(*args, **kwargs)
             return result
         finally:
-            end_time = time.time()
-            duration = end_time - start_time
-            print(f"⏱️ [End] Node: {func.__name__} took {duration:.4f} seconds\n")
+            _report(start_time)
     return wrapper
 
 # === summarizing helper ===
@@ -132,40 +147,39 @@ def _build_rag_queries(state: State) -> List[str]:
 
 #helper
 @measure_time
-def _retrieve_rag_snippets(queries: List[str], top_k_per_query: int = 4, max_snippets: int = 12) -> List[str]:
+async def _retrieve_rag_snippets(queries: List[str], top_k_per_query: int = 4, max_snippets: int = 12) -> List[str]:
     """
     Pinecone 기반 CBT/CBD RAG를 실제로 호출해서 텍스트 스니펫을 가져온다.
 
-    - search_cbt_corpus(query, top_k)를 호출한다고 가정
+    - asearch_cbt_corpus(query, top_k)를 쿼리마다 동시에 호출 (임베딩 + Pinecone 왕복이 쿼리 수만큼 겹침)
         - 반환값: LangChain Document 리스트 또는 유사한 dict 객체 리스트
         - 각 결과에서 content/text 필드를 꺼내서 문자열 리스트로 만든다.
-    - 네 프로젝트에서 실제 RAG 함수 이름/반환 타입에 맞게
-      search_cbt_corpus 호출 부분과 doc.content 접근 부분만 수정하면 된다.
+    - 스니펫 순서는 쿼리 순서 그대로 유지 (순차 호출일 때와 같은 결과)
     """
 
-    snippets: List[str] = []
-
-    for query in queries:
-        if not query.strip():
-            continue
+    queries = [q for q in queries if q.strip()]
 
+    async def _search(query: str) -> List[Any]:
         try:
             # Pinecone RAG 검색 함수
-            docs = search_cbt_corpus(query=query, top_k=top_k_per_query)
-
-            for doc in docs:
-                # LangChain Document 타입이라고 가정 (doc.page_content)
-                # 만약 dict로 되어 있으면 doc["content"]처럼 바꿔주면 됨.
-                text = getattr(doc, "page_content", None)
-                if text is None and isinstance(doc, dict):
-                    text = doc.get("content") or doc.get("text")
-
-                if text:
-                    snippets.append(text)
-
+            return await asearch_cbt_corpus(query=query, top_k=top_k_per_query)
         except Exception as e:
             # RAG 실패해도 전체 플로우가 터지지 않도록 방어
             print(f"[counsel_prepare] RAG 검색 중 에러 발생 (query={query!r}): {e}")
+            return []
+
+    snippets: List[str] = []
+
+    for docs in await asyncio.gather(*(_search(q) for q in queries)):
+        for doc in docs:
+            # LangChain Document 타입이라고 가정 (doc.page_content)
+            # 만약 dict로 되어 있으면 doc["content"]처럼 바꿔주면 됨.
+            text = getattr(doc, "page_content", None)
+            if text is None and isinstance(doc, dict):
+                text = doc.get("content") or doc.get("text")
+
+            if text:
+                snippets.append(text)
 
         # 전체 스니펫 개수가 너무 많아지지 않도록 제한
         if len(snippets) >= max_snippets:
@@ -175,7 +189,7 @@ def _retrieve_rag_snippets(queries: List[str], top_k_per_query: int = 4, max_sni
 
 #node
 @measure_time
-def counsel_prepare(state: State) -> Dict[str, Any]:
+async def counsel_prepare(state: State) -> Dict[str, Any]:
     """
     Dynamic COUNSEL 루프에서 매 턴 시작 직전에 실행되는 준비 노드.
     
@@ -221,7 +235,7 @@ def counsel_prepare(state: State) -> Dict[str, Any]:
 
     # 3. RAG 쿼리 생성 + Pinecone 검색
     rag_queries = _build_rag_queries(state)
-    rag_snippets = _retrieve_rag_snippets(rag_queries)
+    rag_snippets = await _retrieve_rag_snippets(rag_queries)
 
     # updates["rag_queries"] = rag_queries
     updates["rag_snippets"] = rag_snippets
@@ -261,19 +275,15 @@ def _serialize_recent_messages(messages: List[BaseMessage], max_turns: int = 6)
         )
     return recent
 
-#node
-@measure_time
-def llm_technique_selector(state: State) -> Dict[str, Any]:
-    print("\n=== [DEBUG] select_technique_llm Node Started ===")
-
-    if state.phase != "COUNSEL":
-        print(f"[select_technique_llm] phase != 'COUNSEL' (현재: {state.phase!r}) → 업데이트 없음")
-        return {}
-    
-    # intervention.yaml 카탈로그 로드
-    updates: Dict[str, Any] = {}
-    catalog = load_techniques_catalog()
-    
+#helper
+def _plan_technique_selection(state: State, catalog: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[str]]:
+    """
+    LLM 기법 선택 전 단계 (selector / fused 공통)
+    반환: (updates, candidate_defs, candidate_ids)
+      - candidate_defs 가 비어 있으면 LLM 선택 없이 updates 를 그대로 사용
+        (기법 유지 → 기존 기법 / 모든 기법 소진 → EXIT / 유효한 후보 없음 → {})
+      - 아니면 candidate_defs 중에서 LLM 이 새 기법을 고름
+    """
     # 기법 유지(Persistence) 로직 
     technique_history = state.technique_history or []
     MIN_PERSISTENCE = 2  # 최소 2턴은 같은 기법을 유지 (원하는 대로 조절 가능)
@@ -305,7 +315,7 @@ def llm_technique_selector(state: State) -> Dict[str, Any]:
                 "selected_technique_id": last_id,
                 "selected_technique_meta": {"id": last_id, **meta},
                 "micro_goal": last_micro_goal 
-            }
+            }, [], []
     # ------------------------------------------------------------------
 
     # 새 기법 선정
@@ -325,7 +335,7 @@ def llm_technique_selector(state: State) -> Dict[str, Any]:
         return {
             "phase": "EXIT",
             "messages": [AIMessage(content="오늘 준비된 모든 상담 기법을 활용해 보았습니다. 이제 대화를 정리해볼까요?")]
-        }
+        }, [], []
     else:
         print(f"[select_technique_llm] 사용 완료 기법 제외: {used_ids} (남은 후보: {fresh_candidate_ids})")
 
@@ -348,33 +358,18 @@ def llm_technique_selector(state: State) -> Dict[str, Any]:
 
     if not candidate_defs:
         print("[select_technique_llm] 경고: catalog에서 유효한 candidate_defs를 찾지 못했습니다.")
-        return {}
 
-    # 3) 최근 메시지 직렬화
-    recent_messages = _serialize_recent_messages(state.messages)
-    rag_snippets_preview = (state.rag_snippets or [])[:3]
-    
-    # 4) 종료 조건 관련 정보 준비
+    return {}, candidate_defs, candidate_ids
+
+
+#helper
+def _technique_selection_guide(state: State) -> str:
+    """기법 선택 원칙 (개입 레벨별 전략 + 1~4 우선순위 / 미달성 기준) - selector / fused 프롬프트 공통"""
+    # 종료 조건 관련 정보 준비
     unmet_criteria = [c.get("description") for c in (state.success_criteria or []) 
                   if not (state.criteria_status or {}).get(c.get("id"), False)]
     unmet_list_str = "- " + "\n- ".join(unmet_criteria) if unmet_criteria else "없음 (모두 달성)"
-    
-    # 5) 여기서 prompt 메시지 직접 구성
-    system_content = (
-        PERSONA
-        + "\n\n"
-        "너는 CBT 기반 충동/습관적 소비 교정을 돕는 '기법 코디네이터' 상담가다.\n"
-        "네 임무는 이번 턴에 사용할 **딱 하나의 CBT 기법(technique_id)** 을 고르고,\n"
-        "그 기법으로 이번 턴에 달성할 micro-goal 을 정의하는 것이다.\n\n"
-
-        "각 후보 기법(candidate_techniques)은 techniques.yaml에서 온 메타 정보를 포함하고 있다.\n"
-        "각 기법에는 대략 다음과 같은 필드가 있다:\n"
-        "- id: 내부 식별자 (예: identifying_automatic_thoughts)\n"
-        "- level: 'intervention' 또는 'technique'\n"
-        "- typical_targets: 이 기법이 직접적으로 다루는 문제/상태 태그들\n"
-        "- good_for_focus: 세션의 초점(agenda, session_goal, core_task_tags)에 잘 맞는 영역 태그들\n"
-        "- rag_tags: 이론 스니펫 검색에 사용하는 태그들\n\n"
-
+    return (
         f"**[현재 사용자 상태 분석: {state.intervention_level}]**\n"
         "이 분석 결과에 따라 기법 선택 전략을 조정하라:\n"
         "- L1_ENCOURAGE (단답): 구체적인 진술을 이끌어내는 질문이나 가벼운 기법을 선택.\n"
@@ -404,7 +399,79 @@ def llm_technique_selector(state: State) -> Dict[str, Any]:
         "기법을 선택할 때, 단순히 기법의 정의에 매몰되지 말고 **위의 미달성 기준 중 하나라도 충족할 수 있는 질문이나 제안**을 포함하여 micro_goal을 설계하라.\n"
         "- 예: 'CBT 모델 이해'가 미달성이라면, 기법 적용 과정에서 상황-생각-행동의 연결고리를 묻는 내용을 micro_goal에 넣을 것.\n"
         "- 예: '동기 진술'이 미달성이라면, 기법을 통해 얻은 통찰이 사용자에게 왜 중요한지 묻는 내용을 포함할 것.\n"
-        "5) **선택 결과**\n"
+    )
+
+
+#helper
+def _resolve_technique(
+    technique_id: str,
+    micro_goal: str,
+    reason: str,
+    catalog: Dict[str, Any],
+    candidate_ids: List[str],
+) -> Dict[str, Any]:
+    """LLM 이 고른 technique_id 검증 (catalog 에 없으면 첫 후보로 대체) → 선택 결과 업데이트"""
+    if technique_id not in catalog:
+        print(f"[select_technique_llm] 경고: LLM이 고른 technique_id={technique_id!r}가 catalog에 없습니다.")
+        fallback_id = candidate_ids[0]
+        technique_id = fallback_id
+        reason = (reason or "") + "\n[FALLBACK] catalog에 없는 기법이라 첫 후보로 대체."
+
+    technique_meta = {
+        "id": technique_id,
+        **catalog[technique_id],
+        "llm_reason": reason,
+    }
+
+    updates: Dict[str, Any] = {
+        "selected_technique_id": technique_id,
+        "selected_technique_meta": technique_meta,
+        "micro_goal": micro_goal or "",
+    }
+
+    print(f"[select_technique_llm] 선택된 기법: {technique_id}")
+    print(f"[select_technique_llm] micro_goal: {updates['micro_goal']!r}")
+
+    return updates
+
+
+#node
+@measure_time
+async def llm_technique_selector(state: State) -> Dict[str, Any]:
+    print("\n=== [DEBUG] select_technique_llm Node Started ===")
+
+    if state.phase != "COUNSEL":
+        print(f"[select_technique_llm] phase != 'COUNSEL' (현재: {state.phase!r}) → 업데이트 없음")
+        return {}
+    
+    # intervention.yaml 카탈로그 로드
+    catalog = load_techniques_catalog()
+    planned, candidate_defs, candidate_ids = _plan_technique_selection(state, catalog)
+    if not candidate_defs:
+        return planned
+
+    # 3) 최근 메시지 직렬화
+    recent_messages = _serialize_recent_messages(state.messages)
+    rag_snippets_preview = (state.rag_snippets or [])[:3]
+    
+    # 5) 여기서 prompt 메시지 직접 구성
+    system_content = (
+        PERSONA
+        + "\n\n"
+        "너는 CBT 기반 충동/습관적 소비 교정을 돕는 '기법 코디네이터' 상담가다.\n"
+        "네 임무는 이번 턴에 사용할 **딱 하나의 CBT 기법(technique_id)** 을 고르고,\n"
+        "그 기법으로 이번 턴에 달성할 micro-goal 을 정의하는 것이다.\n\n"
+
+        "각 후보 기법(candidate_techniques)은 techniques.yaml에서 온 메타 정보를 포함하고 있다.\n"
+        "각 기법에는 대략 다음과 같은 필드가 있다:\n"
+        "- id: 내부 식별자 (예: identifying_automatic_thoughts)\n"
+        "- level: 'intervention' 또는 'technique'\n"
+        "- typical_targets: 이 기법이 직접적으로 다루는 문제/상태 태그들\n"
+        "- good_for_focus: 세션의 초점(agenda, session_goal, core_task_tags)에 잘 맞는 영역 태그들\n"
+        "- rag_tags: 이론 스니펫 검색에 사용하는 태그들\n\n"
+
+        + _technique_selection_guide(state)
+        + "5) **선택 결과**\n"
         "   - TechniqueSelection.technique_id 에는 반드시 위 후보 목록 중 하나의 id 만 넣어라.\n"
         "   - micro_goal 은, 선택한 기법을 이용해 이번 턴에 실제로 무엇을 해볼지\n"
         "     '한 번의 턴에서 달성 가능한 크기'로 구체적 행동/사고 작업 단위로 적어라.\n"
@@ -445,7 +512,7 @@ def llm_technique_selector(state: State) -> Dict[str, Any]:
     print("[select_technique_llm] LLM 메시지 준비 완료. candidate 개수:", len(candidate_defs))
 
     # 5) LLM 호출 (이제 messages를 바로 넣음)
-    result = TECHNIQUE_SELECTOR.invoke(messages)
+    result = await TECHNIQUE_SELECTOR.ainvoke(messages)
 
     # 6) 결과 해석 및 방어적 처리 (기존 로직 재사용)
     technique_id = result.technique_id
@@ -456,45 +523,13 @@ def llm_technique_selector(state: State) -> Dict[str, Any]:
         print("[select_technique_llm] 경고: LLM이 technique_id를 반환하지 않았습니다.")
         return {}
 
-    if technique_id not in catalog:
-        print(f"[select_technique_llm] 경고: LLM이 고른 technique_id={technique_id!r}가 catalog에 없습니다.")
-        fallback_id = candidate_ids[0]
-        technique_id = fallback_id
-        reason = (reason or "") + "\n[FALLBACK] catalog에 없는 기법이라 첫 후보로 대체."
-
-    technique_meta = {
-        "id": technique_id,
-        **catalog[technique_id],
-        "llm_reason": reason,
-    }
-
-    updates["selected_technique_id"] = technique_id
-    updates["selected_technique_meta"] = technique_meta
-    updates["micro_goal"] = micro_goal or ""
-
-    print(f"[select_technique_llm] 선택된 기법: {technique_id}")
-    print(f"[select_technique_llm] micro_goal: {updates['micro_goal']!r}")
-
-    return updates
+    return _resolve_technique(technique_id, micro_goal, reason, catalog, candidate_ids)
 
 
 # ===== applier ======
-#node
-@measure_time
-def llm_technique_applier(state: State) -> Dict[str, Any]:
-    print("\n=== [DEBUG] llm_technique_applier Node Started ===")
-
-    if state.phase != "COUNSEL":
-        print(f"[applier] phase != 'COUNSEL' (현재: {state.phase!r}) → 스킵")
-        return {}
-
-    if not state.selected_technique_id:
-        print("[applier] selected_technique_id가 없습니다. → 스킵")
-        return {}
-
-    # 1-1) 최근 메시지 직렬화
-    recent_messages = _serialize_recent_messages(state.messages)
-    # 1-2) llm friendly하게 기준 가공
+#helper
+def _criteria_for_prompt(state: State) -> List[Dict[str, Any]]:
+    """success_criteria 를 llm friendly 하게 가공 (id → criterion_id, 현재 충족 여부 포함)"""
     success_criteria = state.success_criteria or []
     criteria_status = dict(state.criteria_status or {})
 
@@ -511,47 +546,12 @@ def llm_technique_applier(state: State) -> Dict[str, Any]:
                 "current_met": bool(criteria_status.get(cid, False)),  # ★ 여기가 추가 포인트
             }
         )
+    return criteria_for_prompt
 
 
-    # 2) System + Human 메시지 구성
-    system_content = (
-        PERSONA
-        + "\n\n"
-        "너는 CBT 기반 충동/습관적 소비 교정을 돕는 전문 상담가다.\n"
-        "아래 정보를 참고하여, 이번 턴에서 선택된 CBT 기법을 활용해 "
-        "사용자가 세션 목표에 한 걸음 더 다가가도록 돕는 상담 메시지를 작성하라.\n\n"
-        "응답은 반드시 CounselorTurn 스키마에 맞는 JSON으로 반환해야 한다.\n\n"
-        f"- 세션 목표(session_goal): {state.session_goal}\n"
-        f"- 핵심 작업 태그(core_task_tags): {state.core_task_tags}\n"
-        f"- 선택된 기법(selected_technique): {state.selected_technique_id}\n"
-        f"- 이 기법의 설명(selected_technique_meta): {state.selected_technique_meta}\n"
-        f"- RAG 이론 스니펫(rag_snippets): {state.rag_snippets}\n"
-        f"- 세션 진행도(session_progress): {state.session_progress}\n"
-        f"- 이번 턴의 micro_goal: {state.micro_goal}\n"
-        f"- 지금까지의 상담 요약(summary): {state.summary}\n"
-        f"- 최근 대화 요약(recent_messages):\n{recent_messages}\n"
-        f"- 성공 기준 정의 목록(success_criteria): {criteria_for_prompt}\n"
-        f"- **분석된 개입 레벨: {state.intervention_level}**\n"
-        "  (이 레벨에 맞춰 상담 태도를 조절할 것. 예: L4면 따뜻하게 공감, L1이면 대화 유도, L5면 절대적으로 안전 제일)\n"
-        "각 success_criterion 은 다음 필드를 가진다:\n"
-        "  - criterion_id: 기준 ID (예: 'understood_CBT_model')\n"
-        "  - required: 이 기준이 이번 주차에서 필수인지 여부\n"
-        "  - description: 이 기준이 의미하는 바에 대한 설명\n"
-        "  - current_met: 지금까지의 대화를 기준으로 이미 충족된 것으로 간주되는지 여부\n\n"
-        "너의 작업:\n"
-        "1) response_text 작성 지침:\n"
-        "   - 선택된 기법의 절차를 충실히 따르되, **'current_met=False'인 성공 기준을 달성하기 위한 유도 질문이나 설명**을 대화에 반드시 포함하라.\n"
-        "   - 사용자가 success_criteria를 달성할 수 있도록 질문을 던져라.\n"
-        "2) criteria_evaluations: 위 success_criteria 목록에 있는 각 기준에 대해,\n"
-        "   이번 턴까지의 대화를 모두 고려했을 때 met(True/False)을 판단해 리스트로 채운다.\n"
-        "   - criterion_id는 success_criteria 안의 criterion_id 중 하나여야 한다.\n"
-        "   - 이미 current_met=True 였다면, 특별한 역행이 없다면 True 유지.\n"
-        "   - 이번 턴에서 새로 충족했다고 판단되면 met=True로 설정.\n"
-        "   - 아직 충족되지 않았다면 met=False로 설정.\n"
-        "   - reason 필드는 선택 사항이지만 가능하면 간단히 작성.\n"
-    )
-        
-
+#helper
+def _last_user_input(state: State) -> str:
+    """마지막 메시지가 사용자 발화면 텍스트로 반환 (list content 는 text 파트만)"""
     last_user_input = ""
     if state.messages:
         last_msg = state.messages[-1]
@@ -565,22 +565,15 @@ def llm_technique_applier(state: State) -> Dict[str, Any]:
                 last_user_input = "\n".join(parts)
             else:
                 last_user_input = content
+    return last_user_input
 
-    human_content = (
-        "위 정보를 참고해서, 이번 턴에서 사용할 CBT 기법을 실제로 적용하는 상담 메시지를 작성해줘.\n"
-        "메시지는 사용자가 바로 읽을 수 있는 한국어 상담 멘트 형태여야 하고, "
-        "CounselorTurn 스키마에 맞는 JSON으로 반환해야 해.\n\n"
-        f"사용자의 마지막 발화: {last_user_input}"
-    )
-
-    messages = [
-        SystemMessage(content=system_content),
-        HumanMessage(content=human_content),
-    ]
-
-    # 3) LLM 호출 (CounselorTurn 구조)
-    structured_output = LLM_CHAIN.invoke(messages)
 
+#helper
+def _counselor_turn_updates(state: State, structured_output: Any, technique_id: str, micro_goal: str) -> Dict[str, Any]:
+    """
+    CounselorTurn 구조 출력 → state 업데이트 (applier / fused 공통)
+    technique_history / session_progress(turn_count) / criteria_status / 이번 턴 AI 메시지
+    """
     response_text = structured_output.response_text
     reasoning = structured_output.reasoning or ""
     progress_delta = structured_output.progress_delta or {}
@@ -592,8 +585,8 @@ def llm_technique_applier(state: State) -> Dict[str, Any]:
     technique_history = list(state.technique_history or [])
     technique_history.append(
         {
-            "technique_id": state.selected_technique_id,
-            "micro_goal": state.micro_goal,
+            "technique_id": technique_id,
+            "micro_goal": micro_goal,
             "reasoning": reasoning,
         }
     )
@@ -629,8 +622,8 @@ def llm_technique_applier(state: State) -> Dict[str, Any]:
     ai_message = AIMessage(content=response_text)    
 
     print("🤖 [applier] LLM Response:")
-    print(f"   - Technique: {state.selected_technique_id}")
-    print(f"   - Micro goal: {state.micro_goal}")
+    print(f"   - Technique: {technique_id}")
+    print(f"   - Micro goal: {micro_goal}")
     print(f"   - Reasoning: {reasoning}")
     print(f"   - Progress delta: {progress_delta}")
     print(f"   - Criteria evals: {[ (e.criterion_id, e.met) for e in criteria_evals ]}")
@@ -646,10 +639,178 @@ def llm_technique_applier(state: State) -> Dict[str, Any]:
         "criteria_status": criteria_status,
         "llm_suggest_end_session": llm_suggest,
     }
-    
+
+
+#node
+@measure_time
+async def llm_technique_applier(state: State) -> Dict[str, Any]:
+    print("\n=== [DEBUG] llm_technique_applier Node Started ===")
+
+    if state.phase != "COUNSEL":
+        print(f"[applier] phase != 'COUNSEL' (현재: {state.phase!r}) → 스킵")
+        return {}
+
+    if not state.selected_technique_id:
+        print("[applier] selected_technique_id가 없습니다. → 스킵")
+        return {}
+
+    # 1-1) 최근 메시지 직렬화
+    recent_messages = _serialize_recent_messages(state.messages)
+    # 1-2) llm friendly하게 기준 가공
+    criteria_for_prompt = _criteria_for_prompt(state)
+
+    # 2) System + Human 메시지 구성
+    system_content = (
+        PERSONA
+        + "\n\n"
+        "너는 CBT 기반 충동/습관적 소비 교정을 돕는 전문 상담가다.\n"
+        "아래 정보를 참고하여, 이번 턴에서 선택된 CBT 기법을 활용해 "
+        "사용자가 세션 목표에 한 걸음 더 다가가도록 돕는 상담 메시지를 작성하라.\n\n"
+        "응답은 반드시 CounselorTurn 스키마에 맞는 JSON으로 반환해야 한다.\n\n"
+        f"- 세션 목표(session_goal): {state.session_goal}\n"
+        f"- 핵심 작업 태그(core_task_tags): {state.core_task_tags}\n"
+        f"- 선택된 기법(selected_technique): {state.selected_technique_id}\n"
+        f"- 이 기법의 설명(selected_technique_meta): {state.selected_technique_meta}\n"
+        f"- RAG 이론 스니펫(rag_snippets): {state.rag_snippets}\n"
+        f"- 세션 진행도(session_progress): {state.session_progress}\n"
+        f"- 이번 턴의 micro_goal: {state.micro_goal}\n"
+        f"- 지금까지의 상담 요약(summary): {state.summary}\n"
+        f"- 최근 대화 요약(recent_messages):\n{recent_messages}\n"
+        f"- 성공 기준 정의 목록(success_criteria): {criteria_for_prompt}\n"
+        f"- **분석된 개입 레벨: {state.intervention_level}**\n"
+        "  (이 레벨에 맞춰 상담 태도를 조절할 것. 예: L4면 따뜻하게 공감, L1이면 대화 유도, L5면 절대적으로 안전 제일)\n"
+        "각 success_criterion 은 다음 필드를 가진다:\n"
+        "  - criterion_id: 기준 ID (예: 'understood_CBT_model')\n"
+        "  - required: 이 기준이 이번 주차에서 필수인지 여부\n"
+        "  - description: 이 기준이 의미하는 바에 대한 설명\n"
+        "  - current_met: 지금까지의 대화를 기준으로 이미 충족된 것으로 간주되는지 여부\n\n"
+        "너의 작업:\n"
+        "1) response_text 작성 지침:\n"
+        "   - 선택된 기법의 절차를 충실히 따르되, **'current_met=False'인 성공 기준을 달성하기 위한 유도 질문이나 설명**을 대화에 반드시 포함하라.\n"
+        "   - 사용자가 success_criteria를 달성할 수 있도록 질문을 던져라.\n"
+        "2) criteria_evaluations: 위 success_criteria 목록에 있는 각 기준에 대해,\n"
+        "   이번 턴까지의 대화를 모두 고려했을 때 met(True/False)을 판단해 리스트로 채운다.\n"
+        "   - criterion_id는 success_criteria 안의 criterion_id 중 하나여야 한다.\n"
+        "   - 이미 current_met=True 였다면, 특별한 역행이 없다면 True 유지.\n"
+        "   - 이번 턴에서 새로 충족했다고 판단되면 met=True로 설정.\n"
+        "   - 아직 충족되지 않았다면 met=False로 설정.\n"
+        "   - reason 필드는 선택 사항이지만 가능하면 간단히 작성.\n"
+    )
+        
+
+    last_user_input = _last_user_input(state)
+
+    human_content = (
+        "위 정보를 참고해서, 이번 턴에서 사용할 CBT 기법을 실제로 적용하는 상담 메시지를 작성해줘.\n"
+        "메시지는 사용자가 바로 읽을 수 있는 한국어 상담 멘트 형태여야 하고, "
+        "CounselorTurn 스키마에 맞는 JSON으로 반환해야 해.\n\n"
+        f"사용자의 마지막 발화: {last_user_input}"
+    )
+
+    messages = [
+        SystemMessage(content=system_content),
+        HumanMessage(content=human_content),
+    ]
+
+    # 3) LLM 호출 (CounselorTurn 구조)
+    structured_output = await LLM_CHAIN.ainvoke(messages)
+
+    return _counselor_turn_updates(state, structured_output, state.selected_technique_id, state.micro_goal)
+
+# ===== fused (selector + applier 한 번에) ======
+#node
+@measure_time
+async def llm_fused_counsel(state: State) -> Dict[str, Any]:
+    """
+    [노드] protocol counsel_mode == "fused" 일 때 TechniqueSelector + TechniqueApplier 대신 실행.
+    기법 선택과 상담 발화를 FusedCounselTurn 한 번의 호출로 받는다. (턴당 LLM 왕복 1회 + 공통 컨텍스트 1회 전송)
+    - 기법 유지 / 모든 기법 소진 / catalog 검증 및 fallback 은 selector 와 동일 (_plan_technique_selection, _resolve_technique)
+    - 기법 유지 턴은 선택할 것이 없으므로 기법만 정하고 TechniqueApplier 노드로 (needs_technique_applier)
+    - 고른 기법이 catalog 에 없어 첫 후보로 대체되면, 받은 발화는 다른 기법 기준이므로 버리고 대체 기법으로 TechniqueApplier 노드에서 다시 작성
+      (이 노드 안에서 applier 를 부르면 /chat/stream 에 버린 발화와 새 발화가 한 답변으로 이어져 나감)
+    """
+    print("\n=== [DEBUG] llm_fused_counsel Node Started ===")
+
+    if state.phase != "COUNSEL":
+        print(f"[fused] phase != 'COUNSEL' (현재: {state.phase!r}) → 스킵")
+        return {"needs_technique_applier": False}
+
+    catalog = load_techniques_catalog()
+    planned, candidate_defs, candidate_ids = _plan_technique_selection(state, catalog)
+    if not candidate_defs:
+        if planned.get("phase") == "EXIT":
+            return {**planned, "needs_technique_applier": False}
+        # 기법 유지(또는 유효한 후보 없음) → 기존 applier 경로
+        return {**planned, "needs_technique_applier": True}
+
+    recent_messages = _serialize_recent_messages(state.messages)
+    criteria_for_prompt = _criteria_for_prompt(state)
+
+    # 공통 컨텍스트(세션 정보 / RAG / 최근 대화)는 한 번만, 후보 기법 목록은 마지막에
+    system_content = (
+        PERSONA
+        + "\n\n"
+        "너는 CBT 기반 충동/습관적 소비 교정을 돕는 전문 상담가다.\n"
+        "이번 턴에서 너는 두 가지를 한 번에 한다.\n"
+        "  (A) 후보 기법(candidate_techniques) 중 이번 턴에 사용할 **딱 하나의 CBT 기법(technique_id)** 을 고르고 micro-goal 을 정의\n"
+        "  (B) 그 기법을 실제로 적용해 사용자가 세션 목표에 한 걸음 더 다가가도록 돕는 상담 메시지를 작성\n\n"
+        "각 후보 기법에는 id / level / typical_targets / good_for_focus / rag_tags 메타 정보가 있다.\n\n"
+        + _technique_selection_guide(state)
+        + "\n"
+        "응답은 반드시 FusedCounselTurn 스키마에 맞는 JSON 형식이어야 한다. (필드 순서대로 작성)\n"
+        "- technique_id: 선택한 CBT 기법의 ID (반드시 후보 목록 중 하나)\n"
+        "- micro_goal: 선택한 기법으로 이번 턴에 달성할 '한 턴짜리' 구체적 목표\n"
+        "- reason: 이 기법이 지금 턴에 가장 적합한 이유 (간단히)\n"
+        "- response_text: 선택한 기법의 절차를 따라 micro_goal 을 실행하는 한국어 상담 멘트.\n"
+        "  **'current_met=False'인 성공 기준을 달성하기 위한 유도 질문이나 설명**을 반드시 포함하라.\n"
+        "- reasoning: 기법을 어떻게 적용했는지에 대한 설명\n"
+        "- criteria_evaluations: 아래 success_criteria 각 기준에 대해 이번 턴까지의 대화를 모두 고려한 met(True/False).\n"
+        "  criterion_id 는 success_criteria 안의 criterion_id 중 하나. 이미 current_met=True 였다면 특별한 역행이 없는 한 True 유지.\n\n"
+
+        f"- 세션 목표(session_goal): {state.session_goal}\n"
+        f"- 세션 agenda: {getattr(state, 'agenda', None)}\n"
+        f"- 핵심 작업 태그(core_task_tags): {state.core_task_tags}\n"
+        f"- 세션 진행도(session_progress): {state.session_progress}\n"
+        f"- 기법 사용 히스토리(technique_history): {state.technique_history}\n"
+        f"- 세션 제약(constraints): {state.constraints}\n"
+        f"- RAG 이론 스니펫(rag_snippets): {state.rag_snippets}\n"
+        f"- 지금까지의 상담 요약(summary): {state.summary}\n"
+        f"- 최근 대화 요약(recent_messages):\n{recent_messages}\n"
+        f"- 성공 기준 정의 목록(success_criteria): {criteria_for_prompt}\n"
+        f"- **분석된 개입 레벨: {state.intervention_level}**\n"
+        "  (이 레벨에 맞춰 상담 태도를 조절할 것. 예: L4면 따뜻하게 공감, L1이면 대화 유도, L5면 절대적으로 안전 제일)\n"
+        f"- 후보 기법 목록(candidate_techniques with meta): {candidate_defs}\n"
+    )
+    human_content = (
+        "위 정보를 참고해서 이번 턴에 사용할 CBT 기법을 하나 고르고, 그 기법을 실제로 적용하는 상담 메시지를 작성해줘.\n"
+        "메시지는 사용자가 바로 읽을 수 있는 한국어 상담 멘트 형태여야 하고, "
+        "FusedCounselTurn 스키마에 맞는 JSON으로 반환해야 해.\n\n"
+        f"사용자의 마지막 발화: {_last_user_input(state)}"
+    )
+
+    messages = [
+        SystemMessage(content=system_content),
+        HumanMessage(content=human_content),
+    ]
+
+    print("[fused] LLM 메시지 준비 완료. candidate 개수:", len(candidate_defs))
+
+    # LLM 호출 (FusedCounselTurn 구조: 선택 + 발화)
+    output = await FUSED_COUNSELOR.ainvoke(messages)
+
+    # technique_id 가 비었거나 catalog 에 없으면 selector 와 같이 첫 후보로 대체
+    selected = _resolve_technique(output.technique_id or "", output.micro_goal, output.reason, catalog, candidate_ids)
+    if selected["selected_technique_id"] != output.technique_id:
+        # response_text 는 LLM 이 고른(대체 전) 기법 기준 → 저장되는 기법과 발화가 어긋나지 않도록 분리 경로로 다시 작성
+        print(f"[fused] 대체 기법({selected['selected_technique_id']})으로 TechniqueApplier 에서 다시 작성")
+        return {**selected, "needs_technique_applier": True}
+    applied = _counselor_turn_updates(state, output, selected["selected_technique_id"], selected["micro_goal"])
+    return {**selected, **applied, "needs_technique_applier": False}
+
+
 # ===== summarizer ======
 @measure_time
-def summarize_and_filter_message(state: State) -> Dict[str, Any]:
+async def summarize_and_filter_message(state: State) -> Dict[str, Any]:
     """
     [노드] 대화 내역이 길어지면 요약하고 State에서 메시지를 삭제하여 컨텍스트 윈도우를 관리함.
     (3턴마다 실행)
@@ -708,7 +869,7 @@ def summarize_and_filter_message(state: State) -> Dict[str, Any]:
     )
     
     # 요약 LLM 호출 (CHAT_LLM 사용)
-    response = CHAT_LLM.invoke([
+    response = await CHAT_LLM.ainvoke([
         SystemMessage(content="너는 상담 기록 요약가다."),
         HumanMessage(content=prompt)
     ])
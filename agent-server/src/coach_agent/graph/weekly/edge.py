@@ -1,6 +1,7 @@
 # coach_agent/graph/weekly/edge.py
 from langgraph.graph import END
 from coach_agent.graph.state import State
+from coach_agent.graph.weekly.offtopic import offtopic_check_text
 
 
 def after_offtopic_router(state: State) -> str:
@@ -25,5 +26,41 @@ def route_exit(state: State) -> str:
         return "EXIT"
     else:
         return "CONTINUE"
-    
-    
\ No newline at end of file
+
+
+def route_after_init(state: State) -> str:
+    """
+    WEEKLY_SPECULATIVE_COUNSEL 모드의 Init 다음 분기
+    - 오프토픽 판별이 필요한 COUNSEL 턴 → SpeculativeCounsel (판별과 상담 준비 / 기법 선택을 동시에)
+    - 그 밖의 턴 → 기존 HandleOffTopic 경로
+    """
+    if route_phase(state) == "COUNSEL" and offtopic_check_text(state) is not None:
+        return "SpeculativeCounsel"
+    return "HandleOffTopic"
+
+def route_counsel_mode(state: State) -> str:
+    # 프로토콜 counsel_mode: fused → 기법 선택 + 상담 발화 한 번에 / 그 외 → 기존 TechniqueSelector → TechniqueApplier
+    if state.counsel_mode == "fused":
+        return "FusedCounsel"
+    return "TechniqueSelector"
+
+def route_after_fused(state: State) -> str:
+    # FusedCounsel 이 기법만 정한 턴(기법 유지 / catalog 대체) → TechniqueApplier 에서 발화 작성
+    if state.phase == "EXIT":
+        return "Exit"
+    if state.needs_technique_applier:
+        return "TechniqueApplier"
+    return "Summarizer"
+
+def after_speculative_router(state: State) -> str:
+    # TechniqueSelector가 기법 소진으로 EXIT 전환 (안내 AIMessage 포함) → 기존처럼 Exit
+    if state.phase == "EXIT":
+        return "Exit"
+    last = state.messages[-1] if state.messages else None
+    if last and getattr(last, "type", "") == "ai":
+        # OFF_TOPIC 안내 메시지 → 이 턴은 여기서 끝
+        return END
+    # fused 모드는 SpeculativeCounsel 이 준비(RAG)만 하고 선택 + 발화는 FusedCounsel 에서
+    if route_counsel_mode(state) == "FusedCounsel":
+        return "FusedCounsel"
+    return "TechniqueApplier"
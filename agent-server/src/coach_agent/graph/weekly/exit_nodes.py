@@ -5,7 +5,7 @@ from coach_agent.graph.state import State
 from coach_agent.services.llm import CHAT_LLM # 상담 종료 시 요약을 위해 LLM import
 from coach_agent.utils.generate_final_summary import _generate_final_summary
 
-def exit_node(state: State) -> dict:
+async def exit_node(state: State) -> dict:
     """
     WEEKLY 상담 종료 노드.
 
@@ -25,7 +25,7 @@ def exit_node(state: State) -> dict:
 
     # 1) 최종 요약 생성
     print("[ExitNode] 최종 요약 갱신을 시작합니다...")
-    final_summary = _generate_final_summary(state)
+    final_summary = await _generate_final_summary(state)
     
     # 2) 갱신된 요약으로 메시지 구성
     week = state.current_week
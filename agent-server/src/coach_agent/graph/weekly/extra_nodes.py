@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 from typing import Dict, Any
 from coach_agent.graph.state import State
 
-def init_weekly_state(state: State) -> dict:
+async def init_weekly_state(state: State) -> dict:
     print("\n🔥 🚀 [WeeklyNode: Init] Weekly Subgraph 진입 성공") # [DEBUG]
     # 이미 phase가 COUNSEL이면 덮어쓰지 않음
     if state.phase in ["GREETING", "COUNSEL"]:
@@ -28,14 +28,14 @@ def init_weekly_state(state: State) -> dict:
         # agenda/session_goal/homework 등은 프로토콜 로딩 로직에서 채워줌
     }
 
-def route_phase_node(state: State) -> dict:
+async def route_phase_node(state: State) -> dict:
     """
     실제로는 아무 것도 안 하고,
     route_phase(라우터 함수)만 쓰기 위한 더미 노드.
     """
     return {}
 
-def should_end_session(state: State) -> Dict[str, Any]:
+async def should_end_session(state: State) -> Dict[str, Any]:
     """
     COUNSEL path에서 llm_technique_applier 바로 뒤에 호출되는 노드.
 
@@ -5,7 +5,7 @@ from langchain_core.messages import AIMessage
 from langchain_core.runnables import RunnableConfig
 from coach_agent.graph.state import State
 
-def greeting(state: State) -> dict: # 첫 인사 (첫 턴)
+async def greeting(state: State) -> dict: # 첫 인사 (첫 턴)
     print("   [WeeklyNode: Greeting] Greeting 노드 실행됨") # [DEBUG]
     
     # 닉네임이 없으면 무조건 "여행자"
@@ -31,7 +31,7 @@ def _extract_last_user_text(messages: list[BaseMessage]) -> Optional[str]:
                     return "\n".join(parts)
     return None
 
-def _is_offtopic_for_weekly(state: State, user_text: str) -> bool:
+async def _is_offtopic_for_weekly(state: State, user_text: str) -> bool:
     """
     LLM을 이용해 '이번 발화가 대화 흐름(맥락)에서 벗어났는지' 판단.
     """
@@ -80,7 +80,7 @@ def _is_offtopic_for_weekly(state: State, user_text: str) -> bool:
     )
 
     # 4. LLM 호출
-    res = CHAT_LLM.invoke(
+    res = await CHAT_LLM.ainvoke(
         [SystemMessage(content=system_prompt),
          HumanMessage(content=human_prompt)]
     )
@@ -91,25 +91,20 @@ def _is_offtopic_for_weekly(state: State, user_text: str) -> bool:
     decision = (res.content or "").strip().upper()
     return decision.startswith("OFF")
 
-def handle_offtopic(state: State) -> Dict[str, Any]:
+def offtopic_check_text(state: State) -> Optional[str]:
     """
-    Main Graph용 HandleOffTopic 노드.
-
-    역할:
-      - WEEKLY 세션일 때, 이번 유저 발화가 '소비 CBT 주간 상담' 주제에서 크게 벗어났는지 판별.
-      - ON_TOPIC  → {} 리턴 (아무것도 안 함, 다음 라우터로 진행)
-      - OFF_TOPIC → 짧은 안내/리다이렉션 메시지를 보내고 이번 턴 종료.
-                    (그래프 상에서는 이 노드 뒤에서 __end__ 로 분기시키면 됨)
+    이번 턴에 LLM 오프토픽 판별이 필요하면 판별할 유저 발화, 아니면 None.
+    (handle_offtopic / speculative_counsel 공통)
     """
 
     # WEEKLY가 아니면 아무 것도 하지 않음
     if state.session_type != "WEEKLY":
-        return {}
+        return None
 
     last_user_text = _extract_last_user_text(state.messages)
     if not last_user_text:
         # 유저 발화가 없으면 할 수 있는 게 없음 → 그냥 패스
-        return {}
+        return None
 
     # 3. 예외 처리: 첫 진입, 명령어, 짧은 인사는 무조건 통과
     
@@ -117,26 +112,19 @@ def handle_offtopic(state: State) -> Dict[str, Any]:
     human_msgs = [m for m in state.messages if isinstance(m, HumanMessage)]
     if len(human_msgs) <= 1:
         print("[HandleOffTopic] 첫 번째 메시지(Init)이므로 검사 건너뜀 -> ON_TOPIC 처리")
-        return {}
+        return None
 
     # (B) 특정 명령어/트리거 단어 리스트 판단 (필요시 추가)
     bypass_keywords = ["/start", "시작", "안녕", "반가워", "__init__"]
     # 텍스트가 짧고(10자 이하) + 키워드가 포함되어 있다면 패스
     if len(last_user_text) < 10 and any(k in last_user_text for k in bypass_keywords):
         print(f"[HandleOffTopic] 단순 인사/명령어('{last_user_text}') 감지 -> ON_TOPIC 처리")
-        return {}
-
-    # LLM으로 오프토픽 여부 판별
-    is_offtopic = _is_offtopic_for_weekly(state, last_user_text)
-
-    if not is_offtopic:
-        # 주제 안에 있으면 아무 것도 하지 않고 다음 노드로 넘김
-        print("[HandleOffTopic] ON_TOPIC → route_phase로 진행")
-        return {}
+        return None
 
-    # 여기까지 왔으면 OFF_TOPIC
-    print("[HandleOffTopic] OFF_TOPIC 감지 → 안내 메시지 후 턴 종료")
+    return last_user_text
 
+def offtopic_reply(state: State) -> Dict[str, Any]:
+    """OFF_TOPIC 판정 시 보내는 안내/리다이렉션 메시지 (이번 턴 종료)"""
     week = state.current_week
     agenda = state.agenda or f"{week}주차 상담"
 
@@ -156,4 +144,31 @@ def handle_offtopic(state: State) -> Dict[str, Any]:
 
     return {
         "messages": [ai_msg],
-    }
\ No newline at end of file
+    }
+
+async def handle_offtopic(state: State) -> Dict[str, Any]:
+    """
+    Main Graph용 HandleOffTopic 노드.
+
+    역할:
+      - WEEKLY 세션일 때, 이번 유저 발화가 '소비 CBT 주간 상담' 주제에서 크게 벗어났는지 판별.
+      - ON_TOPIC  → {} 리턴 (아무것도 안 함, 다음 라우터로 진행)
+      - OFF_TOPIC → 짧은 안내/리다이렉션 메시지를 보내고 이번 턴 종료.
+                    (그래프 상에서는 이 노드 뒤에서 __end__ 로 분기시키면 됨)
+    """
+
+    last_user_text = offtopic_check_text(state)
+    if last_user_text is None:
+        return {}
+
+    # LLM으로 오프토픽 여부 판별
+    is_offtopic = await _is_offtopic_for_weekly(state, last_user_text)
+
+    if not is_offtopic:
+        # 주제 안에 있으면 아무 것도 하지 않고 다음 노드로 넘김
+        print("[HandleOffTopic] ON_TOPIC → route_phase로 진행")
+        return {}
+
+    # 여기까지 왔으면 OFF_TOPIC
+    print("[HandleOffTopic] OFF_TOPIC 감지 → 안내 메시지 후 턴 종료")
+    return offtopic_reply(state)
@@ -0,0 +1,63 @@
+# coach_agent/graph/weekly/speculative.py
+"""
+오프토픽 판별 + 상담 준비의 투기적(speculative) 병렬 실행 (settings.WEEKLY_SPECULATIVE_COUNSEL)
+
+- 기존 순서: HandleOffTopic(LLM) → RoutePhase → CounselPrepare(RAG) → TechniqueSelector(LLM) → TechniqueApplier
+  → 오프토픽 판별 LLM 왕복이 끝나야 RAG / 기법 선택을 시작할 수 있음
+- 대부분의 발화는 ON_TOPIC 이므로, COUNSEL 턴에서 판별이 필요하면
+  판별과 (counsel_prepare → llm_technique_selector) 를 동시에 시작한다.
+    · ON_TOPIC  → 준비 / 선택 결과를 이 노드의 업데이트로 반영 (commit) → TechniqueApplier 로 바로 진행
+      (counsel_mode: fused 이면 준비만 미리 하고 FusedCounsel 로 진행)
+    · OFF_TOPIC → 아직 진행 중이면 취소(cancelled), 이미 끝났으면 결과를 버림(discarded) → 안내 메시지 후 턴 종료
+- 결과는 판별이 끝난 뒤 한 번에 반환하므로, OFF_TOPIC 일 때 state 에는 아무 흔적도 남지 않음
+- 판별이 필요 없는 턴(첫 발화, 인사 / 명령어, GREETING 등)은 기존 HandleOffTopic 경로 그대로
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Tuple
+
+from coach_agent.graph.state import State
+from coach_agent.graph.weekly.counsel_nodes import counsel_prepare, llm_technique_selector
+from coach_agent.graph.weekly.edge import route_counsel_mode
+from coach_agent.graph.weekly.offtopic import _is_offtopic_for_weekly, offtopic_check_text, offtopic_reply
+from coach_agent.observability.metrics import SPECULATIVE_COUNSEL_RUNS
+
+
+async def _counsel_ahead(state: State) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """CounselPrepare → TechniqueSelector 를 state 에 반영하지 않고 미리 실행"""
+    prepared = await counsel_prepare(state)
+    if route_counsel_mode(state) == "FusedCounsel":
+        # fused 모드는 선택 + 발화가 한 번의 호출 (토큰 스트리밍 대상) -> 준비만 미리 하고 호출은 판별 이후 FusedCounsel 에서
+        return prepared, {}
+    selected = await llm_technique_selector(state.model_copy(update=prepared))
+    return prepared, selected
+
+
+async def speculative_counsel(state: State) -> Dict[str, Any]:
+    print("\n=== [DEBUG] speculative_counsel Node Started ===")
+    user_text = offtopic_check_text(state)
+    if user_text is None:
+        # route_after_init 이 판별 대상일 때만 보냄 -> 방어 코드 (판별 없이 준비 / 선택만)
+        prepared, selected = await _counsel_ahead(state)
+        return {**prepared, **selected}
+
+    ahead = asyncio.create_task(_counsel_ahead(state))
+    try:
+        is_offtopic = await _is_offtopic_for_weekly(state, user_text)
+    except BaseException:
+        ahead.cancel()
+        raise
+
+    if is_offtopic:
+        outcome = "discarded" if ahead.done() else "cancelled"
+        ahead.cancel()
+        await asyncio.gather(ahead, return_exceptions=True)
+        SPECULATIVE_COUNSEL_RUNS.inc(outcome=outcome)
+        print(f"[SpeculativeCounsel] OFF_TOPIC 감지 → 미리 실행한 상담 준비 {outcome}, 안내 메시지 후 턴 종료")
+        return offtopic_reply(state)
+
+    prepared, selected = await ahead
+    SPECULATIVE_COUNSEL_RUNS.inc(outcome="committed")
+    print("[SpeculativeCounsel] ON_TOPIC → 미리 실행한 상담 준비 / 기법 선택 반영")
+    return {**prepared, **selected}
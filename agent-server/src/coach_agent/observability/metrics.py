@@ -0,0 +1,394 @@
+# coach_agent/observability/metrics.py
+"""
+Prometheus 텍스트 포맷 메트릭 (GET /metrics)
+
+- 외부 라이브러리(prometheus_client) 없이 Counter / Histogram / 콜백 Gauge만 최소 구현
+- 수집 대상
+    · LangGraph 노드 실행 시간      coach_graph_node_duration_seconds{node, session_type, week}
+    · API 엔드포인트 처리 시간      coach_http_request_duration_seconds{method, route, status}
+    · Firestore 작업 시간          coach_firestore_operation_duration_seconds{operation, status}
+    · 외부 호출 시간 (OpenAI/Pinecone/임베딩)  coach_external_call_duration_seconds{service, operation, status}
+    · 턴 수 / 노드 에러 / LLM 토큰  (session_type, week 라벨)
+    · 캐시 / 큐 / 스레드 대기열 등 운영 상태는 register_gauge 로 등록한 콜백에서 scrape 시점에 읽음
+- 노드 / LLM 시간은 LangChain 콜백(MetricsCallbackHandler)으로 수집 → 그래프 config["callbacks"]에 넣어서 사용
+"""
+from __future__ import annotations
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from coach_agent.observability.tracing import TRACER, token_usage
+
+# 노드 / LLM 은 수백 ms ~ 수십 초, Firestore 는 수 ms ~ 수백 ms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 크기(bytes) 히스토그램용 버킷: 256B ~ 4MiB
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 131072, 262144, 524288, 1048576, 4194304)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_float(v: float) -> str:
+    v = float(v)
+    if v == float("inf"):
+        return "+Inf"
+    return str(int(v)) if v.is_integer() else repr(v)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name}_total {self.documentation}", f"# TYPE {self.name}_total counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            lines.append(f"{self.name}_total{_fmt_labels(self.labelnames, key)} {_fmt_float(v)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key → [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[Dict[str, Any]]:
+        """with 블록 시간 측정. 예외가 나면 status="error" (labelnames에 status가 있을 때)"""
+        started = time.perf_counter()
+        extra: Dict[str, Any] = {}
+        try:
+            yield extra
+        except BaseException:
+            if "status" in self.labelnames:
+                labels["status"] = "error"
+            raise
+        finally:
+            labels.update(extra)
+            if "status" in self.labelnames:
+                labels.setdefault("status", "ok")
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> float:
+        row = self._values.get(self._key(labels))
+        return row[-1] if row else 0.0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, row in items:
+            for i, b in enumerate(self.buckets + (float("inf"),)):
+                le = 'le="' + _fmt_float(b) + '"'
+                count = row[i] if i < len(self.buckets) else row[-1]
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {_fmt_float(count)}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {repr(float(row[-2]))}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {_fmt_float(row[-1])}")
+        return lines
+
+
+class _CallbackGauge(_Metric):
+    """scrape 시점에 fn() 을 호출해서 값을 읽는 Gauge. fn 은 숫자 또는 {라벨값 튜플: 숫자} 반환"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, fn: Callable[[], Any], labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        try:
+            value = self.fn()
+        except Exception as e:
+            print(f"   ⚠️ [Metrics] gauge {self.name} 읽기 실패: {e}")
+            return lines
+        if isinstance(value, dict):
+            for key, v in sorted(value.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_float(float(v))}")
+        elif value is not None:
+            lines.append(f"{self.name} {_fmt_float(float(value))}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_gauge(self, name: str, documentation: str, fn: Callable[[], Any], labelnames: Sequence[str] = ()) -> None:
+        self._register(_CallbackGauge(name, documentation, fn, labelnames))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for m in metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# --- 메트릭 정의 ---
+GRAPH_NODE_DURATION = REGISTRY.histogram(
+    "coach_graph_node_duration_seconds", "LangGraph node execution time",
+    ["node", "session_type", "week"])
+GRAPH_NODE_ERRORS = REGISTRY.counter(
+    "coach_graph_node_errors", "LangGraph node executions that raised",
+    ["node", "session_type", "week"])
+CHAT_TURNS = REGISTRY.counter(
+    "coach_chat_turns", "Chat turns handled by /chat and /chat/stream",
+    ["endpoint", "session_type", "week", "status"])
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "coach_http_request_duration_seconds", "HTTP request handling time per route",
+    ["method", "route", "status"])
+FIRESTORE_OPERATION_DURATION = REGISTRY.histogram(
+    "coach_firestore_operation_duration_seconds", "Firestore repo / checkpointer operation time",
+    ["operation", "status"])
+EXTERNAL_CALL_DURATION = REGISTRY.histogram(
+    "coach_external_call_duration_seconds", "External call time (openai, pinecone, embedding)",
+    ["service", "operation", "status"])
+CHECKPOINT_BLOB_BYTES = REGISTRY.histogram(
+    "coach_checkpoint_blob_bytes", "Serialized checkpoint blob size (checkpoint / metadata / channel / message / write)",
+    ["kind"], buckets=BYTE_BUCKETS)
+CHECKPOINT_CHUNKED_BLOBS = REGISTRY.counter(
+    "coach_checkpoint_chunked_blobs", "Checkpoint blobs stored out of line as numbered chunk documents",
+    ["kind"])
+CHECKPOINT_GROUP_COMMIT_CALLS = REGISTRY.histogram(
+    "coach_checkpoint_group_commit_calls", "aput / aput_writes calls folded into one Firestore batch commit",
+    [], buckets=(1, 2, 3, 4, 6, 8, 12, 16, 32))
+CHECKPOINT_DELETED_DOCS = REGISTRY.counter(
+    "coach_checkpoint_deleted_docs", "Checkpoint documents deleted by the retention policy (prune), thread GC (thread) or archival (archive)",
+    ["reason"])
+CHECKPOINT_ARCHIVE_OPS = REGISTRY.counter(
+    "coach_checkpoint_archive_ops", "Checkpoint threads moved to (archive) or restored from (rehydrate) the cold bundle store",
+    ["op"])
+SPECULATIVE_COUNSEL_RUNS = REGISTRY.counter(
+    "coach_speculative_counsel_runs", "Counsel prepare / technique selection started alongside the off-topic check, "
+    "by outcome (committed: on-topic, cancelled: stopped in flight, discarded: finished but thrown away)",
+    ["outcome"])
+LLM_TOKENS = REGISTRY.counter(
+    "coach_llm_tokens", "LLM tokens by model and kind (prompt / completion)",
+    ["model", "kind", "session_type", "week"])
+
+
+# ---------------------------------------------------------------
+# Firestore 작업 계측
+# ---------------------------------------------------------------
+# 지금 실행 중인 timed_operation 이름 (memory_firestore 의 작업별 읽기/쓰기 집계에 사용)
+_current_operation: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("coach_firestore_operation", default=None)
+
+
+def current_operation() -> Optional[str]:
+    return _current_operation.get()
+
+
+def timed_operation(operation: str) -> Callable:
+    """동기/비동기 함수 모두에 쓸 수 있는 Firestore 작업 시간 측정 데코레이터 (트레이스 span 도 함께 기록)"""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                token = _current_operation.set(operation)
+                try:
+                    with TRACER.start_span(operation, kind="firestore"), FIRESTORE_OPERATION_DURATION.time(operation=operation):
+                        return await func(*args, **kwargs)
+                finally:
+                    _current_operation.reset(token)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = _current_operation.set(operation)
+            try:
+                with TRACER.start_span(operation, kind="firestore"), FIRESTORE_OPERATION_DURATION.time(operation=operation):
+                    return func(*args, **kwargs)
+            finally:
+                _current_operation.reset(token)
+        return wrapper
+    return decorator
+
+
+class TimedRepo:
+    """
+    Repo / AsyncRepo 래퍼: 모든 public 메서드 호출 시간을 operation=메서드명 으로 기록
+    (캐시/합치기 래퍼 안쪽, 실제 Firestore 구현 바로 바깥에 둔다)
+    """
+
+    def __init__(self, inner: Any, prefix: str = "repo") -> None:
+        self.inner = inner
+        self.prefix = prefix
+        self._wrapped: Dict[str, Callable] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.inner, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            wrapped = self._wrapped[name] = timed_operation(f"{self.prefix}.{name}")(attr)
+        return wrapped
+
+
+# ---------------------------------------------------------------
+# LangGraph 노드 / LLM 계측 (LangChain 콜백)
+# ---------------------------------------------------------------
+def _labels_from_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    metadata = metadata or {}
+    session_type = metadata.get("session_type") or metadata.get("session_type_override") or "UNKNOWN"
+    week = metadata.get("week")
+    return {"session_type": str(session_type), "week": str(week) if week is not None else "unknown"}
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    그래프 실행 config["callbacks"] 에 넣으면
+      - 노드 실행(chain run 중 name == langgraph_node 인 것) 시간 → GRAPH_NODE_DURATION
+      - 채팅 모델 호출 시간 / 토큰 → EXTERNAL_CALL_DURATION(service=openai), LLM_TOKENS
+    라벨(session_type, week)은 config["metadata"] 에서 읽음
+    """
+
+    run_inline = True  # 비동기 실행에서도 시작/종료 콜백을 같은 스레드에서 바로 처리
+
+    def __init__(self) -> None:
+        self._runs: Dict[UUID, Tuple[str, float, Dict[str, str], str]] = {}
+        self._lock = threading.Lock()
+
+    # --- 노드 ---
+    def on_chain_start(self, serialized: Optional[Dict[str, Any]], inputs: Any, *, run_id: UUID,
+                       metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        if not node or name != node:
+            return
+        with self._lock:
+            self._runs[run_id] = ("node", time.perf_counter(), _labels_from_metadata(metadata), node)
+
+    def _finish_node(self, run_id: UUID, error: bool) -> None:
+        with self._lock:
+            item = self._runs.pop(run_id, None)
+        if item is None or item[0] != "node":
+            return
+        _, started, labels, node = item
+        GRAPH_NODE_DURATION.observe(time.perf_counter() - started, node=node, **labels)
+        if error:
+            GRAPH_NODE_ERRORS.inc(node=node, **labels)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_node(run_id, error=False)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        # GraphInterrupt / 그래프 제어 흐름 예외도 여기로 오지만, 노드 시간 자체는 기록
+        self._finish_node(run_id, error=True)
+
+    # --- LLM ---
+    def _start_llm(self, run_id: UUID, metadata: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> None:
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        model = metadata.get("ls_model_name") or params.get("model") or params.get("model_name") or "unknown"
+        with self._lock:
+            self._runs[run_id] = ("llm", time.perf_counter(), _labels_from_metadata(metadata), str(model))
+
+    def on_chat_model_start(self, serialized: Optional[Dict[str, Any]], messages: Any, *, run_id: UUID,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        self._start_llm(run_id, metadata, kwargs)
+
+    def on_llm_start(self, serialized: Optional[Dict[str, Any]], prompts: Any, *, run_id: UUID,
+                     metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        self._start_llm(run_id, metadata, kwargs)
+
+    def _finish_llm(self, run_id: UUID, response: Any, status: str) -> None:
+        with self._lock:
+            item = self._runs.pop(run_id, None)
+        if item is None or item[0] != "llm":
+            return
+        _, started, labels, model = item
+        EXTERNAL_CALL_DURATION.observe(time.perf_counter() - started, service="openai", operation=model, status=status)
+        if response is not None:
+            prompt, completion = token_usage(response)
+            if prompt:
+                LLM_TOKENS.inc(prompt, model=model, kind="prompt", **labels)
+            if completion:
+                LLM_TOKENS.inc(completion, model=model, kind="completion", **labels)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_llm(run_id, response, "ok")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_llm(run_id, None, "error")
+
+
+METRICS_CALLBACK = MetricsCallbackHandler()
@@ -0,0 +1,372 @@
+# coach_agent/observability/tracing.py
+"""
+턴 단위 트레이싱 (느린 턴이 어디서 시간을 썼는지: 체크포인트 읽기 / off-topic LLM / RAG / selector vs applier ...)
+
+- chat_endpoint 에서 trace_id 를 만들고 루트 span("chat.turn")을 연다.
+  trace_id 는 그래프 config["metadata"]["trace_id"] 로 모든 하위 실행에 전달된다.
+- span 생성 위치
+    · 그래프 노드 / LLM 호출: TracingCallbackHandler (config["callbacks"])
+      LLM span에는 prompt/completion 토큰 수와 입출력 payload 크기(문자 수)를 기록
+    · Repo / 체크포인터 호출: observability.metrics.timed_operation (메트릭과 같은 지점)
+    · RAG(임베딩 / Pinecone): rag/search.py
+- 부모 span 결정: LangChain 실행 컨텍스트(현재 run_id) → 없으면 contextvar 의 현재 span
+- exporter 는 교체 가능 (set_exporter). TRACE_EXPORTER 기본값은 none (jsonl: 로컬 파일, 크기 제한 + 교체)
+  span 필드는 OTLP JSON 과 같은 이름을 사용 (trace_id, span_id, parent_span_id, start_time_unix_nano ...)
+"""
+from __future__ import annotations
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import var_child_runnable_config
+
+from coach_agent.settings import settings
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "kind", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], kind: str = "internal",
+                 attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        end_ns = self.end_ns or time.time_ns()
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": end_ns,
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+# ---------------------------------------------------------------
+# Exporter
+# ---------------------------------------------------------------
+# TRACE_EXPORTER 설정값
+TRACE_EXPORTERS = ("jsonl", "console", "none")
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: List[Span]) -> None: ...
+
+
+class NoopSpanExporter(SpanExporter):
+    def export(self, spans: List[Span]) -> None:
+        return None
+
+
+class JsonlSpanExporter(SpanExporter):
+    """
+    span 하나당 한 줄 (OTLP JSON 필드명). 턴 하나가 끝날 때 한 번에 append
+    파일이 max_bytes 를 넘으면 <path>.1 로 옮기고 새 파일에 기록 (직전 파일 하나만 보관, 0 이면 제한 없음)
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        lines = "".join(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" for s in spans)
+        with self._lock:
+            if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """개발용: 턴 하나의 span 트리를 시간과 함께 출력"""
+
+    def export(self, spans: List[Span]) -> None:
+        children: Dict[Optional[str], List[Span]] = {}
+        ids = {s.span_id for s in spans}
+        for s in sorted(spans, key=lambda x: x.start_ns):
+            parent = s.parent_span_id if s.parent_span_id in ids else None
+            children.setdefault(parent, []).append(s)
+
+        def _walk(parent: Optional[str], depth: int) -> None:
+            for s in children.get(parent, []):
+                d = s.to_dict()
+                print(f"   🧵 [Trace {s.trace_id[:8]}] {'  ' * depth}{s.name} {d['duration_ms']}ms ({s.status})")
+                _walk(s.span_id, depth + 1)
+
+        _walk(None, 0)
+
+
+def build_exporter(kind: str, path: str, max_bytes: int = 0) -> SpanExporter:
+    if kind not in TRACE_EXPORTERS:
+        raise ValueError(f"지원하지 않는 TRACE_EXPORTER 입니다: {kind!r} (가능: {', '.join(TRACE_EXPORTERS)})")
+    if kind == "jsonl":
+        return JsonlSpanExporter(path, max_bytes)
+    if kind == "console":
+        return ConsoleSpanExporter()
+    return NoopSpanExporter()
+
+
+# ---------------------------------------------------------------
+# Tracer
+# ---------------------------------------------------------------
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("coach_current_span", default=None)
+
+
+class Tracer:
+    def __init__(self, exporter: SpanExporter, enabled: bool = True) -> None:
+        self.exporter = exporter
+        self.enabled = enabled
+        # trace_id → (루트 span, 끝난 span 목록). 루트가 끝나면 한 번에 export
+        self._open: Dict[str, Tuple[Span, List[Span]]] = {}
+        self._lock = threading.Lock()
+        # LangChain run_id → 가장 가까운 기록 중인 span (노드 / LLM / 그 안쪽 실행들)
+        self._run_spans: Dict[UUID, Optional[Span]] = {}
+
+    def set_exporter(self, exporter: SpanExporter) -> None:
+        self.exporter = exporter
+
+    @staticmethod
+    def new_trace_id() -> str:
+        return uuid.uuid4().hex
+
+    # --- 부모 span 찾기 ---
+    def current_span(self) -> Optional[Span]:
+        config = var_child_runnable_config.get()
+        if config:
+            manager = config.get("callbacks")
+            run_id = getattr(manager, "parent_run_id", None)
+            if run_id is not None:
+                span = self._run_spans.get(run_id)
+                if span is not None:
+                    return span
+        return _current_span.get()
+
+    # --- span 생명주기 ---
+    def begin(self, name: str, *, parent: Optional[Span] = None, trace_id: Optional[str] = None,
+              kind: str = "internal", attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        if not self.enabled:
+            return None
+        if parent is None and trace_id is None:
+            parent = self.current_span()
+        if parent is None and trace_id is None:
+            return None  # 트레이스 밖(스크립트, 백그라운드 작업)에서는 기록하지 않음
+        span = Span(name, trace_id or parent.trace_id, parent.span_id if parent else None, kind, attributes)
+        if parent is None:
+            with self._lock:
+                self._open[span.trace_id] = (span, [])
+        return span
+
+    def root_span(self, trace_id: Optional[str]) -> Optional[Span]:
+        """진행 중인 트레이스의 루트 span (contextvar 가 전달되지 않은 실행의 부모로 사용)"""
+        entry = self._open.get(trace_id) if trace_id else None
+        return entry[0] if entry else None
+
+    def end(self, span: Optional[Span], error: Optional[BaseException] = None) -> None:
+        if span is None:
+            return
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.status = "error"
+            span.attributes.setdefault("error", f"{type(error).__name__}: {error}")
+        export: Optional[List[Span]] = None
+        with self._lock:
+            entry = self._open.get(span.trace_id)
+            if entry is None:
+                export = [span]  # 루트가 이미 끝난 뒤의 span (예: write-behind 작업)
+            else:
+                entry[1].append(span)
+                if entry[0] is span:
+                    export = entry[1]
+                    del self._open[span.trace_id]
+        if export:
+            try:
+                self.exporter.export(export)
+            except Exception as e:
+                print(f"   ⚠️ [Tracing] span export 실패: {e}")
+
+    @contextmanager
+    def start_span(self, name: str, *, trace_id: Optional[str] = None, kind: str = "internal",
+                   **attributes: Any) -> Iterator[Optional[Span]]:
+        """with 블록을 span 으로 기록. 블록 안에서는 이 span 이 contextvar 의 현재 span"""
+        span = self.begin(name, trace_id=trace_id, kind=kind, attributes=attributes)
+        if span is None:
+            yield None
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end(span, e)
+            span = None
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                pass  # 스트리밍 제너레이터가 다른 컨텍스트에서 정리되는 경우
+            if span is not None:
+                self.end(span)
+
+    def annotate(self, **attributes: Any) -> None:
+        """현재 span 에 속성 추가 (예: 체크포인트 payload 크기)"""
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attributes)
+
+
+TRACER = Tracer(
+    build_exporter(settings.TRACE_EXPORTER, settings.TRACE_JSONL_PATH, settings.TRACE_JSONL_MAX_BYTES),
+    enabled=settings.TRACE_EXPORTER != "none",
+)
+
+
+# ---------------------------------------------------------------
+# LangGraph 노드 / LLM span (LangChain 콜백)
+# ---------------------------------------------------------------
+def _text_size(obj: Any) -> int:
+    """메시지 / 문자열 / 리스트의 대략적인 payload 크기 (문자 수)"""
+    if obj is None:
+        return 0
+    if isinstance(obj, str):
+        return len(obj)
+    if isinstance(obj, (list, tuple)):
+        return sum(_text_size(x) for x in obj)
+    content = getattr(obj, "content", None)
+    if content is not None:
+        size = _text_size(content) if not isinstance(content, str) else len(content)
+        for tc in getattr(obj, "tool_calls", None) or []:
+            size += len(json.dumps(tc.get("args", {}), ensure_ascii=False, default=str))
+        return size
+    if isinstance(obj, dict):
+        return len(json.dumps(obj, ensure_ascii=False, default=str))
+    text = getattr(obj, "text", None)
+    return len(text) if isinstance(text, str) else 0
+
+
+def token_usage(response: Any) -> Tuple[int, int]:
+    """LLMResult 에서 (prompt, completion) 토큰 수 추출"""
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    prompt = int(usage.get("prompt_tokens") or 0)
+    completion = int(usage.get("completion_tokens") or 0)
+    if prompt or completion:
+        return prompt, completion
+    for gens in getattr(response, "generations", None) or []:
+        for gen in gens:
+            um = getattr(getattr(gen, "message", None), "usage_metadata", None) or {}
+            prompt += int(um.get("input_tokens") or 0)
+            completion += int(um.get("output_tokens") or 0)
+    return prompt, completion
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    run_inline = True
+
+    def __init__(self, tracer: Tracer) -> None:
+        self.tracer = tracer
+        self._spans: Dict[UUID, Span] = {}
+
+    def _parent(self, parent_run_id: Optional[UUID], metadata: Optional[Dict[str, Any]]) -> Tuple[Optional[Span], Optional[str]]:
+        parent = self.tracer._run_spans.get(parent_run_id) if parent_run_id else None
+        if parent is None:
+            parent = _current_span.get()
+        trace_id = (metadata or {}).get("trace_id")
+        if parent is None:
+            parent = self.tracer.root_span(trace_id)
+        return parent, (None if parent else trace_id)
+
+    def on_chain_start(self, serialized: Optional[Dict[str, Any]], inputs: Any, *, run_id: UUID,
+                       parent_run_id: Optional[UUID] = None, metadata: Optional[Dict[str, Any]] = None,
+                       **kwargs: Any) -> None:
+        if not self.tracer.enabled:
+            return
+        node = (metadata or {}).get("langgraph_node")
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        parent, trace_id = self._parent(parent_run_id, metadata)
+        if node and name == node:
+            span = self.tracer.begin(f"node.{node}", parent=parent, trace_id=trace_id, kind="node",
+                                     attributes={"langgraph.step": (metadata or {}).get("langgraph_step")})
+            if span is not None:
+                self._spans[run_id] = span
+                self.tracer._run_spans[run_id] = span
+                return
+        # 기록하지 않는 실행(라우터, 프롬프트, 서브그래프 본체 등)은 가장 가까운 부모 span 으로 연결만
+        self.tracer._run_spans[run_id] = parent
+
+    def _finish(self, run_id: UUID, error: Optional[BaseException] = None, **attributes: Any) -> None:
+        self.tracer._run_spans.pop(run_id, None)
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        span.set(**attributes)
+        self.tracer.end(span, error)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        attrs = {}
+        if run_id in self._spans and isinstance(outputs, dict):
+            attrs["output_keys"] = sorted(outputs.keys())
+        self._finish(run_id, **attrs)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error)
+
+    # --- LLM ---
+    def _start_llm(self, run_id: UUID, parent_run_id: Optional[UUID], metadata: Optional[Dict[str, Any]],
+                   payload: Any, kwargs: Dict[str, Any]) -> None:
+        if not self.tracer.enabled:
+            return
+        params = kwargs.get("invocation_params") or {}
+        model = (metadata or {}).get("ls_model_name") or params.get("model") or params.get("model_name")
+        parent, trace_id = self._parent(parent_run_id, metadata)
+        span = self.tracer.begin("llm.openai", parent=parent, trace_id=trace_id, kind="client",
+                                 attributes={"model": model, "node": (metadata or {}).get("langgraph_node"),
+                                             "prompt_chars": _text_size(payload)})
+        if span is not None:
+            self._spans[run_id] = span
+            self.tracer._run_spans[run_id] = span
+
+    def on_chat_model_start(self, serialized: Optional[Dict[str, Any]], messages: Any, *, run_id: UUID,
+                            parent_run_id: Optional[UUID] = None, metadata: Optional[Dict[str, Any]] = None,
+                            **kwargs: Any) -> None:
+        self._start_llm(run_id, parent_run_id, metadata, messages, kwargs)
+
+    def on_llm_start(self, serialized: Optional[Dict[str, Any]], prompts: Any, *, run_id: UUID,
+                     parent_run_id: Optional[UUID] = None, metadata: Optional[Dict[str, Any]] = None,
+                     **kwargs: Any) -> None:
+        self._start_llm(run_id, parent_run_id, metadata, prompts, kwargs)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt, completion = token_usage(response)
+        generations = [g for gens in (getattr(response, "generations", None) or []) for g in gens]
+        completion_chars = sum(_text_size(getattr(g, "message", None) or getattr(g, "text", "")) for g in generations)
+        self._finish(run_id, prompt_tokens=prompt, completion_tokens=completion, completion_chars=completion_chars)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error)
+
+
+TRACING_CALLBACK = TracingCallbackHandler(TRACER)
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from typing import List
+import asyncio
 import os
 import time
 
@@ -12,6 +13,9 @@ from langchain_pinecone import PineconeVectorStore
 from langchain_huggingface import HuggingFaceEmbeddings
 from pinecone import Pinecone, ServerlessSpec
 
+from coach_agent.observability.metrics import EXTERNAL_CALL_DURATION
+from coach_agent.observability.tracing import TRACER
+
 # RAG 필요성 판단을 위해 RAG 검색 on/off 위한 플래그
 RAG_ENABLED = os.getenv("ENABLE_RAG", "false").lower() == "true"
 
@@ -72,14 +76,31 @@ def search_cbt_corpus(query: str, top_k: int = 5) -> List[Document]:
 
     try:
         vectorstore = _get_vectorstore()
-        
-        # 검색 실행
-        docs: List[Document] = vectorstore.similarity_search(
-            query=query,
-            k=top_k
-        )
+
+        # 검색 실행 (similarity_search 와 동일: 쿼리 임베딩 → 벡터 검색; /metrics 에 구간별 시간 기록)
+        with TRACER.start_span("rag.embed_query", kind="client", query_chars=len(query)), \
+                EXTERNAL_CALL_DURATION.time(service="embedding", operation="embed_query"):
+            embedding = _get_embeddings().embed_query(query)
+        with TRACER.start_span("rag.pinecone_query", kind="client", top_k=top_k) as span, \
+                EXTERNAL_CALL_DURATION.time(service="pinecone", operation="query"):
+            docs: List[Document] = vectorstore.similarity_search_by_vector(
+                embedding=embedding,
+                k=top_k
+            )
+            if span is not None:
+                span.set(docs=len(docs), result_chars=sum(len(d.page_content or "") for d in docs))
         return docs
     except Exception as e:
         print(f"[RAG Search Error] {e}")
         # 에러가 나도 챗봇이 죽지 않도록 빈 리스트 반환
-        return []
\ No newline at end of file
+        return []
+
+
+async def asearch_cbt_corpus(query: str, top_k: int = 5) -> List[Document]:
+    """
+    search_cbt_corpus 의 async 버전 (async 노드용)
+    - 로컬 임베딩 모델(CPU) + 동기 Pinecone 클라이언트라 이벤트 루프 밖(스레드)에서 실행
+    """
+    if not query or not query.strip():
+        return []
+    return await asyncio.to_thread(search_cbt_corpus, query, top_k)
@@ -1,20 +1,74 @@
 # coach_agent/services/__init__.py
 import os
-from coach_agent.services.base_repo import Repo
+from coach_agent.services.base_repo import Repo, AsyncRepo
 # from coach_agent.services.memory_repo import MemoryRepo
 from coach_agent.settings import settings
+from coach_agent.observability.metrics import TimedRepo
 
 # 1. 환경 변수 읽기
 REPO_BACKEND = settings.REPO_BACKEND
 print(f"👀 [Services] 초기화 모드: {REPO_BACKEND}") #디버깅
 
-# 2. Firebase 모드면 저장소 객체 생성
-if REPO_BACKEND == "firestore":
-    from coach_agent.services.firestore_repo import FirestoreRepo
-    print("🔥 FirestoreRepo 생성 시도 중...")
-    REPO: Repo = FirestoreRepo()
-    print(f"✅ FirestoreRepo 객체 생성 성공: {REPO}")
+# 2. 저장소 객체 생성
+#    memory: 같은 FirestoreRepo / AsyncFirestoreRepo / FirestoreSaver 코드를 in-memory Firestore 클라이언트로 실행
+#            (services/memory_firestore.py; 자격 증명 불필요, 재시작 시 데이터 사라짐)
+#    sqlite: 단일 노드(온프레미스 / 엣지) 배포용 로컬 파일 DB (services/sqlite_repo.py; Firestore 왕복 없음)
+if REPO_BACKEND in ("firestore", "memory", "sqlite"):
+    if REPO_BACKEND == "sqlite":
+        from coach_agent.services.sqlite_repo import SqliteRepo, AsyncSqliteRepo
+        print("🗄️ SqliteRepo 생성 시도 중...")
+        _sqlite_repo = SqliteRepo()
+        REPO: Repo = TimedRepo(_sqlite_repo, prefix="repo_sync")
+        # 같은 DB 파일을 전용 연결 풀 스레드에서 실행하는 async 래퍼
+        ASYNC_REPO: AsyncRepo = TimedRepo(AsyncSqliteRepo(_sqlite_repo), prefix="repo")
+        print(f"✅ SqliteRepo 객체 생성 성공: {REPO}")
+    else:
+        from coach_agent.services.firestore_repo import FirestoreRepo
+        print("🔥 FirestoreRepo 생성 시도 중...")
+        REPO: Repo = TimedRepo(FirestoreRepo(), prefix="repo_sync")
+        print(f"✅ FirestoreRepo 객체 생성 성공: {REPO}")
+
+        # FastAPI 엔드포인트 / async 그래프 노드용 (AsyncClient 기반, 이벤트 루프를 막지 않음)
+        from coach_agent.services.async_firestore_repo import AsyncFirestoreRepo
+        # TimedRepo: 실제 Firestore 작업 시간만 /metrics 에 기록 (캐시/합치기 래퍼보다 안쪽)
+        ASYNC_REPO: AsyncRepo = TimedRepo(AsyncFirestoreRepo(), prefix="repo")
+
+    # 유저/세션 메타데이터 읽기 캐시 (TTL + LRU, write-through)
+    if settings.REPO_CACHE_ENABLED:
+        from coach_agent.services.repo_cache import CachedAsyncRepo
+        snapshot_db = None
+        if settings.REPO_CACHE_SNAPSHOT_INVALIDATION and REPO_BACKEND == "firestore":
+            from coach_agent.services.firebase_admin_client import get_db
+            snapshot_db = get_db()
+        ASYNC_REPO = CachedAsyncRepo(
+            ASYNC_REPO,
+            max_size=settings.REPO_CACHE_MAX_SIZE,
+            ttl_seconds=settings.REPO_CACHE_TTL_SECONDS,
+            snapshot_db=snapshot_db,
+        )
+        print(f"🗂️ Repo 캐시 활성화 (ttl={settings.REPO_CACHE_TTL_SECONDS}s, max={settings.REPO_CACHE_MAX_SIZE}, on_snapshot={snapshot_db is not None})")
+
+    # 유저/세션 touch 쓰기 합치기 (워커는 main.py lifespan에서 시작/종료)
+    TOUCH_COALESCER = None
+    if settings.TOUCH_COALESCE_ENABLED:
+        from coach_agent.services.touch_coalescer import TouchCoalescingRepo
+        TOUCH_COALESCER = TouchCoalescingRepo(
+            ASYNC_REPO,
+            flush_interval=settings.TOUCH_FLUSH_INTERVAL_SECONDS,
+            known_sessions_max=settings.TOUCH_KNOWN_SESSIONS_MAX,
+        )
+        ASYNC_REPO = TOUCH_COALESCER
+
+    # 채팅 메시지 write-behind 큐 (워커는 main.py lifespan에서 시작/종료)
+    from coach_agent.services.message_queue import MessageWriteQueue
+    MESSAGE_QUEUE = MessageWriteQueue(
+        ASYNC_REPO,
+        max_size=settings.MESSAGE_QUEUE_MAX_SIZE,
+        batch_size=settings.MESSAGE_QUEUE_BATCH_SIZE,
+        linger_ms=settings.MESSAGE_QUEUE_LINGER_MS,
+        spill_path=settings.MESSAGE_QUEUE_SPILL_PATH,
+    )
 else:
     # REPO: Repo = MemoryRepo()
     # print(f"🧠 MemoryRepo(임시 저장소)가 선택되었습니다.")
-    print(f"❌ memory_repo를 더 이상 지원하지 않습니다. 환경 변수 REPO_BACKEND를 'firestore'로 설정해주세요.")
+    print(f"❌ 지원하지 않는 REPO_BACKEND입니다: {REPO_BACKEND!r}. 'firestore', 'memory', 'sqlite' 중 하나로 설정해주세요.")
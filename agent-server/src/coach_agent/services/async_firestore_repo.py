@@ -0,0 +1,430 @@
+# coach_agent/services/async_firestore_repo.py
+"""
+FirestoreRepo 의 asyncio 네이티브 구현 (google.cloud.firestore.AsyncClient 기반)
+
+- FirestoreRepo(동기)는 firestore.client()를 사용하므로, async def 엔드포인트에서 호출하면
+  네트워크 왕복 동안 uvicorn 이벤트 루프 전체가 멈춘다.
+- AsyncFirestoreRepo는 모든 I/O를 await 하므로 한 사용자의 느린 Firestore 읽기가
+  같은 워커의 다른 요청을 막지 않는다.
+- 문서 구조 / 쿼리 / 필드는 FirestoreRepo와 완전히 동일하다. (두 구현이 같은 DB를 함께 읽고 써도 됨)
+"""
+from __future__ import annotations
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Tuple
+from firebase_admin import firestore
+from google.api_core.exceptions import FailedPrecondition
+from google.cloud.firestore_v1 import FieldFilter
+from coach_agent.services.base_repo import AsyncRepo
+from coach_agent.services.firebase_admin_client import get_async_db
+from coach_agent.utils.pagination import encode_cursor, decode_cursor
+
+# 서랍 목록에 필요한 필드만 가져옴 (state / checkpoint 같은 큰 필드 제외)
+DRAWER_SESSION_FIELDS = ["week", "session_type", "status", "result", "created_at"]
+HISTORY_MESSAGE_FIELDS = ["role", "text", "created_at"]
+
+
+def _page_cursor(created_at: datetime, doc_id: Optional[str]) -> Dict[str, Any]:
+    """start_after 값 (문서 ID 가 없는 예전 cursor 는 created_at 만)"""
+    if doc_id is None:
+        return {"created_at": created_at}
+    return {"created_at": created_at, "__name__": doc_id}
+
+
+class AsyncFirestoreRepo(AsyncRepo):
+    def __init__(self, db=None) -> None:
+        # AsyncClient는 첫 사용 시점(이벤트 루프 안)에 생성
+        self._db = db
+        self._drawer_backfilled: set = set()  # drawer_visible 백필 확인이 끝난 user_id
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = get_async_db()
+        return self._db
+
+    def _user_doc(self, uid: str):
+        return self.db.collection("users").document(uid)
+
+    def _sessions_col(self, uid: str):
+        return self._user_doc(uid).collection("sessions")
+
+    # --- 유저 ---
+    async def get_user(self, user_id: str) -> Dict[str, Any]:
+        ref = self._user_doc(user_id)
+        snap = await ref.get()
+        if not snap.exists:
+            doc = {"user_id": user_id, "current_week": 1, "program_status": "active", "last_seen_at": None}
+            await ref.set(doc)
+            return doc
+        return snap.to_dict()
+
+    async def upsert_user(self, user_id: str, patch: Dict[str, Any]) -> None:
+        await self._user_doc(user_id).set(patch, merge=True)
+
+    async def last_seen_touch(self, user_id: str) -> None:
+        await self.upsert_user(user_id, {"last_seen_at": datetime.now(timezone.utc)})
+
+    # --- 세션 ---
+    async def get_active_weekly_session(self, user_id: str, week: int) -> Optional[Dict[str, Any]]:
+        try:
+            q = (self._sessions_col(user_id)
+                 .where(filter=FieldFilter("week", "==", int(week)))                         # 현재 주차에 해당하는
+                 .where(filter=FieldFilter("session_type", "==", "WEEKLY"))                  # WEEKLY 세션 중에서
+                 .where(filter=FieldFilter("status", "in", ["draft", "active", "paused"])))  # 활성 상태인 것
+            async for d in q.stream():
+                data = d.to_dict()
+                # session_type이 없거나 WEEKLY인 경우만 리턴 (기존 데이터 호환성 고려)
+                if data.get("session_type", "UNKNOWN") in ("WEEKLY", "UNKNOWN"):
+                    data["id"] = d.id
+                    return data
+        except Exception as e:
+            print(f"   🔥 [DB Error] (async) get_active_weekly_session 쿼리 중 예외 발생: {e}")
+        return None
+
+    async def save_session_info(self, user_id: str, thread_id: str, session_type: str, week: int, created_at: Optional[datetime] = None) -> None:
+        """
+        세션 문서가 존재하면 -> last_activity_at 갱신
+        세션 문서가 없으면 -> 새로 생성 (created_at 포함)
+        """
+        session_ref = self._sessions_col(user_id).document(thread_id)
+        snap = await session_ref.get()
+
+        if snap.exists:
+            await session_ref.update({"last_activity_at": firestore.SERVER_TIMESTAMP})
+            print(f"   [DB] (async) save_session_info[A]: Existing session touched: {thread_id}")
+            return
+
+        new_created_at = created_at if created_at else firestore.SERVER_TIMESTAMP
+        new_session_data = {
+            "id": thread_id,
+            "user_id": user_id,
+            "week": int(week),
+            "session_type": session_type,
+            "status": "active",
+            "created_at": new_created_at,
+            "started_at": new_created_at,
+            "last_activity_at": new_created_at,
+            "checkpoint": {"step_index": 0},
+            "state": {},
+            "drawer_visible": True,  # 서랍 목록 서버 측 필터용 (중도포기 시 False)
+        }
+        # WEEKLY 세션일 때만 'is_current_program' 추가 (리셋 시 중요 필드)
+        if session_type == "WEEKLY":
+            new_session_data["is_current_program"] = True
+
+        await session_ref.set(new_session_data)
+        print(f"   [DB] (async) save_session_info[B]: New {session_type} session created: {thread_id}")
+
+    async def save_message(self, user_id: str, thread_id: str, session_type: str, week: int, role: str, text: str) -> None:
+        # 1. 세션 문서 보장
+        await self.save_session_info(user_id, thread_id, session_type, week)
+        # 2. 메시지 서브 컬렉션에 추가
+        await self._sessions_col(user_id).document(thread_id).collection("messages").add({
+            "user_id": user_id,
+            "session_type": session_type,
+            "week": week,
+            "role": role,
+            "text": text,
+            "created_at": firestore.SERVER_TIMESTAMP,
+        })
+
+    async def save_messages_batch(self, messages: List[Dict[str, Any]], ensure_sessions: bool = True) -> None:
+        """
+        write-behind 큐에서 모은 메시지들을 WriteBatch 한 번으로 저장.
+        messages: {id, user_id, thread_id, session_type, week, role, text, created_at} 딕셔너리 리스트
+        - id(메시지 문서 ID)가 있으면 그 ID로 set: 재시도 / 부분 커밋 후 재전송 / spill 재전송이 같은 문서를 덮어씀 (중복 없음)
+        - created_at은 enqueue 시각(클라이언트 시각)을 그대로 사용: 같은 배치 안에서도 순서가 보존됨
+        - 세션 문서 보장은 (user_id, thread_id) 당 한 번만 수행
+          (ensure_sessions=False: 호출자가 이미 보장한 경우; touch_coalescer.py 참고)
+        """
+        seen = set()
+        for m in messages:
+            key = (m["user_id"], m["thread_id"])
+            if not ensure_sessions or key in seen:
+                continue
+            seen.add(key)
+            await self.save_session_info(m["user_id"], m["thread_id"], m["session_type"], m["week"])
+
+        # Firestore WriteBatch는 최대 500개 쓰기
+        for start in range(0, len(messages), 500):
+            batch = self.db.batch()
+            for m in messages[start:start + 500]:
+                ref = self._sessions_col(m["user_id"]).document(m["thread_id"]).collection("messages").document(m.get("id"))
+                batch.set(ref, {
+                    "user_id": m["user_id"],
+                    "session_type": m["session_type"],
+                    "week": m["week"],
+                    "role": m["role"],
+                    "text": m["text"],
+                    "created_at": m.get("created_at") or firestore.SERVER_TIMESTAMP,
+                })
+            await batch.commit()
+
+    async def touch_session(self, user_id: str, thread_id: str, last_activity_at: Optional[datetime] = None) -> None:
+        """세션 문서 존재가 확인된 경우 읽기 없이 last_activity_at만 갱신"""
+        await self._sessions_col(user_id).document(thread_id).update({
+            "last_activity_at": last_activity_at or firestore.SERVER_TIMESTAMP
+        })
+
+    async def update_progress(self, user_id: str, week: int, exit_hit: bool) -> None:
+        s = await self.get_active_weekly_session(user_id, week)
+        if not s:
+            print(f"🚨 [DB Error] (async) update_progress 실패: {week}주차 활성 세션({user_id})을 찾을 수 없습니다.")
+            return
+
+        patch: Dict[str, Any] = {"last_activity_at": firestore.SERVER_TIMESTAMP}
+        if exit_hit:
+            patch["exit_hit_last_turn"] = True
+        await self._sessions_col(user_id).document(s["id"]).set(patch, merge=True)
+
+    async def mark_session_as_completed(self, user_id: str, week: int, completed_at: datetime) -> None:
+        s = await self.get_active_weekly_session(user_id, week)
+        if not s:
+            print(f"🚨 [DB Error] (async) 완료 처리 실패: {week}주차 활성 세션({user_id})을 찾을 수 없습니다.")
+            return
+
+        await self._sessions_col(user_id).document(s["id"]).set({
+            "status": "ended",
+            "completed_at": completed_at
+        }, merge=True)
+        await self._user_doc(user_id).set({
+            "last_weekly_session_completed_at": completed_at
+        }, merge=True)
+        # 주차 승급 & 10주차 시 프로그램 완료 처리
+        await self.advance_to_next_week(user_id)
+
+    async def advance_to_next_week(self, user_id: str) -> int:
+        u_ref = self._user_doc(user_id)
+        snap = await u_ref.get()
+        u = snap.to_dict() if snap.exists else {"user_id": user_id, "current_week": 1, "program_status": "active"}
+
+        current_week = int(u.get("current_week", 1))
+        if current_week < 10:
+            next_week = current_week + 1
+            await u_ref.set({"current_week": next_week}, merge=True)
+            return next_week
+        await u_ref.set({"program_status": "completed", "current_week": 0}, merge=True)
+        return current_week
+
+    async def rollback_user_to_week_1(self, user_id: str) -> None:
+        await self._user_doc(user_id).set({
+            "current_week": 1,
+            "program_status": "active",
+            "last_weekly_session_completed_at": None,
+        }, merge=True)
+
+    async def restart_current_week_session(self, user_id: str, week: int) -> None:
+        s = await self.get_active_weekly_session(user_id, week)
+        if s:
+            await self._sessions_col(user_id).document(s["id"]).update({
+                "status": "ended",
+                "result": "abandoned",
+                "drawer_visible": False,
+                "ended_at": firestore.SERVER_TIMESTAMP
+            })
+            print(f"Session {s['id']} has been closed (abandoned) due to inactivity")
+
+    async def update_checkpoint(self, user_id: str, week: int, step_index: int) -> None:
+        try:
+            query = (self._sessions_col(user_id)
+                     .where(filter=FieldFilter("week", "==", week))
+                     .where(filter=FieldFilter("status", "==", "active"))
+                     .limit(1))
+            async for doc in query.stream():
+                await doc.reference.update({
+                    "checkpoint.step_index": step_index,
+                    "last_activity_at": firestore.SERVER_TIMESTAMP
+                })
+                return
+            print(f"🚨 [DB Error] (async) update_checkpoint 대상 없음: week={week}, status='active'")
+        except Exception as e:
+            print(f"🔥 [DB Exception] (async) Firestore 에러: {e}")
+
+    # --- 메시지 ---
+    async def get_messages(self, user_id: str) -> List[Dict[str, Any]]:
+        q = (self.db.collection_group("messages")
+             .where(filter=FieldFilter("user_id", "==", user_id))
+             .order_by("created_at"))
+        try:
+            return [d.to_dict() async for d in q.stream()]
+        except FailedPrecondition as e:
+            print(f"FIRESTORE ERROR: 'messages' 컬렉션 그룹에 대한 색인이 필요할 수 있습니다. {e}")
+            return []
+        except Exception as e:
+            print(f"FIRESTORE ERROR: {e}")
+            return []
+
+    # --- 요약 ---
+    async def save_session_summary(self, user_id: str, week: int, summary_text: str) -> None:
+        s = await self.get_active_weekly_session(user_id, week)
+        if s and s.get("id"):
+            try:
+                await self._sessions_col(user_id).document(s["id"]).set({
+                    "summary": summary_text,
+                    "summary_created_at": firestore.SERVER_TIMESTAMP
+                }, merge=True)
+            except Exception as e:
+                print(f"FIRESTORE ERROR: Failed to save summary for session {s['id']}: {e}")
+        else:
+            print(f"Warning: No active session found to save summary for user {user_id}, week {week}")
+
+    async def get_past_summaries(self, user_id: str, current_week: int) -> List[Dict[str, Any]]:
+        if current_week == 0: current_week = 11  # 0주차 = 모든 상담 프로그램 종료 -> 모두 가져오기
+
+        q = (self._sessions_col(user_id)
+             .where(filter=FieldFilter("week", "<=", int(current_week)))
+             .where(filter=FieldFilter("is_current_program", "==", True))
+             .order_by("week"))
+        try:
+            summaries = []
+            async for d in q.stream():
+                data = d.to_dict()
+                if data.get("summary"):
+                    summaries.append({"week": data.get("week"), "summary": data.get("summary")})
+            return summaries
+        except Exception as e:
+            print(f"FIRESTORE ERROR: Failed to get past summaries: {e}")
+            return []
+
+    # --- 서랍 ---
+    async def get_all_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        try:
+            q = self._sessions_col(user_id).order_by("created_at", direction=firestore.Query.DESCENDING)
+            results = []
+            async for d in q.stream():
+                data = d.to_dict()
+                data["id"] = d.id
+                results.append(data)
+            return results
+        except Exception as e:
+            print(f"FIRESTORE ERROR (get_all_sessions): {e}")
+            return []
+
+    async def get_session_messages(self, user_id: str, thread_id: str) -> List[Dict[str, Any]]:
+        try:
+            q = (self._sessions_col(user_id)
+                 .document(thread_id)
+                 .collection("messages")
+                 .order_by("created_at"))
+            results = []
+            async for d in q.stream():
+                data = d.to_dict()
+                results.append({
+                    "role": data.get("role"),
+                    "text": data.get("text"),
+                    "created_at": data.get("created_at")
+                })
+            return results
+        except Exception as e:
+            print(f"FIRESTORE ERROR (get_session_messages): {e}")
+            return []
+
+    # --- 서랍 (페이지네이션) ---
+    async def _ensure_drawer_backfill(self, user_id: str) -> None:
+        """
+        drawer_visible 필드가 없는 예전 세션 문서를 유저당 한 번만 채워 넣는다.
+        (user 문서의 drawer_visible_backfilled 플래그로 완료 여부 기록)
+        """
+        if user_id in self._drawer_backfilled:
+            return
+        user_snap = await self._user_doc(user_id).get()
+        if not (user_snap.exists and (user_snap.to_dict() or {}).get("drawer_visible_backfilled")):
+            batch = self.db.batch()
+            count = 0
+            async for d in self._sessions_col(user_id).select(["result", "drawer_visible"]).stream():
+                data = d.to_dict() or {}
+                if "drawer_visible" in data:
+                    continue
+                batch.update(d.reference, {"drawer_visible": data.get("result") != "abandoned"})
+                count += 1
+                if count % 500 == 0:
+                    await batch.commit()
+                    batch = self.db.batch()
+            if count % 500:
+                await batch.commit()
+            await self._user_doc(user_id).set({"drawer_visible_backfilled": True}, merge=True)
+            print(f"   [DB] (async) drawer_visible 백필 완료: {user_id} ({count}개 세션)")
+        self._drawer_backfilled.add(user_id)
+
+    async def get_sessions_page(self, user_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        서랍 목록 한 페이지 (최신순). 반환: (세션 리스트, 다음 페이지 cursor 또는 None)
+        - 중도포기(abandoned) 세션은 drawer_visible == False 로 서버 측에서 제외
+        - 필요한 필드만 select
+        - created_at 이 같은 세션은 문서 ID 순 (cursor 에 문서 ID 포함)
+        - 복합 색인 필요: sessions (drawer_visible ASC, created_at DESC, __name__ DESC)
+        """
+        start_after, after_id = decode_cursor(cursor)
+        await self._ensure_drawer_backfill(user_id)
+        q = (self._sessions_col(user_id)
+             .where(filter=FieldFilter("drawer_visible", "==", True))
+             .order_by("created_at", direction=firestore.Query.DESCENDING)
+             .order_by("__name__", direction=firestore.Query.DESCENDING)
+             .select(DRAWER_SESSION_FIELDS))
+        if start_after is not None:
+            q = q.start_after(_page_cursor(start_after, after_id))
+        q = q.limit(limit + 1)  # 다음 페이지 존재 여부 확인용 1개 더
+        try:
+            results = []
+            async for d in q.stream():
+                data = d.to_dict()
+                data["id"] = d.id
+                results.append(data)
+        except FailedPrecondition as e:
+            print(f"FIRESTORE ERROR: sessions (drawer_visible, created_at desc) 색인이 필요할 수 있습니다. {e}")
+            raise
+        next_cursor = encode_cursor(results[limit - 1].get("created_at"), results[limit - 1]["id"]) if len(results) > limit else None
+        return results[:limit], next_cursor
+
+    async def get_session_messages_page(self, user_id: str, thread_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        특정 세션의 메시지 한 페이지 (시간순). 반환: (메시지 리스트, 다음 페이지 cursor 또는 None)
+        - created_at 이 같은 메시지는 문서 ID 순 (cursor 에 문서 ID 포함)
+        """
+        start_after, after_id = decode_cursor(cursor)
+        q = (self._sessions_col(user_id)
+             .document(thread_id)
+             .collection("messages")
+             .order_by("created_at")
+             .order_by("__name__")
+             .select(HISTORY_MESSAGE_FIELDS))
+        if start_after is not None:
+            q = q.start_after(_page_cursor(start_after, after_id))
+        q = q.limit(limit + 1)
+        results = []
+        ids = []
+        async for d in q.stream():
+            data = d.to_dict()
+            results.append({
+                "role": data.get("role"),
+                "text": data.get("text"),
+                "created_at": data.get("created_at")
+            })
+            ids.append(d.id)
+        next_cursor = encode_cursor(results[limit - 1].get("created_at"), ids[limit - 1]) if len(results) > limit else None
+        return results[:limit], next_cursor
+
+    # --- 리셋 ---
+    async def reset_user_progress(self, user_id: str) -> None:
+        """
+        사용자의 모든 진행 상황을 초기화하여 1주차 신규 유저로 만듦. (과거 세션은 is_current_program=False로 보관)
+        """
+        batch = self.db.batch()
+        try:
+            query = self._sessions_col(user_id).where(filter=FieldFilter("is_current_program", "==", True))
+            count = 0
+            async for doc in query.stream():
+                batch.update(doc.reference, {"is_current_program": False})
+                count += 1
+            if count > 0:
+                await batch.commit()
+            print(f"      UPDATE [DB] (async) {count}개 세션 아카이빙(False 처리) 완료.") # [DEBUG]
+
+            await self._user_doc(user_id).set({
+                "current_week": 1,
+                "program_status": "active",
+                "last_weekly_session_completed_at": None,
+            }, merge=True)
+        except Exception as e:
+            print(f"      ❌ [DB ERROR] (async) reset_user_progress 내부 오류: {e}") # [DEBUG]
+            raise e
@@ -1,5 +1,5 @@
 # coach_agent/services/base_repo.py
-from typing import Optional, Dict, Any, List, Protocol
+from typing import Optional, Dict, Any, List, Protocol, Tuple
 from datetime import datetime
 
 class Repo(Protocol):
@@ -46,4 +46,37 @@ class Repo(Protocol):
         ...
         
     # 현재 주차 세션의 진행 단계(Step Index)를 저장
-    def update_checkpoint(self, user_id: str, week: int, step_index: int) -> None: ...
\ No newline at end of file
+    def update_checkpoint(self, user_id: str, week: int, step_index: int) -> None: ...
+
+class AsyncRepo(Protocol):
+    """
+    Repo 의 asyncio 버전.
+    FastAPI 엔드포인트 / async 그래프 노드에서 await 해서 사용한다. (이벤트 루프를 막지 않음)
+    메서드 의미는 Repo 와 동일하다.
+    """
+    async def get_user(self, user_id: str) -> Dict[str, Any]: ...
+    async def upsert_user(self, user_id: str, patch: Dict[str, Any]) -> None: ...
+    async def get_active_weekly_session(self, user_id: str, week: int) -> Optional[Dict[str, Any]]: ...
+    async def save_session_info(self, user_id: str, thread_id: str, session_type: str, week: int, created_at: Optional[datetime] = None) -> None: ...
+    async def save_message(self, user_id: str, thread_id: str, session_type: str, week: int, role: str, text: str) -> None: ...
+    async def save_messages_batch(self, messages: List[Dict[str, Any]], ensure_sessions: bool = True) -> None: ... # write-behind 큐(message_queue.py)가 모아서 한 번에 저장
+    async def touch_session(self, user_id: str, thread_id: str, last_activity_at: Optional[datetime] = None) -> None: ...
+    async def update_progress(self, user_id: str, week: int, exit_hit: bool) -> None: ...
+    async def last_seen_touch(self, user_id: str) -> None: ...
+    async def get_messages(self, user_id: str) -> List[Dict[str, Any]]: ...
+    # --- 요약 관련 ---
+    async def save_session_summary(self, user_id: str, week: int, summary_text: str) -> None: ...
+    async def get_past_summaries(self, user_id: str, current_week: int) -> List[Dict[str, Any]]: ...
+    # --- 미접속 기간에 따른 세션 초기화/변경 로직 ---
+    async def mark_session_as_completed(self, user_id: str, week: int, completed_at: datetime) -> None: ...
+    async def advance_to_next_week(self, user_id: str) -> int: ...
+    async def rollback_user_to_week_1(self, user_id: str) -> None: ...
+    async def restart_current_week_session(self, user_id: str, week: int) -> None: ...
+    async def update_checkpoint(self, user_id: str, week: int, step_index: int) -> None: ...
+    # --- 서랍 / 리셋 ---
+    async def get_all_sessions(self, user_id: str) -> List[Dict[str, Any]]: ...
+    async def get_session_messages(self, user_id: str, thread_id: str) -> List[Dict[str, Any]]: ...
+    # 페이지네이션 버전: (결과, 다음 페이지 cursor) 반환
+    async def get_sessions_page(self, user_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]: ...
+    async def get_session_messages_page(self, user_id: str, thread_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]: ...
+    async def reset_user_progress(self, user_id: str) -> None: ...
@@ -0,0 +1,154 @@
+# coach_agent/services/checkpoint_archive.py
+"""
+완료된 세션 체크포인트 아카이브 (FirestoreSaver.archive_thread / rehydrate_thread)
+
+- 완료(ended)된 주간 세션 스레드는 route_session 이 다시 열지 않으므로 체크포인트는 드문 감사용 조회에만 쓰인다.
+- 스레드 서브트리(스레드 문서 + checkpoints(+예전 writes) / heads / segments / chunks) 전체를 번들 하나로 묶어
+  msgpack + zstd 로 압축한 뒤 blob 저장소에 두고, Firestore 에는 스레드 문서에 archived 표시만 남긴다.
+- 번들 키는 스레드마다 고정 ({collection}/{thread_id}.bundle): GC 가 표시 문서까지 지운 뒤에도 rehydrate 로 되살릴 수 있음
+- 저장소 (settings.CHECKPOINT_ARCHIVE_STORE)
+    · local  로컬 디렉터리 (CHECKPOINT_ARCHIVE_DIR; 테스트 / 단일 서버)
+    · gcs    Cloud Storage 버킷 (CHECKPOINT_ARCHIVE_BUCKET; firebase_admin.storage)
+    · off    아카이브 안 함 (GC 는 완료 스레드를 head 만 남기고 정리)
+
+실행: python -m coach_agent.services.checkpoint_archive rehydrate <thread_id> [...]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Dict, Optional, Protocol
+
+from coach_agent.services.serde import MAGIC, compress_blob, decompress_blob, get_checkpoint_serializer
+from coach_agent.settings import settings
+
+ARCHIVE_STORES = ("off", "local", "gcs")
+# 스레드 문서에 남기는 아카이브 표시 필드
+ARCHIVE_FIELD = "archived"
+BUNDLE_VERSION = 1
+
+# 번들은 CHECKPOINT_SERDE 와 무관하게 msgpack (문서 값의 bytes / datetime 을 그대로 보존)
+_BUNDLE_SERDE = get_checkpoint_serializer("msgpack")
+
+
+class ArchiveStore(Protocol):
+    def put(self, key: str, data: bytes) -> None: ...
+    def get(self, key: str) -> Optional[bytes]: ...
+    def delete(self, key: str) -> None: ...
+
+
+class LocalArchiveStore:
+    """로컬 디렉터리 저장소: 임시 파일에 쓴 뒤 rename (쓰다 만 번들이 보이지 않음)"""
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root or settings.CHECKPOINT_ARCHIVE_DIR
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class GcsArchiveStore:
+    """Cloud Storage 버킷 저장소 (firebase_admin 앱의 자격 증명 사용)"""
+
+    def __init__(self, bucket: Optional[str] = None) -> None:
+        from firebase_admin import storage
+        from coach_agent.services.firebase_admin_client import _init_app
+
+        name = bucket or settings.CHECKPOINT_ARCHIVE_BUCKET
+        if not name:
+            raise ValueError("CHECKPOINT_ARCHIVE_STORE=gcs 는 CHECKPOINT_ARCHIVE_BUCKET 이 필요합니다.")
+        _init_app()
+        self.bucket = storage.bucket(name)
+
+    def put(self, key: str, data: bytes) -> None:
+        self.bucket.blob(key).upload_from_string(data, content_type="application/octet-stream")
+
+    def get(self, key: str) -> Optional[bytes]:
+        from google.api_core.exceptions import NotFound
+        try:
+            return self.bucket.blob(key).download_as_bytes()
+        except NotFound:
+            return None
+
+    def delete(self, key: str) -> None:
+        from google.api_core.exceptions import NotFound
+        try:
+            self.bucket.blob(key).delete()
+        except NotFound:
+            pass
+
+
+def build_archive_store(kind: Optional[str] = None) -> Optional[ArchiveStore]:
+    kind = kind or settings.CHECKPOINT_ARCHIVE_STORE
+    if kind not in ARCHIVE_STORES:
+        raise ValueError(f"지원하지 않는 CHECKPOINT_ARCHIVE_STORE 입니다: {kind!r} (가능: {', '.join(ARCHIVE_STORES)})")
+    if kind == "local":
+        return LocalArchiveStore()
+    if kind == "gcs":
+        return GcsArchiveStore()
+    return None
+
+
+# 저장소 I/O 는 드문 작업 (GC 배치 / 감사 조회) -> async 경로는 스레드로 실행
+async def aput_bundle(store: ArchiveStore, key: str, data: bytes) -> None:
+    await asyncio.to_thread(store.put, key, data)
+
+
+async def aget_bundle(store: ArchiveStore, key: str) -> Optional[bytes]:
+    return await asyncio.to_thread(store.get, key)
+
+
+# -------------------------------------------------------------------------
+# 번들: {"version", "thread_id", "docs": {스레드 문서 기준 상대 경로("" = 스레드 문서): 문서 데이터}}
+# -------------------------------------------------------------------------
+def bundle_key(collection: str, thread_id: str) -> str:
+    return f"{collection}/{thread_id}.bundle"
+
+
+def encode_bundle(thread_id: str, docs: Dict[str, dict]) -> bytes:
+    payload, _ = compress_blob(_BUNDLE_SERDE.dumps({"version": BUNDLE_VERSION, "thread_id": thread_id, "docs": docs}))
+    return payload
+
+
+def decode_bundle(data: bytes) -> Dict[str, Any]:
+    # 압축되지 않은 번들(zstandard 없음)은 형식 태그로 시작
+    raw = data if data[:1] == MAGIC else decompress_blob(data, "zstd")
+    bundle = _BUNDLE_SERDE.loads(raw)
+    if bundle.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"지원하지 않는 체크포인트 번들 버전입니다: {bundle.get('version')!r}")
+    return bundle
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3 or sys.argv[1] != "rehydrate":
+        print("usage: python -m coach_agent.services.checkpoint_archive rehydrate <thread_id> [...]")
+        sys.exit(2)
+    from coach_agent.services.checkpointer import FirestoreSaver, checkpointer
+    if not isinstance(checkpointer, FirestoreSaver) or checkpointer.archive_store is None:
+        print("FirestoreSaver + CHECKPOINT_ARCHIVE_STORE 설정이 필요합니다.")
+        sys.exit(1)
+    for thread_id in sys.argv[2:]:
+        restored = checkpointer.rehydrate_thread(thread_id)
+        print(f"{'✅' if restored else '⚠️'} {thread_id}: {restored}개 문서 복원")
@@ -0,0 +1,174 @@
+# coach_agent/services/checkpoint_cache.py
+"""
+최신 체크포인트 write-through 캐시 (FirestoreSaver)
+
+- 같은 워커가 한 스레드의 연속된 턴을 처리하는 경우가 대부분인데, 턴마다 get_tuple 이
+  방금 put 한 체크포인트를 Firestore 에서 다시 읽고 역직렬화한다.
+- put / put_writes 때 역직렬화된 (checkpoint, metadata, pending writes) 를 (thread_id, checkpoint_ns) 별로 보관하고
+  get_tuple 이 head(최신) 를 요청하면 여기서 돌려준다.
+- head 문서의 head_token (put / put_writes 마다 새 값) 으로 다른 워커의 쓰기를 감지
+    · verify: head_token 필드만 읽어(projection) 캐시와 같을 때만 사용 (멀티 워커 안전, 역직렬화 / 큰 문서 전송 없음)
+    · trust:  읽지 않고 바로 사용 (sticky session 으로 한 스레드를 한 워커만 처리할 때)
+- 크기 제한: 항목별 대략적인 메모리 크기 합계가 max_bytes 를 넘으면 LRU 순서로 축출
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import Checkpoint, CheckpointMetadata, CheckpointTuple
+
+CACHE_MODES = ("off", "verify", "trust")
+
+
+def approx_bytes(value: Any, _depth: int = 0) -> int:
+    """캐시 크기 계산용 대략적인 메모리 크기 (정확한 값이 아니라 상한 관리용)"""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value) + 48
+    if _depth > 6:
+        return 64
+    if isinstance(value, dict):
+        return 64 + sum(approx_bytes(k, _depth + 1) + approx_bytes(v, _depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return 56 + sum(approx_bytes(v, _depth + 1) for v in value)
+    content = getattr(value, "content", None)
+    if content is not None:
+        # LangChain 메시지: 본문 + 메타데이터
+        return 256 + approx_bytes(content, _depth + 1) + approx_bytes(getattr(value, "response_metadata", None) or {}, _depth + 1)
+    return 64
+
+
+def _copy_checkpoint(checkpoint: Checkpoint) -> Checkpoint:
+    """호출 쪽이 dict 를 바꿔도 캐시는 그대로 (langgraph copy_checkpoint 와 달리 저장된 키만 유지)"""
+    copied = dict(checkpoint)
+    for key in ("channel_values", "channel_versions"):
+        if key in copied:
+            copied[key] = dict(copied[key])
+    if "versions_seen" in copied:
+        copied["versions_seen"] = {k: dict(v) for k, v in copied["versions_seen"].items()}
+    return copied  # type: ignore[return-value]
+
+
+class _Entry:
+    __slots__ = ("token", "config", "checkpoint", "metadata", "parent_config", "writes", "size")
+
+    def __init__(self, token: str, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                 parent_config: Optional[RunnableConfig], size: int) -> None:
+        self.token = token
+        self.config = config
+        self.checkpoint = checkpoint
+        self.metadata = metadata
+        self.parent_config = parent_config
+        self.writes: Dict[str, Tuple[str, str, Any, int]] = {}  # write key -> (task_id, channel, value, idx)
+        self.size = size
+
+    @property
+    def checkpoint_id(self) -> str:
+        return self.config["configurable"]["checkpoint_id"]
+
+    def to_tuple(self) -> CheckpointTuple:
+        writes = sorted(self.writes.values(), key=lambda w: (w[0], w[3]))
+        return CheckpointTuple(
+            config=self.config,
+            checkpoint=_copy_checkpoint(self.checkpoint),
+            metadata=dict(self.metadata),
+            parent_config=self.parent_config,
+            pending_writes=[(task_id, channel, value) for task_id, channel, value, _ in writes],
+        )
+
+
+class CheckpointCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def put_checkpoint(self, key: Tuple[str, str], token: str, config: RunnableConfig, checkpoint: Checkpoint,
+                       metadata: CheckpointMetadata, parent_config: Optional[RunnableConfig]) -> None:
+        size = approx_bytes(checkpoint.get("channel_values")) + approx_bytes(metadata) + 512
+        entry = _Entry(token, config, checkpoint, metadata, parent_config, size)
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._data[key] = entry
+            self._bytes += size
+            self._evict()
+
+    def add_writes(self, key: Tuple[str, str], checkpoint_id: str, token: str,
+                   writes: Dict[str, Tuple[str, str, Any, int]]) -> None:
+        """
+        put_writes write-through: 캐시된 head 체크포인트에 대한 쓰기만 반영
+        - 이전 체크포인트에 대한 늦은 쓰기(async 에서 다음 put 보다 늦게 도착)는 head 내용과 무관 -> token 만 갱신
+        - 캐시보다 새 체크포인트에 대한 쓰기는 다른 워커의 put 이 있었다는 뜻 -> 항목 제거
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return
+            if checkpoint_id != entry.checkpoint_id:
+                if checkpoint_id < entry.checkpoint_id:  # 체크포인트 id(uuid6)는 시간순 정렬
+                    entry.token = token
+                else:
+                    self._remove(key)
+                return
+            added = sum(approx_bytes(w[2]) + 128 for k, w in writes.items() if k not in entry.writes)
+            entry.writes.update(writes)
+            entry.token = token
+            entry.size += added
+            self._bytes += added
+            self._evict()
+
+    def invalidate(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_thread(self, thread_id: str) -> None:
+        """스레드 삭제: 모든 ns 의 항목 제거"""
+        with self._lock:
+            for key in [k for k in self._data if k[0] == thread_id]:
+                self._remove(key)
+
+    def record(self, result: str) -> None:
+        with self._lock:
+            if result == "hit":
+                self.hits += 1
+            elif result == "stale":
+                self.stale += 1
+            else:
+                self.misses += 1
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._data:
+            _, entry = self._data.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "bytes": self._bytes,
+            }
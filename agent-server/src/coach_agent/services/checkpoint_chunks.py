@@ -0,0 +1,99 @@
+# coach_agent/services/checkpoint_chunks.py
+"""
+체크포인트 청크 저장 (FirestoreSaver; Firestore 문서 1MiB 제한)
+
+  {collection}/{thread_id}/chunks/{blob_id}-{index:04d}   ← 큰 blob 을 나눈 조각 (put / put_writes 와 같은 WriteBatch 로 기록)
+
+- settings.CHECKPOINT_CHUNK_BYTES 보다 큰 blob (체크포인트 / 메타데이터 / 채널 값 / 메시지 / pending write) 은
+  필드에 blob 대신 참조 {blob_id, chunks, size, codec} 를 두고, 조각은 zstd 압축 후 CHUNK_PART_BYTES 단위로 나눈다.
+- 읽을 때 참조를 만나면 조각 문서를 읽어 합침 (blob 은 바뀌지 않으므로 blob_id 기준 LRU 캐시)
+- 문서 읽기 / 커밋은 FirestoreSaver 가 함 (동기 get / async 경로의 read-ahead 를 그대로 쓰도록)
+"""
+from __future__ import annotations
+
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from firebase_admin import firestore
+
+from coach_agent.observability.metrics import CHECKPOINT_BLOB_BYTES, CHECKPOINT_CHUNKED_BLOBS
+from coach_agent.services.serde import compress_blob, decompress_blob
+
+# 청크 문서 하나에 넣는 payload 크기 (필드 이름 / 문서 경로 여유를 남김)
+CHUNK_PART_BYTES = 900_000
+CHUNK_CACHE_SIZE = 256
+
+
+def is_chunk_ref(value: Any) -> bool:
+    return isinstance(value, dict) and "blob_id" in value
+
+
+def chunk_doc_id(blob_id: str, index: int) -> str:
+    return f"{blob_id}-{index:04d}"
+
+
+def collect_chunk_refs(value: Any, out: Dict[str, int]) -> None:
+    """저장된 문서 / map 값 안의 청크 참조 -> out[blob_id] = 조각 수"""
+    if isinstance(value, dict):
+        if is_chunk_ref(value):
+            out[value["blob_id"]] = value["chunks"]
+            return
+        for v in value.values():
+            collect_chunk_refs(v, out)
+    elif isinstance(value, list):
+        for v in value:
+            collect_chunk_refs(v, out)
+
+
+class ChunkStore:
+    """큰 blob -> 조각 문서 스테이징 / 조각 -> blob 조립 + 조립한 blob 의 LRU 캐시"""
+
+    def __init__(self, chunk_bytes: int, cache_size: int = CHUNK_CACHE_SIZE) -> None:
+        self.chunk_bytes = chunk_bytes
+        self.cache_size = cache_size
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pack(self, col, blob: bytes, kind: str, staged, force: bool = False, counted: bool = True) -> Any:
+        """
+        문서 필드에 넣을 값: 작으면 blob 그대로, 크면 (또는 force) col 아래 조각 문서를 staged 에 추가하고 참조 반환
+        counted=False 면 메트릭에 세지 않음 (async 경로에서 다시 실행될 스테이징)
+        """
+        if counted:
+            CHECKPOINT_BLOB_BYTES.observe(len(blob), kind=kind)
+        if len(blob) <= self.chunk_bytes and not force:
+            return blob
+        payload, codec = compress_blob(blob)
+        blob_id = uuid.uuid4().hex
+        parts = [payload[i:i + CHUNK_PART_BYTES] for i in range(0, len(payload), CHUNK_PART_BYTES)] or [b""]
+        for index, part in enumerate(parts):
+            staged.set(col.document(chunk_doc_id(blob_id, index)), {
+                "blob_id": blob_id,
+                "index": index,
+                "data": part,
+                "created_at": firestore.SERVER_TIMESTAMP,
+            })
+        if counted:
+            CHECKPOINT_CHUNKED_BLOBS.inc(kind=kind)
+        return {"blob_id": blob_id, "chunks": len(parts), "size": len(blob), "codec": codec}
+
+    def cached(self, blob_id: str) -> Optional[bytes]:
+        with self._lock:
+            blob = self._blobs.get(blob_id)
+            if blob is not None:
+                self._blobs.move_to_end(blob_id)
+            return blob
+
+    def assemble(self, thread_id: str, ref: dict, parts: List[Optional[dict]]) -> bytes:
+        """읽어 온 조각 문서(index 순서, 없으면 None)로 blob 을 조립하고 캐시"""
+        for index, part in enumerate(parts):
+            if part is None:
+                raise ValueError(f"체크포인트 청크가 없습니다: thread={thread_id} blob={ref['blob_id']} index={index}")
+        blob = decompress_blob(b"".join(p["data"] for p in parts), ref.get("codec"))
+        with self._lock:
+            self._blobs[ref["blob_id"]] = blob
+            while len(self._blobs) > self.cache_size:
+                self._blobs.popitem(last=False)
+        return blob
@@ -0,0 +1,177 @@
+# coach_agent/services/checkpoint_gc.py
+"""
+체크포인트 GC 배치 작업 (FirestoreSaver)
+
+sessions 메타데이터(users/{uid}/sessions/{thread_id}, 문서 ID = 체크포인트 thread_id)로 정리 대상 스레드를 찾는다.
+  - expired    last_activity_at 이 CHECKPOINT_THREAD_TTL_DAYS 보다 오래됨          -> 스레드 서브트리 삭제 (adelete_thread)
+               단, 진행 중인 주간 세션은 유저의 last_seen_at 도 TTL 을 넘었을 때만 삭제
+               (GENERAL 대화만 하는 유저도 다음 접속 때 그 주간 스레드로 돌아가므로; 건너뛴 세션은 다음 실행에서 다시 확인)
+  - general    GENERAL 세션이 CHECKPOINT_GENERAL_TTL_DAYS 보다 오래됨             -> 삭제 (다시 열리지 않는 일반 대화)
+  - abandoned  restart_current_week_session 이 닫은 세션 (result = "abandoned")   -> 삭제
+  - completed  완료된 주간 세션 (status = "ended", completed_at)                 -> 아카이브 저장소가 있으면 압축 번들로 옮김
+                                                                                  (aarchive_thread; services/checkpoint_archive.py),
+                                                                                  없으면 head(최신 체크포인트)만 남기고 정리 (prune keep=1)
+
+- 규칙마다 워터마크(maintenance/checkpoint_gc)를 두고 [이전 기준 시각, 이번 기준 시각) 구간만 조회
+  -> 실행마다 새로 대상이 된 세션만 읽음 (조회 비용이 누적 트래픽이 아니라 실행 간격의 트래픽에 비례)
+  -> 실패한 스레드가 있으면 그 규칙의 워터마크는 그대로 두고 다음 실행에서 다시 처리 (삭제 / 정리는 반복해도 같은 결과)
+- 스레드는 CHECKPOINT_GC_CONCURRENCY 개씩 동시에 처리 (스레드 안의 삭제도 배치 단위로 병렬; FirestoreSaver._adelete_docs)
+
+필요한 Firestore 인덱스 (collection group "sessions", 단일 필드 인덱스는 collection group 범위 활성화)
+  - last_activity_at ASC
+  - session_type ASC, last_activity_at ASC
+  - result ASC, ended_at ASC
+  - status ASC, completed_at ASC
+
+실행: python -m coach_agent.services.checkpoint_gc [--dry-run]   (make gc_checkpoints GC_ARGS=--dry-run)
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from coach_agent.settings import settings
+
+WATERMARK_COLLECTION = "maintenance"
+WATERMARK_DOC = "checkpoint_gc"
+# collection group 쿼리 페이지 크기
+GC_PAGE_SIZE = 500
+
+
+def _rules(now: datetime) -> List[Tuple[str, str, Optional[FieldFilter], str, datetime]]:
+    """(규칙 이름, 동작, 추가 필터, 시각 필드, 이번 기준 시각)"""
+    return [
+        ("expired", "delete", None, "last_activity_at", now - timedelta(days=settings.CHECKPOINT_THREAD_TTL_DAYS)),
+        ("general", "delete", FieldFilter("session_type", "==", "GENERAL"), "last_activity_at",
+         now - timedelta(days=settings.CHECKPOINT_GENERAL_TTL_DAYS)),
+        ("abandoned", "delete", FieldFilter("result", "==", "abandoned"), "ended_at", now),
+        ("completed", "prune", FieldFilter("status", "==", "ended"), "completed_at", now),
+    ]
+
+
+async def _sessions(db, extra: Optional[FieldFilter], field: str, start: Optional[datetime], end: datetime) -> List[Any]:
+    """sessions collection group 에서 field 가 [start, end) 인 세션 스냅샷 (문서 ID = thread_id)"""
+    query = db.collection_group("sessions")
+    if extra is not None:
+        query = query.where(filter=extra)
+    if start is not None:
+        query = query.where(filter=FieldFilter(field, ">=", start))
+    query = query.where(filter=FieldFilter(field, "<", end)).order_by(field).select([field, "session_type", "status"]).limit(GC_PAGE_SIZE)
+
+    snaps: List[Any] = []
+    last = None
+    while True:
+        page = [snap async for snap in (query.start_after(last) if last is not None else query).stream()]
+        snaps += page
+        if len(page) < GC_PAGE_SIZE:
+            return snaps
+        last = page[-1]
+
+
+async def _skip_live_weekly(snaps: List[Any], field: str, cutoff: datetime) -> Tuple[List[Any], Optional[datetime]]:
+    """
+    진행 중인 주간 세션 중 유저가 cutoff 이후에 접속한(last_seen_at) 세션을 제외
+    반환: (남은 스냅샷, 제외한 세션 중 가장 이른 field 값 — 워터마크를 여기서 멈춰 다음 실행에서 다시 확인)
+    """
+    kept: List[Any] = []
+    held: Optional[datetime] = None
+    last_seen: Dict[str, Any] = {}
+    for snap in snaps:
+        data = snap.to_dict() or {}
+        if data.get("session_type") == "WEEKLY" and data.get("status") == "active":
+            user_ref = snap.reference.parent.parent
+            if user_ref.path not in last_seen:
+                user_snap = await user_ref.get(["last_seen_at"])
+                last_seen[user_ref.path] = (user_snap.to_dict() or {}).get("last_seen_at")
+            seen = last_seen[user_ref.path]
+            if seen is not None and seen >= cutoff:
+                value = data[field]
+                held = value if held is None else min(held, value)
+                continue
+        kept.append(snap)
+    return kept, held
+
+
+async def run_checkpoint_gc(saver=None, db=None, now: Optional[datetime] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    만료 / 중도포기 스레드 삭제 + 완료 스레드 정리
+    반환: {"deleted": 삭제 / "pruned": 정리 / "archived": 아카이브한 스레드 수, "failed": 실패 수, "rules": 규칙별 대상 수}
+    """
+    if saver is None:
+        from coach_agent.services.checkpointer import checkpointer as saver
+    db = db or saver.adb
+    now = now or datetime.now(timezone.utc)
+    wm_ref = db.collection(WATERMARK_COLLECTION).document(WATERMARK_DOC)
+    wm_snap = await wm_ref.get()
+    watermarks = (wm_snap.to_dict() or {}) if wm_snap.exists else {}
+
+    deletes: Set[str] = set()
+    prunes: Set[str] = set()
+    found: Dict[str, List[str]] = {}
+    held: Dict[str, datetime] = {}
+    rules = _rules(now)
+    for name, action, extra, field, end in rules:
+        snaps = await _sessions(db, extra, field, watermarks.get(name), end)
+        if name == "expired":
+            snaps, oldest = await _skip_live_weekly(snaps, field, end)
+            if oldest is not None:
+                held[name] = oldest
+        ids = [snap.id for snap in snaps]
+        found[name] = ids
+        (deletes if action == "delete" else prunes).update(ids)
+    prunes -= deletes  # 삭제 대상은 정리할 필요 없음
+
+    stats: Dict[str, Any] = {"deleted": 0, "pruned": 0, "archived": 0, "failed": 0,
+                             "rules": {k: len(v) for k, v in found.items()}}
+    archive = getattr(saver, "archive_store", None) is not None
+    print(f"🧹 [CheckpointGC] 대상: 삭제 {len(deletes)}개 / 정리 {len(prunes)}개 스레드 {stats['rules']}"
+          + (" (dry-run)" if dry_run else ""))
+    if dry_run:
+        return stats
+
+    failed: Set[str] = set()
+    semaphore = asyncio.Semaphore(max(1, settings.CHECKPOINT_GC_CONCURRENCY))
+
+    async def process(thread_id: str, action: str) -> None:
+        async with semaphore:
+            try:
+                if action == "delete":
+                    await saver.adelete_thread(thread_id)
+                    stats["deleted"] += 1
+                elif archive:
+                    await saver.aarchive_thread(thread_id)
+                    stats["archived"] += 1
+                else:
+                    await saver.aprune_thread(thread_id, keep=1)
+                    stats["pruned"] += 1
+            except Exception as e:
+                failed.add(thread_id)
+                print(f"⚠️ [CheckpointGC] {action} 실패: thread={thread_id}: {e}")
+
+    await asyncio.gather(*[process(t, "delete") for t in sorted(deletes)], *[process(t, "prune") for t in sorted(prunes)])
+    stats["failed"] = len(failed)
+
+    # 실패가 없는 규칙만 워터마크 전진
+    # 건너뛴 세션이 있는 규칙은 그 세션 시각까지만 전진
+    advanced = {name: held.get(name, end) for name, _, _, _, end in rules if not failed.intersection(found[name])}
+    if advanced:
+        await wm_ref.set(dict(advanced, updated_at=now), merge=True)
+    print(f"✅ [CheckpointGC] 삭제 {stats['deleted']}개 / 정리 {stats['pruned']}개 / 아카이브 {stats['archived']}개 / 실패 {stats['failed']}개")
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="만료된 체크포인트 스레드 삭제 / 완료 스레드 정리 또는 아카이브")
+    parser.add_argument("--dry-run", action="store_true", help="대상 수만 출력")
+    args = parser.parse_args()
+
+    from coach_agent.services.checkpointer import FirestoreSaver, checkpointer
+    if not isinstance(checkpointer, FirestoreSaver):
+        print("REPO_BACKEND=sqlite 는 SqliteSaver.delete_thread 로 직접 삭제합니다.")
+        raise SystemExit(0)
+    asyncio.run(run_checkpoint_gc(checkpointer, dry_run=args.dry_run))
@@ -0,0 +1,151 @@
+# coach_agent/services/checkpoint_io.py
+"""
+체크포인트 문서 I/O (FirestoreSaver 의 동기 / async 경로 공유)
+
+- 스테이징: put / put_writes / prune 은 WriteBatch 대신 StagedWrites 에 쓰기를 모음
+    동기 경로는 commit_staged() 로 바로 WriteBatch 한 번, async 경로는 GroupCommitter 로 같은 스레드의 쓰기를 합쳐 커밋
+- read-ahead: 디코딩 / 스테이징 로직은 동기 함수 하나로 두고, async 경로는 resolve() 로 실행
+    실행 중 read_doc() 이 만난 문서(청크, 세그먼트, head, 루트 로그)는 동기로 읽지 않고 경로만 모아 두었다가(ReadAhead)
+    한 번에 await 로 읽은 뒤 함수를 다시 실행 (읽어야 알 수 있는 문서가 이어지면 반복; 보통 0~1 회)
+- 그룹 커밋: LangGraph 는 다음 단계 실행 중에 이전 단계의 put / put_writes 를 백그라운드로 보냄
+    -> 같은 스레드에 커밋 대기 중인 그룹이 있으면 합류, 없으면 새 그룹을 만들고 다음 루프 틱에 WriteBatch 하나로 커밋
+"""
+from __future__ import annotations
+
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from coach_agent.observability.metrics import CHECKPOINT_GROUP_COMMIT_CALLS
+
+# 그룹 커밋 하나에 넣는 최대 쓰기 수 (Firestore 요청 크기 제한 여유)
+GROUP_COMMIT_MAX_WRITES = 100
+READ_AHEAD_MAX_PASSES = 8
+
+
+class ReadAhead:
+    """async 경로용: 디코딩 중 필요한 문서를 동기로 읽지 않고 경로만 모아 둠 (path -> data, 없는 문서는 None)"""
+
+    __slots__ = ("docs", "missing")
+
+    def __init__(self) -> None:
+        self.docs: Dict[str, Optional[dict]] = {}
+        self.missing: List[str] = []
+
+
+READ_AHEAD: ContextVar[Optional[ReadAhead]] = ContextVar("checkpoint_read_ahead", default=None)
+
+
+def read_doc(ref) -> Optional[dict]:
+    """동기 경로는 바로 get, resolve() 안에서는 읽어 둔 문서 (아직 없으면 경로만 모아 두고 None)"""
+    ahead = READ_AHEAD.get()
+    if ahead is None:
+        snap = ref.get()
+        return snap.to_dict() if snap.exists else None
+    if ref.path in ahead.docs:
+        return ahead.docs[ref.path]
+    ahead.missing.append(ref.path)
+    return None
+
+
+def deferred() -> bool:
+    """resolve() 안에서 빠진 문서가 있어 이번 실행 결과를 버릴 예정인지"""
+    ahead = READ_AHEAD.get()
+    return ahead is not None and bool(ahead.missing)
+
+
+async def resolve(adb, fn: Callable[..., Any], *args: Any) -> Any:
+    """동기 디코딩 / 스테이징 함수를 I/O 없이 실행하고, 필요했던 문서를 adb 로 한 번에 읽은 뒤 다시 실행"""
+    ahead = ReadAhead()
+    token = READ_AHEAD.set(ahead)
+    try:
+        for _ in range(READ_AHEAD_MAX_PASSES):
+            try:
+                result = fn(*args)
+            except Exception:
+                if not ahead.missing:
+                    raise
+                result = None  # 빠진 문서 때문에 생긴 오류 -> 읽은 뒤 다시 실행
+            if not ahead.missing:
+                return result
+            paths = list(dict.fromkeys(ahead.missing))
+            ahead.missing.clear()
+            snaps = await asyncio.gather(*(adb.document(path).get() for path in paths))
+            for path, snap in zip(paths, snaps):
+                ahead.docs[path] = snap.to_dict() if snap.exists else None
+        raise RuntimeError(f"체크포인트 문서를 {READ_AHEAD_MAX_PASSES}번 안에 모두 읽지 못했습니다: {fn.__name__}")
+    finally:
+        READ_AHEAD.reset(token)
+
+
+class StagedWrites:
+    """WriteBatch 대신 쓰기를 모아 두는 버퍼 (동기 경로는 바로 커밋, async 경로는 그룹 커밋으로 합침)"""
+
+    __slots__ = ("db", "ops")
+
+    def __init__(self, db) -> None:
+        self.db = db
+        self.ops: List[Tuple[Any, dict, bool]] = []
+
+    def set(self, reference, document_data: dict, merge: bool = False) -> "StagedWrites":
+        self.ops.append((reference, document_data, merge))
+        return self
+
+
+def commit_staged(staged: StagedWrites) -> None:
+    """동기 경로: 모은 쓰기를 WriteBatch 한 번으로"""
+    batch = staged.db.batch()
+    for ref, data, merge in staged.ops:
+        batch.set(ref, data, merge=merge)
+    batch.commit()
+
+
+class _CommitGroup:
+    __slots__ = ("db", "loop", "ops", "calls", "future")
+
+    def __init__(self, db, loop: asyncio.AbstractEventLoop) -> None:
+        self.db = db
+        self.loop = loop
+        self.ops: List[Tuple[Any, dict, bool]] = []
+        self.calls = 0
+        self.future: asyncio.Future = loop.create_future()
+
+
+class GroupCommitter:
+    """async 경로: 키(thread_id)별로 커밋 대기 중인 쓰기를 모아 WriteBatch 하나로 커밋"""
+
+    def __init__(self, max_writes: int = GROUP_COMMIT_MAX_WRITES) -> None:
+        self.max_writes = max_writes
+        self._groups: Dict[str, _CommitGroup] = {}  # thread_id -> 커밋 대기 중인 그룹
+        # 실행 중인 그룹 커밋 태스크 (이벤트 루프는 태스크를 약하게 참조하므로 끝날 때까지 여기서 잡아 둠)
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def commit(self, key: str, staged: StagedWrites) -> None:
+        """같은 키에 커밋 대기 중인 그룹이 있으면 합류, 없으면 새 그룹을 만들고 다음 루프 틱에 커밋"""
+        loop = asyncio.get_running_loop()
+        group = self._groups.get(key)
+        if (group is None or group.loop is not loop or group.db is not staged.db
+                or len(group.ops) + len(staged.ops) > self.max_writes):
+            group = self._groups[key] = _CommitGroup(staged.db, loop)
+            task = loop.create_task(self._flush(key, group))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        group.ops.extend(staged.ops)  # 호출 순서대로 (같은 문서에 대한 merge 가 순서대로 적용됨)
+        group.calls += 1
+        # 기다리던 호출이 취소돼도 그룹 커밋은 그대로 진행
+        await asyncio.shield(group.future)
+
+    async def _flush(self, key: str, group: _CommitGroup) -> None:
+        await asyncio.sleep(0)  # 같은 틱에 도착한 put / put_writes 가 합류할 시간
+        if self._groups.get(key) is group:
+            del self._groups[key]
+        batch = group.db.batch()
+        for ref, data, merge in group.ops:
+            batch.set(ref, data, merge=merge)
+        CHECKPOINT_GROUP_COMMIT_CALLS.observe(group.calls)
+        try:
+            await batch.commit()
+        except Exception as e:
+            group.future.set_exception(e)
+        else:
+            group.future.set_result(None)
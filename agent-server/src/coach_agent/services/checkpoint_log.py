@@ -0,0 +1,144 @@
+# coach_agent/services/checkpoint_log.py
+"""
+증분 체크포인트 저장 형식 (FirestoreSaver, settings.CHECKPOINT_STORAGE = "incremental")
+
+체크포인트 문서에는 channel_values 를 뺀 체크포인트 + 채널별 버전(channels) + 메시지 로그 위치(message_seq)만 저장하고,
+값은 ns 별 로그에 "추가"만 한다 (put 의 쓰기 양은 세션 길이가 아니라 바뀐 양에 비례).
+  - blobs:    {"{channel}|{version}": blob}  버전이 바뀐 채널만 기록 (같은 버전은 다시 쓰지 않음)
+  - messages: {seq: {op, id, value}}         messages 채널의 추가 전용 로그 (메시지 id 기준)
+      op=add     새 메시지 추가 / 같은 id 면 제자리 교체 (add_messages 리듀서와 같은 규칙)
+      op=remove  RemoveMessage 로 지워진 메시지의 tombstone (summarize_and_filter_message)
+      op=clear   전체 교체 (REMOVE_ALL_MESSAGES 등 로그로 표현할 수 없는 변경)
+      op=base    서브그래프 ns 의 시작점: 루트 ns 로그의 seq 시점 메시지를 그대로 이어받음 (턴마다 전체 히스토리를 다시 쓰지 않음)
+  체크포인트의 messages = seq <= message_seq 인 로그를 순서대로 적용한 결과
+
+세그먼트 (head 문서 크기 / 최신 조회의 읽기 양이 세션 길이에 따라 늘지 않도록)
+  - 새 항목은 head 문서의 blobs / messages map (tail) 에 merge
+  - tail 이 CHECKPOINT_SEGMENT_BYTES 또는 SEGMENT_MAX_ENTRIES 개를 넘으면 그 put 의 WriteBatch 안에서 tail 전체를
+    {collection}/{thread_id}/segments/{segment_id} 문서로 봉인하고, head 에는 포인터만 남김
+      head.segments[segment_id] = {first, last, blobs}   로그 seq 범위 + 들어 있는 blob 키
+  - 봉인된 세그먼트는 바뀌지 않음 (보존 정책이 접을 때는 새 id 로 다시 씀) -> 프로세스 안에서 id 기준 LRU 캐시
+  - 최신 조회는 캐시된 로그 상태(seq) 뒤의 항목만 적용 -> 보통 head 문서 한 번 읽기
+    (보존 정책이 접은 위치 folded_upto 보다 오래된 상태는 처음부터 다시 적용)
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+STORAGE_INCREMENTAL = "incremental"
+MESSAGE_LOG_CHANNEL = "messages"
+# 세그먼트 하나에 넣는 최대 항목 수 (map 필드마다 색인 항목이 생기므로 바이트와 별도로 제한)
+SEGMENT_MAX_ENTRIES = 500
+
+
+def blob_key(channel: str, version: Any) -> str:
+    # Firestore map 키: '.' 은 필드 경로 구분자라 피함
+    return f"{channel}|{version}".replace(".", ",")
+
+
+def seq_key(seq: int) -> str:
+    return f"{seq:08d}"
+
+
+def inline_bytes(values: Iterable[Any]) -> int:
+    return sum(len(v) for v in values if isinstance(v, (bytes, bytearray, str)))
+
+
+def entries_bytes(log: Dict[str, dict], blobs: Dict[str, Any]) -> int:
+    return inline_bytes(blobs.values()) + inline_bytes(e.get("value") for e in log.values())
+
+
+def log_end(state_doc: dict) -> int:
+    """head 문서 기준 로그 끝 seq (tail + 봉인된 세그먼트)"""
+    ends = [int(k) for k in state_doc.get("messages") or {}]
+    ends += [p["last"] for p in (state_doc.get("segments") or {}).values() if p.get("last") is not None]
+    return max(ends, default=0)
+
+
+def segment_pointer(log: Dict[str, dict], blobs: Dict[str, Any]) -> dict:
+    seqs = [int(k) for k in log]
+    return {"first": min(seqs, default=None), "last": max(seqs, default=None), "blobs": sorted(blobs)}
+
+
+def split_segments(log: Dict[str, dict], blobs: Dict[str, Any], max_bytes: int) -> List[Tuple[Dict[str, dict], Dict[str, Any]]]:
+    """로그 / blob 을 max_bytes, SEGMENT_MAX_ENTRIES 안쪽의 세그먼트 여러 개로 나눔 (로그는 seq 순서대로)"""
+    items = [("log", k, log[k]) for k in sorted(log)] + [("blob", k, blobs[k]) for k in sorted(blobs)]
+    parts: List[Tuple[Dict[str, dict], Dict[str, Any]]] = []
+    size = count = 0
+    for kind, key, value in items:
+        item_bytes = inline_bytes([value.get("value") if kind == "log" else value])
+        if not parts or count >= SEGMENT_MAX_ENTRIES or (count and size + item_bytes > max_bytes):
+            parts.append(({}, {}))
+            size = count = 0
+        parts[-1][0 if kind == "log" else 1][key] = value
+        size += item_bytes
+        count += 1
+    return parts
+
+
+def fold_message_log(log: Dict[str, dict], upto: int, load_base: Callable[[int], "OrderedDict[str, Any]"],
+                     start: Optional["OrderedDict[str, Any]"] = None, after: int = 0) -> "OrderedDict[str, Any]":
+    """
+    메시지 로그를 seq 순서대로 적용 -> {message_id: blob} (순서 = 메시지 순서)
+    start 가 있으면 after 시점의 결과에서 이어서 (after 이하 항목은 건너뜀)
+    """
+    blobs: "OrderedDict[str, Any]" = OrderedDict(start) if start is not None else OrderedDict()
+    for key in sorted(log):
+        seq = int(key)
+        if seq <= after:
+            continue
+        if seq > upto:
+            break
+        entry = log[key]
+        op = entry["op"]
+        if op == "add":
+            blobs[entry["id"]] = entry["value"]  # 같은 id 는 제자리 교체
+        elif op == "remove":
+            blobs.pop(entry["id"], None)
+        elif op == "clear":
+            blobs.clear()
+        elif op == "base":
+            blobs = load_base(entry["seq"])
+    return blobs
+
+
+def diff_messages(prev: "OrderedDict[str, Any]", messages: List[Any]) -> Optional[List[Tuple[str, Optional[str], Any]]]:
+    """
+    prev(로그 적용 결과) -> messages 로 가는 로그 항목 [(op, id, message)].
+    add/remove 로 표현할 수 없으면 (id 없음, 순서 변경) None -> 호출 쪽에서 clear + 전체 add
+    """
+    ids = [getattr(m, "id", None) for m in messages]
+    if None in ids or len(set(ids)) != len(ids):
+        return None
+    current = set(ids)
+    kept = [i for i in prev if i in current]
+    if ids[: len(kept)] != kept:
+        return None
+    if prev and not kept:
+        ops: List[Tuple[str, Optional[str], Any]] = [("clear", None, None)]
+    else:
+        ops = [("remove", i, None) for i in prev if i not in current]
+    for message_id, message in zip(ids, messages):
+        old = prev.get(message_id) if kept else None
+        # 같은 객체면 비교 생략 (상태는 리듀서로만 바뀌므로 제자리 수정은 없음)
+        if old is None or (old is not message and old != message):
+            ops.append(("add", message_id, message))
+    return ops
+
+
+class ChannelState:
+    """
+    (thread_id, ns) 별 증분 저장 상태: 로그 끝 seq, 로그 적용 결과 메시지, 이미 기록된 blob 키 (tail + 세그먼트),
+    head tail 에 쌓인 값 크기 / 항목 수 (봉인 시점 판단)
+    """
+
+    __slots__ = ("seq", "messages", "blob_keys", "tail_bytes", "tail_entries")
+
+    def __init__(self, seq: int = 0, messages: Optional["OrderedDict[str, Any]"] = None, blob_keys: Optional[set] = None,
+                 tail_bytes: int = 0, tail_entries: int = 0) -> None:
+        self.seq = seq
+        self.messages: "OrderedDict[str, Any]" = messages if messages is not None else OrderedDict()
+        self.blob_keys: set = blob_keys if blob_keys is not None else set()
+        self.tail_bytes = tail_bytes
+        self.tail_entries = tail_entries
@@ -0,0 +1,41 @@
+# coach_agent/services/checkpoint_migrate.py
+"""
+예전 체크포인트 구조(LAYOUT_VERSION 1: head 문서 없음, writes 서브컬렉션) 스레드 일괄 이전 (FirestoreSaver)
+
+- 스레드 하나의 이전(최신 체크포인트로 head 문서 만들기)은 FirestoreSaver.migrate_thread 가 함
+  (get_tuple 이 head 없는 스레드를 만나면 같은 코드로 자동 이전) -> 여기서는 대상 스레드를 돌며 호출만
+- 이미 head 가 있는 스레드는 건너뜀 (반복 실행해도 같은 결과)
+
+실행: python -m coach_agent.services.checkpoint_migrate [thread_id ...]   (make migrate_checkpoints THREAD_IDS="...")
+"""
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+
+def migrate_threads(saver, thread_ids: Optional[Sequence[str]] = None) -> int:
+    """예전 구조 스레드를 한꺼번에 이전 (thread_ids 가 없으면 컬렉션 전체). 반환: 이전한 스레드 수"""
+    if thread_ids is None:
+        thread_ids = [ref.id for ref in saver.db.collection(saver.collection).list_documents()]
+    migrated = 0
+    for thread_id in thread_ids:
+        if saver.is_migrated(thread_id):
+            continue
+        if saver.migrate_thread(thread_id) is not None:
+            migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="예전 구조(head 없음) 체크포인트 스레드 일괄 이전")
+    parser.add_argument("thread_ids", nargs="*", help="이전할 스레드 (없으면 컬렉션 전체)")
+    args = parser.parse_args()
+
+    from coach_agent.services.checkpointer import FirestoreSaver, checkpointer
+    if not isinstance(checkpointer, FirestoreSaver):
+        print("REPO_BACKEND=sqlite 는 이전할 예전 구조가 없습니다.")
+        raise SystemExit(0)
+    count = migrate_threads(checkpointer, args.thread_ids or None)
+    print(f"✅ 이전 완료: {count}개 스레드")
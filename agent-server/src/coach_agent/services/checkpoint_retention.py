@@ -0,0 +1,191 @@
+# coach_agent/services/checkpoint_retention.py
+"""
+체크포인트 보존 정책 계산 (FirestoreSaver.prune_thread / aprune_thread; settings.CHECKPOINT_KEEP_LAST)
+
+- 루트 ns 체크포인트는 최신 keep 개만 남기고, 끝난 서브그래프 ns(히스토리 + heads 문서 + 세그먼트)는 삭제
+- tail / 세그먼트의 blobs 중 남은 체크포인트가 참조하지 않는 값은 지움
+- 메시지 로그는 남은 가장 오래된 체크포인트의 message_seq 까지를 "그 시점의 메시지 add" 로 접어서 새 세그먼트로 다시 기록
+  (seq 번호는 그대로 -> 남은 체크포인트 / 서브그래프 base 는 같은 결과)
+- 지우는 문서 / 값만 참조하던 청크 문서도 삭제 대상
+문서 읽기 / 쓰기 / 삭제는 FirestoreSaver 가 하고, 여기서는 읽은 문서로 PrunePlan 만 만든다 (I/O 없음)
+"""
+from __future__ import annotations
+
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from firebase_admin import firestore
+
+from coach_agent.services.checkpoint_chunks import chunk_doc_id, collect_chunk_refs
+from coach_agent.services.checkpoint_log import (
+    MESSAGE_LOG_CHANNEL,
+    STORAGE_INCREMENTAL,
+    blob_key,
+    fold_message_log,
+    segment_pointer,
+    seq_key,
+    split_segments,
+)
+
+
+class PrunePlan:
+    """prune_thread 가 지울 문서 ID / 루트 head 에 merge 할 변경 (참조는 호출 쪽 클라이언트로 만듦)"""
+
+    __slots__ = ("checkpoints", "legacy", "heads", "segments", "chunks", "head_patch", "segment_writes", "segment_patches")
+
+    def __init__(self) -> None:
+        self.checkpoints: List[str] = []
+        self.legacy: List[str] = []  # 예전 구조 문서: writes 서브컬렉션도 삭제
+        self.heads: List[str] = []
+        self.segments: List[str] = []
+        self.chunks: List[str] = []
+        self.head_patch: Dict[str, Any] = {}
+        self.segment_writes: Dict[str, dict] = {}  # 접은 로그를 담은 새 세그먼트
+        self.segment_patches: Dict[str, dict] = {}  # 남는 세그먼트에서 지울 값
+
+
+def plan_prune(root_head: Optional[dict], history: List[Tuple[str, dict]], heads: Dict[str, dict],
+               segments: Dict[str, dict], keep: int, *, loads: Callable[[Any], Any], segment_bytes: int,
+               layout_version: int) -> PrunePlan:
+    """
+    세그먼트 / 히스토리 문서(루트 + 서브그래프 ns) / heads 문서 / 루트 head 로 지울 것을 계산 (I/O 없음)
+    - 읽는 순서는 세그먼트 -> 히스토리 -> heads -> 루트 head: 그 사이에 커밋된 put 의 값은 head 의 channels / 포인터로 보호되고,
+      읽은 세그먼트의 포인터(같은 배치로 기록)는 반드시 뒤에 읽은 head 에 보임
+    """
+    plan = PrunePlan()
+    root = sorted((item for item in history if item[1].get("checkpoint_ns", "") == ""),
+                  key=lambda item: item[1]["checkpoint_id"], reverse=True)
+    kept, dropped = root[:max(keep, 1)], root[max(keep, 1):]
+    if not kept:
+        return plan
+    oldest_kept = kept[-1][1]["checkpoint_id"]
+
+    # 서브그래프 ns: 마지막 체크포인트가 남길 가장 오래된 루트 체크포인트보다 오래되면 끝난 실행
+    # (진행 중 / 중단된 턴의 서브그래프는 최신 루트 체크포인트 이후에 생김)
+    latest_by_ns: Dict[str, str] = {}
+    for _, data in history:
+        ns = data.get("checkpoint_ns", "")
+        if ns:
+            latest_by_ns[ns] = max(latest_by_ns.get(ns, ""), data["checkpoint_id"])
+    for head_id, data in heads.items():
+        ns = data.get("checkpoint_ns") or head_id
+        latest_by_ns[ns] = max(latest_by_ns.get(ns, ""), data.get("checkpoint_id", ""))
+    stale_ns = {ns for ns, latest in latest_by_ns.items() if latest < oldest_kept}
+    dropped += [item for item in history if item[1].get("checkpoint_ns", "") in stale_ns]
+    kept += [item for item in history if item[1].get("checkpoint_ns", "") not in stale_ns and item[1].get("checkpoint_ns", "")]
+    stale_heads = {ns.replace("/", "_") for ns in stale_ns}
+    plan.heads = [head_id for head_id in heads if head_id in stale_heads]
+
+    plan.checkpoints = [doc_id for doc_id, _ in dropped]
+    plan.legacy = [doc_id for doc_id, data in dropped if data.get("layout") != layout_version]
+
+    # 세그먼트: 끝난(또는 head 가 없는) 서브그래프 ns 의 것, 루트 head 가 가리키지 않는 것(다시 쓰고 남은 것)은 삭제
+    pointers: Dict[str, dict] = dict((root_head or {}).get("segments") or {})
+    live: Dict[str, dict] = {}  # 남는 세그먼트 (값을 지우면 지운 뒤의 내용)
+    for segment_id, doc in segments.items():
+        ns = doc.get("checkpoint_ns", "")
+        if (ns and (ns in stale_ns or ns not in latest_by_ns)) or (not ns and root_head and segment_id not in pointers):
+            plan.segments.append(segment_id)
+        else:
+            live[segment_id] = doc
+
+    # 루트 head: 남은 루트 체크포인트가 참조하지 않는 blobs 삭제 + 메시지 로그 접기
+    removed: List[Any] = []
+    remaining = dict(root_head or {})
+    if root_head:
+        used = set()
+        seqs = []
+        for data in [d for _, d in kept if d.get("checkpoint_ns", "") == ""] + [root_head]:
+            if data.get("storage") != STORAGE_INCREMENTAL:
+                continue
+            if data.get("message_seq") is not None:
+                seqs.append(data["message_seq"])
+            for channel, version in loads(data["channels"]).items():
+                if channel != MESSAGE_LOG_CHANNEL or data.get("message_seq") is None:
+                    used.add(blob_key(channel, version))
+        blobs = root_head.get("blobs") or {}
+        stale_blobs = [key for key in blobs if key not in used]
+        if stale_blobs:
+            plan.head_patch["blobs"] = {key: firestore.DELETE_FIELD for key in stale_blobs}
+            removed += [blobs[key] for key in stale_blobs]
+            remaining["blobs"] = {k: v for k, v in blobs.items() if k not in plan.head_patch["blobs"]}
+
+        # 세그먼트 안의 값 / 로그는 포인터가 가리키는 세그먼트를 모두 읽었을 때만 정리 (그 사이에 봉인된 것은 다음 실행에서)
+        known = all(segment_id in live for segment_id in pointers)
+        pointer_patch: Dict[str, Any] = {}
+        for segment_id, pointer in pointers.items() if known else ():
+            stale = [key for key in pointer.get("blobs") or () if key not in used]
+            if stale:
+                seg_blobs = live[segment_id].get("blobs") or {}
+                removed += [seg_blobs[key] for key in stale if key in seg_blobs]
+                live[segment_id] = dict(live[segment_id], blobs={k: v for k, v in seg_blobs.items() if k not in stale})
+                plan.segment_patches[segment_id] = {"blobs": {key: firestore.DELETE_FIELD for key in stale}}
+                pointer_patch[segment_id] = dict(pointer, blobs=[k for k in pointer["blobs"] if k not in stale])
+
+        # 살아 있는 서브그래프 ns 가 이어받은 루트 로그 위치(base)도 그대로 읽혀야 함
+        for head_id, data in heads.items():
+            if head_id not in stale_heads:
+                seqs += [e["seq"] for e in (data.get("messages") or {}).values() if e.get("op") == "base"]
+        for doc in live.values():
+            if doc.get("checkpoint_ns", ""):
+                seqs += [e["seq"] for e in (doc.get("messages") or {}).values() if e.get("op") == "base"]
+        tail = root_head.get("messages") or {}
+        log = dict(tail)
+        for segment_id in pointers if known else ():
+            log.update(live[segment_id].get("messages") or {})
+        if known and log and seqs:
+            floor = min(seqs)
+            old = sorted(k for k in log if int(k) <= floor)
+            if not any(log[k]["op"] == "base" for k in old):
+                folded = fold_message_log({k: log[k] for k in old}, floor, lambda seq: OrderedDict())
+                if len(folded) < len(old):
+                    # 접은 결과를 floor 에서 끝나도록 배치: 이후 seq 와 겹치지 않고 로그 끝 위치도 그대로
+                    start = floor - len(folded) + 1
+                    rewritten = {seq_key(start + offset): {"op": "add", "id": message_id, "value": value}
+                                 for offset, (message_id, value) in enumerate(folded.items())}
+                    removed += [log[k].get("value") for k in old]
+                    # floor 이하를 담은 세그먼트는 floor 뒤의 항목 / 남은 값과 함께 새 세그먼트로 다시 씀, tail 의 floor 이하는 삭제
+                    carried: Dict[str, Any] = {}
+                    for segment_id, pointer in pointers.items():
+                        if pointer.get("first") is None or pointer["first"] > floor:
+                            continue
+                        doc = live.pop(segment_id)
+                        rewritten.update({k: e for k, e in (doc.get("messages") or {}).items() if int(k) > floor})
+                        carried.update(doc.get("blobs") or {})
+                        plan.segments.append(segment_id)
+                        plan.segment_patches.pop(segment_id, None)
+                        pointer_patch[segment_id] = firestore.DELETE_FIELD
+                    for part_log, part_blobs in split_segments(rewritten, carried, segment_bytes):
+                        segment_id = uuid.uuid4().hex
+                        plan.segment_writes[segment_id] = {"checkpoint_ns": "", "messages": part_log, "blobs": part_blobs}
+                        pointer_patch[segment_id] = segment_pointer(part_log, part_blobs)
+                    tail_patch = {k: firestore.DELETE_FIELD for k in tail if int(k) <= floor}
+                    if tail_patch:
+                        plan.head_patch["messages"] = tail_patch
+                        remaining["messages"] = {k: v for k, v in tail.items() if k not in tail_patch}
+                    plan.head_patch["folded_upto"] = floor
+        if pointer_patch:
+            plan.head_patch["segments"] = pointer_patch
+
+    # 지우는 문서 / 값만 참조하던 청크
+    garbage: Dict[str, int] = {}
+    for _, data in dropped:
+        collect_chunk_refs(data, garbage)
+    for head_id in plan.heads:
+        collect_chunk_refs(heads[head_id], garbage)
+    for segment_id in plan.segments:
+        collect_chunk_refs(segments[segment_id], garbage)
+    collect_chunk_refs(removed, garbage)
+    alive: Dict[str, int] = {}
+    for _, data in kept:
+        collect_chunk_refs(data, alive)
+    for head_id, data in heads.items():
+        if head_id not in stale_heads:
+            collect_chunk_refs(data, alive)
+    collect_chunk_refs(remaining, alive)
+    collect_chunk_refs(list(live.values()) + list(plan.segment_writes.values()), alive)
+    plan.chunks = [chunk_doc_id(blob_id, index) for blob_id, count in garbage.items() if blob_id not in alive
+                   for index in range(count)]
+    return plan
+
@@ -0,0 +1,319 @@
+# coach_agent/services/checkpoint_storage.py
+"""
+증분 체크포인트 저장소 (FirestoreSaver, settings.CHECKPOINT_STORAGE = "incremental")
+
+형식(메시지 로그 / 세그먼트)은 services/checkpoint_log.py 참고. 여기서는 그 형식을 Firestore 문서로 읽고 쓴다.
+  - 읽기: 체크포인트의 channels(채널별 버전) + message_seq 로 head tail / 세그먼트에서 채널 값과 메시지를 복원
+  - 쓰기: 캐시된 로그 상태(ChannelState)와 비교해 바뀐 채널 값 / 새 메시지 로그 항목만 head tail 에 추가,
+          tail 이 segment_bytes 를 넘으면 같은 배치에서 세그먼트로 봉인
+  - 프로세스 안 캐시: (thread_id, ns) 별 로그 상태, 봉인된 세그먼트 문서 (바뀌지 않음)
+문서 참조 / 청크 / 직렬화 / read-ahead 는 FirestoreSaver 와 같은 것을 씀 (동기 / async 경로 모두 이 코드로)
+"""
+from __future__ import annotations
+
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from firebase_admin import firestore
+from langgraph.checkpoint.base import Checkpoint, CheckpointMetadata
+from langchain_core.runnables import RunnableConfig
+
+from coach_agent.observability.tracing import TRACER
+from coach_agent.services.checkpoint_io import StagedWrites, deferred, read_doc
+from coach_agent.services.checkpoint_log import (
+    MESSAGE_LOG_CHANNEL,
+    SEGMENT_MAX_ENTRIES,
+    STORAGE_INCREMENTAL,
+    ChannelState,
+    blob_key,
+    diff_messages,
+    entries_bytes,
+    fold_message_log,
+    inline_bytes,
+    log_end,
+    segment_pointer,
+    seq_key,
+)
+
+# 스레드(ns)별 메시지 로그 / 기록된 blob 키 캐시 크기 (put 에서 바뀐 것만 골라내는 데 사용)
+CHANNEL_STATE_CACHE_SIZE = 1024
+SEGMENT_CACHE_SIZE = 64
+
+
+class IncrementalStorage:
+    """FirestoreSaver 의 증분 저장 읽기 / 스테이징 + 로그 상태 / 세그먼트 캐시"""
+
+    def __init__(self, saver, segment_bytes: int, inline_max_bytes: int, layout_version: int) -> None:
+        self.saver = saver
+        self.segment_bytes = segment_bytes
+        self.inline_max_bytes = inline_max_bytes  # tail 에 인라인으로 쌓는 값 합계 (넘으면 청크)
+        self.layout_version = layout_version
+        self._states: "OrderedDict[Tuple[str, str], ChannelState]" = OrderedDict()
+        self._states_lock = threading.Lock()
+        self._segments: "OrderedDict[str, dict]" = OrderedDict()  # 봉인된 세그먼트 문서 (바뀌지 않음)
+        self._segments_lock = threading.Lock()
+
+    # ---------------------------------------------------------------------
+    # 읽기: 채널 값 복원
+    # ---------------------------------------------------------------------
+    def load_values(self, thread_id: str, checkpoint_ns: str, data: dict, state_doc: Optional[dict]) -> Dict[str, Any]:
+        """증분 저장 체크포인트 문서의 channel_values (state_doc: 이미 읽은 head 문서)"""
+        saver = self.saver
+        if state_doc is None:
+            # 히스토리 문서만 읽은 경우: 값은 head 문서(tail / 세그먼트 포인터)에 있음
+            state_doc = read_doc(saver._head_doc(thread_id, checkpoint_ns)) or {}
+        channels = saver._load_blob(thread_id, data["channels"])
+        keys = [blob_key(channel, version) for channel, version in channels.items()
+                if channel != MESSAGE_LOG_CHANNEL or data.get("message_seq") is None]
+        blobs = self._channel_blobs(thread_id, state_doc, keys)
+        values = {}
+        for channel, version in channels.items():
+            if channel == MESSAGE_LOG_CHANNEL and data.get("message_seq") is not None:
+                values[channel] = self._messages_at(thread_id, checkpoint_ns, state_doc, data["message_seq"])
+                continue
+            key = blob_key(channel, version)
+            if key not in blobs:
+                raise ValueError(f"체크포인트 채널 값이 없습니다: thread={thread_id} ns={checkpoint_ns!r} {key}")
+            values[channel] = saver._load_blob(thread_id, blobs[key])
+        return values
+
+    def _segment_docs(self, thread_id: str, segment_ids: List[str]) -> Dict[str, dict]:
+        """봉인된 세그먼트 문서 (캐시에 없는 것만 읽음; async 에서 아직 못 읽은 문서는 빠짐)"""
+        found: Dict[str, dict] = {}
+        with self._segments_lock:
+            for segment_id in segment_ids:
+                doc = self._segments.get(segment_id)
+                if doc is not None:
+                    self._segments.move_to_end(segment_id)
+                    found[segment_id] = doc
+        col = self.saver._segment_col(thread_id)
+        read = {segment_id: read_doc(col.document(segment_id)) for segment_id in segment_ids if segment_id not in found}
+        if deferred():
+            return found
+        for segment_id, doc in read.items():
+            if doc is None:
+                raise ValueError(f"체크포인트 로그 세그먼트가 없습니다: thread={thread_id} segment={segment_id}")
+        with self._segments_lock:
+            for segment_id, doc in read.items():
+                self._segments[segment_id] = doc
+            while len(self._segments) > SEGMENT_CACHE_SIZE:
+                self._segments.popitem(last=False)
+        found.update(read)
+        return found
+
+    def _channel_blobs(self, thread_id: str, state_doc: dict, keys: List[str]) -> Dict[str, Any]:
+        """채널 값 blob: head tail 에 없으면 포인터로 세그먼트를 찾아 읽음"""
+        tail = state_doc.get("blobs") or {}
+        found = {key: tail[key] for key in keys if key in tail}
+        where = {key: segment_id for segment_id, pointer in (state_doc.get("segments") or {}).items()
+                 for key in pointer.get("blobs") or ()}
+        docs = self._segment_docs(thread_id, sorted({where[key] for key in keys if key not in found and key in where}))
+        for key in keys:
+            if key not in found and where.get(key) in docs:
+                value = (docs[where[key]].get("blobs") or {}).get(key)
+                if value is not None:
+                    found[key] = value
+        return found
+
+    def _log_entries(self, thread_id: str, state_doc: dict, upto: int, after: int = 0) -> Dict[str, dict]:
+        """seq 가 (after, upto] 구간에 걸친 로그 항목 (tail + 필요한 세그먼트만)"""
+        log = dict(state_doc.get("messages") or {})
+        segment_ids = [segment_id for segment_id, pointer in (state_doc.get("segments") or {}).items()
+                       if pointer.get("first") is not None and pointer["first"] <= upto and pointer["last"] > after]
+        for doc in self._segment_docs(thread_id, segment_ids).values():
+            log.update(doc.get("messages") or {})
+        return log
+
+    def _fold_blobs(self, thread_id: str, checkpoint_ns: str, state_doc: dict, upto: int,
+                    start: Optional["OrderedDict[str, Any]"] = None, after: int = 0) -> "OrderedDict[str, Any]":
+        def load_base(seq: int) -> "OrderedDict[str, Any]":
+            # 서브그래프 ns 의 시작점 = 루트 ns(스레드 문서) 로그의 seq 시점
+            return self._fold_blobs(thread_id, "", read_doc(self.saver._thread_doc(thread_id)) or {}, seq)
+
+        log = self._log_entries(thread_id, state_doc, upto, after)
+        return fold_message_log(log, upto, load_base, start=start, after=after)
+
+    def _messages_at(self, thread_id: str, checkpoint_ns: str, state_doc: dict, seq: int) -> List[Any]:
+        cached = self.cached_state(thread_id, checkpoint_ns)
+        if cached is not None and cached.seq == seq:
+            return list(cached.messages.values())
+        load_blob = self.saver._load_blob
+        return [load_blob(thread_id, b) for b in self._fold_blobs(thread_id, checkpoint_ns, state_doc, seq).values()]
+
+    # ---------------------------------------------------------------------
+    # 로그 상태 캐시
+    # ---------------------------------------------------------------------
+    def cached_state(self, thread_id: str, checkpoint_ns: str) -> Optional[ChannelState]:
+        with self._states_lock:
+            state = self._states.get((thread_id, checkpoint_ns))
+            if state is not None:
+                self._states.move_to_end((thread_id, checkpoint_ns))
+            return state
+
+    def remember_state(self, thread_id: str, checkpoint_ns: str, state: ChannelState) -> None:
+        if deferred():
+            return  # async: 아직 읽지 못한 문서가 있는 중간 결과는 캐시하지 않음
+        with self._states_lock:
+            self._states[(thread_id, checkpoint_ns)] = state
+            self._states.move_to_end((thread_id, checkpoint_ns))
+            while len(self._states) > CHANNEL_STATE_CACHE_SIZE:
+                self._states.popitem(last=False)
+
+    def forget_thread(self, thread_id: str) -> None:
+        with self._states_lock:
+            for key in [k for k in self._states if k[0] == thread_id]:
+                del self._states[key]
+
+    def state_from_doc(self, thread_id: str, checkpoint_ns: str, state_doc: dict) -> ChannelState:
+        load_blob = self.saver._load_blob
+        seq = log_end(state_doc)
+        cached = self.cached_state(thread_id, checkpoint_ns)
+        if cached is not None and 0 < cached.seq <= seq and cached.seq >= state_doc.get("folded_upto", 0):
+            # 캐시된 상태 뒤의 항목만 적용 (보통 tail 만; 값이 None 이면 캐시된 메시지 그대로)
+            folded = self._fold_blobs(thread_id, checkpoint_ns, state_doc, seq,
+                                      start=OrderedDict.fromkeys(cached.messages), after=cached.seq)
+            messages = OrderedDict(
+                (message_id, cached.messages[message_id] if blob is None else load_blob(thread_id, blob))
+                for message_id, blob in folded.items()
+            )
+        else:
+            messages = OrderedDict(
+                (message_id, load_blob(thread_id, blob))
+                for message_id, blob in self._fold_blobs(thread_id, checkpoint_ns, state_doc, seq).items()
+            )
+        log = state_doc.get("messages") or {}
+        blobs = state_doc.get("blobs") or {}
+        blob_keys = set(blobs)
+        for pointer in (state_doc.get("segments") or {}).values():
+            blob_keys.update(pointer.get("blobs") or ())
+        return ChannelState(seq, messages, blob_keys, entries_bytes(log, blobs), len(log) + len(blobs))
+
+    def _channel_state(self, thread_id: str, checkpoint_ns: str) -> ChannelState:
+        """put 에서 쓰는 상태 (보통 get_tuple 에서 이미 캐시됨; 없으면 head 문서를 한 번 읽음)"""
+        state = self.cached_state(thread_id, checkpoint_ns)
+        if state is None:
+            state = self.state_from_doc(thread_id, checkpoint_ns,
+                                        read_doc(self.saver._head_doc(thread_id, checkpoint_ns)) or {})
+            self.remember_state(thread_id, checkpoint_ns, state)
+        return state
+
+    # ---------------------------------------------------------------------
+    # 쓰기: 바뀐 것만 스테이징
+    # ---------------------------------------------------------------------
+    def stage(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+              head_token: str, staged: StagedWrites) -> Tuple[dict, dict, ChannelState]:
+        """
+        바뀐 채널 값 / 새 메시지 로그만 head tail 에 merge 할 head 변경을 만듦 (체크포인트 문서는 채널 값 없이)
+        tail 이 segment_bytes 를 넘으면 같은 배치에서 세그먼트로 봉인. 반환: (히스토리 문서, head 변경, 커밋 뒤의 상태)
+        """
+        saver = self.saver
+        serializer = saver.serializer
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        state = self._channel_state(thread_id, checkpoint_ns)
+        tail_bytes = state.tail_bytes
+        delta_bytes = 0
+
+        def pack(blob: bytes, kind: str) -> Any:
+            # tail 에 쌓이는 값: 합계가 inline_max_bytes 를 넘으면 이후 값은 청크로
+            nonlocal tail_bytes, delta_bytes
+            value = saver._pack(thread_id, blob, kind, staged, force=tail_bytes + len(blob) > self.inline_max_bytes)
+            tail_bytes += inline_bytes([value])
+            delta_bytes += len(blob)
+            return value
+
+        versions = checkpoint["channel_versions"]
+        channels: Dict[str, Any] = {}
+        new_blobs: Dict[str, bytes] = {}
+        new_log: Dict[str, dict] = {}
+        seq = state.seq
+        messages = state.messages
+        message_seq = None
+        for channel, value in checkpoint["channel_values"].items():
+            channels[channel] = versions.get(channel)
+            if channel == MESSAGE_LOG_CHANNEL and isinstance(value, list):
+                base = None
+                prev = state.messages
+                if checkpoint_ns and seq == 0:
+                    # 새 서브그래프 ns: 부모(루트) 로그를 이어받고 달라진 것만 기록
+                    root = self.cached_state(thread_id, "")
+                    if root is not None and root.seq:
+                        base, prev = root.seq, root.messages
+                ops = diff_messages(prev, value)
+                if ops is None:
+                    if any(getattr(m, "id", None) is None for m in value):
+                        # 메시지 id 가 없으면 로그로 표현 불가 -> 일반 채널처럼 blob 으로 저장
+                        new_blobs[blob_key(channel, channels[channel])] = pack(serializer.dumps(value), "channel")
+                        continue
+                    ops = [("clear", None, None)] + [("add", m.id, m) for m in value]
+                if base is not None:
+                    seq += 1
+                    new_log[seq_key(seq)] = {"op": "base", "seq": base}
+                for op, message_id, message in ops:
+                    seq += 1
+                    entry: Dict[str, Any] = {"op": op}
+                    if message_id is not None:
+                        entry["id"] = message_id
+                    if op == "add":
+                        entry["value"] = pack(serializer.dumps(message), "message")
+                    new_log[seq_key(seq)] = entry
+                messages = OrderedDict((m.id, m) for m in value)
+                message_seq = seq
+                continue
+            key = blob_key(channel, channels[channel])
+            if key not in state.blob_keys:
+                new_blobs[key] = pack(serializer.dumps(value), "channel")
+
+        stripped = dict(checkpoint, channel_values={})
+        cp_blob = serializer.dumps(stripped)
+        ch_blob = serializer.dumps(channels)
+        mt_blob = serializer.dumps(metadata)
+        TRACER.annotate(thread_id=thread_id, payload_bytes=len(cp_blob) + len(ch_blob) + len(mt_blob) + delta_bytes)
+
+        doc_data = {
+            "layout": self.layout_version,
+            "storage": STORAGE_INCREMENTAL,
+            "checkpoint_id": checkpoint["id"],
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint": saver._pack(thread_id, cp_blob, "checkpoint", staged),
+            "channels": ch_blob,
+            "message_seq": message_seq,
+            "metadata": saver._pack(thread_id, mt_blob, "metadata", staged),
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "created_at": firestore.SERVER_TIMESTAMP,
+        }
+        # head 는 merge: tail(blobs / messages 로그)에는 새 항목만 추가
+        head = dict(doc_data, head_token=head_token)
+        tail_entries = state.tail_entries + len(new_blobs) + len(new_log)
+        if tail_bytes > self.segment_bytes or tail_entries > SEGMENT_MAX_ENTRIES:
+            self._stage_seal(staged, thread_id, checkpoint_ns, head, new_log, new_blobs)
+            tail_bytes = tail_entries = 0
+        else:
+            if new_blobs:
+                head["blobs"] = new_blobs
+            if new_log:
+                head["messages"] = new_log
+        return doc_data, head, ChannelState(seq, messages, state.blob_keys | new_blobs.keys(), tail_bytes, tail_entries)
+
+    def _stage_seal(self, staged: StagedWrites, thread_id: str, checkpoint_ns: str, head: dict,
+                    new_log: Dict[str, dict], new_blobs: Dict[str, Any]) -> None:
+        """head tail + 이번 put 의 새 항목을 세그먼트 문서 하나로 봉인하고 head 에는 포인터만 (tail 은 head 를 한 번 읽어 얻음)"""
+        current = read_doc(self.saver._head_doc(thread_id, checkpoint_ns)) or {}
+        old_log = current.get("messages") or {}
+        old_blobs = current.get("blobs") or {}
+        log = dict(old_log, **new_log)
+        blobs = dict(old_blobs, **new_blobs)
+        segment_id = uuid.uuid4().hex
+        staged.set(self.saver._segment_col(thread_id, staged.db).document(segment_id), {
+            "checkpoint_ns": checkpoint_ns,
+            "messages": log,
+            "blobs": blobs,
+            "created_at": firestore.SERVER_TIMESTAMP,
+        })
+        if old_log:
+            head["messages"] = {key: firestore.DELETE_FIELD for key in old_log}
+        if old_blobs:
+            head["blobs"] = {key: firestore.DELETE_FIELD for key in old_blobs}
+        head["segments"] = {segment_id: segment_pointer(log, blobs)}
@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Optional, Iterator, AsyncIterator, Sequence, Any, List, Tuple
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Iterator, AsyncIterator, Sequence, Any, List, Tuple
 
 from langchain_core.runnables import RunnableConfig
 from langchain_core.load import dumps as lc_dumps, loads as lc_loads
@@ -17,10 +20,36 @@ from langgraph.checkpoint.base import (
 
 from firebase_admin import firestore
 from google.cloud.firestore_v1.base_query import FieldFilter
-from coach_agent.services.firebase_admin_client import get_db
+from coach_agent.services.firebase_admin_client import get_async_db, get_db
+from coach_agent.services.checkpoint_archive import (
+    ARCHIVE_FIELD,
+    ArchiveStore,
+    aget_bundle,
+    aput_bundle,
+    build_archive_store,
+    bundle_key,
+    decode_bundle,
+    encode_bundle,
+)
+from coach_agent.services.checkpoint_cache import CACHE_MODES, CheckpointCache
+from coach_agent.services.checkpoint_io import GroupCommitter, StagedWrites, commit_staged, deferred, read_doc, resolve
+from coach_agent.services.checkpoint_chunks import ChunkStore, chunk_doc_id, is_chunk_ref
+from coach_agent.services.checkpoint_log import STORAGE_INCREMENTAL, ChannelState, inline_bytes
+from coach_agent.services.checkpoint_storage import IncrementalStorage
+from coach_agent.services.checkpoint_retention import PrunePlan, plan_prune
+from coach_agent.services.serde import get_checkpoint_serializer
+from coach_agent.settings import settings
+from coach_agent.observability.metrics import (
+    CHECKPOINT_ARCHIVE_OPS,
+    CHECKPOINT_DELETED_DOCS,
+    timed_operation,
+)
+from coach_agent.observability.tracing import TRACER
 
 # -------------------------------------------------------------------------
 # 1. 안전한 Serializer 정의
+#    기본값은 services/serde.py 의 CheckpointSerializer (형식 태그 + msgpack/zstd; settings.CHECKPOINT_SERDE)
+#    LangChainSerializer 는 예전 JSON 텍스트 형식 (serde=LangChainSerializer() 로 직접 지정할 때만 사용)
 # -------------------------------------------------------------------------
 class LangChainSerializer:
     def dumps(self, obj: Any) -> bytes:
@@ -34,6 +63,67 @@ class LangChainSerializer:
 # -------------------------------------------------------------------------
 # 2. 표준 FirestoreSaver 구현 (SerializerCompat 충돌 해결판)
 # -------------------------------------------------------------------------
+# 저장 구조 (LAYOUT_VERSION = 2)
+#   {collection}/{thread_id}                                  ← head: 루트 네임스페이스("")의 최신 체크포인트 사본 + pending writes
+#   {collection}/{thread_id}/heads/{checkpoint_ns}            ← head: 서브그래프 네임스페이스별
+#   {collection}/{thread_id}/checkpoints/{checkpoint_id}      ← 히스토리: 체크포인트 + pending writes (인라인 map)
+#
+# - /chat 마다 호출되는 "최신 체크포인트 + pending writes" 조회는 head 문서 get 한 번 (쿼리 / writes 스트림 없음)
+# - put: head + 히스토리 문서를 WriteBatch 한 번으로 기록
+# - put_writes: 쓰기 N개를 문서 N개 대신 히스토리 문서 / head 문서의 map 필드에 merge (문서 2개)
+#   head 의 pending_writes 는 checkpoint_id 별 map -> 늦게 도착한 예전 체크포인트의 쓰기가 최신 것과 섞이지 않음
+# - 예전 구조(LAYOUT_VERSION 1: head 없음, writes 서브컬렉션) 스레드는 첫 조회 때 head 를 만들어 이전 (migrate_thread)
+#   한꺼번에 이전하려면: python -m coach_agent.services.checkpoint_migrate
+#
+# 증분 저장 (settings.CHECKPOINT_STORAGE = "incremental", 기본값; 형식은 services/checkpoint_log.py, 읽기 / 쓰기는 services/checkpoint_storage.py)
+#   {collection}/{thread_id}/segments/{segment_id}            ← 봉인된 로그 세그먼트 (blobs / messages 로그 조각)
+#   체크포인트 문서에는 channel_values 를 뺀 체크포인트 + 채널별 버전 + 메시지 로그 위치만 저장하고,
+#   바뀐 채널 값 / 메시지 로그 항목은 head 문서의 tail(blobs / messages map)에 merge 로 추가 (put 당 문서 2개 그대로).
+#   tail 이 CHECKPOINT_SEGMENT_BYTES 를 넘으면 같은 WriteBatch 에서 세그먼트 문서로 봉인 -> head 에는 tail + 포인터만
+#   "full" 이면 예전처럼 체크포인트 전체를 저장 (두 형식은 문서의 storage 필드로 구분되어 섞여 있어도 읽힘)
+#
+# 청크 저장 (services/checkpoint_chunks.py; Firestore 문서 1MiB 제한)
+#   {collection}/{thread_id}/chunks/{blob_id}-{index:04d}   ← 큰 blob 을 나눈 조각 (put / put_writes 와 같은 WriteBatch 로 기록)
+#   증분 저장의 tail 은 봉인 전까지 값이 쌓이므로 tail 합계가 HEAD_INLINE_MAX_BYTES 를 넘으면 이후 값은 크기와 상관없이 청크로 저장.
+#
+# 최신 체크포인트 캐시 (services/checkpoint_cache.py; settings.CHECKPOINT_CACHE_MODE)
+#   put / put_writes 가 head 문서에 새 head_token 을 쓰고, 같은 값을 역직렬화된 체크포인트와 함께 캐시에 보관.
+#   get_tuple(최신) 은 verify 모드면 head_token 필드만 읽어 비교, trust 모드면 읽지 않고 캐시를 돌려줌
+#
+# async 경로 (aget_tuple / alist / aput / aput_writes)
+#   AsyncClient(get_async_db) 로 직접 await -> 체크포인트 I/O 에 스레드 풀을 쓰지 않음 (FastAPI 와 기본 executor 경쟁 없음)
+#   - 디코딩 / 스테이징 로직은 동기 경로와 공유: 중간에 필요한 문서는 read-ahead 로 모아 한 번에 await (services/checkpoint_io.py)
+#   - 그룹 커밋: 같은 스레드의 aput / aput_writes 가 동시에 진행 중이면 WriteBatch 하나로 합쳐 커밋 (GroupCommitter)
+#     LangGraph 는 put 이 끝나기 전에 새 체크포인트의 put_writes 를 보낼 수 있음 -> 히스토리 문서는 merge 로 쓰고,
+#     head 의 pending writes 를 지울 때는 이 프로세스가 이미 스테이징한 새 체크포인트의 쓰기를 같은 배치에서 다시 기록
+#   - alist 는 LIST_PAGE_SIZE 단위 페이지 쿼리로 필요한 만큼만 읽음
+#
+# 보존 정책 / 스레드 삭제 (settings.CHECKPOINT_KEEP_LAST, services/checkpoint_retention.py, services/checkpoint_gc.py)
+#   - prune_thread: 루트 ns 는 최신 keep 개 체크포인트만 남기고 끝난 서브그래프 ns / 참조 없는 값 / 청크를 삭제,
+#     메시지 로그의 오래된 부분은 접어서 새 세그먼트로 다시 기록 (계산은 checkpoint_retention.plan_prune)
+#     put 이 keep_last 번 쌓일 때마다 자동 실행 (async 는 백그라운드)
+#   - delete_thread / adelete_thread: 스레드 문서 아래 서브트리 전체 (checkpoints(+예전 writes), heads, segments, chunks) 삭제
+#   - 삭제는 DELETE_BATCH_SIZE 단위 WriteBatch, async 는 CHECKPOINT_GC_CONCURRENCY 개 배치를 동시에 커밋
+#
+# 아카이브 (services/checkpoint_archive.py; settings.CHECKPOINT_ARCHIVE_STORE)
+#   - archive_thread: 완료된 스레드의 서브트리 전체를 압축 번들 하나로 blob 저장소에 두고 Firestore 에서는 삭제,
+#     스레드 문서에는 {archived: {key, bytes, docs, checkpoint_id, archived_at}} 표시만 남김
+#   - get_tuple 이 표시를 만나면 번들을 Firestore 로 되돌린 뒤(rehydrate_thread) 평소처럼 조회 (드문 감사용 조회)
+#   - 완료 세션만 대상 (route_session 이 다시 열지 않음): 아카이브 도중의 put 은 고려하지 않음
+LAYOUT_VERSION = 2
+# 체크포인트 사본을 head 에 넣는 최대 크기 (Firestore 문서 1MiB 제한; 넘으면 head 에는 포인터만 두고 히스토리 문서를 한 번 더 읽음)
+HEAD_INLINE_MAX_BYTES = 700_000
+# 스레드(ns)별 최근 pending writes / 보존 정책 카운트 캐시 크기
+CHANNEL_STATE_CACHE_SIZE = 1024
+LIST_PAGE_SIZE = 20
+# 삭제 / 아카이브 복원 WriteBatch 하나에 넣는 문서 수 (Firestore 배치 제한 500)
+DELETE_BATCH_SIZE = 400
+
+
+def _write_key(task_id: str, idx: int) -> str:
+    return f"{task_id}_{idx:03d}"
+
+
 class FirestoreSaver(BaseCheckpointSaver):
     """
     LangGraph BaseCheckpointSaver 명세를 준수하는 Firestore 구현체.
@@ -44,75 +134,371 @@ class FirestoreSaver(BaseCheckpointSaver):
         *,
         collection: str = "langgraph_checkpoints",
         serde=None,
+        storage: Optional[str] = None,
+        chunk_bytes: Optional[int] = None,
+        segment_bytes: Optional[int] = None,
+        cache_mode: Optional[str] = None,
+        cache_max_bytes: Optional[int] = None,
+        keep_last: Optional[int] = None,
+        archive_store: Optional[ArchiveStore] = None,
+        db=None,
+        async_db=None,
     ) -> None:
         # ✅ [핵심 수정] 부모 클래스가 self.serde를 래핑해버리므로, 
         # 원본 시리얼라이저를 self.serializer라는 별도 변수에 보관합니다.
-        self.serializer = serde or LangChainSerializer()
+        self.serializer = serde or get_checkpoint_serializer()
         
         super().__init__(serde=self.serializer)
         
-        self.db = get_db()
+        self.db = db or get_db()
+        # AsyncClient 는 첫 async 호출 시점(이벤트 루프 안)에 생성 (AsyncFirestoreRepo 와 같은 방식)
+        self._adb = async_db
+        self.group_commit = GroupCommitter()
         self.collection = collection
+        self.storage = storage or settings.CHECKPOINT_STORAGE
+        # (thread_id, ns) -> (checkpoint_id, 쓰기 항목): 스레드별 가장 최근 체크포인트에 대해 스테이징한 pending writes
+        self._recent_writes: "OrderedDict[Tuple[str, str], Tuple[str, Dict[str, dict]]]" = OrderedDict()
+        self._states_lock = threading.Lock()
+        self.chunks = ChunkStore(chunk_bytes or settings.CHECKPOINT_CHUNK_BYTES)
+        self.segment_bytes = segment_bytes or settings.CHECKPOINT_SEGMENT_BYTES
+        self.incremental = IncrementalStorage(self, self.segment_bytes, HEAD_INLINE_MAX_BYTES, LAYOUT_VERSION)
+        self.cache_mode = cache_mode or settings.CHECKPOINT_CACHE_MODE
+        if self.cache_mode not in CACHE_MODES:
+            raise ValueError(f"지원하지 않는 CHECKPOINT_CACHE_MODE 입니다: {self.cache_mode!r} (가능: {', '.join(CACHE_MODES)})")
+        self.cache = None
+        if self.cache_mode != "off":
+            self.cache = CheckpointCache(cache_max_bytes or settings.CHECKPOINT_CACHE_MAX_BYTES)
+        # 보존 정책: 루트 ns put 이 keep_last 번 쌓일 때마다 prune_thread (0 이면 끄기)
+        self.keep_last = settings.CHECKPOINT_KEEP_LAST if keep_last is None else keep_last
+        self._puts_since_prune: "OrderedDict[str, int]" = OrderedDict()
+        self._prune_tasks: Dict[str, asyncio.Task] = {}
+        self.archive_store = archive_store if archive_store is not None else build_archive_store()
 
-    def _get_checkpoint_col(self, thread_id: str):
-        return self.db.collection(self.collection).document(thread_id).collection("checkpoints")
+    @property
+    def adb(self):
+        if self._adb is None:
+            self._adb = get_async_db()
+        return self._adb
 
-    # ---------------------------------------------------------------------
-    # (1) GET TUPLE
-    # ---------------------------------------------------------------------
-    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
-        thread_id = config["configurable"].get("thread_id")
-        checkpoint_id = config["configurable"].get("checkpoint_id")
-        
-        if not checkpoint_id:
-            checkpoint_id = config["configurable"].get("thread_ts")
+    # 문서 참조: db 를 주지 않으면 동기 클라이언트 (async 경로는 self.adb 를 넘김)
+    def _thread_doc(self, thread_id: str, db=None):
+        return (db or self.db).collection(self.collection).document(thread_id)
 
-        if not thread_id:
-            return None
+    def _get_checkpoint_col(self, thread_id: str, db=None):
+        return self._thread_doc(thread_id, db).collection("checkpoints")
 
-        col = self._get_checkpoint_col(thread_id)
+    def _head_doc(self, thread_id: str, checkpoint_ns: str = "", db=None):
+        if not checkpoint_ns:
+            return self._thread_doc(thread_id, db)
+        # 문서 ID 에 '/' 는 쓸 수 없음 (서브그래프 ns 는 'node:task_id|...' 형태)
+        return self._thread_doc(thread_id, db).collection("heads").document(checkpoint_ns.replace("/", "_"))
 
-        if checkpoint_id:
-            doc_ref = col.document(checkpoint_id)
-            snap = doc_ref.get()
-        else:
-            query = col.order_by("checkpoint_id", direction=firestore.Query.DESCENDING).limit(1)
-            docs = list(query.stream())
-            snap = docs[0] if docs else None
+    def _chunk_col(self, thread_id: str, db=None):
+        return self._thread_doc(thread_id, db).collection("chunks")
 
-        if not snap or not snap.exists:
-            return None
+    def _segment_col(self, thread_id: str, db=None):
+        return self._thread_doc(thread_id, db).collection("segments")
 
-        data = snap.to_dict()
-        
-        # Writes 조회
-        writes_col = snap.reference.collection("writes")
-        pending_writes: List[Tuple[str, Any, str]] = []
-        
-        for w_doc in writes_col.stream():
-            w_data = w_doc.to_dict()
-            pending_writes.append((
-                w_data["task_id"],
-                w_data["channel"],
-                # ✅ self.serde 대신 self.serializer 사용
-                self.serializer.loads(w_data["value"])
-            ))
+    def _latest_history_query(self, thread_id: str, db=None):
+        return self._get_checkpoint_col(thread_id, db).order_by("checkpoint_id", direction=firestore.Query.DESCENDING)
+
+    # ---------------------------------------------------------------------
+    # (0) 청크 저장: 큰 blob 은 조각 문서로 나누고 필드에는 참조만
+    # ---------------------------------------------------------------------
+    def _pack(self, thread_id: str, blob: bytes, kind: str, staged: StagedWrites, force: bool = False) -> Any:
+        """문서 필드에 넣을 값: 작으면 blob 그대로, 크면 (또는 force) 조각 문서를 staged 에 추가하고 참조 반환"""
+        # async 에서 다시 실행될 스테이징은 메트릭에 세지 않음
+        return self.chunks.pack(self._chunk_col(thread_id, staged.db), blob, kind, staged, force=force,
+                                counted=not deferred())
 
+    def _unpack(self, thread_id: str, value: Any) -> Any:
+        if not is_chunk_ref(value):
+            return value
+        blob = self.chunks.cached(value["blob_id"])
+        if blob is not None:
+            return blob
+        col = self._chunk_col(thread_id)
+        parts = [read_doc(col.document(chunk_doc_id(value["blob_id"], index))) for index in range(value["chunks"])]
+        if deferred():
+            return None  # async: 조각을 모두 모아서 한 번에 읽음
+        return self.chunks.assemble(thread_id, value, parts)
+
+    def _load_blob(self, thread_id: str, value: Any) -> Any:
+        # ✅ self.serde 대신 self.serializer 사용
+        blob = self._unpack(thread_id, value)
+        return None if blob is None else self.serializer.loads(blob)
+
+    def _decode_writes(self, thread_id: str, writes: dict) -> List[Tuple[str, Any, str]]:
+        items = sorted(writes.values(), key=lambda w: (w["task_id"], w["idx"]))
+        return [(w["task_id"], w["channel"], self._load_blob(thread_id, w["value"])) for w in items]
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, data: dict, pending_writes,
+                  state_doc: Optional[dict] = None) -> CheckpointTuple:
+        parent_id = data.get("parent_checkpoint_id")
+        if parent_id:
+            parent_config = {
+                "configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}
+            }
+        else:
+            parent_config = data.get("parent_config")  # 예전 구조 (thread_ts)
         return CheckpointTuple(
             config={
                 "configurable": {
                     "thread_id": thread_id,
                     "checkpoint_id": data["checkpoint_id"],
-                    "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+                    "checkpoint_ns": checkpoint_ns,
                 }
             },
             # ✅ self.serde 대신 self.serializer 사용
-            checkpoint=self.serializer.loads(data["checkpoint"]),
-            metadata=self.serializer.loads(data["metadata"]),
-            parent_config=data.get("parent_config"),
+            checkpoint=self._load_checkpoint(thread_id, checkpoint_ns, data, state_doc),
+            metadata=self._load_blob(thread_id, data["metadata"]),
+            parent_config=parent_config,
             pending_writes=pending_writes,
         )
 
+    @staticmethod
+    def _is_head(data: Optional[dict]) -> bool:
+        return bool(data) and data.get("layout") == LAYOUT_VERSION and "checkpoint_id" in data
+
+    # ---------------------------------------------------------------------
+    # (0) 채널 값 복원 (증분 저장: services/checkpoint_storage.py) / 최근 pending writes / 최신 체크포인트 캐시
+    # ---------------------------------------------------------------------
+    def _load_checkpoint(self, thread_id: str, checkpoint_ns: str, data: dict, state_doc: Optional[dict]) -> Checkpoint:
+        checkpoint = self._load_blob(thread_id, data["checkpoint"])
+        if data.get("storage") == STORAGE_INCREMENTAL:
+            checkpoint["channel_values"] = self.incremental.load_values(thread_id, checkpoint_ns, data, state_doc)
+        return checkpoint
+
+    def _note_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, entries: Dict[str, dict]) -> None:
+        key = (thread_id, checkpoint_ns)
+        with self._states_lock:
+            current = self._recent_writes.get(key)
+            if current is None or current[0] < checkpoint_id:  # 체크포인트 id(uuid6)는 시간순 정렬
+                current = self._recent_writes[key] = (checkpoint_id, {})
+            elif current[0] != checkpoint_id:
+                return  # 이전 체크포인트에 대한 늦은 쓰기
+            current[1].update(entries)
+            self._recent_writes.move_to_end(key)
+            while len(self._recent_writes) > CHANNEL_STATE_CACHE_SIZE:
+                self._recent_writes.popitem(last=False)
+
+    def _stage_head(self, staged: StagedWrites, thread_id: str, checkpoint_ns: str, checkpoint_id: str, head: dict) -> None:
+        """head merge (이전 체크포인트의 pending writes 삭제) + put 보다 먼저 스테이징된 이 체크포인트의 쓰기 다시 기록"""
+        ref = self._head_doc(thread_id, checkpoint_ns, staged.db)
+        staged.set(ref, dict(head, pending_writes=firestore.DELETE_FIELD), merge=True)
+        with self._states_lock:
+            current = self._recent_writes.get((thread_id, checkpoint_ns))
+            early = dict(current[1]) if current is not None and current[0] == checkpoint_id else None
+        if early:
+            staged.set(ref, {"pending_writes": {checkpoint_id: early}}, merge=True)
+
+    def _cache_entry(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]):
+        entry = self.cache.get((thread_id, checkpoint_ns))
+        if entry is None or (checkpoint_id and entry.checkpoint_id != checkpoint_id):
+            self.cache.record("miss")
+            return None
+        return entry
+
+    def _cache_result(self, thread_id: str, checkpoint_ns: str, entry, head_token: Optional[str]) -> Optional[CheckpointTuple]:
+        """verify 모드: head 문서의 head_token 과 같을 때만 캐시 사용 (다르면 다른 워커가 쓴 것)"""
+        if self.cache_mode == "verify" and head_token != entry.token:
+            self.cache.invalidate((thread_id, checkpoint_ns))
+            self.cache.record("stale")
+            return None
+        self.cache.record("hit")
+        return entry.to_tuple()
+
+    def _cached_head(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[CheckpointTuple]:
+        """캐시된 최신 체크포인트 (verify 모드면 head_token 만 읽어 다른 워커의 쓰기가 없었는지 확인)"""
+        entry = self._cache_entry(thread_id, checkpoint_ns, checkpoint_id)
+        if entry is None:
+            return None
+        head_token = None
+        if self.cache_mode == "verify":
+            snap = self._head_doc(thread_id, checkpoint_ns).get(field_paths=["head_token"])
+            head_token = snap.get("head_token") if snap.exists else None
+        return self._cache_result(thread_id, checkpoint_ns, entry, head_token)
+
+    async def _acached_head(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[CheckpointTuple]:
+        entry = self._cache_entry(thread_id, checkpoint_ns, checkpoint_id)
+        if entry is None:
+            return None
+        head_token = None
+        if self.cache_mode == "verify":
+            snap = await self._head_doc(thread_id, checkpoint_ns, self.adb).get(field_paths=["head_token"])
+            head_token = snap.get("head_token") if snap.exists else None
+        return self._cache_result(thread_id, checkpoint_ns, entry, head_token)
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        return self.cache.stats() if self.cache is not None else None
+
+    # ---------------------------------------------------------------------
+    # (1) GET TUPLE
+    # ---------------------------------------------------------------------
+    @staticmethod
+    def _parse_config(config: RunnableConfig) -> Tuple[Optional[str], str, Optional[str]]:
+        configurable = config["configurable"]
+        checkpoint_id = configurable.get("checkpoint_id") or configurable.get("thread_ts")
+        return configurable.get("thread_id"), configurable.get("checkpoint_ns", ""), checkpoint_id
+
+    @timed_operation("checkpoint.get_tuple")
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id, checkpoint_ns, checkpoint_id = self._parse_config(config)
+        if not thread_id:
+            return None
+
+        if self.cache is not None:
+            cached = self._cached_head(thread_id, checkpoint_ns, checkpoint_id)
+            if cached is not None:
+                return cached
+
+        if checkpoint_id:
+            found = self._get_by_id(thread_id, checkpoint_ns, checkpoint_id)
+            if found is None and not checkpoint_ns and self._is_archived(read_doc(self._thread_doc(thread_id))):
+                self.rehydrate_thread(thread_id)
+                return self._get_by_id(thread_id, checkpoint_ns, checkpoint_id)
+            return found
+
+        # 최신 체크포인트: head 문서 한 번 읽기
+        data = read_doc(self._head_doc(thread_id, checkpoint_ns))
+        if self._is_archived(data):
+            # 아카이브된 스레드 (드문 감사용 조회): 번들을 Firestore 로 되돌린 뒤 다시 조회
+            self.rehydrate_thread(thread_id)
+            return self.get_tuple(config)
+        if not self._is_head(data):
+            if checkpoint_ns:
+                return self._no_head(thread_id, checkpoint_ns)
+            migrated = self.migrate_thread(thread_id)
+            if migrated is None:
+                self._no_head(thread_id, checkpoint_ns)
+            return migrated
+        return self._from_head(thread_id, checkpoint_ns, data)
+
+    @timed_operation("checkpoint.get_tuple")
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id, checkpoint_ns, checkpoint_id = self._parse_config(config)
+        if not thread_id:
+            return None
+
+        if self.cache is not None:
+            cached = await self._acached_head(thread_id, checkpoint_ns, checkpoint_id)  # trust 모드는 I/O 없음
+            if cached is not None:
+                return cached
+
+        if checkpoint_id:
+            ref = self._get_checkpoint_col(thread_id, self.adb).document(checkpoint_id)
+            snap = await ref.get()
+            if not snap.exists:
+                if not checkpoint_ns and self._is_archived((await self._thread_doc(thread_id, self.adb).get()).to_dict()):
+                    await self.arehydrate_thread(thread_id)
+                    return await self.aget_tuple(config)
+                return None
+            data = snap.to_dict()
+            legacy = {}
+            if data.get("layout") != LAYOUT_VERSION:
+                legacy = {w.id: w.to_dict() async for w in ref.collection("writes").stream()}
+            return await resolve(self.adb, self._from_history, thread_id, checkpoint_ns, data, legacy)
+
+        snap = await self._head_doc(thread_id, checkpoint_ns, self.adb).get()
+        data = snap.to_dict() if snap.exists else None
+        if self._is_archived(data):
+            await self.arehydrate_thread(thread_id)
+            return await self.aget_tuple(config)
+        if not self._is_head(data):
+            if checkpoint_ns:
+                return self._no_head(thread_id, checkpoint_ns)
+            migrated = await self.amigrate_thread(thread_id)
+            if migrated is None:
+                self._no_head(thread_id, checkpoint_ns)
+            return migrated
+        return await resolve(self.adb, self._from_head, thread_id, checkpoint_ns, data)
+
+    def _no_head(self, thread_id: str, checkpoint_ns: str) -> None:
+        # 새 스레드 / 서브그래프 ns (실행마다 새로 생김): 첫 put 에서 head 를 다시 읽지 않도록 빈 상태 캐시
+        self.incremental.remember_state(thread_id, checkpoint_ns, ChannelState())
+        return None
+
+    def _from_head(self, thread_id: str, checkpoint_ns: str, data: dict) -> Optional[CheckpointTuple]:
+        pending_writes = self._decode_writes(thread_id, (data.get("pending_writes") or {}).get(data["checkpoint_id"], {}))
+        if data.get("storage") == STORAGE_INCREMENTAL:
+            # 다른 인스턴스가 쓴 내용이 있을 수 있으므로 최신 조회 때마다 캐시를 head 기준으로 갱신
+            self.incremental.remember_state(thread_id, checkpoint_ns, self.incremental.state_from_doc(thread_id, checkpoint_ns, data))
+            return self._to_tuple(thread_id, checkpoint_ns, data, pending_writes, state_doc=data)
+        if "checkpoint" not in data:
+            # 큰 체크포인트: head 에는 포인터만 있음
+            data = read_doc(self._get_checkpoint_col(thread_id).document(data["checkpoint_id"]))
+            if data is None:
+                return None
+        return self._to_tuple(thread_id, checkpoint_ns, data, pending_writes)
+
+    def _get_by_id(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Optional[CheckpointTuple]:
+        ref = self._get_checkpoint_col(thread_id).document(checkpoint_id)
+        data = read_doc(ref)
+        if data is None:
+            return None
+        legacy = {}
+        if data.get("layout") != LAYOUT_VERSION:
+            # 예전 구조: 체크포인트 문서 아래 writes 서브컬렉션 (문서 1개 = 쓰기 1개)
+            legacy = {w.id: w.to_dict() for w in ref.collection("writes").stream()}
+        return self._from_history(thread_id, checkpoint_ns, data, legacy)
+
+    def _from_history(self, thread_id: str, checkpoint_ns: str, data: dict, legacy_writes: dict) -> CheckpointTuple:
+        # 예전 구조 문서는 업그레이드 뒤 인라인으로 추가된 쓰기가 있으면 함께
+        pending_writes = (self._decode_writes(thread_id, legacy_writes)
+                          + self._decode_writes(thread_id, data.get("pending_writes") or {}))
+        return self._to_tuple(thread_id, checkpoint_ns, data, pending_writes)
+
+    # ---------------------------------------------------------------------
+    # (1-1) 예전 구조 이전
+    # ---------------------------------------------------------------------
+    @staticmethod
+    def _migration_head(data: dict, raw_writes: dict) -> dict:
+        head = {
+            "layout": LAYOUT_VERSION,
+            "checkpoint_id": data["checkpoint_id"],
+            "checkpoint_ns": "",
+            "parent_checkpoint_id": data.get("parent_checkpoint_id"),
+            "pending_writes": {data["checkpoint_id"]: raw_writes},
+            "created_at": firestore.SERVER_TIMESTAMP,
+        }
+        if len(data["checkpoint"]) + len(data["metadata"]) <= HEAD_INLINE_MAX_BYTES:
+            head["checkpoint"] = data["checkpoint"]
+            head["metadata"] = data["metadata"]
+        return head
+
+    @timed_operation("checkpoint.migrate")
+    def migrate_thread(self, thread_id: str) -> Optional[CheckpointTuple]:
+        """
+        head 가 없는 예전 구조 스레드의 최신 체크포인트로 head 문서를 만든다.
+        반환: 최신 체크포인트 (없으면 None)
+        """
+        docs = list(self._latest_history_query(thread_id).limit(1).stream())
+        if not docs:
+            return None
+        snap = docs[0]
+        data = snap.to_dict()
+        # 예전 writes 서브컬렉션 문서 ID 가 곧 인라인 map 키 ({task_id}_{idx:03d})
+        raw_writes = {w.id: w.to_dict() for w in snap.reference.collection("writes").stream()}
+        self._thread_doc(thread_id).set(self._migration_head(data, raw_writes))
+        print(f"   [Checkpoint] 예전 구조 스레드 이전 완료: {thread_id} (checkpoint={data['checkpoint_id']}, writes={len(raw_writes)})")
+        return self._to_tuple(thread_id, "", data, self._decode_writes(thread_id, raw_writes))
+
+    @timed_operation("checkpoint.migrate")
+    async def amigrate_thread(self, thread_id: str) -> Optional[CheckpointTuple]:
+        docs = [d async for d in self._latest_history_query(thread_id, self.adb).limit(1).stream()]
+        if not docs:
+            return None
+        snap = docs[0]
+        data = snap.to_dict()
+        raw_writes = {w.id: w.to_dict() async for w in snap.reference.collection("writes").stream()}
+        await self._thread_doc(thread_id, self.adb).set(self._migration_head(data, raw_writes))
+        print(f"   [Checkpoint] 예전 구조 스레드 이전 완료: {thread_id} (checkpoint={data['checkpoint_id']}, writes={len(raw_writes)})")
+        return await resolve(self.adb, self._from_history, thread_id, "", data, raw_writes)
+
+    def is_migrated(self, thread_id: str) -> bool:
+        """head 문서가 있는 (현재 구조) 스레드인지 (일괄 이전: services/checkpoint_migrate.py)"""
+        return self._is_head(read_doc(self._thread_doc(thread_id)))
+
     # ---------------------------------------------------------------------
     # (2) LIST
     # ---------------------------------------------------------------------
@@ -120,43 +506,85 @@ class FirestoreSaver(BaseCheckpointSaver):
         self,
         config: RunnableConfig,
         *,
+        filter: Optional[Dict[str, Any]] = None,
         before: Optional[RunnableConfig] = None,
         limit: Optional[int] = None,
     ) -> Iterator[CheckpointTuple]:
         thread_id = config["configurable"].get("thread_id")
         if not thread_id:
             return
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
 
-        col = self._get_checkpoint_col(thread_id)
-        query = col.order_by("checkpoint_id", direction=firestore.Query.DESCENDING)
-
+        query = self._latest_history_query(thread_id)
         if before:
             before_id = before["configurable"].get("checkpoint_id") or before["configurable"].get("thread_ts")
             if before_id:
                 query = query.where(filter=FieldFilter("checkpoint_id", "<", before_id))
 
-        if limit:
-            query = query.limit(limit)
-
+        count = 0
+        state_doc = None
         for doc in query.stream():
             data = doc.to_dict()
-            yield CheckpointTuple(
-                config={
-                    "configurable": {
-                        "thread_id": thread_id,
-                        "checkpoint_id": data["checkpoint_id"],
-                    }
-                },
-                # ✅ self.serde 대신 self.serializer 사용
-                checkpoint=self.serializer.loads(data["checkpoint"]),
-                metadata=self.serializer.loads(data["metadata"]),
-                parent_config=data.get("parent_config"),
-                pending_writes=[], 
-            )
+            # 히스토리는 네임스페이스 구분 없이 한 컬렉션 (예전 문서는 checkpoint_ns 필드 없음 = 루트)
+            if data.get("checkpoint_ns", "") != checkpoint_ns:
+                continue
+            if data.get("storage") == STORAGE_INCREMENTAL and state_doc is None:
+                state_doc = read_doc(self._head_doc(thread_id, checkpoint_ns)) or {}  # 증분 저장 값은 head 에 있으므로 한 번만 읽음
+            item = self._to_tuple(thread_id, checkpoint_ns, data, [], state_doc=state_doc)
+            if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            yield item
+            count += 1
+            if limit and count >= limit:
+                return
+
+    async def alist(
+        self,
+        config: RunnableConfig,
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """list 와 같은 결과를 LIST_PAGE_SIZE 단위 페이지로 읽으면서 바로 yield (소비한 만큼만 읽음)"""
+        thread_id = config["configurable"].get("thread_id")
+        if not thread_id:
+            return
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        before_id = None
+        if before:
+            before_id = before["configurable"].get("checkpoint_id") or before["configurable"].get("thread_ts")
+
+        count = 0
+        state_doc = None
+        while True:
+            query = self._latest_history_query(thread_id, self.adb)
+            if before_id:
+                query = query.where(filter=FieldFilter("checkpoint_id", "<", before_id))
+            page = 0
+            async for doc in query.limit(LIST_PAGE_SIZE).stream():
+                page += 1
+                data = doc.to_dict()
+                before_id = data["checkpoint_id"]
+                if data.get("checkpoint_ns", "") != checkpoint_ns:
+                    continue
+                if data.get("storage") == STORAGE_INCREMENTAL and state_doc is None:
+                    head = await self._head_doc(thread_id, checkpoint_ns, self.adb).get()
+                    state_doc = head.to_dict() or {}
+                item = await resolve(self.adb, self._to_tuple, thread_id, checkpoint_ns, data, [], state_doc)
+                if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                    continue
+                yield item
+                count += 1
+                if limit and count >= limit:
+                    return
+            if page < LIST_PAGE_SIZE:
+                return
 
     # ---------------------------------------------------------------------
     # (3) PUT
     # ---------------------------------------------------------------------
+    @timed_operation("checkpoint.put")
     def put(
         self,
         config: RunnableConfig,
@@ -164,102 +592,473 @@ class FirestoreSaver(BaseCheckpointSaver):
         metadata: CheckpointMetadata,
         new_versions: ChannelVersions,
     ) -> RunnableConfig:
-        thread_id = config["configurable"].get("thread_id")
-        checkpoint_id = checkpoint["id"]
+        head_token = uuid.uuid4().hex
+        staged, state = self._stage_put(config, checkpoint, metadata, head_token, self.db)
+        commit_staged(staged)
+        new_config = self._put_done(config, checkpoint, metadata, head_token, state)
+        thread_id = self._prune_due(config)
+        if thread_id:
+            try:
+                self.prune_thread(thread_id)
+            except Exception as e:
+                print(f"⚠️ [Checkpoint] 보존 정책 적용 실패: thread={thread_id}: {e}")
+        return new_config
 
-        if not thread_id:
-             raise ValueError("FirestoreSaver.put: 'thread_id'가 config에 없습니다.")
+    @timed_operation("checkpoint.put")
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        head_token = uuid.uuid4().hex
+        staged, state = await resolve(self.adb, self._stage_put, config, checkpoint, metadata, head_token, self.adb)
+        await self.group_commit.commit(config["configurable"]["thread_id"], staged)
+        new_config = self._put_done(config, checkpoint, metadata, head_token, state)
+        thread_id = self._prune_due(config)
+        if thread_id and thread_id not in self._prune_tasks:
+            # 턴 응답을 기다리게 하지 않도록 백그라운드로
+            self._prune_tasks[thread_id] = asyncio.get_running_loop().create_task(self._aprune_quietly(thread_id))
+        return new_config
+
+    def _stage_put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   head_token: str, db) -> Tuple[StagedWrites, Optional[ChannelState]]:
+        if not config["configurable"].get("thread_id"):
+            raise ValueError("FirestoreSaver.put: 'thread_id'가 config에 없습니다.")
+        staged = StagedWrites(db)
+        if self.storage == STORAGE_INCREMENTAL:
+            return staged, self._stage_incremental(config, checkpoint, metadata, head_token, staged)
+        self._stage_full(config, checkpoint, metadata, head_token, staged)
+        return staged, None
+
+    def _put_done(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                  head_token: str, state: Optional[ChannelState]) -> RunnableConfig:
+        """커밋이 성공한 뒤에만 캐시 반영"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        new_config = {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_id": checkpoint["id"],
+                "checkpoint_ns": checkpoint_ns,
+            }
+        }
+        if state is not None:
+            self.incremental.remember_state(thread_id, checkpoint_ns, state)
+        if self.cache is not None:
+            parent_id = config["configurable"].get("checkpoint_id")
+            parent_config = {
+                "configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}
+            } if parent_id else None
+            self.cache.put_checkpoint((thread_id, checkpoint_ns), head_token, new_config, checkpoint, metadata, parent_config)
+        return new_config
+
+    def _stage_full(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                    head_token: str, staged: StagedWrites) -> None:
+        """체크포인트 전체를 히스토리 + head 문서에 기록"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = checkpoint["id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
 
-        col = self._get_checkpoint_col(thread_id)
-        
         # ✅ self.serde 대신 self.serializer 사용 (여기서 에러 해결!)
-        cp_bytes = self.serializer.dumps(checkpoint)
-        mt_bytes = self.serializer.dumps(metadata)
+        cp_blob = self.serializer.dumps(checkpoint)
+        mt_blob = self.serializer.dumps(metadata)
+        TRACER.annotate(thread_id=thread_id, payload_bytes=len(cp_blob) + len(mt_blob))
 
+        cp_value = self._pack(thread_id, cp_blob, "checkpoint", staged)
+        mt_value = self._pack(thread_id, mt_blob, "metadata", staged)
         doc_data = {
+            "layout": LAYOUT_VERSION,
             "checkpoint_id": checkpoint_id,
-            "checkpoint": cp_bytes.decode("utf-8"),
-            "metadata": mt_bytes.decode("utf-8"),
-            "parent_config": config.get("configurable", {}).get("thread_ts"),
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint": cp_value,
+            "metadata": mt_value,
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
             "created_at": firestore.SERVER_TIMESTAMP,
         }
+        # 이전 체크포인트의 pending writes / 증분 저장 필드는 지우고, blobs / messages 로그는 유지
+        # (증분 저장으로 쓴 예전 히스토리 체크포인트가 계속 읽히도록 merge)
+        head = dict(doc_data, storage=firestore.DELETE_FIELD, channels=firestore.DELETE_FIELD,
+                    message_seq=firestore.DELETE_FIELD, head_token=head_token)
+        if inline_bytes([cp_value, mt_value]) > HEAD_INLINE_MAX_BYTES:
+            head["checkpoint"] = head["metadata"] = firestore.DELETE_FIELD
 
-        col.document(checkpoint_id).set(doc_data)
+        staged.set(self._get_checkpoint_col(thread_id, staged.db).document(checkpoint_id), doc_data, merge=True)
+        self._stage_head(staged, thread_id, checkpoint_ns, checkpoint_id, head)
 
-        return {
-            "configurable": {
-                "thread_id": thread_id,
-                "checkpoint_id": checkpoint_id,
-            }
-        }
+    def _stage_incremental(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                           head_token: str, staged: StagedWrites) -> ChannelState:
+        """바뀐 채널 값 / 새 메시지 로그만 기록 (services/checkpoint_storage.py). 반환: 커밋 뒤의 상태"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        doc_data, head, state = self.incremental.stage(config, checkpoint, metadata, head_token, staged)
+        staged.set(self._get_checkpoint_col(thread_id, staged.db).document(checkpoint["id"]), doc_data, merge=True)
+        self._stage_head(staged, thread_id, checkpoint_ns, checkpoint["id"], head)
+        return state
 
     # ---------------------------------------------------------------------
     # (4) PUT WRITES
     # ---------------------------------------------------------------------
+    @timed_operation("checkpoint.put_writes")
     def put_writes(
         self,
         config: RunnableConfig,
         writes: Sequence[tuple[str, Any]], 
         task_id: str, 
     ) -> None:
-        thread_id = config["configurable"].get("thread_id")
-        checkpoint_id = config["configurable"].get("checkpoint_id")
+        if not config["configurable"].get("thread_id") or not config["configurable"].get("checkpoint_id"):
+            return
+        head_token = uuid.uuid4().hex
+        commit_staged(self._stage_writes(config, writes, task_id, head_token, self.db))
+        self._writes_done(config, writes, task_id, head_token)
 
-        if not thread_id or not checkpoint_id:
+    @timed_operation("checkpoint.put_writes")
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+    ) -> None:
+        if not config["configurable"].get("thread_id") or not config["configurable"].get("checkpoint_id"):
             return
+        head_token = uuid.uuid4().hex
+        # 쓰기 스테이징은 읽기가 없으므로 resolve 없이 바로
+        staged = self._stage_writes(config, writes, task_id, head_token, self.adb)
+        await self.group_commit.commit(config["configurable"]["thread_id"], staged)
+        self._writes_done(config, writes, task_id, head_token)
 
-        writes_col = self._get_checkpoint_col(thread_id).document(checkpoint_id).collection("writes")
-        batch = self.db.batch()
-        
+    def _stage_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                      head_token: str, db) -> StagedWrites:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+
+        staged = StagedWrites(db)
+        entries = {}
+        payload_bytes = 0
         for idx, (channel, value) in enumerate(writes):
-            write_doc_ref = writes_col.document(f"{task_id}_{idx:03d}")
-            
             # ✅ self.serde 대신 self.serializer 사용
-            val_bytes = self.serializer.dumps(value)
-            
-            batch.set(write_doc_ref, {
+            val_blob = self.serializer.dumps(value)
+            payload_bytes += len(val_blob)
+            entries[_write_key(task_id, idx)] = {
                 "task_id": task_id,
                 "channel": channel,
-                "value": val_bytes.decode("utf-8"),
-                "idx": idx
+                "value": self._pack(thread_id, val_blob, "write", staged),  # 큰 값은 청크 (히스토리 / head 가 같은 참조 공유)
+                "idx": idx,
+            }
+        TRACER.annotate(thread_id=thread_id, writes=len(writes), payload_bytes=payload_bytes)
+        self._note_writes(thread_id, checkpoint_ns, checkpoint_id, entries)
+
+        # 쓰기 개수와 상관없이 문서 2개 (히스토리 + head) 를 한 번에 merge
+        staged.set(self._get_checkpoint_col(thread_id, db).document(checkpoint_id), {"pending_writes": entries}, merge=True)
+        staged.set(self._head_doc(thread_id, checkpoint_ns, db),
+                   {"pending_writes": {checkpoint_id: entries}, "head_token": head_token}, merge=True)
+        return staged
+
+    def _writes_done(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, head_token: str) -> None:
+        if self.cache is not None:
+            configurable = config["configurable"]
+            self.cache.add_writes((configurable["thread_id"], configurable.get("checkpoint_ns", "")), configurable["checkpoint_id"], head_token, {
+                _write_key(task_id, idx): (task_id, channel, value, idx) for idx, (channel, value) in enumerate(writes)
             })
-            
-        batch.commit()
 
     # ---------------------------------------------------------------------
-    # (5) Async Wrappers
+    # (5) 보존 정책: 최신 keep 개 루트 체크포인트만 남기고 정리
     # ---------------------------------------------------------------------
-    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
-        return await asyncio.to_thread(self.get_tuple, config)
+    def _prune_due(self, config: RunnableConfig) -> Optional[str]:
+        """루트 ns put 이 keep_last 번 쌓일 때마다 정리할 스레드 반환 (프로세스별 카운트)"""
+        if self.keep_last <= 0 or config["configurable"].get("checkpoint_ns", ""):
+            return None
+        thread_id = config["configurable"]["thread_id"]
+        with self._states_lock:
+            count = self._puts_since_prune.pop(thread_id, 0) + 1
+            if count >= self.keep_last:
+                return thread_id
+            self._puts_since_prune[thread_id] = count
+            while len(self._puts_since_prune) > CHANNEL_STATE_CACHE_SIZE:
+                self._puts_since_prune.popitem(last=False)
+        return None
 
-    async def alist(
-        self,
-        config: RunnableConfig,
-        *,
-        before: Optional[RunnableConfig] = None,
-        limit: Optional[int] = None,
-    ) -> AsyncIterator[CheckpointTuple]:
-        loop = asyncio.get_running_loop()
-        iterator = await loop.run_in_executor(None, lambda: list(self.list(config, before=before, limit=limit)))
-        for item in iterator:
-            yield item
+    async def _aprune_quietly(self, thread_id: str) -> None:
+        try:
+            await self.aprune_thread(thread_id)
+        except Exception as e:
+            print(f"⚠️ [Checkpoint] 보존 정책 적용 실패: thread={thread_id}: {e}")
+        finally:
+            self._prune_tasks.pop(thread_id, None)
 
-    async def aput(
-        self,
-        config: RunnableConfig,
-        checkpoint: Checkpoint,
-        metadata: CheckpointMetadata,
-        new_versions: ChannelVersions,
-    ) -> RunnableConfig:
-        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
-    
-    async def aput_writes(
-        self,
-        config: RunnableConfig,
-        writes: Sequence[tuple[str, Any]],
-        task_id: str,
-    ) -> None:
-        return await asyncio.to_thread(self.put_writes, config, writes, task_id)
+    def _plan_prune(self, root_head: Optional[dict], history: List[Tuple[str, dict]], heads: Dict[str, dict],
+                    segments: Dict[str, dict], keep: Optional[int]) -> PrunePlan:
+        return plan_prune(root_head, history, heads, segments, self.keep_last if keep is None else keep,
+                          loads=self.serializer.loads, segment_bytes=self.segment_bytes, layout_version=LAYOUT_VERSION)
+
+    def _stage_prune(self, thread_id: str, plan: PrunePlan, db) -> StagedWrites:
+        """새 세그먼트 + 루트 head 변경(포인터 / tail) + 남는 세그먼트의 값 삭제를 한 배치로 (중간에 실패해도 head 는 온전한 로그를 가리킴)"""
+        staged = StagedWrites(db)
+        col = self._segment_col(thread_id, db)
+        for segment_id, doc in plan.segment_writes.items():
+            staged.set(col.document(segment_id), dict(doc, created_at=firestore.SERVER_TIMESTAMP))
+        if plan.head_patch:
+            staged.set(self._thread_doc(thread_id, db), plan.head_patch, merge=True)
+        for segment_id, patch in plan.segment_patches.items():
+            staged.set(col.document(segment_id), patch, merge=True)
+        return staged
+
+    @timed_operation("checkpoint.prune")
+    def prune_thread(self, thread_id: str, keep: Optional[int] = None) -> int:
+        """
+        보존 정책 적용: 루트 ns 는 최신 keep 개(기본 keep_last; 최소 1 = head) 체크포인트만 남김
+        반환: 삭제한 문서 수
+        """
+        col = self._get_checkpoint_col(thread_id)
+        heads_col = self._thread_doc(thread_id).collection("heads")
+        segment_col = self._segment_col(thread_id)
+        segments = {snap.id: snap.to_dict() for snap in segment_col.stream()}
+        history = [(snap.id, snap.to_dict()) for snap in col.stream()]
+        heads = {snap.id: snap.to_dict() for snap in heads_col.stream()}
+        plan = self._plan_prune(read_doc(self._thread_doc(thread_id)), history, heads, segments, keep)
+        refs = [col.document(doc_id) for doc_id in plan.checkpoints] + [heads_col.document(h) for h in plan.heads]
+        for doc_id in plan.legacy:
+            refs += col.document(doc_id).collection("writes").list_documents()
+        # 순서: 히스토리 / 서브그래프 head -> 루트 head / 세그먼트 정리 -> 남은 세그먼트 / 청크 (중간에 실패해도 남은 체크포인트는 읽힘)
+        deleted = self._delete_docs(refs, "prune")
+        staged = self._stage_prune(thread_id, plan, self.db)
+        if staged.ops:
+            commit_staged(staged)
+        chunk_col = self._chunk_col(thread_id)
+        garbage = [segment_col.document(s) for s in plan.segments] + [chunk_col.document(c) for c in plan.chunks]
+        return deleted + self._delete_docs(garbage, "prune")
+
+    @timed_operation("checkpoint.prune")
+    async def aprune_thread(self, thread_id: str, keep: Optional[int] = None) -> int:
+        col = self._get_checkpoint_col(thread_id, self.adb)
+        heads_col = self._thread_doc(thread_id, self.adb).collection("heads")
+        segment_col = self._segment_col(thread_id, self.adb)
+        segments = {snap.id: snap.to_dict() async for snap in segment_col.stream()}
+        history = [(snap.id, snap.to_dict()) async for snap in col.stream()]
+        heads = {snap.id: snap.to_dict() async for snap in heads_col.stream()}
+        head_snap = await self._thread_doc(thread_id, self.adb).get()
+        plan = self._plan_prune(head_snap.to_dict() if head_snap.exists else None, history, heads, segments, keep)
+        refs = [col.document(doc_id) for doc_id in plan.checkpoints] + [heads_col.document(h) for h in plan.heads]
+        for doc_id in plan.legacy:
+            refs += [ref async for ref in col.document(doc_id).collection("writes").list_documents()]
+        deleted = await self._adelete_docs(refs, "prune")
+        staged = self._stage_prune(thread_id, plan, self.adb)
+        if staged.ops:
+            await self.group_commit.commit(thread_id, staged)
+        chunk_col = self._chunk_col(thread_id, self.adb)
+        garbage = [segment_col.document(s) for s in plan.segments] + [chunk_col.document(c) for c in plan.chunks]
+        return deleted + await self._adelete_docs(garbage, "prune")
+
+    # ---------------------------------------------------------------------
+    # (6) 스레드 삭제: 스레드 문서 아래 서브트리 전체
+    # ---------------------------------------------------------------------
+    def _delete_docs(self, refs: List[Any], reason: str) -> int:
+        for start in range(0, len(refs), DELETE_BATCH_SIZE):
+            batch = self.db.batch()
+            for ref in refs[start:start + DELETE_BATCH_SIZE]:
+                batch.delete(ref)
+            batch.commit()
+        CHECKPOINT_DELETED_DOCS.inc(len(refs), reason=reason)
+        return len(refs)
+
+    async def _adelete_docs(self, refs: List[Any], reason: str) -> int:
+        """DELETE_BATCH_SIZE 단위 배치를 CHECKPOINT_GC_CONCURRENCY 개까지 동시에 커밋"""
+        semaphore = asyncio.Semaphore(max(1, settings.CHECKPOINT_GC_CONCURRENCY))
+
+        async def commit(chunk: List[Any]) -> None:
+            async with semaphore:
+                batch = self.adb.batch()
+                for ref in chunk:
+                    batch.delete(ref)
+                await batch.commit()
+
+        await asyncio.gather(*(commit(refs[i:i + DELETE_BATCH_SIZE]) for i in range(0, len(refs), DELETE_BATCH_SIZE)))
+        CHECKPOINT_DELETED_DOCS.inc(len(refs), reason=reason)
+        return len(refs)
+
+    def _forget_thread(self, thread_id: str) -> None:
+        """삭제된 스레드의 프로세스 내 상태 / 캐시 제거"""
+        with self._states_lock:
+            for key in [k for k in self._recent_writes if k[0] == thread_id]:
+                del self._recent_writes[key]
+            self._puts_since_prune.pop(thread_id, None)
+        self.incremental.forget_thread(thread_id)
+        if self.cache is not None:
+            self.cache.invalidate_thread(thread_id)
+
+    @timed_operation("checkpoint.delete_thread")
+    def delete_thread(self, thread_id: str) -> None:
+        thread = self._thread_doc(thread_id)
+        refs = []
+        for snap in thread.collection("checkpoints").select(["layout"]).stream():
+            refs.append(snap.reference)
+            if (snap.to_dict() or {}).get("layout") != LAYOUT_VERSION:
+                refs += snap.reference.collection("writes").list_documents()
+        for name in ("heads", "segments", "chunks"):
+            refs += thread.collection(name).list_documents()
+        # 스레드(head) 문서는 마지막: 중간에 실패해도 list_documents 로 다시 찾을 수 있음
+        self._delete_docs(refs, "thread")
+        self._delete_docs([thread], "thread")
+        self._forget_thread(thread_id)
+
+    @timed_operation("checkpoint.delete_thread")
+    async def adelete_thread(self, thread_id: str) -> None:
+        thread = self._thread_doc(thread_id, self.adb)
+        refs = []
+        async for snap in thread.collection("checkpoints").select(["layout"]).stream():
+            refs.append(snap.reference)
+            if (snap.to_dict() or {}).get("layout") != LAYOUT_VERSION:
+                refs += [ref async for ref in snap.reference.collection("writes").list_documents()]
+        for name in ("heads", "segments", "chunks"):
+            refs += [ref async for ref in thread.collection(name).list_documents()]
+        await self._adelete_docs(refs, "thread")
+        await self._adelete_docs([thread], "thread")
+        self._forget_thread(thread_id)
+
+
+    # ---------------------------------------------------------------------
+    # (7) 아카이브: 완료된 스레드를 압축 번들로 blob 저장소에 옮기고, 조회 때 되돌림
+    # ---------------------------------------------------------------------
+    @staticmethod
+    def _is_archived(data: Optional[dict]) -> bool:
+        return data is not None and ARCHIVE_FIELD in data
+
+    def _require_archive(self) -> ArchiveStore:
+        if self.archive_store is None:
+            raise RuntimeError("아카이브된 체크포인트 스레드를 다루려면 CHECKPOINT_ARCHIVE_STORE 설정이 필요합니다.")
+        return self.archive_store
+
+    def _archive_marker(self, thread_id: str, head: dict, data: bytes, docs: int) -> dict:
+        return {ARCHIVE_FIELD: {
+            "key": bundle_key(self.collection, thread_id),
+            "bytes": len(data),
+            "docs": docs,
+            "checkpoint_id": head.get("checkpoint_id"),
+            "archived_at": firestore.SERVER_TIMESTAMP,
+        }}
+
+    def _bundle_refs(self, thread_id: str, bundle: Dict[str, Any], db) -> List[Tuple[Any, dict]]:
+        """번들 문서 -> (참조, 데이터); 스레드 문서("")는 마지막 (중간에 실패해도 표시가 남아 다시 복원)"""
+        thread = self._thread_doc(thread_id, db)
+        items = [(db.document(f"{thread.path}/{path}"), data) for path, data in bundle["docs"].items() if path]
+        return items + [(thread, bundle["docs"][""])]
+
+    @timed_operation("checkpoint.archive")
+    def archive_thread(self, thread_id: str) -> int:
+        """
+        스레드 서브트리를 번들 하나로 blob 저장소에 옮기고 스레드 문서에는 archived 표시만 남김
+        반환: 옮긴 문서 수 (스레드가 없거나 이미 아카이브되었으면 0)
+        """
+        store = self._require_archive()
+        thread = self._thread_doc(thread_id)
+        head = read_doc(thread)
+        if head is None or self._is_archived(head):
+            return 0
+        docs: Dict[str, dict] = {"": head}
+        refs = []
+        for name in ("checkpoints", "heads", "segments", "chunks"):
+            for snap in thread.collection(name).stream():
+                docs[f"{name}/{snap.id}"] = snap.to_dict()
+                refs.append(snap.reference)
+                if name == "checkpoints" and snap.to_dict().get("layout") != LAYOUT_VERSION:
+                    for w in snap.reference.collection("writes").stream():
+                        docs[f"{name}/{snap.id}/writes/{w.id}"] = w.to_dict()
+                        refs.append(w.reference)
+        data = encode_bundle(thread_id, docs)
+        store.put(bundle_key(self.collection, thread_id), data)
+        # 표시를 먼저 기록: 이후 삭제가 중간에 실패해도 조회는 번들에서 복원
+        thread.set(self._archive_marker(thread_id, head, data, len(docs)))
+        self._delete_docs(refs, "archive")
+        self._forget_thread(thread_id)
+        CHECKPOINT_ARCHIVE_OPS.inc(op="archive")
+        return len(docs)
+
+    @timed_operation("checkpoint.archive")
+    async def aarchive_thread(self, thread_id: str) -> int:
+        store = self._require_archive()
+        thread = self._thread_doc(thread_id, self.adb)
+        head_snap = await thread.get()
+        head = head_snap.to_dict() if head_snap.exists else None
+        if head is None or self._is_archived(head):
+            return 0
+        docs: Dict[str, dict] = {"": head}
+        refs = []
+        for name in ("checkpoints", "heads", "segments", "chunks"):
+            async for snap in thread.collection(name).stream():
+                docs[f"{name}/{snap.id}"] = snap.to_dict()
+                refs.append(snap.reference)
+                if name == "checkpoints" and snap.to_dict().get("layout") != LAYOUT_VERSION:
+                    async for w in snap.reference.collection("writes").stream():
+                        docs[f"{name}/{snap.id}/writes/{w.id}"] = w.to_dict()
+                        refs.append(w.reference)
+        data = encode_bundle(thread_id, docs)
+        await aput_bundle(store, bundle_key(self.collection, thread_id), data)
+        await thread.set(self._archive_marker(thread_id, head, data, len(docs)))
+        await self._adelete_docs(refs, "archive")
+        self._forget_thread(thread_id)
+        CHECKPOINT_ARCHIVE_OPS.inc(op="archive")
+        return len(docs)
+
+    @timed_operation("checkpoint.rehydrate")
+    def rehydrate_thread(self, thread_id: str) -> int:
+        """
+        번들을 Firestore 로 되돌림 (번들은 감사용으로 남겨 둠). 반환: 복원한 문서 수
+        - 스레드 문서에 표시가 없어도 (GC 가 지운 뒤) 번들이 있으면 복원
+        """
+        store = self._require_archive()
+        head = read_doc(self._thread_doc(thread_id))
+        if head is not None and not self._is_archived(head):
+            return 0
+        key = (head or {}).get(ARCHIVE_FIELD, {}).get("key") or bundle_key(self.collection, thread_id)
+        data = store.get(key)
+        if data is None:
+            if head is not None:
+                raise RuntimeError(f"아카이브 번들이 없습니다: thread={thread_id} key={key}")
+            return 0
+        items = self._bundle_refs(thread_id, decode_bundle(data), self.db)
+        for start in range(0, len(items), DELETE_BATCH_SIZE):
+            batch = self.db.batch()
+            for ref, doc in items[start:start + DELETE_BATCH_SIZE]:
+                batch.set(ref, doc)
+            batch.commit()
+        self._forget_thread(thread_id)
+        CHECKPOINT_ARCHIVE_OPS.inc(op="rehydrate")
+        print(f"♻️ [Checkpoint] 아카이브 복원: thread={thread_id} docs={len(items)}")
+        return len(items)
+
+    @timed_operation("checkpoint.rehydrate")
+    async def arehydrate_thread(self, thread_id: str) -> int:
+        store = self._require_archive()
+        snap = await self._thread_doc(thread_id, self.adb).get()
+        head = snap.to_dict() if snap.exists else None
+        if head is not None and not self._is_archived(head):
+            return 0
+        key = (head or {}).get(ARCHIVE_FIELD, {}).get("key") or bundle_key(self.collection, thread_id)
+        data = await aget_bundle(store, key)
+        if data is None:
+            if head is not None:
+                raise RuntimeError(f"아카이브 번들이 없습니다: thread={thread_id} key={key}")
+            return 0
+        items = self._bundle_refs(thread_id, decode_bundle(data), self.adb)
+        for start in range(0, len(items), DELETE_BATCH_SIZE):
+            batch = self.adb.batch()
+            for ref, doc in items[start:start + DELETE_BATCH_SIZE]:
+                batch.set(ref, doc)
+            await batch.commit()
+        self._forget_thread(thread_id)
+        CHECKPOINT_ARCHIVE_OPS.inc(op="rehydrate")
+        print(f"♻️ [Checkpoint] 아카이브 복원: thread={thread_id} docs={len(items)}")
+        return len(items)
+
+
+# 인스턴스 생성 (REPO_BACKEND=sqlite 면 같은 명세의 SqliteSaver; services/sqlite_checkpointer.py)
+def build_checkpointer() -> BaseCheckpointSaver:
+    if settings.REPO_BACKEND == "sqlite":
+        from coach_agent.services.sqlite_checkpointer import SqliteSaver
+        return SqliteSaver()
+    return FirestoreSaver()
 
-# 인스턴스 생성
-firestore_checkpointer = FirestoreSaver()
\ No newline at end of file
+checkpointer = build_checkpointer()
+firestore_checkpointer = checkpointer  # 예전 import 경로 호환
@@ -1,9 +1,10 @@
 # coach_agent/services/firebase_admin_client.py
 from __future__ import annotations
 import os, firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
+from coach_agent.settings import settings
 
-def get_db():
+def _init_app():
     if not firebase_admin._apps:
         key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "firebase_key.json")
         try:
@@ -11,4 +12,24 @@ def get_db():
         except Exception:
             cred = credentials.ApplicationDefault()
         firebase_admin.initialize_app(cred)
+
+def get_db():
+    if settings.REPO_BACKEND == "memory":
+        # 자격 증명 없이 실행 (테스트 / 벤치마크 / 프로파일링용 in-memory 클라이언트)
+        from coach_agent.services.memory_firestore import get_memory_db
+        return get_memory_db()
+    _init_app()
     return firestore.client()
+
+def get_async_db():
+    """
+    asyncio 네이티브 Firestore 클라이언트 (google.cloud.firestore.AsyncClient).
+    - FastAPI 이벤트 루프를 막지 않고 I/O 대기 (AsyncFirestoreRepo에서 사용)
+    - firebase_admin 내부에서 앱별로 캐시되므로 여러 번 호출해도 같은 클라이언트를 반환
+    - REPO_BACKEND=memory 면 get_db() 와 저장소를 공유하는 in-memory AsyncClient
+    """
+    if settings.REPO_BACKEND == "memory":
+        from coach_agent.services.memory_firestore import get_memory_async_db
+        return get_memory_async_db()
+    _init_app()
+    return firestore_async.client()
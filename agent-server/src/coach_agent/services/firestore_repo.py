@@ -158,6 +158,7 @@ class FirestoreRepo(Repo):
                 "last_activity_at": new_created_at,
                 "checkpoint": {"step_index": 0},
                 "state": {},
+                "drawer_visible": True,  # 서랍 목록 서버 측 필터용 (중도포기 시 False)
             }
             
             # WEEKLY 세션일 때만 'is_current_program'(현재 프로그램 세션인지/리셋 시 중요 필드) 추가
@@ -284,6 +285,7 @@ class FirestoreRepo(Repo):
             _sessions_col(user_id).document(s["id"]).update({
                 "status": "ended",
                 "result": "abandoned",
+                "drawer_visible": False,
                 "ended_at": firestore.SERVER_TIMESTAMP
             })
             print(f"Session {s['id']} has been closed (abandoned) due to inactivity: 주간 상담 미완료 상태에서 24시간 이상 21일 미만 미접속")
@@ -0,0 +1,153 @@
+# coach_agent/services/idempotency.py
+"""
+/chat 재시도 중복 실행 방지 (Idempotency-Key)
+
+- 모바일 클라이언트는 네트워크가 불안정하면 같은 /chat 요청을 다시 보낸다.
+  매 재시도마다 그래프 한 턴(LLM 2~3회 호출 + 체크포인트 + save_message)이 통째로 다시 실행되므로,
+  같은 키의 요청은 한 번만 실행하고 결과를 공유한다.
+- 진행 중인 키로 다시 요청이 오면: 새로 실행하지 않고 원래 실행이 끝나기를 기다려 같은 결과 반환
+- 완료된 키로 다시 요청이 오면: 저장해 둔 응답을 그대로 반환 (TTL 동안)
+- 실패한 실행은 저장하지 않음 → 다음 재시도에서 다시 실행
+- 완료 항목은 TTL + 크기 제한 LRU (진행 중 항목은 축출하지 않음)
+- 진행 중 항목은 in_flight_timeout 이 지나면 버려진 실행으로 간주
+  (예: /chat/stream 본문이 시작되기 전에 클라이언트가 끊어 해제 코드가 돌지 못한 경우)
+  → 기다리던 요청은 에러, 다음 재시도는 새로 실행. 늦게 끝난 원래 실행은 새 실행의 진행 중 표시를 건드리지 않음
+"""
+from __future__ import annotations
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from coach_agent.settings import settings
+
+
+class IdempotencyStore:
+    def __init__(self, max_size: int = 2048, ttl_seconds: float = 600.0, in_flight_timeout: float = 300.0) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.in_flight_timeout = in_flight_timeout
+        self._in_flight: Dict[Hashable, Tuple[float, asyncio.Future]] = {}  # key → (시작 시각, Future)
+        self._completed: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # 운영 통계
+        self.executions = 0
+        self.replayed = 0   # 완료된 결과 재사용
+        self.joined = 0     # 진행 중인 실행에 합류
+        self.abandoned = 0  # in_flight_timeout 이 지나 버린 진행 중 항목
+
+    def _get_completed(self, key: Hashable) -> Tuple[bool, Any]:
+        item = self._completed.get(key)
+        if item is None:
+            return False, None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._completed[key]
+            return False, None
+        self._completed.move_to_end(key)
+        return True, value
+
+    def lookup(self, key: Hashable) -> Tuple[str, Any]:
+        """
+        ("completed", 결과) | ("in_flight", Future) | ("new", None)
+        """
+        found, value = self._get_completed(key)
+        if found:
+            self.replayed += 1
+            return "completed", value
+        item = self._in_flight.get(key)
+        if item is not None:
+            started_at, fut = item
+            if time.monotonic() - started_at < self.in_flight_timeout:
+                return "in_flight", fut
+            print(f"   ⚠️ [Idempotency] {self.in_flight_timeout}s 동안 끝나지 않은 요청 → 버리고 새로 실행: {key}")
+            self.abandoned += 1
+            self.fail(key, TimeoutError("original request did not finish in time; please retry"), fut)
+        return "new", None
+
+    def begin(self, key: Hashable) -> asyncio.Future:
+        """
+        이 키의 실행을 시작함을 등록 (lookup이 "new"를 돌려준 직후 같은 이벤트 루프 턴 안에서 호출)
+        반환한 Future 를 complete / fail 에 넘기면, 이 실행이 버려진 뒤 시작된 새 실행의 표시는 건드리지 않음
+        """
+        fut = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (time.monotonic(), fut)
+        self.executions += 1
+        return fut
+
+    def _pop_in_flight(self, key: Hashable, owner: Optional[asyncio.Future]) -> Optional[asyncio.Future]:
+        item = self._in_flight.get(key)
+        if item is None:
+            return owner
+        if owner is not None and item[1] is not owner:
+            # 이 실행은 이미 버려졌고 같은 키로 새 실행이 진행 중
+            return owner
+        del self._in_flight[key]
+        return item[1]
+
+    def complete(self, key: Hashable, result: Any, owner: Optional[asyncio.Future] = None) -> None:
+        fut = self._pop_in_flight(key, owner)
+        self._completed[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._completed.move_to_end(key)
+        while len(self._completed) > self.max_size:
+            self._completed.popitem(last=False)
+        if fut is not None and not fut.done():
+            fut.set_result(result)
+
+    def fail(self, key: Hashable, exc: BaseException, owner: Optional[asyncio.Future] = None) -> None:
+        fut = self._pop_in_flight(key, owner)
+        if fut is not None and not fut.done():
+            if isinstance(exc, asyncio.CancelledError):
+                # 원래 요청이 취소된 경우: 기다리던 요청은 일반 에러로 받음 (재시도하면 새로 실행됨)
+                exc = RuntimeError("original request was cancelled; please retry")
+            fut.set_exception(exc)
+            fut.exception()  # 기다리는 쪽이 없어도 "never retrieved" 경고가 나지 않도록
+
+    async def wait(self, fut: asyncio.Future) -> Any:
+        self.joined += 1
+        # 기다리던 요청이 취소되어도 원래 실행(future)은 건드리지 않음
+        # 원래 실행이 버려진 경우에도 영원히 기다리지 않도록 in_flight_timeout 까지만
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout=self.in_flight_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("original request did not finish in time; please retry") from None
+
+    async def run(self, key: Optional[Hashable], factory: Callable[[], Awaitable[Any]]) -> Any:
+        """key가 없으면 그냥 실행. 있으면 같은 key의 실행을 한 번으로 합침."""
+        if key is None:
+            return await factory()
+        state, value = self.lookup(key)
+        if state == "completed":
+            print(f"   ♻️ [Idempotency] 완료된 응답 재사용: {key}")
+            return value
+        if state == "in_flight":
+            print(f"   ⏳ [Idempotency] 진행 중인 요청에 합류: {key}")
+            return await self.wait(value)
+        owner = self.begin(key)
+        try:
+            result = await factory()
+        except BaseException as e:
+            self.fail(key, e, owner)
+            raise
+        self.complete(key, result, owner)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "completed": len(self._completed),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "in_flight_timeout": self.in_flight_timeout,
+            "executions": self.executions,
+            "replayed": self.replayed,
+            "joined": self.joined,
+            "abandoned": self.abandoned,
+        }
+
+
+# /chat, /chat/stream 공용
+CHAT_IDEMPOTENCY = IdempotencyStore(
+    max_size=settings.IDEMPOTENCY_MAX_SIZE,
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    in_flight_timeout=settings.IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS,
+)
@@ -3,7 +3,7 @@
 from typing import Any, Dict
 import os
 from langchain_openai import ChatOpenAI
-from coach_agent.services.llm_schemas import CounselorTurn, TechniqueSelection
+from coach_agent.services.llm_schemas import CounselorTurn, FusedCounselTurn, TechniqueSelection
 
 
 # ---------------------------
@@ -41,6 +41,8 @@ CHAT_LLM = _build_chat_llm()
 # 노드에서 messages를 만들고, 여기서는 “모델 + 스키마”만 제공
 LLM_CHAIN = CHAT_LLM.with_structured_output(CounselorTurn, method="function_calling")
 TECHNIQUE_SELECTOR = CHAT_LLM.with_structured_output(TechniqueSelection, method="function_calling")
+# fused 상담 모드: 기법 선택 + 상담 발화를 한 번에
+FUSED_COUNSELOR = CHAT_LLM.with_structured_output(FusedCounselTurn, method="function_calling")
 '''
 # ---------------------------
 # 1) 상담 발화용 체인 (techninque_applier에서 사용)
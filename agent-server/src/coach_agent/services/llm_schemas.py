@@ -100,3 +100,12 @@ class TechniqueSelection(BaseModel):
             "왜 이 기법과 micro-goal이 현재 상황에 적합하다고 판단했는지에 대한 설명."
         )
     )
+
+
+class FusedCounselTurn(CounselorTurn, TechniqueSelection):
+    """
+    fused 상담 모드(protocol counsel_mode: fused)에서
+    기법 선택(TechniqueSelection) + 상담 발화(CounselorTurn)를 한 번의 호출로 받는 구조화 출력 스키마.
+    필드 순서: technique_id / micro_goal / reason → response_text / reasoning / ... / criteria_evaluations
+    (기법을 먼저 정하고 그 기법으로 발화를 쓰도록 선택 필드가 앞에 옴)
+    """
@@ -0,0 +1,610 @@
+# coach_agent/services/memory_firestore.py
+"""
+in-memory Firestore 클라이언트 (REPO_BACKEND=memory; 동기 Client / AsyncClient 가 저장소 하나를 공유)
+
+- FirestoreRepo / AsyncFirestoreRepo / FirestoreSaver 코드를 그대로 두고 자격 증명 없이 실행하기 위한 대역
+  (firebase_admin_client.get_db / get_async_db 가 REPO_BACKEND=memory 일 때 이 클라이언트를 반환)
+- FirestoreRepo / AsyncFirestoreRepo / FirestoreSaver 가 사용하는 부분만 구현
+    · collection / document / 서브컬렉션, add, get(field_paths), set(merge), update(점 경로), delete
+    · where(FieldFilter: == != < <= > >= in not-in array_contains), order_by("__name__" 포함), limit, select, start_after
+    · stream, batch(set / update / delete), collection_group, list_documents
+    · SERVER_TIMESTAMP → 쓰기 시점의 UTC datetime, DELETE_FIELD
+    · 문서 크기 제한 (1MiB; Firestore 와 같은 방식으로 계산, 넘으면 InvalidArgument / 배치 전체 취소)
+- 읽기/쓰기 횟수를 Firestore 과금 단위로 집계 (문서 get 1회 = 1 read, 쿼리 = 결과 문서 수(최소 1) reads, 문서 쓰기 1개 = 1 write)
+    · 작업(operation)별: observability.metrics.timed_operation 으로 감싼 Repo / 체크포인터 메서드 이름 (없으면 "-")
+    · 호출 종류별(doc.get / query / doc.set ...) / 컬렉션별
+- 네트워크 없이 메모리에서 바로 처리 → 벤치마크·프로파일링 결과가 결정적 (benchmarks/loadtest.py 참고)
+- 프로세스 메모리에만 있으므로 재시작하면 데이터가 사라진다 (운영 용도 아님)
+"""
+from __future__ import annotations
+import copy
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.api_core.exceptions import InvalidArgument, NotFound
+from google.cloud.firestore_v1 import transforms
+
+from coach_agent.observability.metrics import current_operation
+
+_MISSING = object()
+# Firestore 문서 최대 크기
+MAX_DOCUMENT_BYTES = 1_048_576
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _resolve(value: Any, now: datetime) -> Any:
+    if value is transforms.SERVER_TIMESTAMP:
+        return now
+    if isinstance(value, dict):
+        return {k: _resolve(v, now) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, now) for v in value]
+    return value
+
+
+def _get_field(data: Dict[str, Any], path: str) -> Any:
+    cur: Any = data
+    for part in path.split("."):
+        if not isinstance(cur, dict) or part not in cur:
+            return _MISSING
+        cur = cur[part]
+    return cur
+
+
+def _set_field(data: Dict[str, Any], path: str, value: Any) -> None:
+    parts = path.split(".")
+    cur = data
+    for part in parts[:-1]:
+        nxt = cur.get(part)
+        if not isinstance(nxt, dict):
+            nxt = cur[part] = {}
+        cur = nxt
+    cur[parts[-1]] = value
+
+
+def _merge(dst: Dict[str, Any], src: Dict[str, Any]) -> None:
+    for k, v in src.items():
+        if v is transforms.DELETE_FIELD:
+            dst.pop(k, None)
+        elif isinstance(v, dict):
+            # map 은 필드 단위로 merge (없는 map 안의 DELETE_FIELD 는 무시)
+            if not isinstance(dst.get(k), dict):
+                dst[k] = {}
+            _merge(dst[k], v)
+        else:
+            dst[k] = v
+
+
+def _value_size(value: Any) -> int:
+    # https://firebase.google.com/docs/firestore/storage-size
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(k.encode("utf-8")) + 1 + _value_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_value_size(v) for v in value)
+    if value is None or isinstance(value, bool):
+        return 1
+    return 8
+
+
+def _check_size(path: str, data: Dict[str, Any]) -> None:
+    size = len(path.encode("utf-8")) + 16 + _value_size(data) + 32
+    if size > MAX_DOCUMENT_BYTES:
+        raise InvalidArgument(f"Document '{path}' cannot be written because its size ({size:,} bytes) exceeds the maximum allowed size of {MAX_DOCUMENT_BYTES:,} bytes.")
+
+
+def _match(value: Any, op: str, target: Any) -> bool:
+    if value is _MISSING:
+        return False
+    try:
+        if op == "==":
+            return value == target
+        if op == "!=":
+            return value != target
+        if op == "<":
+            return value < target
+        if op == "<=":
+            return value <= target
+        if op == ">":
+            return value > target
+        if op == ">=":
+            return value >= target
+        if op == "in":
+            return value in target
+        if op == "not-in":
+            return value not in target
+        if op == "array_contains":
+            return isinstance(value, list) and target in value
+        if op == "array_contains_any":
+            return isinstance(value, list) and any(t in value for t in target)
+    except TypeError:
+        return False  # 타입이 다른 값끼리 비교 (Firestore 도 매칭하지 않음)
+    raise ValueError(f"지원하지 않는 연산자: {op}")
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    # Firestore 타입 순서: null < bool < 숫자 < 날짜 < 문자열 ...
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value.timestamp())
+    if isinstance(value, str):
+        return (4, value)
+    return (5, str(value))
+
+
+def _order_value(path: str, data: Dict[str, Any], field: str) -> Any:
+    # order_by("__name__") 는 문서 경로 순
+    return path if field == "__name__" else _get_field(data, field)
+
+
+def _collection_id(path: str) -> str:
+    """문서 경로 또는 컬렉션 경로 → 컬렉션 ID ("users/u1/sessions/t1" → "sessions")"""
+    parts = path.split("/")
+    return parts[-2] if len(parts) % 2 == 0 else parts[-1]
+
+
+class MemoryStore:
+    """문서 경로("users/u1/sessions/t1") → 데이터. 동기/비동기 클라이언트가 함께 사용"""
+
+    def __init__(self) -> None:
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.RLock()
+        # 읽기/쓰기 집계: 키 → [calls, reads, writes]
+        self._by_operation: Dict[str, List[int]] = {}
+        self._by_kind: Dict[str, List[int]] = {}
+        self._by_collection: Dict[str, List[int]] = {}
+
+    def clear(self) -> None:
+        with self.lock:
+            self.docs.clear()
+
+    # --- 읽기/쓰기 집계 ---
+    def record(self, kind: str, path: str, reads: int = 0, writes: int = 0) -> None:
+        operation = current_operation() or "-"
+        with self.lock:
+            for table, key in ((self._by_operation, operation), (self._by_kind, kind),
+                               (self._by_collection, _collection_id(path))):
+                row = table.get(key)
+                if row is None:
+                    row = table[key] = [0, 0, 0]
+                row[0] += 1
+                row[1] += reads
+                row[2] += writes
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self._by_operation.clear()
+            self._by_kind.clear()
+            self._by_collection.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        def _table(table: Dict[str, List[int]]) -> Dict[str, Dict[str, int]]:
+            return {k: {"calls": c, "reads": r, "writes": w}
+                    for k, (c, r, w) in sorted(table.items(), key=lambda kv: -(kv[1][1] + kv[1][2]))}
+
+        with self.lock:
+            reads = sum(r for _, r, _ in self._by_kind.values())
+            writes = sum(w for _, _, w in self._by_kind.values())
+            return {
+                "documents": len(self.docs),
+                "reads": reads,
+                "writes": writes,
+                "by_operation": _table(self._by_operation),
+                "by_kind": _table(self._by_kind),
+                "by_collection": _table(self._by_collection),
+            }
+
+
+# ---------------------------------------------------------------
+# 동기 클라이언트
+# ---------------------------------------------------------------
+class MemoryDocumentSnapshot:
+    def __init__(self, reference: "MemoryDocumentReference", data: Optional[Dict[str, Any]],
+                 fields: Optional[List[str]] = None) -> None:
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self._fields = fields
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        if self._data is None:
+            return None
+        if self._fields is None:
+            return copy.deepcopy(self._data)
+        out: Dict[str, Any] = {}
+        for f in self._fields:
+            v = _get_field(self._data, f)
+            if v is not _MISSING:
+                _set_field(out, f, copy.deepcopy(v))
+        return out
+
+    def get(self, field_path: str) -> Any:
+        v = _get_field(self._data or {}, field_path)
+        return None if v is _MISSING else copy.deepcopy(v)
+
+
+class MemoryDocumentReference:
+    def __init__(self, client: "MemoryFirestoreClient", path: str) -> None:
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> "MemoryCollectionReference":
+        return self._client._collection_cls(self._client, self.path.rsplit("/", 1)[0])
+
+    def collection(self, collection_id: str) -> "MemoryCollectionReference":
+        return self._client._collection_cls(self._client, f"{self.path}/{collection_id}")
+
+    def _get(self, field_paths: Optional[List[str]] = None) -> MemoryDocumentSnapshot:
+        store = self._client._store
+        with store.lock:
+            data = store.docs.get(self.path)
+            if data is None:
+                return MemoryDocumentSnapshot(self, None)
+            if field_paths is None:
+                return MemoryDocumentSnapshot(self, copy.deepcopy(data))
+            # projection: 요청한 필드만 복사 (큰 문서를 통째로 복사하지 않음)
+            projected: Dict[str, Any] = {}
+            for f in field_paths:
+                v = _get_field(data, f)
+                if v is not _MISSING:
+                    _set_field(projected, f, copy.deepcopy(v))
+            return MemoryDocumentSnapshot(self, projected)
+
+    def _set(self, document_data: Dict[str, Any], merge: bool = False) -> None:
+        store = self._client._store
+        data = _resolve(copy.deepcopy(document_data), _now())
+        with store.lock:
+            current = store.docs.get(self.path)
+            if merge:
+                # 문서가 없어도 merge 는 DELETE_FIELD 를 지우고 나머지만 기록
+                merged = copy.deepcopy(current) if current is not None else {}
+                _merge(merged, data)
+                data = merged
+            _check_size(self.path, data)
+            store.docs[self.path] = data
+
+    def _update(self, field_updates: Dict[str, Any]) -> None:
+        store = self._client._store
+        now = _now()
+        with store.lock:
+            current = store.docs.get(self.path)
+            if current is None:
+                raise NotFound(f"No document to update: {self.path}")
+            current = copy.deepcopy(current)
+            for k, v in field_updates.items():
+                if v is transforms.DELETE_FIELD:
+                    parent = _get_field(current, k.rsplit(".", 1)[0]) if "." in k else current
+                    if isinstance(parent, dict):
+                        parent.pop(k.rsplit(".", 1)[-1], None)
+                    continue
+                _set_field(current, k, _resolve(copy.deepcopy(v), now))
+            _check_size(self.path, current)
+            store.docs[self.path] = current
+
+    def _delete(self) -> None:
+        store = self._client._store
+        with store.lock:
+            store.docs.pop(self.path, None)
+
+    def _record(self, kind: str, reads: int = 0, writes: int = 0) -> None:
+        self._client._store.record(kind, self.path, reads, writes)
+
+    def get(self, field_paths: Optional[List[str]] = None, *args: Any, **kwargs: Any) -> MemoryDocumentSnapshot:
+        self._record("doc.get", reads=1)
+        return self._get(field_paths)
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False) -> None:
+        self._record("doc.set", writes=1)
+        self._set(document_data, merge)
+
+    def update(self, field_updates: Dict[str, Any]) -> None:
+        self._record("doc.update", writes=1)
+        self._update(field_updates)
+
+    def delete(self) -> None:
+        self._record("doc.delete", writes=1)
+        self._delete()
+
+
+class MemoryQuery:
+    def __init__(self, client: "MemoryFirestoreClient", path: str, all_descendants: bool = False) -> None:
+        self._client = client
+        self._path = path  # 컬렉션 경로 (collection_group 이면 컬렉션 ID)
+        self._all_descendants = all_descendants
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._orders: List[Tuple[str, str]] = []
+        self._limit: Optional[int] = None
+        self._fields: Optional[List[str]] = None
+        self._start_after: Optional[Any] = None
+
+    def _copy(self) -> "MemoryQuery":
+        q = self._client._query_cls(self._client, self._path, self._all_descendants)
+        q._filters = list(self._filters)
+        q._orders = list(self._orders)
+        q._limit = self._limit
+        q._fields = self._fields
+        q._start_after = self._start_after
+        return q
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None, value: Any = None,
+              *, filter: Any = None) -> "MemoryQuery":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        q = self._copy()
+        q._filters.append((field_path, op_string, value))
+        return q
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "MemoryQuery":
+        q = self._copy()
+        q._orders.append((field_path, direction))
+        return q
+
+    def limit(self, count: int) -> "MemoryQuery":
+        q = self._copy()
+        q._limit = count
+        return q
+
+    def select(self, field_paths: List[str]) -> "MemoryQuery":
+        q = self._copy()
+        q._fields = list(field_paths)
+        return q
+
+    def start_after(self, document_fields_or_snapshot: Any) -> "MemoryQuery":
+        q = self._copy()
+        q._start_after = document_fields_or_snapshot
+        return q
+
+    def _in_scope(self, doc_path: str) -> bool:
+        parent, _, _ = doc_path.rpartition("/")
+        if self._all_descendants:
+            return parent.rsplit("/", 1)[-1] == self._path
+        return parent == self._path
+
+    def _cursor_values(self) -> Optional[List[Any]]:
+        if self._start_after is None:
+            return None
+        src = self._start_after
+        if isinstance(src, MemoryDocumentSnapshot):
+            src = dict(src._data or {}, __name__=src.reference)
+        values = []
+        for f, _ in self._orders:
+            v = _get_field(src, f)
+            if f == "__name__" and v is not _MISSING:
+                # 문서 ID 문자열은 이 컬렉션의 문서로 해석 (Firestore 와 동일)
+                v = v.path if isinstance(v, MemoryDocumentReference) else f"{self._path}/{v}"
+            values.append(v)
+        return values
+
+    def _run(self) -> List[MemoryDocumentSnapshot]:
+        store = self._client._store
+        with store.lock:
+            rows = [(p, copy.deepcopy(d)) for p, d in store.docs.items() if self._in_scope(p)]
+
+        rows = [(p, d) for p, d in rows if all(_match(_get_field(d, f), op, v) for f, op, v in self._filters)]
+        # order_by 필드가 없는 문서는 결과에서 제외 (Firestore 동작과 동일)
+        rows = [(p, d) for p, d in rows if all(_order_value(p, d, f) is not _MISSING for f, _ in self._orders)]
+        rows.sort(key=lambda r: r[0].rsplit("/", 1)[-1])  # 문서 ID 순이 기본 순서
+        for field, direction in reversed(self._orders):
+            rows.sort(key=lambda r: _sort_key(_order_value(r[0], r[1], field)), reverse=(direction == "DESCENDING"))
+
+        cursor = self._cursor_values()
+        if cursor is not None:
+            def _after(p: str, d: Dict[str, Any]) -> bool:
+                for (field, direction), c in zip(self._orders, cursor):
+                    if c is _MISSING:
+                        continue
+                    a, b = _sort_key(_order_value(p, d, field)), _sort_key(c)
+                    if a == b:
+                        continue
+                    return (a < b) if direction == "DESCENDING" else (a > b)
+                return False
+            rows = [(p, d) for p, d in rows if _after(p, d)]
+
+        if self._limit is not None:
+            rows = rows[: self._limit]
+        # 쿼리는 결과 문서 수만큼 read (결과가 없어도 최소 1)
+        self._client._store.record("collection_group" if self._all_descendants else "query", self._path,
+                                   reads=max(1, len(rows)))
+        return [MemoryDocumentSnapshot(self._client._document_cls(self._client, p), d, self._fields) for p, d in rows]
+
+    def stream(self, *args: Any, **kwargs: Any) -> Iterator[MemoryDocumentSnapshot]:
+        return iter(self._run())
+
+    def get(self, *args: Any, **kwargs: Any) -> List[MemoryDocumentSnapshot]:
+        return self._run()
+
+
+class MemoryCollectionReference(MemoryQuery):
+    def __init__(self, client: "MemoryFirestoreClient", path: str, all_descendants: bool = False) -> None:
+        super().__init__(client, path, all_descendants)
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> Optional[MemoryDocumentReference]:
+        # 최상위 컬렉션이면 None (서브컬렉션이면 그 상위 문서)
+        if "/" not in self._path:
+            return None
+        return self._client._document_cls(self._client, self._path.rsplit("/", 1)[0])
+
+    def document(self, document_id: Optional[str] = None) -> MemoryDocumentReference:
+        return self._client._document_cls(self._client, f"{self._path}/{document_id or uuid.uuid4().hex[:20]}")
+
+    def _add(self, document_data: Dict[str, Any]) -> Tuple[datetime, MemoryDocumentReference]:
+        ref = self.document()
+        self._client._store.record("collection.add", self._path, writes=1)
+        ref._set(document_data)
+        return _now(), ref
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None) -> Tuple[datetime, MemoryDocumentReference]:
+        return self._add(document_data)
+
+    def list_documents(self) -> List[MemoryDocumentReference]:
+        # 실제 Firestore 처럼 서브컬렉션만 있는 "missing" 문서도 포함
+        store = self._client._store
+        prefix = self._path + "/"
+        with store.lock:
+            ids = {p[len(prefix):].split("/", 1)[0] for p in store.docs if p.startswith(prefix)}
+        store.record("collection.list_documents", self._path, reads=max(1, len(ids)))
+        return [self._client._document_cls(self._client, prefix + doc_id) for doc_id in sorted(ids)]
+
+
+class MemoryWriteBatch:
+    def __init__(self, client: "MemoryFirestoreClient") -> None:
+        self._client = client
+        self._ops: List[Tuple[str, MemoryDocumentReference, Any, bool]] = []
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def set(self, reference: MemoryDocumentReference, document_data: Dict[str, Any], merge: bool = False) -> "MemoryWriteBatch":
+        self._ops.append(("set", reference, document_data, merge))
+        return self
+
+    def update(self, reference: MemoryDocumentReference, field_updates: Dict[str, Any]) -> "MemoryWriteBatch":
+        self._ops.append(("update", reference, field_updates, False))
+        return self
+
+    def delete(self, reference: MemoryDocumentReference) -> "MemoryWriteBatch":
+        self._ops.append(("delete", reference, None, False))
+        return self
+
+    def _commit(self) -> List[Any]:
+        store = self._client._store
+        # commit 1회를 컬렉션별 호출 1회로 집계 (쓰기 수 = 배치 안의 문서 수)
+        per_collection: Dict[str, Tuple[str, int]] = {}
+        for _, ref, _, _ in self._ops:
+            cid = _collection_id(ref.path)
+            path, n = per_collection.get(cid, (ref.path, 0))
+            per_collection[cid] = (path, n + 1)
+        for path, n in per_collection.values():
+            store.record("batch.commit", path, writes=n)
+        # 배치는 원자적: 저장소 락을 잡은 채로 한 번에 적용 (하나라도 실패하면 전부 되돌림)
+        with store.lock:
+            before = {ref.path: store.docs.get(ref.path) for _, ref, _, _ in self._ops}
+            try:
+                for kind, ref, data, merge in self._ops:
+                    if kind == "set":
+                        ref._set(data, merge)
+                    elif kind == "update":
+                        ref._update(data)
+                    else:
+                        ref._delete()
+            except Exception:
+                for path, data in before.items():
+                    if data is None:
+                        store.docs.pop(path, None)
+                    else:
+                        store.docs[path] = data
+                self._ops = []
+                raise
+        results = [None] * len(self._ops)
+        self._ops = []
+        return results
+
+    def commit(self) -> List[Any]:
+        return self._commit()
+
+
+class MemoryFirestoreClient:
+    _document_cls = MemoryDocumentReference
+    _collection_cls = MemoryCollectionReference
+    _query_cls = MemoryQuery
+    _batch_cls = MemoryWriteBatch
+
+    def __init__(self, store: Optional[MemoryStore] = None) -> None:
+        self._store = store or MemoryStore()
+
+    def collection(self, collection_path: str) -> MemoryCollectionReference:
+        return self._collection_cls(self, collection_path)
+
+    def document(self, document_path: str) -> MemoryDocumentReference:
+        return self._document_cls(self, document_path)
+
+    def collection_group(self, collection_id: str) -> MemoryQuery:
+        return self._query_cls(self, collection_id, all_descendants=True)
+
+    def batch(self) -> MemoryWriteBatch:
+        return self._batch_cls(self)
+
+
+# ---------------------------------------------------------------
+# AsyncClient (같은 저장소를 await 로 접근)
+# ---------------------------------------------------------------
+class MemoryAsyncDocumentReference(MemoryDocumentReference):
+    async def get(self, field_paths: Optional[List[str]] = None, *args: Any, **kwargs: Any) -> MemoryDocumentSnapshot:
+        return MemoryDocumentReference.get(self, field_paths)
+
+    async def set(self, document_data: Dict[str, Any], merge: bool = False) -> None:
+        MemoryDocumentReference.set(self, document_data, merge)
+
+    async def update(self, field_updates: Dict[str, Any]) -> None:
+        MemoryDocumentReference.update(self, field_updates)
+
+    async def delete(self) -> None:
+        MemoryDocumentReference.delete(self)
+
+
+class MemoryAsyncQuery(MemoryQuery):
+    async def stream(self, *args: Any, **kwargs: Any):
+        for snap in self._run():
+            yield snap
+
+    async def get(self, *args: Any, **kwargs: Any) -> List[MemoryDocumentSnapshot]:
+        return self._run()
+
+
+class MemoryAsyncCollectionReference(MemoryAsyncQuery, MemoryCollectionReference):
+    async def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None) -> Tuple[datetime, MemoryDocumentReference]:
+        return self._add(document_data)
+
+    async def list_documents(self, *args: Any, **kwargs: Any):
+        # AsyncCollectionReference.list_documents 와 같은 async generator
+        for ref in MemoryCollectionReference.list_documents(self):
+            yield ref
+
+
+class MemoryAsyncWriteBatch(MemoryWriteBatch):
+    async def commit(self) -> List[Any]:
+        return self._commit()
+
+
+class MemoryAsyncFirestoreClient(MemoryFirestoreClient):
+    _document_cls = MemoryAsyncDocumentReference
+    _collection_cls = MemoryAsyncCollectionReference
+    _query_cls = MemoryAsyncQuery
+    _batch_cls = MemoryAsyncWriteBatch
+
+
+# ---------------------------------------------------------------
+# 프로세스 공용 인스턴스 (REPO_BACKEND=memory)
+# ---------------------------------------------------------------
+MEMORY_STORE = MemoryStore()
+_SYNC_CLIENT = MemoryFirestoreClient(MEMORY_STORE)
+_ASYNC_CLIENT = MemoryAsyncFirestoreClient(MEMORY_STORE)
+
+
+def get_memory_db() -> MemoryFirestoreClient:
+    return _SYNC_CLIENT
+
+
+def get_memory_async_db() -> MemoryAsyncFirestoreClient:
+    return _ASYNC_CLIENT
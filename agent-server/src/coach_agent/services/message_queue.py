@@ -0,0 +1,239 @@
+# coach_agent/services/message_queue.py
+"""
+채팅 메시지 write-behind 저장 큐
+
+- /chat 한 턴마다 save_message가 두 번(user / assistant) 호출되고, 각각 세션 문서 get+update 와
+  messages.add 를 수행한다. 클라이언트는 이 쓰기 완료를 기다릴 필요가 없으므로 응답 경로에서 뺀다.
+- enqueue(): 메시지를 메모리 큐(asyncio.Queue, 크기 제한)에 넣고 바로 리턴
+- 백그라운드 워커: 큐에 쌓인 메시지를 최대 batch_size 개씩 모아 repo.save_messages_batch 로 한 번에 저장
+- Firestore 장애 시: 재시도 후에도 실패하면 로컬 spill 파일(JSONL)에 기록 → 다음 기동 시 재전송
+  (재전송 중에는 <spill>.replaying 으로 옮겨 두고 청크가 저장될 때마다 남은 것만 다시 기록,
+   전부 저장된 뒤에 삭제 → 재전송 도중 프로세스가 죽어도 다음 기동 때 이어서 재전송)
+- 메시지 id 는 enqueue 시점에 정함 → 재시도 / spill 재전송이 같은 문서를 덮어쓰므로 중복 저장 없음
+- FastAPI lifespan: 시작 시 start() (spill 재전송 포함), 종료 시 stop() 으로 남은 메시지 flush
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+class MessageWriteQueue:
+    def __init__(self, repo, *, max_size: int = 1000, batch_size: int = 100,
+                 linger_ms: float = 50, max_retries: int = 3,
+                 spill_path: str = "message_spill.jsonl") -> None:
+        self.repo = repo
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.linger = linger_ms / 1000.0
+        self.max_retries = max_retries
+        self.spill_path = spill_path
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._spill_lock = threading.Lock()
+        # 운영 통계
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ---------------------------------------------------------------
+    # 생명주기 (FastAPI lifespan 에서 호출)
+    # ---------------------------------------------------------------
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        await self.replay_spill()
+        self._task = asyncio.create_task(self._worker(), name="message-write-behind")
+        print(f"📨 [MessageQueue] write-behind 워커 시작 (max_size={self.max_size}, batch={self.batch_size})")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """남은 메시지를 모두 저장(flush)하고 워커 종료. 저장 실패분은 spill 파일로."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"   ⚠️ [MessageQueue] flush 타임아웃 ({timeout}s) → 남은 메시지는 spill")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # 워커가 꺼낸 배치는 워커가 spill, 큐에 아직 남은 메시지는 여기서 spill
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+            self._queue.task_done()
+        if leftover:
+            self._spill(leftover)
+        print(f"📨 [MessageQueue] 종료 (written={self.written}, spilled={self.spilled})")
+
+    # ---------------------------------------------------------------
+    # 생산자
+    # ---------------------------------------------------------------
+    async def enqueue(self, user_id: str, thread_id: str, session_type: str, week: int, role: str, text: str) -> None:
+        message = {
+            "id": uuid.uuid4().hex,  # 메시지 문서 ID (재시도 / 재전송 시 같은 문서에 기록)
+            "user_id": user_id,
+            "thread_id": thread_id,
+            "session_type": session_type,
+            "week": int(week),
+            "role": role,
+            "text": text,
+            "created_at": datetime.now(timezone.utc),  # 응답 순서 보존용 (enqueue 시각)
+        }
+        self.enqueued += 1
+        if not self.running:
+            # lifespan 밖(스크립트 / 테스트)에서는 기존처럼 바로 저장
+            await self.repo.save_messages_batch([message])
+            self.written += 1
+            return
+        # 큐가 가득 차면 자리가 날 때까지 대기 (backpressure)
+        await self._queue.put(message)
+
+    # ---------------------------------------------------------------
+    # 소비자 (백그라운드 워커)
+    # ---------------------------------------------------------------
+    async def _worker(self) -> None:
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            try:
+                # 잠깐 기다리며 같은 배치로 묶을 메시지를 더 모음 (user + assistant 가 같이 묶이는 경우가 많음)
+                if self.linger > 0:
+                    await asyncio.sleep(self.linger)
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                await self._write(batch)
+            except asyncio.CancelledError:
+                # stop() flush 타임아웃으로 취소됨: 이미 큐에서 꺼낸 배치는 spill
+                # (저장이 끝난 뒤 취소됐더라도 메시지 id 가 같으므로 재전송해도 중복 없음)
+                try:
+                    self._spill(batch)
+                except Exception as e:
+                    print(f"   🔥 [MessageQueue] 메시지 {len(batch)}건 유실: {e}")
+                raise
+            except Exception as e:
+                # spill 파일 쓰기까지 실패한 경우: 워커가 죽지 않도록 로그만 남김
+                print(f"   🔥 [MessageQueue] 메시지 {len(batch)}건 유실: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        delay = 0.5
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await self.repo.save_messages_batch(batch)
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                print(f"   ⚠️ [MessageQueue] 배치 저장 실패 ({attempt}/{self.max_retries}, {len(batch)}건): {e}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(delay)
+                    delay *= 2
+        self._spill(batch)
+
+    # ---------------------------------------------------------------
+    # spill 파일 (Firestore 장애 대비)
+    # ---------------------------------------------------------------
+    @staticmethod
+    def _write_rows(f, messages: List[Dict[str, Any]]) -> None:
+        for m in messages:
+            row = dict(m)
+            if isinstance(row.get("created_at"), datetime):
+                row["created_at"] = row["created_at"].isoformat()
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    @staticmethod
+    def _read_rows(path: str) -> List[Dict[str, Any]]:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        messages = []
+        for line in lines:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if row.get("created_at"):
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+            messages.append(row)
+        return messages
+
+    def _spill(self, messages: List[Dict[str, Any]]) -> None:
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                self._write_rows(f, messages)
+        self.spilled += len(messages)
+        print(f"   💾 [MessageQueue] {len(messages)}건을 spill 파일에 기록: {self.spill_path}")
+
+    @property
+    def replaying_path(self) -> str:
+        return self.spill_path + ".replaying"
+
+    def _rewrite_replaying(self, messages: List[Dict[str, Any]]) -> None:
+        """재전송 파일을 남은 메시지로 교체 (임시 파일 + os.replace 로 원자적으로)"""
+        tmp = self.replaying_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            self._write_rows(f, messages)
+        os.replace(tmp, self.replaying_path)
+
+    async def replay_spill(self) -> int:
+        """
+        spill 파일에 남은 메시지를 다시 저장. 보내지 못한 나머지는 다시 spill 파일에 남김.
+        spill 파일은 먼저 .replaying 으로 옮기고(이후 새 spill 은 원래 경로에), 모두 저장된 뒤에 삭제한다.
+        이전 재전송이 도중에 중단돼 남은 .replaying 파일도 함께 재전송.
+        """
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                if os.path.exists(self.replaying_path):
+                    with open(self.replaying_path, "a", encoding="utf-8") as f:
+                        self._write_rows(f, self._read_rows(self.spill_path))
+                    os.remove(self.spill_path)
+                else:
+                    os.replace(self.spill_path, self.replaying_path)
+        if not os.path.exists(self.replaying_path):
+            return 0
+        messages = self._read_rows(self.replaying_path)
+        sent = 0
+        for start in range(0, len(messages), self.batch_size):
+            chunk = messages[start:start + self.batch_size]
+            try:
+                await self.repo.save_messages_batch(chunk)
+            except Exception as e:
+                # 아직 못 보낸 나머지만 다시 spill (다음 기동 때 재시도)
+                print(f"   ⚠️ [MessageQueue] spill 재전송 실패 (다음 기동 때 재시도): {e}")
+                self._spill(messages[start:])
+                break
+            sent += len(chunk)
+            if sent < len(messages):
+                self._rewrite_replaying(messages[sent:])
+        os.remove(self.replaying_path)
+        if messages:
+            print(f"   ✅ [MessageQueue] spill 파일 {sent}/{len(messages)}건 재전송 완료")
+        return sent
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self.max_size,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "spilled": self.spilled,
+        }
@@ -0,0 +1,296 @@
+# coach_agent/services/repo_cache.py
+"""
+유저 / 세션 메타데이터 읽기용 프로세스 로컬 캐시
+
+- 한 번의 /chat 턴에서 get_user가 chat_endpoint → LoadState → GenerateAnswer 로 여러 번 호출되는데,
+  user 문서는 거의 바뀌지 않으므로 매번 Firestore를 읽을 필요가 없다.
+- TTLCache: TTL + 크기 제한 LRU (hit/miss/eviction 카운터 포함)
+- CachedAsyncRepo: AsyncRepo를 감싸서 get_user / get_active_weekly_session 결과를 캐시
+    · upsert_user / last_seen_touch / advance_to_next_week / rollback_user_to_week_1 / update_progress: write-through
+    · 세션 상태를 바꾸는 메서드: 해당 (user_id, week) 항목 무효화
+    · (옵션) Firestore on_snapshot 리스너로 다른 uvicorn 워커에서 일어난 변경도 무효화
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from google.cloud.firestore_v1 import FieldFilter
+from coach_agent.services.base_repo import AsyncRepo
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    TTL + LRU 캐시. on_snapshot 콜백(백그라운드 스레드)에서도 접근하므로 lock으로 보호한다.
+    on_evict: 항목이 만료/축출/무효화될 때 key를 받아 호출 (스냅샷 리스너 해제용)
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 30.0,
+                 on_evict: Optional[Callable[[Hashable], None]] = None) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        expired = False
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at >= time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                expired = True
+            self.misses += 1
+        if expired and self.on_evict:
+            self.on_evict(key)
+        return default
+
+    def peek(self, key: Hashable) -> Any:
+        """hit/miss 카운트 없이 현재 값 조회 (write-through용)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                return _MISSING
+            return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        evicted = []
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                old_key, _ = self._data.popitem(last=False)
+                self.evictions += 1
+                evicted.append(old_key)
+        if self.on_evict:
+            for k in evicted:
+                self.on_evict(k)
+
+    def invalidate(self, key: Hashable, notify: bool = True) -> None:
+        with self._lock:
+            removed = self._data.pop(key, None) is not None
+        if removed and notify and self.on_evict:
+            self.on_evict(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            keys = list(self._data.keys())
+            self._data.clear()
+        if self.on_evict:
+            for k in keys:
+                self.on_evict(k)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class CachedAsyncRepo:
+    """
+    AsyncRepo 래퍼. 캐시하지 않는 메서드는 그대로 inner로 위임한다.
+    (Protocol을 상속하면 빈 stub 메서드가 __getattr__ 위임을 가리므로 상속하지 않음)
+
+    캐시 키:
+      - ("user", user_id)                 → get_user 결과
+      - ("weekly", user_id, week)         → get_active_weekly_session 결과 (None 포함)
+    """
+
+    def __init__(self, inner: AsyncRepo, *, max_size: int = 1024, ttl_seconds: float = 30.0,
+                 snapshot_db=None) -> None:
+        self.inner = inner
+        self.cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds, on_evict=self._on_evict)
+        # snapshot_db: 동기 firestore.Client (on_snapshot 지원). None이면 리스너 미사용(TTL만으로 일관성 유지)
+        self.snapshot_db = snapshot_db
+        self._watches: Dict[Hashable, Any] = {}
+        self._watch_lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    # ---------------------------------------------------------------
+    # 읽기 (캐시)
+    # ---------------------------------------------------------------
+    async def get_user(self, user_id: str) -> Dict[str, Any]:
+        key = ("user", user_id)
+        cached = self.cache.get(key)
+        if cached is not _MISSING:
+            return dict(cached)
+        user = await self.inner.get_user(user_id)
+        self.cache.set(key, dict(user))
+        self._watch(key)
+        return user
+
+    async def get_active_weekly_session(self, user_id: str, week: int) -> Optional[Dict[str, Any]]:
+        key = ("weekly", user_id, int(week))
+        cached = self.cache.get(key)
+        if cached is not _MISSING:
+            return dict(cached) if cached is not None else None
+        session = await self.inner.get_active_weekly_session(user_id, week)
+        self.cache.set(key, dict(session) if session is not None else None)
+        self._watch(key)
+        return session
+
+    # ---------------------------------------------------------------
+    # 유저 쓰기 (write-through)
+    # ---------------------------------------------------------------
+    def _patch_user(self, user_id: str, patch: Dict[str, Any]) -> None:
+        key = ("user", user_id)
+        current = self.cache.peek(key)
+        if current is _MISSING:
+            return
+        updated = dict(current)
+        updated.update(patch)
+        self.cache.set(key, updated)
+
+    async def upsert_user(self, user_id: str, patch: Dict[str, Any]) -> None:
+        await self.inner.upsert_user(user_id, patch)
+        self._patch_user(user_id, patch)
+
+    async def last_seen_touch(self, user_id: str) -> None:
+        now = datetime.now(timezone.utc)
+        await self.inner.upsert_user(user_id, {"last_seen_at": now})
+        self._patch_user(user_id, {"last_seen_at": now})
+
+    async def advance_to_next_week(self, user_id: str) -> int:
+        before = self.cache.peek(("user", user_id))
+        result = await self.inner.advance_to_next_week(user_id)
+        if before is not _MISSING:
+            # inner와 같은 규칙: 10주차 미만이면 진급, 아니면 프로그램 완료
+            if int(before.get("current_week", 1)) < 10:
+                self._patch_user(user_id, {"current_week": result})
+            else:
+                self._patch_user(user_id, {"program_status": "completed", "current_week": 0})
+        return result
+
+    async def rollback_user_to_week_1(self, user_id: str) -> None:
+        await self.inner.rollback_user_to_week_1(user_id)
+        self._patch_user(user_id, {
+            "current_week": 1,
+            "program_status": "active",
+            "last_weekly_session_completed_at": None,
+        })
+
+    async def reset_user_progress(self, user_id: str) -> None:
+        await self.inner.reset_user_progress(user_id)
+        self._patch_user(user_id, {
+            "current_week": 1,
+            "program_status": "active",
+            "last_weekly_session_completed_at": None,
+        })
+
+    # ---------------------------------------------------------------
+    # 세션 쓰기 (write-through)
+    # ---------------------------------------------------------------
+    async def update_progress(self, user_id: str, week: int, exit_hit: bool) -> None:
+        await self.inner.update_progress(user_id, week, exit_hit)
+        key = ("weekly", user_id, int(week))
+        current = self.cache.peek(key)
+        if current is _MISSING or current is None:
+            return
+        updated = dict(current)
+        updated["last_activity_at"] = datetime.now(timezone.utc)
+        if exit_hit:
+            updated["exit_hit_last_turn"] = True
+        self.cache.set(key, updated)
+
+    # ---------------------------------------------------------------
+    # 세션 상태 변경 (무효화)
+    # ---------------------------------------------------------------
+    async def save_session_info(self, user_id: str, thread_id: str, session_type: str, week: int, created_at: Optional[datetime] = None) -> None:
+        await self.inner.save_session_info(user_id, thread_id, session_type, week, created_at)
+        if session_type == "WEEKLY":
+            # 새 WEEKLY 세션이 생겼을 수 있음 (캐시된 None 제거)
+            self.cache.invalidate(("weekly", user_id, int(week)))
+
+    async def restart_current_week_session(self, user_id: str, week: int) -> None:
+        await self.inner.restart_current_week_session(user_id, week)
+        self.cache.invalidate(("weekly", user_id, int(week)))
+
+    async def mark_session_as_completed(self, user_id: str, week: int, completed_at: datetime) -> None:
+        # inner 내부에서 advance_to_next_week까지 수행하므로 user 항목은 통째로 무효화
+        await self.inner.mark_session_as_completed(user_id, week, completed_at)
+        self.cache.invalidate(("weekly", user_id, int(week)))
+        self.cache.invalidate(("user", user_id))
+
+    # ---------------------------------------------------------------
+    # 통계
+    # ---------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        with self._watch_lock:
+            stats["snapshot_listeners"] = len(self._watches)
+        return stats
+
+    # ---------------------------------------------------------------
+    # on_snapshot 무효화 (멀티 워커 일관성)
+    # ---------------------------------------------------------------
+    def _watch(self, key: Hashable) -> None:
+        if self.snapshot_db is None:
+            return
+        with self._watch_lock:
+            if key in self._watches:
+                return
+            self._watches[key] = None  # 자리 예약 (중복 등록 방지)
+
+        first = {"seen": False}
+
+        def _callback(*_args: Any) -> None:
+            # 리스너 등록 직후 현재 상태로 한 번 호출되므로 첫 호출은 무시
+            if not first["seen"]:
+                first["seen"] = True
+                return
+            print(f"   [RepoCache] on_snapshot 변경 감지 → 캐시 무효화: {key}")
+            # 콜백은 리스너 스레드에서 실행되므로 여기서 리스너를 해제하지 않음 (다음 캐시 적재 때 재사용)
+            self.cache.invalidate(key, notify=False)
+
+        try:
+            if key[0] == "user":
+                target = self.snapshot_db.collection("users").document(key[1])
+            else:
+                _, user_id, week = key
+                target = (self.snapshot_db.collection("users").document(user_id).collection("sessions")
+                          .where(filter=FieldFilter("week", "==", int(week)))
+                          .where(filter=FieldFilter("session_type", "==", "WEEKLY")))
+            watch = target.on_snapshot(_callback)
+        except Exception as e:
+            print(f"   [RepoCache] on_snapshot 리스너 등록 실패 ({key}): {e}")
+            with self._watch_lock:
+                self._watches.pop(key, None)
+            return
+
+        with self._watch_lock:
+            if key in self._watches:
+                self._watches[key] = watch
+                return
+        # 등록 도중 이미 축출된 경우
+        watch.unsubscribe()
+
+    def _on_evict(self, key: Hashable) -> None:
+        with self._watch_lock:
+            watch = self._watches.pop(key, None)
+        if watch is not None:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                print(f"   [RepoCache] on_snapshot 리스너 해제 실패 ({key}): {e}")
@@ -0,0 +1,159 @@
+# coach_agent/services/serde.py
+"""
+체크포인트 직렬화 레지스트리 (FirestoreSaver / SqliteSaver 공용)
+
+blob 형식: b"\\x01" + 형식 태그(ascii) + b"\\x00" + payload
+  - json          lc_dumps JSON 텍스트 (예전 LangChainSerializer 와 같은 내용)
+  - msgpack       langgraph JsonPlusSerializer 의 msgpack 인코딩
+                  (LangChain 메시지 / pydantic 모델 / datetime / set 등을 ext 타입으로 직접 인코딩; JSON 중간 단계 없음)
+  - msgpack+zstd  msgpack + zstd 압축 (작은 값은 압축 이득이 없으므로 msgpack 태그로 저장)
+- 태그 없는 값(str 또는 b"\\x01" 로 시작하지 않는 bytes)은 예전 JSON 체크포인트로 보고 lc_loads 로 읽는다.
+- 저장 형식은 settings.CHECKPOINT_SERDE, 읽기는 blob 태그를 보고 자동 선택 (형식을 바꿔도 기존 체크포인트는 그대로 읽힘)
+"""
+from __future__ import annotations
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.load import dumps as lc_dumps, loads as lc_loads
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from coach_agent.settings import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd 는 선택 의존성: 없으면 msgpack 으로 저장
+    zstandard = None
+
+MAGIC = b"\x01"
+SEP = b"\x00"
+# 이보다 작은 msgpack payload 는 압축하지 않음 (zstd 프레임 헤더가 더 큼)
+ZSTD_MIN_BYTES = 256
+
+_JSONPLUS = JsonPlusSerializer()
+
+
+# -------------------------------------------------------------------------
+# 형식별 인코더 / 디코더
+# -------------------------------------------------------------------------
+def _json_encode(obj: Any) -> bytes:
+    return lc_dumps(obj).encode("utf-8")
+
+
+def _json_decode(data: bytes) -> Any:
+    return lc_loads(data.decode("utf-8"))
+
+
+def _msgpack_encode(obj: Any) -> bytes:
+    # 리스트로 감싸면 None / bytes 같은 값도 항상 msgpack 타입으로 인코딩됨
+    type_, data = _JSONPLUS.dumps_typed([obj])
+    assert type_ == "msgpack", type_
+    return data
+
+
+def _msgpack_decode(data: bytes) -> Any:
+    return _JSONPLUS.loads_typed(("msgpack", data))[0]
+
+
+_local = threading.local()
+
+
+def _zstd_compress(data: bytes, level: int = 3) -> bytes:
+    # ZstdCompressor 는 스레드 간 공유 불가 -> 스레드별 / 레벨별로 재사용
+    compressors = getattr(_local, "compressors", None)
+    if compressors is None:
+        compressors = _local.compressors = {}
+    if level not in compressors:
+        compressors[level] = zstandard.ZstdCompressor(level=level)
+    return compressors[level].compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    if zstandard is None:
+        raise RuntimeError("msgpack+zstd 체크포인트를 읽으려면 zstandard 패키지가 필요합니다. (pip install zstandard)")
+    decompressor = getattr(_local, "decompressor", None)
+    if decompressor is None:
+        decompressor = _local.decompressor = zstandard.ZstdDecompressor()
+    return decompressor.decompress(data)
+
+
+# 형식 태그 -> (encode, decode). 새 형식은 register_format 으로 추가
+SERDE_FORMATS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "json": (_json_encode, _json_decode),
+    "msgpack": (_msgpack_encode, _msgpack_decode),
+    "msgpack+zstd": (
+        lambda obj: _zstd_compress(_msgpack_encode(obj)),
+        lambda data: _msgpack_decode(_zstd_decompress(data)),
+    ),
+}
+
+
+def register_format(tag: str, encode: Callable[[Any], bytes], decode: Callable[[bytes], Any]) -> None:
+    if not tag.isascii() or "\x00" in tag:
+        raise ValueError(f"형식 태그는 ascii 문자열이어야 합니다: {tag!r}")
+    SERDE_FORMATS[tag] = (encode, decode)
+
+
+def compress_blob(data: bytes, level: int = 3) -> Tuple[bytes, Optional[str]]:
+    """이미 zstd 로 압축된 blob 이 아니면 zstd 압축 -> (payload, codec). zstandard 가 없으면 그대로"""
+    if zstandard is None or blob_format(data).endswith("+zstd"):
+        return data, None
+    return _zstd_compress(data, level), "zstd"
+
+
+def decompress_blob(data: bytes, codec: Optional[str]) -> bytes:
+    if codec is None:
+        return data
+    if codec != "zstd":
+        raise ValueError(f"알 수 없는 압축 형식입니다: {codec!r}")
+    return _zstd_decompress(data)
+
+
+def blob_format(data: bytes | str) -> str:
+    """저장된 blob 의 형식 태그 (태그 없는 예전 값은 'json')"""
+    if isinstance(data, (bytes, bytearray)) and data[:1] == MAGIC:
+        return bytes(data[1:]).split(SEP, 1)[0].decode("ascii")
+    return "json"
+
+
+# -------------------------------------------------------------------------
+# 체크포인터용 시리얼라이저
+# -------------------------------------------------------------------------
+class CheckpointSerializer:
+    """
+    dumps: 설정된 형식으로 인코딩 + 형식 태그
+    loads: 태그를 보고 형식 선택 (태그 없는 str / bytes 는 예전 JSON)
+    """
+
+    def __init__(self, fmt: str = "msgpack+zstd", zstd_level: int = 3) -> None:
+        if fmt not in SERDE_FORMATS:
+            raise ValueError(f"지원하지 않는 CHECKPOINT_SERDE 입니다: {fmt!r} (가능: {', '.join(SERDE_FORMATS)})")
+        if fmt.endswith("+zstd") and zstandard is None:
+            print(f"⚠️ [Serde] zstandard 패키지가 없어 {fmt} 대신 msgpack 으로 저장합니다.")
+            fmt = fmt[: -len("+zstd")]
+        self.format = fmt
+        self.zstd_level = zstd_level
+
+    def dumps(self, obj: Any) -> bytes:
+        if self.format == "msgpack+zstd":
+            raw = _msgpack_encode(obj)
+            if len(raw) < ZSTD_MIN_BYTES:
+                return MAGIC + b"msgpack" + SEP + raw
+            return MAGIC + b"msgpack+zstd" + SEP + _zstd_compress(raw, self.zstd_level)
+        encode, _ = SERDE_FORMATS[self.format]
+        return MAGIC + self.format.encode("ascii") + SEP + encode(obj)
+
+    def loads(self, data: bytes | str) -> Any:
+        if isinstance(data, str):
+            return lc_loads(data)
+        data = bytes(data)
+        if data[:1] != MAGIC:
+            return _json_decode(data)
+        tag, _, payload = data[1:].partition(SEP)
+        try:
+            _, decode = SERDE_FORMATS[tag.decode("ascii")]
+        except KeyError:
+            raise ValueError(f"알 수 없는 체크포인트 형식 태그입니다: {tag!r}") from None
+        return decode(payload)
+
+
+def get_checkpoint_serializer(fmt: Optional[str] = None) -> CheckpointSerializer:
+    return CheckpointSerializer(fmt or settings.CHECKPOINT_SERDE, zstd_level=settings.CHECKPOINT_ZSTD_LEVEL)
@@ -0,0 +1,253 @@
+# coach_agent/services/sqlite_checkpointer.py
+"""
+LangGraph BaseCheckpointSaver 의 SQLite 구현 (REPO_BACKEND=sqlite)
+
+- SqliteRepo 와 같은 DB 파일 / 연결 풀 사용 (sqlite_db.get_sqlite_db)
+- 직렬화는 FirestoreSaver 와 같은 형식 태그 blob (services/serde.py; 두 저장소의 체크포인트 형식이 동일)
+- 키: (thread_id, checkpoint_ns, checkpoint_id) — 서브그래프 체크포인트가 부모 스레드의 최신 체크포인트와 섞이지 않음
+- put_writes 는 체크포인트당 트랜잭션 한 번 (executemany)
+"""
+from __future__ import annotations
+
+from typing import Optional, Iterator, AsyncIterator, Sequence, Any, List, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    Checkpoint,
+    CheckpointMetadata,
+    ChannelVersions,
+    WRITES_IDX_MAP,
+)
+
+from coach_agent.services.serde import get_checkpoint_serializer
+from coach_agent.services.sqlite_db import SqliteDatabase, get_sqlite_db, now_utc, ts
+from coach_agent.observability.metrics import CHECKPOINT_BLOB_BYTES, timed_operation
+from coach_agent.observability.tracing import TRACER
+
+_SQL_GET = ("SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?")
+_SQL_GET_LATEST = ("SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints "
+                   "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1")
+_SQL_LIST = ("SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints "
+             "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ? "
+             "ORDER BY checkpoint_id DESC LIMIT ?")
+_SQL_WRITES = ("SELECT task_id, channel, value FROM checkpoint_writes "
+               "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx")
+_SQL_PUT = ("INSERT OR REPLACE INTO checkpoints "
+            "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_SQL_PUT_WRITE = ("INSERT OR REPLACE INTO checkpoint_writes "
+                  "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, value) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_SQL_PUT_WRITE_IF_ABSENT = _SQL_PUT_WRITE.replace("INSERT OR REPLACE", "INSERT OR IGNORE")
+_SQL_DELETE_CHECKPOINTS = "DELETE FROM checkpoints WHERE thread_id = ?"
+_SQL_DELETE_WRITES = "DELETE FROM checkpoint_writes WHERE thread_id = ?"
+
+# list() 에서 limit 이 없을 때 / before 가 없을 때 쓰는 경계값 (SQL 문 하나로 prepare 재사용)
+_NO_LIMIT = -1
+_MAX_ID = "\uffff"
+
+
+class SqliteSaver(BaseCheckpointSaver):
+    def __init__(self, *, db: Optional[SqliteDatabase] = None, serde=None) -> None:
+        # FirestoreSaver 와 같은 이유로 원본 시리얼라이저를 self.serializer 에 보관
+        self.serializer = serde or get_checkpoint_serializer()
+        super().__init__(serde=self.serializer)
+        self.db = db or get_sqlite_db()
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: tuple, pending_writes: List[Tuple[str, str, Any]]) -> CheckpointTuple:
+        checkpoint_id, parent_id, cp_blob, mt_blob = row
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serializer.loads(cp_blob),
+            metadata=self.serializer.loads(mt_blob),
+            parent_config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": parent_id,
+                }
+            } if parent_id else None,
+            pending_writes=pending_writes,
+        )
+
+    # ---------------------------------------------------------------------
+    # (1) GET TUPLE
+    # ---------------------------------------------------------------------
+    @timed_operation("checkpoint.get_tuple")
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        thread_id = configurable.get("thread_id")
+        if not thread_id:
+            return None
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable.get("checkpoint_id") or configurable.get("thread_ts")
+
+        conn = self.db.conn
+        if checkpoint_id:
+            row = conn.execute(_SQL_GET, (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+        else:
+            row = conn.execute(_SQL_GET_LATEST, (thread_id, checkpoint_ns)).fetchone()
+        if not row:
+            return None
+
+        pending_writes = [
+            (task_id, channel, self.serializer.loads(value))
+            for task_id, channel, value in conn.execute(_SQL_WRITES, (thread_id, checkpoint_ns, row[0]))
+        ]
+        return self._tuple(thread_id, checkpoint_ns, row, pending_writes)
+
+    # ---------------------------------------------------------------------
+    # (2) LIST
+    # ---------------------------------------------------------------------
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if not config:
+            return
+        thread_id = config["configurable"].get("thread_id")
+        if not thread_id:
+            return
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+
+        before_id = _MAX_ID
+        if before:
+            before_id = before["configurable"].get("checkpoint_id") or before["configurable"].get("thread_ts") or _MAX_ID
+
+        rows = self.db.conn.execute(_SQL_LIST, (thread_id, checkpoint_ns, before_id, limit or _NO_LIMIT)).fetchall()
+        for row in rows:
+            item = self._tuple(thread_id, checkpoint_ns, row, [])
+            if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            yield item
+
+    # ---------------------------------------------------------------------
+    # (3) PUT
+    # ---------------------------------------------------------------------
+    @timed_operation("checkpoint.put")
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = configurable.get("thread_id")
+        if not thread_id:
+            raise ValueError("SqliteSaver.put: 'thread_id'가 config에 없습니다.")
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+
+        cp_blob = self.serializer.dumps(checkpoint)
+        mt_blob = self.serializer.dumps(metadata)
+        CHECKPOINT_BLOB_BYTES.observe(len(cp_blob), kind="checkpoint")
+        CHECKPOINT_BLOB_BYTES.observe(len(mt_blob), kind="metadata")
+        TRACER.annotate(thread_id=thread_id, payload_bytes=len(cp_blob) + len(mt_blob))
+
+        with self.db.transaction() as conn:
+            conn.execute(_SQL_PUT, (
+                thread_id, checkpoint_ns, checkpoint["id"],
+                configurable.get("checkpoint_id"),  # 부모 체크포인트
+                cp_blob, mt_blob, ts(now_utc()),
+            ))
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    # ---------------------------------------------------------------------
+    # (4) PUT WRITES
+    # ---------------------------------------------------------------------
+    @timed_operation("checkpoint.put_writes")
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        thread_id = configurable.get("thread_id")
+        checkpoint_id = configurable.get("checkpoint_id")
+        if not thread_id or not checkpoint_id:
+            return
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+
+        rows = []
+        payload_bytes = 0
+        for idx, (channel, value) in enumerate(writes):
+            val_blob = self.serializer.dumps(value)
+            payload_bytes += len(val_blob)
+            CHECKPOINT_BLOB_BYTES.observe(len(val_blob), kind="write")
+            # 특수 채널(에러/인터럽트 등)은 음수 고정 인덱스 -> 같은 태스크가 다시 기록해도 덮어씀
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel, val_blob))
+        TRACER.annotate(thread_id=thread_id, writes=len(writes), payload_bytes=payload_bytes)
+
+        # 일반 쓰기는 먼저 기록된 것을 유지 (재실행된 태스크가 같은 idx를 다시 써도 무시)
+        sql = _SQL_PUT_WRITE if all(w[0] in WRITES_IDX_MAP for w in writes) else _SQL_PUT_WRITE_IF_ABSENT
+        with self.db.transaction() as conn:
+            conn.executemany(sql, rows)
+
+    # ---------------------------------------------------------------------
+    # (5) DELETE THREAD
+    # ---------------------------------------------------------------------
+    def delete_thread(self, thread_id: str) -> None:
+        with self.db.transaction() as conn:
+            conn.execute(_SQL_DELETE_WRITES, (thread_id,))
+            conn.execute(_SQL_DELETE_CHECKPOINTS, (thread_id,))
+
+    # ---------------------------------------------------------------------
+    # (6) Async Wrappers (전용 연결 풀에서 실행)
+    # ---------------------------------------------------------------------
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await self.db.run(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await self.db.run(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await self.db.run(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return await self.db.run(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.db.run(self.delete_thread, thread_id)
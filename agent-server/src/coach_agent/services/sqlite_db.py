@@ -0,0 +1,224 @@
+# coach_agent/services/sqlite_db.py
+"""
+단일 노드 배포용 SQLite 연결 관리 (REPO_BACKEND=sqlite)
+
+- WAL 모드: 읽기는 쓰기를 기다리지 않음 (동시 읽기 N + 쓰기 1)
+- 연결 풀: 전용 ThreadPoolExecutor(SQLITE_POOL_SIZE) 의 스레드마다 연결 하나 (thread-local)
+  -> async 코드는 run() 으로 이 풀에서 실행하므로 asyncio 기본 executor 와 경쟁하지 않음
+- 쓰기 트랜잭션은 프로세스 안에서 lock 으로 직렬화 (BEGIN IMMEDIATE 대기/SQLITE_BUSY 방지)
+- SQL 문은 모듈 상수 문자열 + ? 바인딩만 사용: sqlite3 연결별 statement 캐시(cached_statements)에서
+  한 번 prepare 된 문장을 재사용
+- 테이블: users / sessions / messages (sqlite_repo.py), checkpoints / checkpoint_writes (sqlite_checkpointer.py)
+"""
+from __future__ import annotations
+import asyncio
+import functools
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator, Optional
+from coach_agent.settings import settings
+
+STATEMENT_CACHE_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    data    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id            TEXT NOT NULL,
+    thread_id          TEXT NOT NULL,
+    week               INTEGER,
+    session_type       TEXT,
+    status             TEXT,
+    drawer_visible     INTEGER,
+    is_current_program INTEGER,
+    created_at         TEXT,
+    data               TEXT NOT NULL,
+    PRIMARY KEY (user_id, thread_id)
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_active
+    ON sessions (user_id, week, session_type, status);
+CREATE INDEX IF NOT EXISTS idx_sessions_drawer
+    ON sessions (user_id, drawer_visible, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_sessions_program
+    ON sessions (user_id, is_current_program, week);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id      TEXT NOT NULL,
+    thread_id    TEXT NOT NULL,
+    session_type TEXT,
+    week         INTEGER,
+    role         TEXT,
+    text         TEXT,
+    created_at   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_thread
+    ON messages (user_id, thread_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_messages_user
+    ON messages (user_id, created_at);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id            TEXT NOT NULL,
+    checkpoint_ns        TEXT NOT NULL DEFAULT '',
+    checkpoint_id        TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    checkpoint           BLOB NOT NULL,
+    metadata             BLOB NOT NULL,
+    created_at           TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE INDEX IF NOT EXISTS idx_checkpoints_thread
+    ON checkpoints (thread_id, checkpoint_id);
+
+CREATE TABLE IF NOT EXISTS checkpoint_writes (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id       TEXT NOT NULL,
+    idx           INTEGER NOT NULL,
+    channel       TEXT NOT NULL,
+    value         BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+# -------------------------------------------------------------------------
+# 시각 / JSON 변환
+# -------------------------------------------------------------------------
+def now_utc() -> datetime:
+    """firestore.SERVER_TIMESTAMP 대신 쓰는 서버 시각"""
+    return datetime.now(timezone.utc)
+
+
+def ts(value: Optional[datetime]) -> Optional[str]:
+    """정렬 가능한 UTC 문자열 (자릿수 고정: 문자열 비교 == 시간 비교)"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+
+def from_ts(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return {"$dt": ts(obj)}
+    raise TypeError(f"SQLite 문서에 저장할 수 없는 타입입니다: {type(obj).__name__}")
+
+
+def _json_hook(obj: dict) -> Any:
+    if len(obj) == 1 and "$dt" in obj:
+        return from_ts(obj["$dt"])
+    return obj
+
+
+def dumps_doc(doc: dict) -> str:
+    """Firestore 문서(dict) -> JSON 텍스트 (datetime 보존)"""
+    return json.dumps(doc, ensure_ascii=False, default=_json_default)
+
+
+def loads_doc(raw: Optional[str]) -> Optional[dict]:
+    return json.loads(raw, object_hook=_json_hook) if raw else None
+
+
+# -------------------------------------------------------------------------
+# 연결 풀
+# -------------------------------------------------------------------------
+class SqliteDatabase:
+    def __init__(self, path: str, pool_size: int = 4, busy_timeout_ms: int = 5000) -> None:
+        self.path = path
+        self.pool_size = max(1, int(pool_size))
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connections: list = []
+        self._connections_lock = threading.Lock()
+
+        with self._write_lock:
+            self.conn.executescript(SCHEMA)  # executescript 는 자체적으로 커밋
+        print(f"🗄️ SQLite 저장소 준비 완료: {path} (WAL, pool={self.pool_size})")
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: 트랜잭션은 transaction() 에서 직접 BEGIN/COMMIT
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL 에서는 NORMAL 로도 커밋 손상 없음 (전원 차단 시 마지막 커밋만 유실 가능)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """현재 스레드 전용 연결"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """쓰기 트랜잭션 (중첩 호출 시 바깥 트랜잭션에 합쳐짐)"""
+        with self._write_lock:
+            conn = self.conn
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="sqlite")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """동기 함수를 전용 연결 풀 스레드에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+
+# 프로세스 공용 인스턴스 (SqliteRepo / AsyncSqliteRepo / SqliteSaver 가 같은 파일을 공유)
+_DB: Optional[SqliteDatabase] = None
+_DB_LOCK = threading.Lock()
+
+
+def get_sqlite_db() -> SqliteDatabase:
+    global _DB
+    with _DB_LOCK:
+        if _DB is None:
+            _DB = SqliteDatabase(settings.SQLITE_PATH, pool_size=settings.SQLITE_POOL_SIZE)
+        return _DB
@@ -0,0 +1,415 @@
+# coach_agent/services/sqlite_repo.py
+"""
+Repo / AsyncRepo 의 SQLite 구현 (REPO_BACKEND=sqlite; 온프레미스 / 엣지 단일 노드 배포용)
+
+- 문서 구조는 FirestoreRepo 와 동일: 유저/세션 문서는 JSON(data 컬럼)으로 통째로 보관하고,
+  조회 조건에 쓰는 필드(week, session_type, status, drawer_visible, is_current_program, created_at)만 컬럼으로 복제
+- 세션 문서 갱신은 트랜잭션 안에서 읽기 -> merge -> 쓰기 (Firestore set(merge=True) / update 와 같은 의미)
+- AsyncSqliteRepo 는 SqliteRepo 를 전용 연결 풀(sqlite_db.SqliteDatabase.run)에서 실행
+"""
+from __future__ import annotations
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+from coach_agent.services.base_repo import Repo, AsyncRepo
+from coach_agent.services.sqlite_db import SqliteDatabase, get_sqlite_db, dumps_doc, loads_doc, now_utc, ts, from_ts
+from coach_agent.utils.pagination import encode_cursor, decode_cursor
+
+DRAWER_SESSION_FIELDS = ["week", "session_type", "status", "result", "created_at"]
+
+# --- SQL (연결별 statement 캐시에서 재사용되도록 상수 문자열로만 사용) ---
+_SQL_GET_USER = "SELECT data FROM users WHERE user_id = ?"
+_SQL_PUT_USER = ("INSERT INTO users (user_id, data) VALUES (?, ?) "
+                 "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data")
+_SQL_GET_SESSION = "SELECT data FROM sessions WHERE user_id = ? AND thread_id = ?"
+_SQL_PUT_SESSION = (
+    "INSERT INTO sessions (user_id, thread_id, week, session_type, status, drawer_visible, is_current_program, created_at, data) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(user_id, thread_id) DO UPDATE SET week = excluded.week, session_type = excluded.session_type, "
+    "status = excluded.status, drawer_visible = excluded.drawer_visible, "
+    "is_current_program = excluded.is_current_program, created_at = excluded.created_at, data = excluded.data"
+)
+_SQL_ACTIVE_WEEKLY = (
+    "SELECT thread_id, data FROM sessions "
+    "WHERE user_id = ? AND week = ? AND session_type = 'WEEKLY' AND status IN ('draft', 'active', 'paused') "
+    "ORDER BY created_at DESC LIMIT 1"
+)
+_SQL_ACTIVE_BY_WEEK = "SELECT thread_id FROM sessions WHERE user_id = ? AND week = ? AND status = 'active' LIMIT 1"
+_SQL_CURRENT_PROGRAM = "SELECT thread_id FROM sessions WHERE user_id = ? AND is_current_program = 1"
+_SQL_PAST_SUMMARIES = ("SELECT data FROM sessions WHERE user_id = ? AND is_current_program = 1 AND week <= ? "
+                       "ORDER BY week")
+_SQL_ALL_SESSIONS = "SELECT thread_id, data FROM sessions WHERE user_id = ? ORDER BY created_at DESC"
+# 페이지: created_at 이 같으면 thread_id / id 순 (cursor 의 ID가 NULL 이면 같은 시각은 건너뜀 = 예전 cursor)
+_SQL_SESSIONS_PAGE = ("SELECT thread_id, data FROM sessions WHERE user_id = ? AND drawer_visible = 1 "
+                      "ORDER BY created_at DESC, thread_id DESC LIMIT ?")
+_SQL_SESSIONS_PAGE_AFTER = ("SELECT thread_id, data FROM sessions WHERE user_id = ? AND drawer_visible = 1 "
+                            "AND (created_at < ? OR (created_at = ? AND thread_id < ?)) "
+                            "ORDER BY created_at DESC, thread_id DESC LIMIT ?")
+_SQL_ADD_MESSAGE = ("INSERT INTO messages (user_id, thread_id, session_type, week, role, text, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_SQL_USER_MESSAGES = ("SELECT user_id, session_type, week, role, text, created_at FROM messages "
+                      "WHERE user_id = ? ORDER BY created_at, id")
+_SQL_SESSION_MESSAGES = ("SELECT role, text, created_at FROM messages WHERE user_id = ? AND thread_id = ? "
+                         "ORDER BY created_at, id")
+_SQL_SESSION_MESSAGES_PAGE = ("SELECT role, text, created_at, id FROM messages WHERE user_id = ? AND thread_id = ? "
+                              "ORDER BY created_at, id LIMIT ?")
+_SQL_SESSION_MESSAGES_PAGE_AFTER = ("SELECT role, text, created_at, id FROM messages WHERE user_id = ? AND thread_id = ? "
+                                    "AND (created_at > ? OR (created_at = ? AND id > ?)) ORDER BY created_at, id LIMIT ?")
+
+
+def _merge(doc: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """Firestore merge 의미: 'checkpoint.step_index' 같은 점 표기 경로도 중첩 필드로 반영"""
+    for key, value in patch.items():
+        target = doc
+        parts = key.split(".")
+        for part in parts[:-1]:
+            if not isinstance(target.get(part), dict):
+                target[part] = {}
+            target = target[part]
+        target[parts[-1]] = value
+    return doc
+
+
+def _flag(value: Any) -> Optional[int]:
+    return None if value is None else int(bool(value))
+
+
+class SqliteRepo(Repo):
+    def __init__(self, db: Optional[SqliteDatabase] = None) -> None:
+        self.db = db or get_sqlite_db()
+
+    # --- 내부: 문서 읽기/쓰기 ---
+    def _read_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.conn.execute(_SQL_GET_USER, (user_id,)).fetchone()
+        return loads_doc(row[0]) if row else None
+
+    def _merge_user(self, user_id: str, patch: Dict[str, Any]) -> Dict[str, Any]:
+        with self.db.transaction() as conn:
+            doc = _merge(self._read_user(user_id) or {}, patch)
+            conn.execute(_SQL_PUT_USER, (user_id, dumps_doc(doc)))
+            return doc
+
+    def _read_session(self, user_id: str, thread_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.conn.execute(_SQL_GET_SESSION, (user_id, thread_id)).fetchone()
+        return loads_doc(row[0]) if row else None
+
+    def _write_session(self, user_id: str, thread_id: str, doc: Dict[str, Any]) -> None:
+        week = doc.get("week")
+        self.db.conn.execute(_SQL_PUT_SESSION, (
+            user_id, thread_id,
+            int(week) if week is not None else None,
+            doc.get("session_type"),
+            doc.get("status"),
+            _flag(doc.get("drawer_visible")),
+            _flag(doc.get("is_current_program")),
+            ts(doc.get("created_at")),
+            dumps_doc(doc),
+        ))
+
+    def _merge_session(self, user_id: str, thread_id: str, patch: Dict[str, Any], create: bool = True) -> bool:
+        """세션 문서 merge. create=False 면 문서가 없을 때 아무것도 하지 않음 (Firestore update 와 같은 의미)"""
+        with self.db.transaction():
+            doc = self._read_session(user_id, thread_id)
+            if doc is None and not create:
+                return False
+            self._write_session(user_id, thread_id, _merge(doc or {}, patch))
+            return True
+
+    # --- 유저 ---
+    def get_user(self, user_id: str) -> Dict[str, Any]:
+        doc = self._read_user(user_id)
+        if doc is None:
+            doc = {"user_id": user_id, "current_week": 1, "program_status": "active", "last_seen_at": None}
+            with self.db.transaction() as conn:
+                existing = self._read_user(user_id)
+                if existing is not None:
+                    return existing
+                conn.execute(_SQL_PUT_USER, (user_id, dumps_doc(doc)))
+        return doc
+
+    def upsert_user(self, user_id: str, patch: Dict[str, Any]) -> None:
+        self._merge_user(user_id, patch)
+
+    def last_seen_touch(self, user_id: str) -> None:
+        self.upsert_user(user_id, {"last_seen_at": now_utc()})
+
+    # --- 세션 ---
+    def get_active_weekly_session(self, user_id: str, week: int) -> Optional[Dict[str, Any]]:
+        # 색인 idx_sessions_active (user_id, week, session_type, status)
+        row = self.db.conn.execute(_SQL_ACTIVE_WEEKLY, (user_id, int(week))).fetchone()
+        if not row:
+            return None
+        data = loads_doc(row[1])
+        data["id"] = row[0]
+        return data
+
+    def create_weekly_session(self, user_id: str, week: int) -> Dict[str, Any]:
+        # 예전 인터페이스 호환용 (현재는 /session/init 에서 save_session_info 로 생성)
+        thread_id = uuid.uuid4().hex
+        self.save_session_info(user_id, thread_id, "WEEKLY", week)
+        return self.get_active_weekly_session(user_id, week) or {"id": thread_id}
+
+    def save_session_info(self, user_id: str, thread_id: str, session_type: str, week: int, created_at: Optional[datetime] = None) -> None:
+        """
+        세션 문서가 존재하면 -> last_activity_at 갱신
+        세션 문서가 없으면 -> 새로 생성 (created_at 포함)
+        """
+        with self.db.transaction():
+            doc = self._read_session(user_id, thread_id)
+            if doc is not None:
+                doc["last_activity_at"] = now_utc()
+                self._write_session(user_id, thread_id, doc)
+                return
+
+            new_created_at = created_at or now_utc()
+            doc = {
+                "id": thread_id,
+                "user_id": user_id,
+                "week": int(week),
+                "session_type": session_type,
+                "status": "active",
+                "created_at": new_created_at,
+                "started_at": new_created_at,
+                "last_activity_at": new_created_at,
+                "checkpoint": {"step_index": 0},
+                "state": {},
+                "drawer_visible": True,  # 서랍 목록 서버 측 필터용 (중도포기 시 False)
+            }
+            # WEEKLY 세션일 때만 'is_current_program' 추가 (리셋 시 중요 필드)
+            if session_type == "WEEKLY":
+                doc["is_current_program"] = True
+            self._write_session(user_id, thread_id, doc)
+        print(f"   [DB] (sqlite) save_session_info: New {session_type} session created: {thread_id}")
+
+    def save_message(self, user_id: str, thread_id: str, session_type: str, week: int, role: str, text: str) -> None:
+        # 세션 보장 + 메시지 추가를 한 트랜잭션으로
+        with self.db.transaction() as conn:
+            self.save_session_info(user_id, thread_id, session_type, week)
+            conn.execute(_SQL_ADD_MESSAGE, (user_id, thread_id, session_type, week, role, text, ts(now_utc())))
+
+    def save_messages_batch(self, messages: List[Dict[str, Any]], ensure_sessions: bool = True) -> None:
+        """write-behind 큐에서 모은 메시지들을 트랜잭션 한 번으로 저장 (AsyncFirestoreRepo.save_messages_batch 와 같은 의미)"""
+        with self.db.transaction() as conn:
+            seen = set()
+            for m in messages:
+                key = (m["user_id"], m["thread_id"])
+                if not ensure_sessions or key in seen:
+                    continue
+                seen.add(key)
+                self.save_session_info(m["user_id"], m["thread_id"], m["session_type"], m["week"])
+            conn.executemany(_SQL_ADD_MESSAGE, [
+                (m["user_id"], m["thread_id"], m["session_type"], m["week"], m["role"], m["text"],
+                 ts(m.get("created_at") or now_utc()))
+                for m in messages
+            ])
+
+    def touch_session(self, user_id: str, thread_id: str, last_activity_at: Optional[datetime] = None) -> None:
+        self._merge_session(user_id, thread_id, {"last_activity_at": last_activity_at or now_utc()}, create=False)
+
+    def update_progress(self, user_id: str, week: int, exit_hit: bool) -> None:
+        s = self.get_active_weekly_session(user_id, week)
+        if not s:
+            print(f"🚨 [DB Error] (sqlite) update_progress 실패: {week}주차 활성 세션({user_id})을 찾을 수 없습니다.")
+            return
+        patch: Dict[str, Any] = {"last_activity_at": now_utc()}
+        if exit_hit:
+            patch["exit_hit_last_turn"] = True
+        self._merge_session(user_id, s["id"], patch)
+
+    def mark_session_as_completed(self, user_id: str, week: int, completed_at: datetime) -> None:
+        with self.db.transaction():
+            s = self.get_active_weekly_session(user_id, week)
+            if not s:
+                print(f"🚨 [DB Error] (sqlite) 완료 처리 실패: {week}주차 활성 세션({user_id})을 찾을 수 없습니다.")
+                return
+            self._merge_session(user_id, s["id"], {"status": "ended", "completed_at": completed_at})
+            self._merge_user(user_id, {"last_weekly_session_completed_at": completed_at})
+            # 주차 승급 & 10주차 시 프로그램 완료 처리
+            self.advance_to_next_week(user_id)
+
+    def advance_to_next_week(self, user_id: str) -> int:
+        with self.db.transaction():
+            u = self._read_user(user_id) or {"user_id": user_id, "current_week": 1, "program_status": "active"}
+            current_week = int(u.get("current_week", 1))
+            if current_week < 10:
+                next_week = current_week + 1
+                self._merge_user(user_id, {"current_week": next_week})
+                return next_week
+            self._merge_user(user_id, {"program_status": "completed", "current_week": 0})
+            return current_week
+
+    def rollback_user_to_week_1(self, user_id: str) -> None:
+        self._merge_user(user_id, {
+            "current_week": 1,
+            "program_status": "active",
+            "last_weekly_session_completed_at": None,
+        })
+
+    def restart_current_week_session(self, user_id: str, week: int) -> None:
+        s = self.get_active_weekly_session(user_id, week)
+        if s:
+            self._merge_session(user_id, s["id"], {
+                "status": "ended",
+                "result": "abandoned",
+                "drawer_visible": False,
+                "ended_at": now_utc(),
+            }, create=False)
+            print(f"Session {s['id']} has been closed (abandoned) due to inactivity")
+
+    def update_checkpoint(self, user_id: str, week: int, step_index: int) -> None:
+        row = self.db.conn.execute(_SQL_ACTIVE_BY_WEEK, (user_id, int(week))).fetchone()
+        if not row:
+            print(f"🚨 [DB Error] (sqlite) update_checkpoint 대상 없음: week={week}, status='active'")
+            return
+        self._merge_session(user_id, row[0], {"checkpoint.step_index": step_index, "last_activity_at": now_utc()}, create=False)
+
+    # --- 메시지 ---
+    def get_messages(self, user_id: str) -> List[Dict[str, Any]]:
+        rows = self.db.conn.execute(_SQL_USER_MESSAGES, (user_id,)).fetchall()
+        return [
+            {"user_id": r[0], "session_type": r[1], "week": r[2], "role": r[3], "text": r[4], "created_at": from_ts(r[5])}
+            for r in rows
+        ]
+
+    # --- 요약 ---
+    def save_session_summary(self, user_id: str, week: int, summary_text: str) -> None:
+        s = self.get_active_weekly_session(user_id, week)
+        if s and s.get("id"):
+            self._merge_session(user_id, s["id"], {"summary": summary_text, "summary_created_at": now_utc()})
+        else:
+            print(f"Warning: No active session found to save summary for user {user_id}, week {week}")
+
+    def get_past_summaries(self, user_id: str, current_week: int) -> List[Dict[str, Any]]:
+        if current_week == 0: current_week = 11  # 0주차 = 모든 상담 프로그램 종료 -> 모두 가져오기
+        summaries = []
+        for (raw,) in self.db.conn.execute(_SQL_PAST_SUMMARIES, (user_id, int(current_week))):
+            data = loads_doc(raw)
+            if data.get("summary"):
+                summaries.append({"week": data.get("week"), "summary": data.get("summary")})
+        return summaries
+
+    # --- 서랍 ---
+    def get_all_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        results = []
+        for thread_id, raw in self.db.conn.execute(_SQL_ALL_SESSIONS, (user_id,)):
+            data = loads_doc(raw)
+            data["id"] = thread_id
+            results.append(data)
+        return results
+
+    def get_session_messages(self, user_id: str, thread_id: str) -> List[Dict[str, Any]]:
+        rows = self.db.conn.execute(_SQL_SESSION_MESSAGES, (user_id, thread_id)).fetchall()
+        return [{"role": r[0], "text": r[1], "created_at": from_ts(r[2])} for r in rows]
+
+    def get_sessions_page(self, user_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """서랍 목록 한 페이지 (최신순, 중도포기 제외). 반환: (세션 리스트, 다음 페이지 cursor 또는 None)"""
+        start_after, after_id = decode_cursor(cursor)
+        if start_after is None:
+            rows = self.db.conn.execute(_SQL_SESSIONS_PAGE, (user_id, limit + 1)).fetchall()
+        else:
+            rows = self.db.conn.execute(_SQL_SESSIONS_PAGE_AFTER,
+                                        (user_id, ts(start_after), ts(start_after), after_id, limit + 1)).fetchall()
+        results = []
+        for thread_id, raw in rows:
+            data = loads_doc(raw)
+            item = {k: data[k] for k in DRAWER_SESSION_FIELDS if k in data}
+            item["id"] = thread_id
+            results.append(item)
+        next_cursor = encode_cursor(results[limit - 1].get("created_at"), results[limit - 1]["id"]) if len(results) > limit else None
+        return results[:limit], next_cursor
+
+    def get_session_messages_page(self, user_id: str, thread_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        start_after, after_id = decode_cursor(cursor)
+        if start_after is None:
+            rows = self.db.conn.execute(_SQL_SESSION_MESSAGES_PAGE, (user_id, thread_id, limit + 1)).fetchall()
+        else:
+            after_id = int(after_id) if after_id is not None else None
+            rows = self.db.conn.execute(_SQL_SESSION_MESSAGES_PAGE_AFTER,
+                                        (user_id, thread_id, ts(start_after), ts(start_after), after_id, limit + 1)).fetchall()
+        results = [{"role": r[0], "text": r[1], "created_at": from_ts(r[2])} for r in rows]
+        next_cursor = encode_cursor(results[limit - 1].get("created_at"), rows[limit - 1][3]) if len(results) > limit else None
+        return results[:limit], next_cursor
+
+    # --- 리셋 ---
+    def reset_user_progress(self, user_id: str) -> None:
+        """사용자의 모든 진행 상황을 초기화하여 1주차 신규 유저로 만듦. (과거 세션은 is_current_program=False로 보관)"""
+        with self.db.transaction() as conn:
+            thread_ids = [r[0] for r in conn.execute(_SQL_CURRENT_PROGRAM, (user_id,)).fetchall()]
+            for thread_id in thread_ids:
+                self._merge_session(user_id, thread_id, {"is_current_program": False}, create=False)
+            self.rollback_user_to_week_1(user_id)
+        print(f"      UPDATE [DB] (sqlite) {len(thread_ids)}개 세션 아카이빙(False 처리) 완료.") # [DEBUG]
+
+
+class AsyncSqliteRepo(AsyncRepo):
+    """SqliteRepo 를 전용 연결 풀 스레드에서 실행하는 async 래퍼 (이벤트 루프를 막지 않음)"""
+
+    def __init__(self, repo: Optional[SqliteRepo] = None) -> None:
+        self.sync = repo or SqliteRepo()
+        self._run = self.sync.db.run
+
+    async def get_user(self, user_id: str) -> Dict[str, Any]:
+        return await self._run(self.sync.get_user, user_id)
+
+    async def upsert_user(self, user_id: str, patch: Dict[str, Any]) -> None:
+        await self._run(self.sync.upsert_user, user_id, patch)
+
+    async def last_seen_touch(self, user_id: str) -> None:
+        await self._run(self.sync.last_seen_touch, user_id)
+
+    async def get_active_weekly_session(self, user_id: str, week: int) -> Optional[Dict[str, Any]]:
+        return await self._run(self.sync.get_active_weekly_session, user_id, week)
+
+    async def save_session_info(self, user_id: str, thread_id: str, session_type: str, week: int, created_at: Optional[datetime] = None) -> None:
+        await self._run(self.sync.save_session_info, user_id, thread_id, session_type, week, created_at)
+
+    async def save_message(self, user_id: str, thread_id: str, session_type: str, week: int, role: str, text: str) -> None:
+        await self._run(self.sync.save_message, user_id, thread_id, session_type, week, role, text)
+
+    async def save_messages_batch(self, messages: List[Dict[str, Any]], ensure_sessions: bool = True) -> None:
+        await self._run(self.sync.save_messages_batch, messages, ensure_sessions)
+
+    async def touch_session(self, user_id: str, thread_id: str, last_activity_at: Optional[datetime] = None) -> None:
+        await self._run(self.sync.touch_session, user_id, thread_id, last_activity_at)
+
+    async def update_progress(self, user_id: str, week: int, exit_hit: bool) -> None:
+        await self._run(self.sync.update_progress, user_id, week, exit_hit)
+
+    async def mark_session_as_completed(self, user_id: str, week: int, completed_at: datetime) -> None:
+        await self._run(self.sync.mark_session_as_completed, user_id, week, completed_at)
+
+    async def advance_to_next_week(self, user_id: str) -> int:
+        return await self._run(self.sync.advance_to_next_week, user_id)
+
+    async def rollback_user_to_week_1(self, user_id: str) -> None:
+        await self._run(self.sync.rollback_user_to_week_1, user_id)
+
+    async def restart_current_week_session(self, user_id: str, week: int) -> None:
+        await self._run(self.sync.restart_current_week_session, user_id, week)
+
+    async def update_checkpoint(self, user_id: str, week: int, step_index: int) -> None:
+        await self._run(self.sync.update_checkpoint, user_id, week, step_index)
+
+    async def get_messages(self, user_id: str) -> List[Dict[str, Any]]:
+        return await self._run(self.sync.get_messages, user_id)
+
+    async def save_session_summary(self, user_id: str, week: int, summary_text: str) -> None:
+        await self._run(self.sync.save_session_summary, user_id, week, summary_text)
+
+    async def get_past_summaries(self, user_id: str, current_week: int) -> List[Dict[str, Any]]:
+        return await self._run(self.sync.get_past_summaries, user_id, current_week)
+
+    async def get_all_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        return await self._run(self.sync.get_all_sessions, user_id)
+
+    async def get_session_messages(self, user_id: str, thread_id: str) -> List[Dict[str, Any]]:
+        return await self._run(self.sync.get_session_messages, user_id, thread_id)
+
+    async def get_sessions_page(self, user_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self._run(self.sync.get_sessions_page, user_id, limit, cursor)
+
+    async def get_session_messages_page(self, user_id: str, thread_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self._run(self.sync.get_session_messages_page, user_id, thread_id, limit, cursor)
+
+    async def reset_user_progress(self, user_id: str) -> None:
+        await self._run(self.sync.reset_user_progress, user_id)
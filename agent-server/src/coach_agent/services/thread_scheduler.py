@@ -0,0 +1,79 @@
+# coach_agent/services/thread_scheduler.py
+"""
+thread_id 별 턴 직렬화 (같은 스레드의 /chat 은 한 번에 하나씩, 다른 스레드는 병렬)
+
+- 같은 thread_id로 /chat 두 개가 동시에 들어오면 둘 다 같은 최신 체크포인트를 읽고 LLM을 돌린 뒤
+  한쪽이 다른 쪽 state를 덮어쓴다. 턴 단위로 thread_id 락을 잡아 순서대로 실행한다.
+- 락 레지스트리: thread_id → (asyncio.Lock, 대기/보유 수). 아무도 쓰지 않으면 바로 제거 (idle eviction)
+- 통계: 스레드별 대기열 길이, 대기 시간 (평균 / p95 / 최대)
+"""
+from __future__ import annotations
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict
+
+
+class _ThreadSlot:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0  # 락을 잡고 있거나 기다리는 요청 수
+
+
+class ThreadTurnScheduler:
+    def __init__(self, wait_samples: int = 1000) -> None:
+        self._slots: Dict[str, _ThreadSlot] = {}
+        self._waits_ms: Deque[float] = deque(maxlen=wait_samples)  # 최근 대기 시간 샘플
+        # 운영 통계
+        self.turns = 0
+        self.contended = 0          # 앞선 턴을 기다려야 했던 턴 수
+        self.max_queue_depth = 0    # 관측된 스레드별 최대 대기열 길이 (실행 중 1개 포함)
+        self.max_wait_ms = 0.0
+
+    @asynccontextmanager
+    async def turn(self, thread_id: str) -> AsyncIterator[None]:
+        slot = self._slots.get(thread_id)
+        if slot is None:
+            slot = self._slots[thread_id] = _ThreadSlot()
+        slot.users += 1
+        self.max_queue_depth = max(self.max_queue_depth, slot.users)
+        if slot.users > 1:
+            self.contended += 1
+            print(f"   🚦 [ThreadScheduler] 같은 스레드의 이전 턴 대기 중: {thread_id} (대기열 {slot.users - 1})")
+
+        started = time.perf_counter()
+        try:
+            async with slot.lock:
+                wait_ms = (time.perf_counter() - started) * 1000
+                self._waits_ms.append(wait_ms)
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+                self.turns += 1
+                yield
+        finally:
+            slot.users -= 1
+            if slot.users == 0 and self._slots.get(thread_id) is slot:
+                del self._slots[thread_id]
+
+    def queue_depth(self, thread_id: str) -> int:
+        slot = self._slots.get(thread_id)
+        return slot.users if slot else 0
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits_ms)
+        return {
+            "active_threads": len(self._slots),
+            "waiting": sum(max(s.users - 1, 0) for s in self._slots.values()),
+            "max_queue_depth": self.max_queue_depth,
+            "turns": self.turns,
+            "contended": self.contended,
+            "wait_ms_avg": round(sum(waits) / len(waits), 2) if waits else 0.0,
+            "wait_ms_p95": round(waits[int(len(waits) * 0.95) - 1 if len(waits) >= 20 else -1], 2) if waits else 0.0,
+            "wait_ms_max": round(self.max_wait_ms, 2),
+        }
+
+
+# /chat, /chat/stream 공용
+THREAD_SCHEDULER = ThreadTurnScheduler()
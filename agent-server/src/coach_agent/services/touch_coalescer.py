@@ -0,0 +1,221 @@
+# coach_agent/services/touch_coalescer.py
+"""
+유저 / 세션 "touch" 쓰기 합치기 (debounce)
+
+- 한 턴마다 같은 문서에 여러 번 쓰기가 발생한다.
+    · save_message → save_session_info: 세션 문서 get + last_activity_at update
+    · UpdateProgress 노드: last_seen_touch(user 문서) + update_progress(세션 문서 last_activity_at)
+  Firestore는 문서 하나당 지속 쓰기 속도가 제한되어 있으므로, 활동 시각은 메모리에 최신값만 들고 있다가
+  flush_interval 마다 최대 한 번씩만 기록한다.
+- update_progress(exit_hit 아님)는 주차의 활성 세션(캐시된 get_active_weekly_session)을 찾아 세션 touch로 합침
+  -> flush 때 그 세션 문서에 last_activity_at=touch 시각을 바로 기록 (활성 세션을 다시 조회하지 않음)
+- 세션 존재 집합(LRU): 이미 확인/생성한 (user_id, thread_id)는 save_session_info의 존재 확인 읽기를 생략
+- 세션이 끝날 때(mark_session_as_completed / restart_current_week_session / exit_hit) 는 해당 유저의
+  대기 중인 touch를 먼저 flush 한 뒤 실제 쓰기를 수행
+- 워커(start/stop)는 main.py lifespan에서 관리. 워커가 돌지 않으면 모든 호출을 그대로 inner로 전달
+"""
+from __future__ import annotations
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class TouchCoalescingRepo:
+    """
+    AsyncRepo 래퍼. 합치지 않는 메서드는 그대로 inner로 위임한다.
+    (CachedAsyncRepo와 같은 이유로 AsyncRepo Protocol을 상속하지 않음)
+    """
+
+    def __init__(self, inner, *, flush_interval: float = 30.0, known_sessions_max: int = 10000) -> None:
+        self.inner = inner
+        self.flush_interval = flush_interval
+        self.known_sessions_max = known_sessions_max
+        self._known_sessions: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        # 대기 중인 touch (최신 시각만 유지)
+        self._pending_users: Dict[str, datetime] = {}                     # user_id → last_seen_at
+        self._pending_sessions: Dict[Tuple[str, str], datetime] = {}      # (user_id, thread_id) → last_activity_at
+        self._task: Optional[asyncio.Task] = None
+        # 운영 통계
+        self.touches = 0
+        self.writes = 0
+        self.existence_reads_skipped = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ---------------------------------------------------------------
+    # 생명주기 (FastAPI lifespan 에서 호출)
+    # ---------------------------------------------------------------
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._worker(), name="touch-coalescer")
+        print(f"👆 [TouchCoalescer] 시작 (flush_interval={self.flush_interval}s)")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+        print(f"👆 [TouchCoalescer] 종료 (touches={self.touches}, writes={self.writes})")
+
+    async def _worker(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"   ⚠️ [TouchCoalescer] flush 실패: {e}")
+
+    # ---------------------------------------------------------------
+    # flush
+    # ---------------------------------------------------------------
+    async def flush(self, user_id: Optional[str] = None) -> int:
+        """대기 중인 touch 기록. user_id를 주면 해당 유저 것만."""
+        def _take(pending: Dict) -> List:
+            keys = [k for k in pending if user_id is None or (k if isinstance(k, str) else k[0]) == user_id]
+            return [(k, pending.pop(k)) for k in keys]
+
+        users = _take(self._pending_users)
+        sessions = _take(self._pending_sessions)
+
+        count = 0
+        for uid, ts in users:
+            try:
+                await self.inner.upsert_user(uid, {"last_seen_at": ts})
+                count += 1
+            except Exception as e:
+                print(f"   ⚠️ [TouchCoalescer] last_seen_at 기록 실패 ({uid}): {e}")
+        for (uid, tid), ts in sessions:
+            try:
+                await self.inner.touch_session(uid, tid, ts)
+                count += 1
+            except Exception as e:
+                print(f"   ⚠️ [TouchCoalescer] last_activity_at 기록 실패 ({uid}/{tid}): {e}")
+        self.writes += count
+        return count
+
+    # ---------------------------------------------------------------
+    # 세션 존재 집합
+    # ---------------------------------------------------------------
+    def _remember_session(self, user_id: str, thread_id: str) -> None:
+        key = (user_id, thread_id)
+        self._known_sessions[key] = None
+        self._known_sessions.move_to_end(key)
+        while len(self._known_sessions) > self.known_sessions_max:
+            self._known_sessions.popitem(last=False)
+
+    def _is_known_session(self, user_id: str, thread_id: str) -> bool:
+        key = (user_id, thread_id)
+        if key in self._known_sessions:
+            self._known_sessions.move_to_end(key)
+            return True
+        return False
+
+    # ---------------------------------------------------------------
+    # touch 합치기
+    # ---------------------------------------------------------------
+    async def get_user(self, user_id: str) -> Dict[str, Any]:
+        user = await self.inner.get_user(user_id)
+        # 아직 기록하지 않은 last_seen_at이 있으면 덮어써서 반환 (미접속 기간 계산이 어긋나지 않도록)
+        pending = self._pending_users.get(user_id)
+        if pending is not None:
+            user = dict(user)
+            user["last_seen_at"] = pending
+        return user
+
+    async def last_seen_touch(self, user_id: str) -> None:
+        if not self.running:
+            return await self.inner.last_seen_touch(user_id)
+        self.touches += 1
+        self._pending_users[user_id] = datetime.now(timezone.utc)
+
+    async def save_session_info(self, user_id: str, thread_id: str, session_type: str, week: int, created_at: Optional[datetime] = None) -> None:
+        if self.running and self._is_known_session(user_id, thread_id):
+            # 이미 존재하는 세션: 읽기 생략, last_activity_at은 다음 flush 때 기록
+            self.touches += 1
+            self.existence_reads_skipped += 1
+            self._pending_sessions[(user_id, thread_id)] = datetime.now(timezone.utc)
+            return
+        await self.inner.save_session_info(user_id, thread_id, session_type, week, created_at)
+        self._remember_session(user_id, thread_id)
+
+    async def save_message(self, user_id: str, thread_id: str, session_type: str, week: int, role: str, text: str) -> None:
+        await self.save_messages_batch([{
+            "user_id": user_id,
+            "thread_id": thread_id,
+            "session_type": session_type,
+            "week": int(week),
+            "role": role,
+            "text": text,
+            "created_at": None,
+        }])
+
+    async def save_messages_batch(self, messages: List[Dict[str, Any]], ensure_sessions: bool = True) -> None:
+        if ensure_sessions:
+            seen = set()
+            for m in messages:
+                key = (m["user_id"], m["thread_id"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                await self.save_session_info(m["user_id"], m["thread_id"], m["session_type"], m["week"])
+        await self.inner.save_messages_batch(messages, ensure_sessions=False)
+
+    async def update_progress(self, user_id: str, week: int, exit_hit: bool) -> None:
+        if not self.running:
+            return await self.inner.update_progress(user_id, week, exit_hit)
+        now = datetime.now(timezone.utc)
+        session = await self.inner.get_active_weekly_session(user_id, week)
+        if exit_hit:
+            # 세션 종료 턴: exit_hit_last_turn은 바로 기록해야 하므로 대기분을 버리고 즉시 쓰기
+            if session:
+                self._pending_sessions.pop((user_id, session["id"]), None)
+            await self.inner.update_progress(user_id, week, exit_hit)
+            self.writes += 1
+            return
+        if not session:
+            print(f"🚨 [DB Error] (touch) update_progress 실패: {week}주차 활성 세션({user_id})을 찾을 수 없습니다.")
+            return
+        self.touches += 1
+        self._pending_sessions[(user_id, session["id"])] = now
+
+    # ---------------------------------------------------------------
+    # 세션 종료 계열: 대기 중인 touch를 먼저 기록
+    # ---------------------------------------------------------------
+    async def mark_session_as_completed(self, user_id: str, week: int, completed_at: datetime) -> None:
+        await self.flush(user_id)
+        await self.inner.mark_session_as_completed(user_id, week, completed_at)
+
+    async def restart_current_week_session(self, user_id: str, week: int) -> None:
+        await self.flush(user_id)
+        await self.inner.restart_current_week_session(user_id, week)
+
+    async def reset_user_progress(self, user_id: str) -> None:
+        await self.flush(user_id)
+        await self.inner.reset_user_progress(user_id)
+
+    # ---------------------------------------------------------------
+    # 통계 (stats는 CachedAsyncRepo 것이 위임되므로 이름을 따로 둠)
+    # ---------------------------------------------------------------
+    def touch_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "flush_interval": self.flush_interval,
+            "pending_users": len(self._pending_users),
+            "pending_sessions": len(self._pending_sessions),
+            "known_sessions": len(self._known_sessions),
+            "touches": self.touches,
+            "writes": self.writes,
+            "existence_reads_skipped": self.existence_reads_skipped,
+        }
@@ -12,7 +12,73 @@ class Settings(BaseModel):
     OPENAI_TONE_MODEL: str = os.getenv("OPENAI_TONE_MODEL", "gpt-5-nano")    # 2. 말투 교정용 후처리 모델 (단순 변환용, 가볍고 빠른 모델)
     
     SERVICE_AUTH_HEADER: str = os.getenv("SERVICE_AUTH_HEADER", "dev-secret")
-    REPO_BACKEND: str = os.getenv("REPO_BACKEND", "firestore")  # .env에 REPO_BACKEND가 없으면 기본값 "firestore" 사용
+    REPO_BACKEND: str = os.getenv("REPO_BACKEND", "firestore")  # .env에 REPO_BACKEND가 없으면 기본값 "firestore" 사용 (memory: 자격 증명 없이 in-memory Firestore, sqlite: 로컬 파일 DB)
+    
+    # REPO_BACKEND=sqlite (services/sqlite_db.py): DB 파일 경로 / 전용 연결 풀 크기
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "coach_agent.db")
+    SQLITE_POOL_SIZE: int = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+    
+    # LangGraph 체크포인트 저장 형식 (services/serde.py): msgpack+zstd | msgpack | json  (읽기는 형식 태그로 자동 판별)
+    CHECKPOINT_SERDE: str = os.getenv("CHECKPOINT_SERDE", "msgpack+zstd")
+    CHECKPOINT_ZSTD_LEVEL: int = int(os.getenv("CHECKPOINT_ZSTD_LEVEL", "3"))
+    # FirestoreSaver 저장 방식: incremental(바뀐 채널 값 + 메시지 추가 로그만 기록) | full(매 put 마다 체크포인트 전체)
+    CHECKPOINT_STORAGE: str = os.getenv("CHECKPOINT_STORAGE", "incremental")
+    # 이보다 큰 체크포인트 blob 은 번호 붙은 청크 문서로 나눠 저장 (Firestore 문서 1MiB 제한 회피)
+    CHECKPOINT_CHUNK_BYTES: int = int(os.getenv("CHECKPOINT_CHUNK_BYTES", "131072"))
+    # 증분 저장의 head tail(새 채널 값 / 메시지 로그)이 이 크기를 넘으면 세그먼트 문서로 봉인 (head 문서 크기 / 최신 조회 읽기 양 상한)
+    CHECKPOINT_SEGMENT_BYTES: int = int(os.getenv("CHECKPOINT_SEGMENT_BYTES", "262144"))
+    # 최신 체크포인트 캐시 (services/checkpoint_cache.py): verify(head_token 만 읽어 확인) | trust(sticky session) | off
+    CHECKPOINT_CACHE_MODE: str = os.getenv("CHECKPOINT_CACHE_MODE", "verify")
+    CHECKPOINT_CACHE_MAX_BYTES: int = int(os.getenv("CHECKPOINT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # 체크포인트 저장 시점 (LangGraph durability): exit(턴이 끝날 때 한 번) | sync(슈퍼스텝마다, 다음 스텝 전에 저장 완료) | async(슈퍼스텝마다, 백그라운드 저장)
+    CHECKPOINT_DURABILITY: str = os.getenv("CHECKPOINT_DURABILITY", "exit")
+    # 체크포인트 보존 정책 (FirestoreSaver): 스레드별 루트 체크포인트를 최신 N개만 남김 (0 이면 끄기)
+    CHECKPOINT_KEEP_LAST: int = int(os.getenv("CHECKPOINT_KEEP_LAST", "10"))
+    # 체크포인트 GC (services/checkpoint_gc.py): 마지막 활동 후 이 기간이 지난 스레드는 체크포인트 전체 삭제
+    CHECKPOINT_THREAD_TTL_DAYS: float = float(os.getenv("CHECKPOINT_THREAD_TTL_DAYS", "21"))
+    CHECKPOINT_GENERAL_TTL_DAYS: float = float(os.getenv("CHECKPOINT_GENERAL_TTL_DAYS", "7"))  # GENERAL 스레드는 /session/init 이 다시 열지 않음
+    CHECKPOINT_GC_CONCURRENCY: int = int(os.getenv("CHECKPOINT_GC_CONCURRENCY", "8"))  # 동시에 커밋하는 삭제 배치 / 처리하는 스레드 수
+    # 완료된 세션 체크포인트 아카이브 (services/checkpoint_archive.py): off | local(CHECKPOINT_ARCHIVE_DIR) | gcs(CHECKPOINT_ARCHIVE_BUCKET)
+    CHECKPOINT_ARCHIVE_STORE: str = os.getenv("CHECKPOINT_ARCHIVE_STORE", "off")
+    CHECKPOINT_ARCHIVE_DIR: str = os.getenv("CHECKPOINT_ARCHIVE_DIR", "checkpoint_archive")
+    CHECKPOINT_ARCHIVE_BUCKET: str = os.getenv("CHECKPOINT_ARCHIVE_BUCKET", "")
+    
+    # 주간 상담 COUNSEL 턴에서 오프토픽 판별과 상담 준비(RAG) / 기법 선택을 동시에 실행 (graph/weekly/speculative.py)
+    # 기본 off: 지연은 줄지만 OFF_TOPIC 턴에서는 미리 한 RAG / LLM 호출 비용을 버림 (opt-in)
+    WEEKLY_SPECULATIVE_COUNSEL: bool = os.getenv("WEEKLY_SPECULATIVE_COUNSEL", "false").lower() == "true"
+    # 주간 상담 COUNSEL 턴 기본 실행 방식 (주차 YAML 의 counsel_mode 가 우선)
+    #   split: TechniqueSelector → TechniqueApplier / fused: FusedCounsel 한 번의 호출로 선택 + 발화
+    WEEKLY_COUNSEL_MODE: str = os.getenv("WEEKLY_COUNSEL_MODE", "split")
+    
+    # 유저/세션 메타데이터 캐시 (services/repo_cache.py)
+    REPO_CACHE_ENABLED: bool = os.getenv("REPO_CACHE_ENABLED", "true").lower() == "true"
+    REPO_CACHE_TTL_SECONDS: float = float(os.getenv("REPO_CACHE_TTL_SECONDS", "30"))
+    REPO_CACHE_MAX_SIZE: int = int(os.getenv("REPO_CACHE_MAX_SIZE", "1024"))
+    REPO_CACHE_SNAPSHOT_INVALIDATION: bool = os.getenv("REPO_CACHE_SNAPSHOT_INVALIDATION", "false").lower() == "true"  # 멀티 워커 배포 시 true 권장
+    
+    # 채팅 메시지 write-behind 저장 큐 (services/message_queue.py)
+    MESSAGE_QUEUE_ENABLED: bool = os.getenv("MESSAGE_QUEUE_ENABLED", "true").lower() == "true"
+    MESSAGE_QUEUE_MAX_SIZE: int = int(os.getenv("MESSAGE_QUEUE_MAX_SIZE", "1000"))
+    MESSAGE_QUEUE_BATCH_SIZE: int = int(os.getenv("MESSAGE_QUEUE_BATCH_SIZE", "100"))
+    MESSAGE_QUEUE_LINGER_MS: float = float(os.getenv("MESSAGE_QUEUE_LINGER_MS", "50"))
+    MESSAGE_QUEUE_SPILL_PATH: str = os.getenv("MESSAGE_QUEUE_SPILL_PATH", "message_spill.jsonl")
+    
+    # 유저/세션 touch(last_seen_at, last_activity_at) 쓰기 합치기 (services/touch_coalescer.py)
+    TOUCH_COALESCE_ENABLED: bool = os.getenv("TOUCH_COALESCE_ENABLED", "true").lower() == "true"
+    TOUCH_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("TOUCH_FLUSH_INTERVAL_SECONDS", "30"))
+    TOUCH_KNOWN_SESSIONS_MAX: int = int(os.getenv("TOUCH_KNOWN_SESSIONS_MAX", "10000"))
+    
+    # /chat 재시도 중복 실행 방지 (services/idempotency.py)
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+    IDEMPOTENCY_MAX_SIZE: int = int(os.getenv("IDEMPOTENCY_MAX_SIZE", "2048"))
+    # 진행 중 표시의 최대 유지 시간: 이 시간이 지나도 끝나지 않은 실행은 버려진 것으로 보고 재시도에 새로 실행
+    IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS: float = float(os.getenv("IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS", "300"))
+    
+    # 턴 단위 트레이싱 (observability/tracing.py): jsonl | console | none (기본 none: 켜야 기록)
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_JSONL_PATH: str = os.getenv("TRACE_JSONL_PATH", "traces.jsonl")
+    # jsonl 파일이 이 크기를 넘으면 <path>.1 로 교체 (직전 파일 하나만 보관, 0 이면 제한 없음)
+    TRACE_JSONL_MAX_BYTES: int = int(os.getenv("TRACE_JSONL_MAX_BYTES", str(50 * 1024 * 1024)))
     
     LANGSMITH_TRACING: bool = os.getenv("LANGSMITH_TRACING", "false").lower() == "true"
     LANGSMITH_API_KEY: str = os.getenv("LANGSMITH_API_KEY", "")
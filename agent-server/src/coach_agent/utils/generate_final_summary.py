@@ -4,7 +4,7 @@ from coach_agent.services.llm import CHAT_LLM # 상담 종료 시 요약을 위
 from langchain_core.messages import SystemMessage, HumanMessage
 
 # helper: 주간 상담 종료 전, update_progress에서 최종 요약 생성
-def _generate_final_summary(state: State) -> str:
+async def _generate_final_summary(state: State) -> str:
     """
     SubGraph에서 미처 요약되지 않고 남은 messages(recent messages)를
     기존 summary에 통합하여 '최종 요약본'을 리턴합니다.
@@ -38,7 +38,7 @@ def _generate_final_summary(state: State) -> str:
     )
 
     try:
-        response = CHAT_LLM.invoke([
+        response = await CHAT_LLM.ainvoke([
             SystemMessage(content="상담 기록을 최종 정리하는 전문가입니다."),
             HumanMessage(content=prompt)
         ])
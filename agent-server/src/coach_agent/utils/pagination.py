@@ -0,0 +1,39 @@
+# coach_agent/utils/pagination.py
+"""
+서랍(/sessions, /history) 페이지네이션용 opaque cursor 인코딩/디코딩
+
+- cursor 내용: 마지막으로 내려준 문서의 created_at + 문서 ID (Firestore start_after 기준값)
+  created_at 이 같은 문서가 페이지 경계에 걸쳐도 빠지지 않도록 문서 ID를 두 번째 정렬 키로 사용
+  (문서 ID가 없는 예전 cursor 는 created_at 만으로 이어감)
+- 클라이언트는 값을 해석하지 않고 X-Next-Cursor 헤더로 받은 문자열을 그대로 다시 보내면 됨
+"""
+from __future__ import annotations
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+
+def encode_cursor(created_at: Any, doc_id: Any = None) -> Optional[str]:
+    if created_at is None:
+        return None
+    if hasattr(created_at, "to_datetime"):
+        created_at = created_at.to_datetime()
+    value = created_at.isoformat() if isinstance(created_at, datetime) else str(created_at)
+    payload = {"c": value}
+    if doc_id is not None:
+        payload["i"] = str(doc_id)
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[Optional[datetime], Optional[str]]:
+    """(created_at, 문서 ID). cursor 가 없으면 (None, None), 잘못된 cursor면 ValueError"""
+    if not cursor:
+        return None, None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["c"]), data.get("i")
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
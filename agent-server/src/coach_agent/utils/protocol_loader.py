@@ -4,6 +4,7 @@ from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, List
 from coach_agent.graph.state import State
+from coach_agent.settings import settings
 import yaml
 
 
@@ -16,6 +17,8 @@ COACH_AGENT_DIR = Path(__file__).resolve().parent.parent   # .../src/coach_agent
 PROTOCOLS_DIR = COACH_AGENT_DIR / "protocols"          # .../src/coach_agent/protocols
 folder = PROTOCOLS_DIR / VERSION
 TECHNIQUE_CATALOG_PATH = folder / "techniques.yaml"
+# COUNSEL 턴 실행 방식 (split: 기법 선택 / 적용 LLM 2회, fused: 한 번에)
+COUNSEL_MODES = ("split", "fused")
 
 def _normalize_list(x) -> List[str]:
     if x is None:
@@ -83,6 +86,11 @@ def load_protocol_spec(week: int) -> Dict[str, Any]:
     # 4) 기법 관련
     allowed_techniques = _safe_list(raw.get("allowed_techniques"))
     blocked_techniques = _safe_list(raw.get("blocked_techniques"))
+    # 주차에 counsel_mode 가 없으면 settings.WEEKLY_COUNSEL_MODE
+    counsel_mode = str(raw.get("counsel_mode") or settings.WEEKLY_COUNSEL_MODE).strip().lower()
+    if counsel_mode not in COUNSEL_MODES:
+        print(f"[Protocol] week={week} 알 수 없는 counsel_mode={counsel_mode!r} → 'split' 사용")
+        counsel_mode = "split"
 
     # 5) 제약 조건
     constraints_raw = _safe_dict(raw.get("constraints"))
@@ -114,6 +122,7 @@ def load_protocol_spec(week: int) -> Dict[str, Any]:
         "success_criteria": success_criteria,
         "allowed_techniques": allowed_techniques,
         "blocked_techniques": blocked_techniques,
+        "counsel_mode": counsel_mode,
         "constraints": constraints,
         "homework": homework,
     }
@@ -0,0 +1,205 @@
+# coach_agent/utils/streaming.py
+"""
+/chat/stream (SSE) 엔드포인트용 헬퍼
+
+- format_sse: Server-Sent Events 프레임 문자열 생성
+- ResponseTextExtractor: function calling 으로 스트리밍되는 CounselorTurn 인자(JSON 조각)에서
+  response_text 값만 점진적으로 꺼내는 파서
+- TechniqueCheckedExtractor: FusedCounselTurn 용. technique_id 가 catalog 에 있을 때만 response_text 를 내보냄
+- extract_stream_text: LangGraph stream_mode="messages" 청크에서 사용자에게 보낼 텍스트 조각 추출
+"""
+from __future__ import annotations
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# 토큰을 클라이언트로 흘려보낼 노드 (사용자에게 실제로 보여줄 답변을 생성하는 노드만)
+# - TechniqueApplier: 주간 상담 답변 (CounselorTurn 구조화 출력 → response_text 만 추출)
+# - FusedCounsel: 주간 상담 fused 모드 답변 (FusedCounselTurn 구조화 출력 → response_text 만 추출)
+# - GenerateAnswer: 일반 상담 답변 (일반 텍스트)
+# HandleOffTopic / Summarizer / Exit 등 내부 판단·요약용 LLM 호출은 스트리밍하지 않음
+STRUCTURED_STREAM_NODES = {"TechniqueApplier", "FusedCounsel"}
+TEXT_STREAM_NODES = {"GenerateAnswer"}
+# FusedCounsel 은 고른 기법이 catalog 에 없으면 발화를 버리고 TechniqueApplier 에서 다시 작성
+# → technique_id 를 확인하기 전까지 response_text 를 보내지 않음 (버린 발화가 새 발화 앞에 붙어 나가지 않도록)
+TECHNIQUE_CHECKED_STREAM_NODES = {"FusedCounsel"}
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def _hex4(buf: str, pos: int) -> Optional[int]:
+    """buf[pos:pos+4] 의 16진수 값 (형식이 틀리면 -1, 아직 덜 들어왔으면 None)"""
+    if pos + 4 > len(buf):
+        return None
+    try:
+        return int(buf[pos:pos + 4], 16)
+    except ValueError:
+        return -1
+
+
+def _decode_unicode_escape(buf: str, i: int) -> Optional[Tuple[str, int]]:
+    """
+    buf[i] 에서 시작하는 \\uXXXX 디코딩 → (문자, 다음 위치). 판단에 필요한 부분이 덜 들어왔으면 None
+    - 이모지 등 BMP 밖 문자는 \\ud83d\\ude00 처럼 surrogate pair 두 개로 들어오므로 합쳐서 한 문자로
+    - 짝이 없는 surrogate 는 U+FFFD 로 (그대로 두면 UTF-8 인코딩에서 SSE 본문이 깨짐)
+    """
+    code = _hex4(buf, i + 2)
+    if code is None:
+        return None
+    if code < 0:
+        return "", i + 6
+    if 0xDC00 <= code <= 0xDFFF:
+        return "\ufffd", i + 6
+    if not 0xD800 <= code <= 0xDBFF:
+        return chr(code), i + 6
+    # high surrogate: 바로 뒤의 \uXXXX 가 low surrogate 인지 확인
+    nxt = buf[i + 6:i + 8]
+    if len(nxt) < 2 and nxt in ("", "\\"):
+        return None
+    if nxt != "\\u":
+        return "\ufffd", i + 6
+    low = _hex4(buf, i + 8)
+    if low is None:
+        return None
+    if not 0xDC00 <= low <= 0xDFFF:
+        return "\ufffd", i + 6
+    return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), i + 12
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """이벤트 이름과 JSON payload로 SSE 프레임 한 개를 만든다."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class ResponseTextExtractor:
+    """
+    tool call 인자 JSON이 조각조각 들어올 때, "response_text" 문자열 값만
+    디코딩해서 새로 확정된 부분(delta)을 돌려준다.
+
+    예) '{"respon' → '' / 'se_text": "안녕' → '안녕' / '하세요", "reasoning"' → '하세요'
+    """
+
+    def __init__(self, key: str = "response_text") -> None:
+        self.key = f'"{key}"'
+        self.buffer = ""
+        self.value_start: Optional[int] = None  # response_text 값(여는 따옴표 다음)의 시작 위치
+        self.cursor = 0                          # 다음에 디코딩할 buffer 위치
+        self.done = False
+
+    def feed(self, fragment: str) -> str:
+        if self.done or not fragment:
+            return ""
+        self.buffer += fragment
+
+        # 1) 아직 값의 시작을 못 찾았으면 키 → ':' → '"' 순서로 찾는다
+        if self.value_start is None:
+            key_pos = self.buffer.find(self.key)
+            if key_pos < 0:
+                return ""
+            pos = key_pos + len(self.key)
+            while pos < len(self.buffer) and self.buffer[pos] in " \t\r\n:":
+                pos += 1
+            if pos >= len(self.buffer):
+                return ""
+            if self.buffer[pos] != '"':
+                # 문자열이 아닌 값이면 스트리밍 포기 (최종 이벤트의 reply로 대체됨)
+                self.done = True
+                return ""
+            self.value_start = pos + 1
+            self.cursor = self.value_start
+
+        # 2) 이스케이프를 풀면서 닫는 따옴표 전까지 디코딩
+        out = []
+        buf = self.buffer
+        i = self.cursor
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch == "\\":
+                if i + 1 >= len(buf):
+                    break  # 이스케이프가 잘려서 들어옴 → 다음 조각을 기다림
+                esc = buf[i + 1]
+                if esc == "u":
+                    decoded = _decode_unicode_escape(buf, i)
+                    if decoded is None:
+                        break  # \uXXXX 또는 surrogate pair 뒤쪽이 잘려서 들어옴 → 다음 조각을 기다림
+                    text, i = decoded
+                    out.append(text)
+                    continue
+                out.append(_ESCAPES.get(esc, esc))
+                i += 2
+                continue
+            out.append(ch)
+            i += 1
+        self.cursor = i
+        return "".join(out)
+
+
+class TechniqueCheckedExtractor:
+    """
+    FusedCounselTurn 인자에서 response_text 를 꺼내되, technique_id 값이 끝까지 들어와
+    catalog 에 있는 기법으로 확인된 뒤에만 내보낸다. (그 전까지 나온 부분은 모아 두었다가 한 번에)
+    catalog 에 없거나 비어 있으면 이 호출의 발화는 버려지므로 아무것도 보내지 않음 (llm_fused_counsel 의 대체 규칙과 동일)
+    """
+
+    def __init__(self) -> None:
+        self.technique = ResponseTextExtractor("technique_id")
+        self.text = ResponseTextExtractor()
+        self.technique_id = ""
+        self.accepted: Optional[bool] = None  # None: 아직 technique_id 확인 전
+        self.pending: List[str] = []
+
+    def feed(self, fragment: str) -> str:
+        if self.accepted is None:
+            self.technique_id += self.technique.feed(fragment)
+        delta = self.text.feed(fragment)
+        if self.accepted is None:
+            if not self.technique.done:
+                self.pending.append(delta)
+                return ""
+            # protocol_loader 는 coach_agent.graph 패키지(그래프 컴파일)를 거치므로 여기서 import
+            from coach_agent.utils.protocol_loader import load_techniques_catalog
+            self.accepted = bool(self.technique_id) and self.technique_id in load_techniques_catalog()
+            delta = "".join(self.pending) + delta
+            self.pending = []
+        return delta if self.accepted else ""
+
+
+def extract_stream_text(chunk: Any, metadata: Dict[str, Any], extractors: Dict[str, Any]) -> str:
+    """
+    stream_mode="messages" 로 받은 (chunk, metadata) 한 쌍에서
+    클라이언트로 보낼 텍스트 조각을 꺼낸다. 보낼 것이 없으면 빈 문자열.
+
+    extractors: 구조화 출력 LLM 호출(run) 별 ResponseTextExtractor / TechniqueCheckedExtractor 보관용 dict
+    """
+    node = metadata.get("langgraph_node")
+
+    if node in TEXT_STREAM_NODES:
+        content = getattr(chunk, "content", "")
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return "".join(
+                item.get("text", "") for item in content
+                if isinstance(item, dict) and item.get("type") == "text"
+            )
+        return ""
+
+    if node in STRUCTURED_STREAM_NODES:
+        text = ""
+        for tc in getattr(chunk, "tool_call_chunks", None) or []:
+            args = tc.get("args") if isinstance(tc, dict) else None
+            if not args:
+                continue
+            run_id = str(getattr(chunk, "id", None) or metadata.get("langgraph_checkpoint_ns", node))
+            extractor = extractors.get(run_id)
+            if extractor is None:
+                checked = node in TECHNIQUE_CHECKED_STREAM_NODES
+                extractor = extractors[run_id] = TechniqueCheckedExtractor() if checked else ResponseTextExtractor()
+            text += extractor.feed(args)
+        return text
+
+    return ""
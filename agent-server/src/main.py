@@ -9,9 +9,12 @@
 # 주요 기능:
     - API 1: 스레드 생성/유지; 유저 상태에 따라 적절한 스레드 ID와 세션 타입 생성 및 반환
     - API 2: 주어진 스레드 ID로 LangGraph 그래프 실행
+    - API 2-1: API 2의 스트리밍 버전 (SSE; 답변 토큰을 생성되는 대로 전송)
     - API 3: 서랍 기능 (과거 채팅 내역 접근)
     - API 4: 서랍 상세 (특정 세션 메시지 내역 조회)
     - API 5: 세션 리셋 (주간 상담 관련 user db 필드 초기화; current_week 등)
+    - API 6: 운영 통계 (Repo 캐시 hit/miss, 메시지 저장 큐, touch 합치기, 중복 요청 처리, 스레드 대기열 상태, memory 백엔드 읽기/쓰기 수 등)
+    - API 7: Prometheus 메트릭 (/metrics; 노드·엔드포인트·Firestore·외부 호출 지연 히스토그램)
 
 # 채팅 기능 요구사항: 세션 & 스레드(채팅방) 관리 규칙
     1. weekly session 을 수행한 지 만 일주일이 지난 후에야 다음 상담이 진행되도록 한다. 마지막 weekly 상담으로부터 아직 7일이 지나지 않았으면 채팅창에 접속하더라도 주간 상담이 진행되지 않는다.
@@ -23,23 +26,70 @@
     7. 새로운 세션 만드는 버튼 UI(이걸 누르면 새로운 sessionType =="General" 세션이 생성되고, 새로운 thread가 시작됨. 단, 주간 상담 진행 중에는 새로운 세션을 만들 수 없고, ‘새로운 세션 만들기’ 버튼을 터치하면 ‘현재 진행 중인 주간 상담을 먼저 마무리해 주세요!’라는 안내문을 띄움
 '''
 
+import asyncio
+import time
 import uuid
 import traceback
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 # LangChain / LangGraph
 from langchain_core.messages import HumanMessage
 
 # 내 프로젝트 모듈
-from coach_agent.graph import app as graph_app  # 컴파일된 그래프
-from coach_agent.services import REPO           # DB 접근용 (Firestore/Memory)
+from coach_agent.graph import app as graph_app, durability as GRAPH_DURABILITY  # 컴파일된 그래프, 체크포인트 저장 시점
+from coach_agent.services import ASYNC_REPO     # DB 접근용 (AsyncClient 기반; 이벤트 루프를 막지 않음)
+from coach_agent.services import MESSAGE_QUEUE  # 채팅 메시지 write-behind 저장 큐
+from coach_agent.services.idempotency import CHAT_IDEMPOTENCY  # /chat 재시도 중복 실행 방지
+from coach_agent.services.thread_scheduler import THREAD_SCHEDULER  # thread_id 별 턴 직렬화
+from coach_agent.services import TOUCH_COALESCER  # last_seen_at / last_activity_at 쓰기 합치기 (비활성 시 None)
+from coach_agent.services.checkpointer import checkpointer  # 그래프 체크포인터 (최신 체크포인트 캐시 gauge 용)
+from coach_agent.settings import settings
 from coach_agent.utils._days_since import _days_since
+from coach_agent.utils.streaming import format_sse, extract_stream_text
+from coach_agent.observability.metrics import REGISTRY, METRICS_CALLBACK, CHAT_TURNS, HTTP_REQUEST_DURATION
+from coach_agent.observability.tracing import TRACER, TRACING_CALLBACK
 
 # --- 앱 초기화 ---
-server = FastAPI(title="CBT Coach Agent API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 시작: 메시지 write-behind 워커 기동 (이전 spill 파일 재전송 포함)
+    if settings.MESSAGE_QUEUE_ENABLED:
+        await MESSAGE_QUEUE.start()
+    # 시작: touch 합치기 flush 워커 기동
+    if TOUCH_COALESCER is not None:
+        await TOUCH_COALESCER.start()
+    yield
+    # 종료: 큐에 남은 메시지 flush (실패분은 spill 파일로)
+    await MESSAGE_QUEUE.stop()
+    # 종료: 대기 중인 touch 기록 (메시지 flush 중 생긴 touch 포함)
+    if TOUCH_COALESCER is not None:
+        await TOUCH_COALESCER.stop()
+
+server = FastAPI(title="CBT Coach Agent API", lifespan=lifespan)
+
+# --- 엔드포인트별 처리 시간 (/metrics) ---
+@server.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # 경로 파라미터 대신 라우트 템플릿으로 라벨링 (예: /sessions/{user_id})
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status),
+        )
 
 # ========== 데이터 모델 (DTO) =========
 # -- API 1: 세션 초기화 (교통정리) --
@@ -63,6 +113,7 @@ class ChatRequest(BaseModel):
     thread_id: str
     message: str
     session_type: str = "GENERAL" # 이건 기본값, 안드로이드가 init_session에서 받은 타입을 그대로 다시 보내줌
+    client_message_id: Optional[str] = None # 재시도 시 같은 값 → 같은 턴으로 간주 (Idempotency-Key 헤더와 동일 용도)
 
 # ChatResponse용 숙제 데이터 구조를 정의
 class HomeworkContent(BaseModel):
@@ -99,12 +150,12 @@ class ResetRequest(BaseModel):
 
 # --- 헬퍼 함수 ---
 # init_session: 활성 세션 조회 헬퍼 함수
-def _get_active_thread_id(user_id: str, week: int) -> Optional[str]:
+async def _get_active_thread_id(user_id: str, week: int) -> Optional[str]:
     """
-    REPO에서 현재 주차의 활성 세션을 찾아서 thread_id(문서 ID)를 반환.
+    ASYNC_REPO에서 현재 주차의 활성 세션을 찾아서 thread_id(문서 ID)를 반환.
     없으면 None.
     """
-    session = REPO.get_active_weekly_session(user_id, week)
+    session = await ASYNC_REPO.get_active_weekly_session(user_id, week)
     if session:
         # FirestoreRepo는 id 필드에 문서 ID를 담아줌
         return session.get("id")
@@ -122,6 +173,89 @@ def _format_kst(dt_obj: datetime) -> str:
     
     return dt_obj.astimezone(KST).strftime("%y-%m-%d %H:%M")
 
+# chat: 그래프 최종 state에서 마지막 AI 답변 텍스트 추출 (/chat, /chat/stream 공용)
+def _extract_last_ai_reply(msgs: list) -> str:
+    # 역순 탐색하되, 시스템 메시지나 __init__은 무시
+    for msg in reversed(msgs):
+        if msg.type == "ai":
+            content = msg.content
+            
+            # 내용 추출 (리스트/문자열 처리)
+            if isinstance(content, list):
+                temp_text = "\n\n".join([str(c) for c in content if isinstance(c, str)])
+            else:
+                temp_text = str(content)
+            
+            # 유효성 검사 (__init__ 제외, 빈 문자열 제외)
+            if temp_text and temp_text.strip() and temp_text.strip() != "__init__":
+                return temp_text
+    return "(응답 없음)"
+
+# chat: 그래프 최종 state → ChatResponse 구성 (/chat, /chat/stream 공용)
+def _build_chat_response(final_state: Dict[str, Any], reply: str, current_week: int) -> ChatResponse:
+    week_title = final_state.get("agenda") or "상담" 
+    raw_criteria = final_state.get("success_criteria") or []
+    week_goals = [
+        c.get("description") or c.get("label") or c.get("id", "")
+        for c in raw_criteria
+        if isinstance(c, dict)
+    ]
+    
+    # Graph의 State에서 'homework' 값을 추출
+    homework_content = final_state.get("homework", None)
+    if homework_content:
+        print(f"   -> 📬 [Homework Found]: {homework_content}") # 디버깅용
+        
+    return ChatResponse(
+        reply=reply,
+        is_ended=final_state.get("exit", False), # 그래프 결과에서 종료 여부 추출
+        current_week=current_week,
+        week_title=week_title,
+        week_goals=week_goals,
+        homework=homework_content
+    )
+
+# chat: Idempotency-Key 범위 (/chat, /chat/stream 공용)
+def _idempotency_key(req: ChatRequest, header_key: Optional[str]) -> Optional[tuple]:
+    """Idempotency-Key 헤더 우선, 없으면 client_message_id. 둘 다 없으면 None (중복 방지 안 함)"""
+    key = header_key or req.client_message_id
+    if not key:
+        return None
+    # 다른 유저/스레드의 키와 섞이지 않도록 범위를 함께 묶음
+    return (req.user_id, req.thread_id, key)
+
+# chat: LangGraph config 구성 (/chat, /chat/stream 공용)
+def _build_graph_config(req: ChatRequest, current_week: int, trace_id: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "configurable": {
+            "thread_id": req.thread_id,
+            "user_id": req.user_id,                   # 안드로이드에서 보낸 device_id
+            "session_type_override": req.session_type, # WEEKLY/GENERAL 강제 지정
+        },
+        # /metrics 노드·LLM 메트릭 라벨 + 수집용 콜백, 턴 트레이스 (노드 / LLM span)
+        "metadata": {"session_type": req.session_type, "week": current_week, "trace_id": trace_id},
+        "callbacks": [METRICS_CALLBACK, TRACING_CALLBACK],
+    }
+
+async def _graph_inputs(req: ChatRequest, config: Dict[str, Any], resumable: bool) -> Optional[Dict[str, Any]]:
+    """
+    그래프 입력 (/chat, /chat/stream 공용; 같은 스레드의 턴 순서 보장 구간 안에서 호출)
+    - 재시도 키가 있는 요청이고, 스레드의 마지막 턴이 같은 메시지로 시작했다가 중간에 멈춰 있으면(노드 예외 등) None
+      -> 멈춘 지점부터 이어서 실행 (끝난 노드 / LLM 호출을 다시 하지 않고, 사용자 메시지도 중복 저장되지 않음)
+    - 그 외에는 새 턴 (멈춘 턴의 남은 노드는 LangGraph 가 버리고 START 부터 실행)
+    """
+    inputs = {"messages": [HumanMessage(content=req.message)]}
+    if not resumable:
+        return inputs
+    snapshot = await graph_app.aget_state(config)
+    if not snapshot.next:
+        return inputs
+    last_human = next((m for m in reversed(snapshot.values.get("messages", [])) if getattr(m, "type", None) == "human"), None)
+    if last_human is None or last_human.content != req.message:
+        return inputs
+    print(f"   ♻️ [Resume] 중단된 턴 이어서 실행: next={snapshot.next}")
+    return None
+
 # --- API 1: 세션 초기화 (교통정리) ---
 @server.post("/session/init", response_model=InitSessionResponse)
 async def init_session(req: InitSessionRequest):
@@ -138,7 +272,7 @@ async def init_session(req: InitSessionRequest):
     now = datetime.now(timezone.utc)
     
     # 0. 유저 정보 조회
-    user = REPO.get_user(user_id)
+    user = await ASYNC_REPO.get_user(user_id)
     last_seen = user.get("last_seen_at")
     last_completed = user.get("last_weekly_session_completed_at")
     program_status = user.get("program_status", "active") # 10주 상담 프로그램 이수 여부 "active" | "completed"
@@ -201,7 +335,7 @@ async def init_session(req: InitSessionRequest):
     elif days_seen >= 21:
         print("   - [API Debug] 21일 이상 미접속 -> 1주차로 롤백") # 디버깅
         # DB 롤백 처리 (REPO 함수 재사용)
-        REPO.rollback_user_to_week_1(user_id)
+        await ASYNC_REPO.rollback_user_to_week_1(user_id)
         # 롤백 후 1주차로 설정
         response_data = InitSessionResponse(
             thread_id=str(uuid.uuid4()), # 새 방
@@ -230,7 +364,7 @@ async def init_session(req: InitSessionRequest):
         print("   - [API Debug] 쿨다운 기간 아님 -> 진행 중인 세션 확인...") # 디버깅
         print("   - [API Debug] Active 세션 검색 시도...") # 디버깅
         
-        active_session = REPO.get_active_weekly_session(user_id, current_week)
+        active_session = await ASYNC_REPO.get_active_weekly_session(user_id, current_week)
         print(f"   - [API Debug] 검색 결과 ID: {active_session}") # 디버깅
     
         if active_session:
@@ -251,7 +385,7 @@ async def init_session(req: InitSessionRequest):
                     session_created_at_dt = active_session["created_at"]
             else:
                 # [요구사항 3] 24시간 경과 -> 재시작 (새 방)
-                REPO.restart_current_week_session(user_id, current_week)
+                await ASYNC_REPO.restart_current_week_session(user_id, current_week)
                 new_id = str(uuid.uuid4())
                 print(f"   - [API Debug] 새로운 방에서 이번 주차 상담 재시작: {new_id}") # 디버깅
                 
@@ -315,7 +449,7 @@ async def init_session(req: InitSessionRequest):
         try:
             # ----- 2. 새로 생성된 thread id라면, 바로 DB에 세션 정보 저장 / 아니라면 last_activity_at 갱신 -----
             print(f"   - [API Debug] thread id 발급 직후 바로 DB에 저장: ID={response_data.thread_id}")
-            REPO.save_session_info(
+            await ASYNC_REPO.save_session_info(
                 user_id=user_id,
                 thread_id=response_data.thread_id, # [중요] 스레드 ID 명시
                 session_type=response_data.session_type,# [중요] 타입 강제 지정
@@ -333,19 +467,40 @@ async def init_session(req: InitSessionRequest):
 
 # --- API 2: 채팅 (그래프 실행) ---
 @server.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(req: ChatRequest):
+async def chat_endpoint(req: ChatRequest, response: Response, idempotency_key: Optional[str] = Header(None)):
+    """
+    Idempotency-Key 헤더(또는 client_message_id)가 있으면 같은 키의 재시도는 그래프를 다시 돌리지 않음
+      - 진행 중: 원래 실행이 끝나길 기다렸다가 같은 응답
+      - 완료됨: 저장된 응답 그대로
+    응답 헤더 X-Trace-Id: 이 턴의 트레이스 ID (TRACE_EXPORTER=jsonl 이면 traces.jsonl 에서 검색)
+    """
+    key = _idempotency_key(req, idempotency_key)
+    trace_id = TRACER.new_trace_id()
+    response.headers["X-Trace-Id"] = trace_id
+    return await CHAT_IDEMPOTENCY.run(key, lambda: _run_serialized_chat_turn(req, trace_id, resumable=key is not None))
+
+async def _run_serialized_chat_turn(req: ChatRequest, trace_id: Optional[str] = None, resumable: bool = False) -> ChatResponse:
+    # 루트 span: 스레드 대기 ~ 그래프 실행 ~ 응답 구성까지 한 턴 전체
+    with TRACER.start_span("chat.turn", trace_id=trace_id, kind="server", endpoint="chat",
+                           thread_id=req.thread_id, session_type=req.session_type):
+        # 같은 thread_id의 턴은 순서대로 (동시에 같은 체크포인트를 읽고 덮어쓰는 것 방지)
+        async with THREAD_SCHEDULER.turn(req.thread_id):
+            return await _run_chat_turn(req, trace_id, resumable)
+
+async def _run_chat_turn(req: ChatRequest, trace_id: Optional[str] = None, resumable: bool = False) -> ChatResponse:
     print(f"\n🔥 [Chat API Start] Thread={req.thread_id}, UserMsg='{req.message}', SessionType={req.session_type}") # 디버깅
+    current_week = 1
     try:
         # 1. DB에서 사용자 정보 조회 (program_status 확인용): graph 내부에서도 조회하지만, config 주입을 위해 여기서 미리 조회
-        user_data = REPO.get_user(req.user_id)
+        user_data = await ASYNC_REPO.get_user(req.user_id)
         program_status = user_data.get("program_status", "active") # 기본값 active
         current_week = int(user_data.get("current_week", 1))
 
         # __init__ message는 저장하지 않기
-        # 2. user 메시지 저장
+        # 2. user 메시지 저장 (write-behind 큐에 넣고 바로 진행; 실제 Firestore 쓰기는 백그라운드)
         user_text = req.message or ""
         if user_text.strip() != "__init__":
-            REPO.save_message(
+            await MESSAGE_QUEUE.enqueue(
                 user_id=req.user_id,
                 thread_id=req.thread_id,
                 session_type=req.session_type,
@@ -353,24 +508,16 @@ async def chat_endpoint(req: ChatRequest):
                 role="user",
                 text=user_text,
             )
-        # 3. 그래프 입력값(Inputs) 준비
-        inputs = {
-            "messages": [HumanMessage(content=req.message)],
-        }
-        # 4. LangGraph Config 설정
-        config = {
-            "configurable": {
-                "thread_id": req.thread_id,
-                "user_id": req.user_id,                   # 안드로이드에서 보낸 device_id
-                "session_type_override": req.session_type, # WEEKLY/GENERAL 강제 지정
-            }
-        }
+        # 3. LangGraph Config 설정
+        config = _build_graph_config(req, current_week, trace_id)
+        TRACER.annotate(week=current_week)
+        # 4. 그래프 입력값(Inputs) 준비 (중간에 멈춘 같은 턴의 재시도면 None -> 이어서 실행)
+        inputs = await _graph_inputs(req, config, resumable)
         
-        print(f"   -> [Graph Invoke] Config: {config['configurable']}") # 디버깅
+        print(f"   -> [Graph Invoke] Config: {config['configurable']}, durability={GRAPH_DURABILITY}") # 디버깅
         
-        # 5. ainvoke로 그래프 비동기 실행
-        final_state = await graph_app.ainvoke(inputs, config=config)
-        is_ended = final_state.get("exit", False) # 그래프 결과에서 종료 여부 추출
+        # 5. ainvoke로 그래프 비동기 실행 (체크포인트 저장 시점: settings.CHECKPOINT_DURABILITY)
+        final_state = await graph_app.ainvoke(inputs, config=config, durability=GRAPH_DURABILITY)
 
         # ---- 디버깅: 메시지 개수 및 마지막 메시지 내용 출력 ----
         print("   -> [Graph Finished] Final State Keys:", final_state.keys())
@@ -381,37 +528,12 @@ async def chat_endpoint(req: ChatRequest):
         # ----------------------------------------------------
 
         # 6. 결과 파싱
-        messages = final_state.get("messages", [])
-        last_ai_msg = ""
-        
-        # 역순 탐색하되, 시스템 메시지나 __init__은 무시
-        for msg in reversed(msgs):
-            if msg.type == "ai":
-                content = msg.content
-                
-                # 내용 추출 (리스트/문자열 처리)
-                if isinstance(content, list):
-                    temp_text = "\n\n".join([str(c) for c in content if isinstance(c, str)])
-                else:
-                    temp_text = str(content)
-                
-                # 유효성 검사 (__init__ 제외, 빈 문자열 제외)
-                if temp_text and temp_text.strip() and temp_text.strip() != "__init__":
-                    last_ai_msg = temp_text
-                    break
-        
-        if not last_ai_msg:
-            last_ai_msg = "(응답 없음)"
-        
+        last_ai_msg = _extract_last_ai_reply(msgs)
         print(f"   -> [Parsed AI Reply]: '{last_ai_msg}'") # 디버깅
-        
-        # 만약 메시지가 비어있다면 디버깅용 메시지
-        if not last_ai_msg:
-            last_ai_msg = "(응답 없음)"
             
-        # 7. DB 저장 (그래프 정상 실행 시): AI 메시지 저장
+        # 7. DB 저장 (그래프 정상 실행 시): AI 메시지 저장 (write-behind 큐)
         if last_ai_msg and last_ai_msg != "(응답 없음)":
-            REPO.save_message(
+            await MESSAGE_QUEUE.enqueue(
                 user_id=req.user_id,
                 thread_id=req.thread_id,
                 session_type=req.session_type,
@@ -421,27 +543,8 @@ async def chat_endpoint(req: ChatRequest):
             )
 
         # 8. 응답 구성
-        week_title = final_state.get("agenda") or "상담" 
-        raw_criteria = final_state.get("success_criteria") or []
-        week_goals = [
-            c.get("description") or c.get("label") or c.get("id", "")
-            for c in raw_criteria
-            if isinstance(c, dict)
-        ]
-        
-        # Graph의 State에서 'homework' 값을 추출
-        homework_content = final_state.get("homework", None)
-        if homework_content:
-            print(f"   -> 📬 [Homework Found]: {homework_content}") # 디버깅용
-            
-        return ChatResponse(
-            reply=last_ai_msg,
-            is_ended=is_ended,
-            current_week=current_week,
-            week_title=week_title,
-            week_goals=week_goals,
-            homework=homework_content
-        )
+        CHAT_TURNS.inc(endpoint="chat", session_type=req.session_type, week=current_week, status="ok")
+        return _build_chat_response(final_state, last_ai_msg, current_week)
 
     except Exception as e:
         print(f"ERROR executing graph: {e}")
@@ -450,7 +553,7 @@ async def chat_endpoint(req: ChatRequest):
         # [응답 생성 중 오류 발생 시] 에러 안내 메시지 저장
         try:
             # get_user가 실패했더라도 맨 위에서 current_week = 1로 초기화해뒀으므로 여기서 에러(UnboundLocalError)가 나지 않음
-            REPO.save_message(
+            await MESSAGE_QUEUE.enqueue(
                 user_id=req.user_id,
                 thread_id=req.thread_id,
                 session_type=req.session_type,
@@ -463,17 +566,170 @@ async def chat_endpoint(req: ChatRequest):
             print(f"Failed to save error message: {db_e}")
             pass
         
+        CHAT_TURNS.inc(endpoint="chat", session_type=req.session_type, week=current_week, status="error")
         raise HTTPException(status_code=500, detail=str(e))
-            
-    
+
+# --- API 2-1: 채팅 스트리밍 (SSE) ---
+@server.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest, idempotency_key: Optional[str] = Header(None)):
+    """
+    /chat 과 같은 그래프를 astream으로 실행하면서, 답변 토큰을 Server-Sent Events로 흘려보낸다.
+
+    이벤트 종류:
+      - token: {"text": "..."}  TechniqueApplier / FusedCounsel / GenerateAnswer 노드가 생성 중인 답변 조각
+      - final: ChatResponse 와 동일한 payload (reply, is_ended, current_week, week_title, week_goals, homework)
+      - error: {"detail": "..."}
+    Greeting / OffTopic / Exit 처럼 LLM 스트리밍이 없는 답변은 final 이벤트의 reply로만 전달된다.
+    같은 Idempotency-Key(또는 client_message_id)의 재시도는 그래프를 다시 돌리지 않고 final 이벤트 하나만 보낸다.
+    """
+    print(f"\n🔥 [Chat Stream API Start] Thread={req.thread_id}, UserMsg='{req.message}', SessionType={req.session_type}") # 디버깅
+
+    # 0. 중복 요청 확인 (/chat 과 같은 저장소를 공유)
+    key = _idempotency_key(req, idempotency_key)
+    trace_id = TRACER.new_trace_id()
+    owner = None  # 이 요청이 등록한 진행 중 표시 (complete / fail 에 넘김)
+    if key is not None:
+        state, value = CHAT_IDEMPOTENCY.lookup(key)
+        if state != "new":
+            print(f"   ♻️ [Idempotency] 중복 스트림 요청 ({state}): {key}")
+            return _sse_response(_replay_chat_stream(state, value), trace_id)
+        owner = CHAT_IDEMPOTENCY.begin(key)
+
+    # 1. 사용자 정보 조회 + user 메시지 저장 + config 구성 (스트림 시작 전, /chat과 동일)
+    #    여기서 실패하면 진행 중 표시를 바로 해제 (스트림 본문의 finally 는 실행되지 않음)
+    #    본문이 시작되기 전에 클라이언트가 끊긴 경우는 IdempotencyStore 의 in_flight_timeout 이 해제
+    try:
+        user_data = await ASYNC_REPO.get_user(req.user_id)
+        current_week = int(user_data.get("current_week", 1))
+
+        user_text = req.message or ""
+        if user_text.strip() != "__init__":
+            await MESSAGE_QUEUE.enqueue(
+                user_id=req.user_id,
+                thread_id=req.thread_id,
+                session_type=req.session_type,
+                week=current_week,
+                role="user",
+                text=user_text,
+            )
+        config = _build_graph_config(req, current_week, trace_id)
+    except BaseException as e:
+        if key is not None:
+            CHAT_IDEMPOTENCY.fail(key, e, owner)
+        if not isinstance(e, Exception):
+            raise
+        print(f"ERROR preparing chat stream: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def event_stream():
+        final_state: Dict[str, Any] = {}
+        extractors: Dict[str, Any] = {}
+        # 같은 thread_id의 턴은 순서대로 (그래프 실행 ~ AI 메시지 저장 구간), 이 구간이 트레이스 루트 span
+        with TRACER.start_span("chat.turn", trace_id=trace_id, kind="server", endpoint="chat_stream",
+                               thread_id=req.thread_id, session_type=req.session_type, week=current_week):
+            async with THREAD_SCHEDULER.turn(req.thread_id):
+                try:
+                    # 2. 그래프 스트리밍 실행
+                    #   - messages: LLM 토큰 (서브그래프 노드 포함 → subgraphs=True)
+                    #   - values: 루트 그래프 state (마지막 값이 최종 state)
+                    inputs = await _graph_inputs(req, config, resumable=key is not None)
+                    async for namespace, mode, chunk in graph_app.astream(
+                        inputs,
+                        config=config,
+                        stream_mode=["messages", "values"],
+                        subgraphs=True,
+                        durability=GRAPH_DURABILITY,
+                    ):
+                        if mode == "values":
+                            if not namespace:
+                                final_state = chunk
+                            continue
+
+                        msg_chunk, metadata = chunk
+                        text = extract_stream_text(msg_chunk, metadata, extractors)
+                        if text:
+                            yield format_sse("token", {"text": text})
+
+                    # 3. 최종 답변 파싱 + AI 메시지 저장 (스트림 완료 후)
+                    last_ai_msg = _extract_last_ai_reply(final_state.get("messages", []))
+                    print(f"   -> [Stream Parsed AI Reply]: '{last_ai_msg}'") # 디버깅
+
+                    if last_ai_msg and last_ai_msg != "(응답 없음)":
+                        await MESSAGE_QUEUE.enqueue(
+                            user_id=req.user_id,
+                            thread_id=req.thread_id,
+                            session_type=req.session_type,
+                            week=current_week,
+                            role="assistant",
+                            text=last_ai_msg,
+                        )
+
+                    response = _build_chat_response(final_state, last_ai_msg, current_week)
+                    if key is not None:
+                        CHAT_IDEMPOTENCY.complete(key, response, owner)
+                    CHAT_TURNS.inc(endpoint="chat_stream", session_type=req.session_type, week=current_week, status="ok")
+                    yield format_sse("final", response.model_dump())
+
+                except Exception as e:
+                    print(f"ERROR streaming graph: {e}")
+                    traceback.print_exc()
+                    try:
+                        await MESSAGE_QUEUE.enqueue(
+                            user_id=req.user_id,
+                            thread_id=req.thread_id,
+                            session_type=req.session_type,
+                            week=current_week,
+                            role="assistant",
+                            text="죄송해요, 오류가 발생했어요. 잠시 후 다시 시도해 주세요. 😢"
+                        )
+                    except Exception as db_e:
+                        print(f"Failed to save error message: {db_e}")
+                    if key is not None:
+                        CHAT_IDEMPOTENCY.fail(key, e, owner)
+                    CHAT_TURNS.inc(endpoint="chat_stream", session_type=req.session_type, week=current_week, status="error")
+                    yield format_sse("error", {"detail": str(e)})
+                finally:
+                    # 클라이언트가 스트림 도중 연결을 끊은 경우: 진행 중 표시를 풀어서 재시도가 새로 실행되도록 (완료/실패 후엔 no-op)
+                    if key is not None:
+                        CHAT_IDEMPOTENCY.fail(key, asyncio.CancelledError(), owner)
+
+    return _sse_response(event_stream(), trace_id)
+
+def _sse_response(stream, trace_id: Optional[str] = None) -> StreamingResponse:
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if trace_id:
+        headers["X-Trace-Id"] = trace_id
+    return StreamingResponse(stream, media_type="text/event-stream", headers=headers)
+
+async def _replay_chat_stream(state: str, value: Any):
+    """중복 스트림 요청: 저장된(또는 진행 중인 원래 실행의) ChatResponse를 final 이벤트 하나로 전송"""
+    try:
+        response = value if state == "completed" else await CHAT_IDEMPOTENCY.wait(value)
+        yield format_sse("final", response.model_dump())
+    except Exception as e:
+        yield format_sse("error", {"detail": getattr(e, "detail", None) or str(e)})
+
 # --- API 3: 서랍 (과거 채팅 내역 접근) ---
 @server.get("/sessions/{user_id}", response_model=List[SessionSummary])
-async def get_user_sessions(user_id: str):
+async def get_user_sessions(
+    user_id: str,
+    response: Response,
+    limit: int = Query(30, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
     """
-    유저의 모든 과거 세션 목록을 반환 (최신순)
+    유저의 과거 세션 목록을 한 페이지씩 반환 (최신순)
+    - limit: 한 페이지 크기 / cursor: 이전 응답의 X-Next-Cursor 헤더 값
+    - 다음 페이지가 있으면 응답 헤더 X-Next-Cursor 에 cursor를 담아줌 (응답 본문은 기존과 같은 리스트)
     """
-    # 1. DB에서 목록 가져오기
-    sessions = REPO.get_all_sessions(user_id) 
+    # 1. DB에서 한 페이지 가져오기 (중도포기 세션은 DB 쿼리에서 제외, 필요한 필드만 select)
+    try:
+        sessions, next_cursor = await ASYNC_REPO.get_sessions_page(user_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     results = []
     for s in sessions:
@@ -482,7 +738,7 @@ async def get_user_sessions(user_id: str):
         if not sid: continue # ID가 없는 유령 데이터는 건너뜀
 
         # --- 미완료&&종료 세션 서랍에서 숨기기 ---
-        # 'result'가 'abandoned'인 세션은 서랍 목록에서 숨김(건너뛰기)
+        # DB 쿼리(drawer_visible)에서 이미 제외되지만, 혹시 남은 abandoned 세션은 한 번 더 숨김
         if s.get("result") == "abandoned": continue
         session_status = s.get("status")
         
@@ -545,12 +801,24 @@ async def get_user_sessions(user_id: str):
 
 # --- API 4: 서랍 상세: 특정 세션의 대화 내용 가져오기 ---
 @server.get("/history/{user_id}/{thread_id}", response_model=List[MessageHistoryItem])
-async def get_session_history(user_id: str, thread_id: str):
+async def get_session_history(
+    user_id: str,
+    thread_id: str,
+    response: Response,
+    limit: int = Query(200, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
     """
-    특정 스레드(세션)의 모든 대화 내용을 시간순으로 반환
+    특정 스레드(세션)의 대화 내용을 시간순으로 한 페이지씩 반환
     (단, 시스템 초기화 메시지 '__init__'은 제외하고 반환하여 클라이언트가 첫 시작임을 알게 함)
+    - 다음 페이지가 있으면 응답 헤더 X-Next-Cursor 에 cursor를 담아줌
     """
-    messages = REPO.get_session_messages(user_id, thread_id)
+    try:
+        messages, next_cursor = await ASYNC_REPO.get_session_messages_page(user_id, thread_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     # [수정] 필터링 로직 추가
     filtered_messages = []
@@ -582,16 +850,16 @@ async def reset_session(req: ResetRequest):
     
     try:
         # 1. DB 리셋
-        print("   -> [Step 1] REPO.reset_user_progress 호출 시도...") # [DEBUG]
-        REPO.reset_user_progress(user_id)
-        print("   -> [Step 1] REPO.reset_user_progress 완료 ✅") # [DEBUG]
+        print("   -> [Step 1] ASYNC_REPO.reset_user_progress 호출 시도...") # [DEBUG]
+        await ASYNC_REPO.reset_user_progress(user_id)
+        print("   -> [Step 1] ASYNC_REPO.reset_user_progress 완료 ✅") # [DEBUG]
         
         # 2. 신규 1주차 세션 생성 및 저장
         new_thread_id = str(uuid.uuid4())
         now = datetime.now(timezone.utc)
         print(f"   -> [Step 2] 신규 세션 생성 중. ThreadID={new_thread_id}") # [DEBUG]
         
-        REPO.save_session_info(
+        await ASYNC_REPO.save_session_info(
             user_id=user_id,
             thread_id=new_thread_id,
             session_type="WEEKLY",
@@ -621,3 +889,88 @@ async def reset_session(req: ResetRequest):
         traceback.print_exc() # 에러가 발생한 정확한 코드 라인을 출력
         print("------------------------------------------------\n")
         raise HTTPException(status_code=500, detail=str(e))
+
+# --- API 6: 운영 통계 (Repo 캐시 hit/miss) ---
+@server.get("/stats/cache")
+async def get_cache_stats():
+    """
+    유저/세션 메타데이터 캐시의 hit/miss/eviction 통계 (캐시 크기 산정용)
+    캐시가 꺼져 있으면 enabled=False만 반환
+    """
+    if hasattr(ASYNC_REPO, "stats"):
+        return {"enabled": True, **ASYNC_REPO.stats()}
+    return {"enabled": False}
+
+@server.get("/stats/message_queue")
+async def get_message_queue_stats():
+    """
+    메시지 write-behind 큐 상태 (대기 중인 메시지 수, 저장/spill 건수)
+    """
+    return MESSAGE_QUEUE.stats()
+
+@server.get("/stats/touch")
+async def get_touch_stats():
+    """
+    touch 쓰기 합치기 상태 (대기 중인 touch 수, 실제 쓰기 수, 생략한 세션 존재 확인 읽기 수)
+    """
+    if TOUCH_COALESCER is None:
+        return {"enabled": False}
+    return {"enabled": True, **TOUCH_COALESCER.touch_stats()}
+
+@server.get("/stats/idempotency")
+async def get_idempotency_stats():
+    """
+    /chat 중복 요청 처리 통계 (실제 실행 수, 완료 응답 재사용 수, 진행 중 합류 수)
+    """
+    return CHAT_IDEMPOTENCY.stats()
+
+@server.get("/stats/threads")
+async def get_thread_scheduler_stats():
+    """
+    thread_id 별 턴 직렬화 상태 (대기 중인 턴 수, 대기 시간 avg/p95/max)
+    """
+    return THREAD_SCHEDULER.stats()
+
+@server.get("/stats/firestore")
+async def get_firestore_op_stats(reset: bool = False):
+    """
+    REPO_BACKEND=memory 일 때 Firestore 읽기/쓰기 횟수 (작업별 / 호출 종류별 / 컬렉션별)
+    - reset=true: 조회 후 집계 초기화 (구간별 측정용)
+    """
+    if settings.REPO_BACKEND != "memory":
+        raise HTTPException(status_code=404, detail="Firestore 읽기/쓰기 집계는 REPO_BACKEND=memory 에서만 제공됩니다.")
+    from coach_agent.services.memory_firestore import MEMORY_STORE
+    stats = MEMORY_STORE.stats()
+    if reset:
+        MEMORY_STORE.reset_stats()
+    return stats
+
+# --- API 7: Prometheus 메트릭 ---
+# 운영 상태(캐시 / 큐 / 스레드 대기열 등)는 scrape 시점에 각 stats()에서 읽음
+def _stats_gauge(fn, field):
+    return lambda: (fn() or {}).get(field)
+
+if hasattr(ASYNC_REPO, "stats"):
+    REGISTRY.register_gauge("coach_repo_cache_hits", "Repo cache hits", _stats_gauge(ASYNC_REPO.stats, "hits"))
+    REGISTRY.register_gauge("coach_repo_cache_misses", "Repo cache misses", _stats_gauge(ASYNC_REPO.stats, "misses"))
+    REGISTRY.register_gauge("coach_repo_cache_size", "Repo cache entries", _stats_gauge(ASYNC_REPO.stats, "size"))
+REGISTRY.register_gauge("coach_message_queue_pending", "Messages waiting in the write-behind queue", _stats_gauge(MESSAGE_QUEUE.stats, "pending"))
+REGISTRY.register_gauge("coach_message_queue_spilled", "Messages written to the spill file", _stats_gauge(MESSAGE_QUEUE.stats, "spilled"))
+if TOUCH_COALESCER is not None:
+    REGISTRY.register_gauge("coach_touch_writes", "Touch writes actually sent to Firestore", _stats_gauge(TOUCH_COALESCER.touch_stats, "writes"))
+    REGISTRY.register_gauge("coach_touch_coalesced", "Touch calls absorbed by the coalescer", _stats_gauge(TOUCH_COALESCER.touch_stats, "touches"))
+if getattr(checkpointer, "cache", None) is not None:
+    REGISTRY.register_gauge("coach_checkpoint_cache_hits", "Latest-checkpoint cache hits", _stats_gauge(checkpointer.stats, "hits"))
+    REGISTRY.register_gauge("coach_checkpoint_cache_misses", "Latest-checkpoint cache misses", _stats_gauge(checkpointer.stats, "misses"))
+    REGISTRY.register_gauge("coach_checkpoint_cache_stale", "Cached checkpoints dropped after a head_token mismatch", _stats_gauge(checkpointer.stats, "stale"))
+    REGISTRY.register_gauge("coach_checkpoint_cache_bytes", "Approximate memory held by the checkpoint cache", _stats_gauge(checkpointer.stats, "bytes"))
+REGISTRY.register_gauge("coach_idempotency_replayed", "Duplicate /chat requests answered from the store", _stats_gauge(CHAT_IDEMPOTENCY.stats, "replayed"))
+REGISTRY.register_gauge("coach_thread_waiting_turns", "Turns waiting for an earlier turn on the same thread", _stats_gauge(THREAD_SCHEDULER.stats, "waiting"))
+REGISTRY.register_gauge("coach_thread_wait_ms_p95", "p95 wait time for the per-thread turn lock (ms)", _stats_gauge(THREAD_SCHEDULER.stats, "wait_ms_p95"))
+
+@server.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus 텍스트 포맷 (노드 / 엔드포인트 / Firestore / 외부 호출 히스토그램 + 운영 상태 gauge)
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,119 @@
+"""FirestoreSaver 테스트 공용 그래프 / 저장소 헬퍼 (test_checkpointer_*.py, test_memory_firestore.py)"""
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+import operator
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, RemoveMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from coach_agent.services.checkpointer import FirestoreSaver
+from coach_agent.services.memory_firestore import MemoryAsyncFirestoreClient, MemoryFirestoreClient, MemoryStore
+
+
+class CounterState(TypedDict):
+    items: Annotated[list, operator.add]
+
+
+def counter_graph(checkpointer):
+    builder = StateGraph(CounterState)
+    builder.add_node("append", lambda state: {"items": [len(state["items"])]})
+    builder.add_edge(START, "append")
+    builder.add_edge("append", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def isolated_saver(store: MemoryStore, **kwargs) -> FirestoreSaver:
+    kwargs.setdefault("keep_last", 0)  # 저장 형식 테스트는 전체 히스토리를 봄 (보존 정책은 따로 테스트)
+    return FirestoreSaver(db=MemoryFirestoreClient(store), async_db=MemoryAsyncFirestoreClient(store), **kwargs)
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def chat_graph(checkpointer):
+    def reply(state):
+        return {"messages": [AIMessage(content=f"echo {state['messages'][-1].content}", id=f"a-{state['messages'][-1].id}")]}
+
+    def trim(state):
+        # summarize_and_filter_message 처럼 오래된 메시지를 RemoveMessage 로 정리
+        return {"messages": [RemoveMessage(id=m.id) for m in state["messages"][:-6]]}
+
+    inner = StateGraph(ChatState)
+    inner.add_node("reply", reply)
+    inner.add_edge(START, "reply")
+    inner.add_edge("reply", END)
+    builder = StateGraph(ChatState)
+    builder.add_node("inner", inner.compile())  # 서브그래프: 부모 체크포인터를 이어받아 별도 ns 로 저장
+    builder.add_node("trim", trim)
+    builder.add_edge(START, "inner")
+    builder.add_edge("inner", "trim")
+    builder.add_edge("trim", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def async_chat_graph(checkpointer):
+    # 노드가 async 여야 LangGraph 도 스레드 풀을 쓰지 않음 (체크포인트 I/O 만 남음)
+    async def reply(state):
+        last = state["messages"][-1]
+        return {"messages": [AIMessage(content=f"echo {last.content}" * 40, id=f"a-{last.id}")]}
+
+    async def trim(state):
+        return {"messages": [RemoveMessage(id=m.id) for m in state["messages"][:-6]]}
+
+    inner = StateGraph(ChatState)
+    inner.add_node("reply", reply)
+    inner.add_edge(START, "reply")
+    inner.add_edge("reply", END)
+    builder = StateGraph(ChatState)
+    builder.add_node("inner", inner.compile())
+    builder.add_node("trim", trim)
+    builder.add_edge(START, "inner")
+    builder.add_edge("inner", "trim")
+    builder.add_edge("trim", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def flaky_chat_graph(checkpointer, runs: dict, fail: set):
+    # 메인 그래프 모양: LoadState -> SubGraph(draft -> reply) -> UpdateProgress. fail 에 있는 노드는 한 번 예외
+    def node(name, update):
+        def run(state):
+            runs[name] = runs.get(name, 0) + 1
+            if name in fail:
+                fail.discard(name)
+                raise RuntimeError(f"{name} crashed")
+            return update(state)
+        return run
+
+    last = lambda state: state["messages"][-1].content  # noqa: E731
+    inner = StateGraph(ChatState)
+    inner.add_node("draft", node("draft", lambda s: {"messages": [AIMessage(content=f"draft {last(s)}", id=f"d-{last(s)}")]}))
+    inner.add_node("reply", node("reply", lambda s: {"messages": [AIMessage(content="reply", id=f"r-{len(s['messages'])}")]}))
+    inner.add_edge(START, "draft")
+    inner.add_edge("draft", "reply")
+    inner.add_edge("reply", END)
+    builder = StateGraph(ChatState)
+    builder.add_node("load", node("load", lambda s: {}))
+    builder.add_node("inner", inner.compile())
+    builder.add_node("progress", node("progress", lambda s: {}))
+    builder.add_edge(START, "load")
+    builder.add_edge("load", "inner")
+    builder.add_edge("inner", "progress")
+    builder.add_edge("progress", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def thread_docs(store: MemoryStore, saver: FirestoreSaver, thread_id: str) -> dict:
+    prefix = f"{saver.collection}/{thread_id}"
+    return {p: d for p, d in store.docs.items() if p == prefix or p.startswith(prefix + "/")}
+
+
+def root_history(store: MemoryStore, saver: FirestoreSaver, thread_id: str) -> list:
+    prefix = f"{saver.collection}/{thread_id}/checkpoints/"
+    return [d for p, d in thread_docs(store, saver, thread_id).items()
+            if p.startswith(prefix) and d.get("checkpoint_ns", "") == ""]
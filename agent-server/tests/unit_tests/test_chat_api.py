@@ -0,0 +1,232 @@
+import os
+import sys
+from pathlib import Path
+
+# coach_agent.services 는 import 시점에 저장소를, services.llm 은 ChatOpenAI 를 만들므로 먼저 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+# FastAPI 앱(src/main.py)은 패키지 밖 모듈
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+import main
+
+
+class _StubGraph:
+    """graph_app 대역: GenerateAnswer 노드가 토큰을 스트리밍하는 한 턴"""
+
+    def __init__(self) -> None:
+        self.runs = 0
+        self.tokens = ["안녕", "하세요"]
+        self.error = None
+        self.gate = None
+
+    async def aget_state(self, config):
+        return SimpleNamespace(next=(), values={})
+
+    def _final_state(self, inputs):
+        return {"messages": [*inputs["messages"], AIMessage(content="".join(self.tokens))], "exit": False}
+
+    async def ainvoke(self, inputs, config=None, **kwargs):
+        self.runs += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return self._final_state(inputs)
+
+    async def astream(self, inputs, config=None, **kwargs):
+        self.runs += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        for token in self.tokens:
+            yield ("general:1",), "messages", (AIMessageChunk(content=token), {"langgraph_node": "GenerateAnswer"})
+        if self.error is not None:
+            raise self.error
+        yield (), "values", self._final_state(inputs)
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    stub = _StubGraph()
+    monkeypatch.setattr(main, "graph_app", stub)
+    return stub
+
+
+def _request(**kwargs) -> main.ChatRequest:
+    kwargs.setdefault("user_id", f"u-{uuid.uuid4().hex[:8]}")
+    kwargs.setdefault("thread_id", f"t-{uuid.uuid4().hex[:8]}")
+    return main.ChatRequest(message="요즘 쇼핑을 너무 많이 해요", **kwargs)
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.server), base_url="http://test")
+
+
+@pytest.mark.anyio
+async def test_chat_retry_joins_in_flight_turn_and_replays_completed_one(graph) -> None:
+    graph.gate = asyncio.Event()
+    body = _request().model_dump()
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+
+    async with _client() as client:
+        first = asyncio.create_task(client.post("/chat", json=body, headers=headers))
+        await asyncio.sleep(0.05)
+        retry = asyncio.create_task(client.post("/chat", json=body, headers=headers))
+        await asyncio.sleep(0.05)
+        graph.gate.set()
+        responses = [await first, await retry]
+        replay = await client.post("/chat", json=body, headers=headers)
+
+    assert [r.status_code for r in responses + [replay]] == [200, 200, 200]
+    assert {r.json()["reply"] for r in responses + [replay]} == {"안녕하세요"}
+    assert graph.runs == 1
+
+
+@pytest.mark.anyio
+async def test_chat_failure_releases_key_for_retry(graph) -> None:
+    graph.error = RuntimeError("llm down")
+    body = _request().model_dump()
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+
+    async with _client() as client:
+        failed = await client.post("/chat", json=body, headers=headers)
+        graph.error = None
+        retried = await client.post("/chat", json=body, headers=headers)
+
+    assert failed.status_code == 500
+    assert retried.status_code == 200 and retried.json()["reply"] == "안녕하세요"
+    assert graph.runs == 2
+
+
+@pytest.mark.anyio
+async def test_stream_disconnect_mid_body_releases_key(graph) -> None:
+    req = _request(client_message_id=uuid.uuid4().hex)
+    key = main._idempotency_key(req, None)
+
+    response = await main.chat_stream_endpoint(req, idempotency_key=None)
+    body = response.body_iterator
+    assert (await body.__anext__()).startswith("event: token")
+    await body.aclose()  # 클라이언트가 스트림 도중 연결을 끊음
+
+    assert main.CHAT_IDEMPOTENCY.lookup(key) == ("new", None)
+
+
+@pytest.mark.anyio
+async def test_stream_disconnect_before_body_starts_expires_key(graph, monkeypatch) -> None:
+    monkeypatch.setattr(main.CHAT_IDEMPOTENCY, "in_flight_timeout", 0.05)
+    req = _request(client_message_id=uuid.uuid4().hex)
+    key = main._idempotency_key(req, None)
+
+    # 본문을 한 번도 읽지 않고 끊김 -> 스트림의 finally 가 실행되지 않음
+    await main.chat_stream_endpoint(req, idempotency_key=None)
+    assert main.CHAT_IDEMPOTENCY.lookup(key)[0] == "in_flight"
+
+    await asyncio.sleep(0.06)
+    response = await main.chat_stream_endpoint(req, idempotency_key=None)
+    events = [frame async for frame in response.body_iterator]
+    assert events[-1].startswith("event: final") and graph.runs == 1
+
+
+@pytest.mark.anyio
+async def test_stream_setup_failure_releases_key(graph, monkeypatch) -> None:
+    def broken_config(*args, **kwargs):
+        raise KeyError("configurable")
+
+    monkeypatch.setattr(main, "_build_graph_config", broken_config)
+    req = _request(client_message_id=uuid.uuid4().hex)
+
+    with pytest.raises(HTTPException):
+        await main.chat_stream_endpoint(req, idempotency_key=None)
+    assert main.CHAT_IDEMPOTENCY.lookup(main._idempotency_key(req, None)) == ("new", None)
+
+
+def _frames(body: str):
+    """SSE 본문 -> [(event, data)]"""
+    frames = []
+    for block in body.split("\n\n"):
+        if not block:
+            continue
+        event, data = block.split("\n", 1)
+        assert event.startswith("event: ") and data.startswith("data: ")
+        frames.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return frames
+
+
+async def _stream(req: main.ChatRequest):
+    async with _client() as client:
+        async with client.stream("POST", "/chat/stream", json=req.model_dump()) as response:
+            body = "".join([chunk async for chunk in response.aiter_text()])
+    return response, _frames(body)
+
+
+async def _saved(req: main.ChatRequest):
+    return [(m["role"], m["text"]) for m in await main.ASYNC_REPO.get_session_messages(req.user_id, req.thread_id)]
+
+
+@pytest.mark.anyio
+async def test_stream_sends_tokens_then_final_and_persists_both_messages(graph) -> None:
+    req = _request()
+    response, frames = await _stream(req)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream") and response.headers["x-trace-id"]
+    assert frames[:2] == [("token", {"text": "안녕"}), ("token", {"text": "하세요"})]
+    (event, final), = frames[2:]
+    assert event == "final" and final["reply"] == "안녕하세요" and final["is_ended"] is False
+    assert await _saved(req) == [("user", req.message), ("assistant", "안녕하세요")]
+
+
+@pytest.mark.anyio
+async def test_stream_failure_ends_with_error_event_and_saves_apology(graph) -> None:
+    graph.error = RuntimeError("llm down")
+    req = _request()
+    response, frames = await _stream(req)
+
+    assert response.status_code == 200  # 헤더는 이미 나갔으므로 오류는 이벤트로 전달
+    assert [event for event, _ in frames] == ["token", "token", "error"]
+    assert frames[-1][1] == {"detail": "llm down"}
+    saved = await _saved(req)
+    assert saved[0] == ("user", req.message) and saved[1][0] == "assistant" and "오류" in saved[1][1]
+
+
+def _metric(body: str, prefix: str) -> float:
+    (line,) = [line for line in body.splitlines() if line.startswith(prefix)]
+    return float(line.rsplit(" ", 1)[1])
+
+
+@pytest.mark.anyio
+async def test_metrics_count_turns_per_endpoint_session_type_and_week(graph) -> None:
+    weekly = _request(session_type="WEEKLY")
+    await main.ASYNC_REPO.upsert_user(weekly.user_id, {"current_week": 3})
+    general = _request()
+
+    async with _client() as client:
+        before = (await client.get("/metrics")).text
+        assert (await client.post("/chat", json=weekly.model_dump())).status_code == 200
+        await _stream(general)
+        graph.error = RuntimeError("llm down")
+        assert (await client.post("/chat", json=general.model_dump())).status_code == 500
+        after = await client.get("/metrics")
+
+    assert after.status_code == 200 and after.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    def delta(labels: str) -> float:
+        prefix = "coach_chat_turns_total{" + labels + "} "
+        old = _metric(before, prefix) if prefix in before else 0.0
+        return _metric(after.text, prefix) - old
+
+    assert delta('endpoint="chat",session_type="WEEKLY",week="3",status="ok"') == 1
+    assert delta('endpoint="chat_stream",session_type="GENERAL",week="1",status="ok"') == 1
+    assert delta('endpoint="chat",session_type="GENERAL",week="1",status="error"') == 1
+    # 실패한 요청도 엔드포인트 처리 시간에 status 라벨로 기록
+    assert 'coach_http_request_duration_seconds_count{method="POST",route="/chat",status="500"}' in after.text
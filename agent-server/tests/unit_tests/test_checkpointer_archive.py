@@ -0,0 +1,43 @@
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from coach_agent.services.checkpoint_archive import ARCHIVE_FIELD, LocalArchiveStore
+from coach_agent.services.memory_firestore import MemoryStore
+
+from .checkpointer_utils import async_chat_graph, isolated_saver, thread_docs
+
+
+@pytest.mark.anyio
+async def test_archived_thread_moves_to_bundle_and_is_rehydrated_on_read(tmp_path) -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, chunk_bytes=512, archive_store=LocalArchiveStore(str(tmp_path)))
+    graph = async_chat_graph(saver)
+    config = {"configurable": {"thread_id": "t-archive"}}
+    for i in range(3):
+        await graph.ainvoke({"messages": [HumanMessage(content=str(i), id=f"h{i}")]}, config, durability="sync")
+    history = [t.checkpoint["channel_values"].get("messages") async for t in saver.alist(config)]
+    docs = len(thread_docs(store, saver, "t-archive"))
+
+    assert await saver.aarchive_thread("t-archive") == docs
+    assert await saver.aarchive_thread("t-archive") == 0  # 이미 아카이브됨
+    (marker,) = thread_docs(store, saver, "t-archive").values()  # Firestore 에는 표시 문서 하나만
+    assert marker[ARCHIVE_FIELD]["docs"] == docs and (tmp_path / saver.collection / "t-archive.bundle").exists()
+
+    # 다른 인스턴스의 조회: 번들에서 복원한 뒤 그대로 읽힘
+    cold = isolated_saver(store, archive_store=LocalArchiveStore(str(tmp_path)))
+    latest = await cold.aget_tuple(config)
+    assert latest.checkpoint["channel_values"]["messages"] == history[0]
+    assert len(thread_docs(store, saver, "t-archive")) == docs
+    assert [t.checkpoint["channel_values"].get("messages") async for t in cold.alist(config)] == history
+
+    # 특정 체크포인트 조회도 복원 (동기 경로)
+    saver.archive_thread("t-archive")
+    by_id = {"configurable": dict(config["configurable"], checkpoint_id=latest.config["configurable"]["checkpoint_id"])}
+    assert cold.get_tuple(by_id).checkpoint["channel_values"]["messages"] == history[0]
+    await graph.ainvoke({"messages": [HumanMessage(content="again", id="h-again")]}, config)
+    assert (await cold.aget_tuple(config)).checkpoint["channel_values"]["messages"][-1].id == "a-h-again"
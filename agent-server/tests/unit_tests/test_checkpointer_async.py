@@ -0,0 +1,109 @@
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.base import create_checkpoint, empty_checkpoint
+
+from coach_agent.observability.metrics import CHECKPOINT_CHUNKED_BLOBS, CHECKPOINT_GROUP_COMMIT_CALLS
+from coach_agent.services.checkpoint_io import deferred, read_doc, resolve
+from coach_agent.services.memory_firestore import MemoryAsyncFirestoreClient, MemoryFirestoreClient, MemoryStore
+
+from .checkpointer_utils import async_chat_graph, isolated_saver
+
+
+@pytest.mark.anyio
+async def test_async_saver_uses_no_threads_and_groups_commits(monkeypatch) -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, cache_mode="off", chunk_bytes=128)  # 긴 AI 메시지는 청크로 저장
+    loop = asyncio.get_running_loop()
+    executor_calls = []
+    run_in_executor = loop.run_in_executor
+    monkeypatch.setattr(loop, "run_in_executor", lambda *args: executor_calls.append(args) or run_in_executor(*args))
+    saver_calls = 0
+    for name in ("aput", "aput_writes"):
+        async def counted(*args, _original=getattr(saver, name), **kwargs):
+            nonlocal saver_calls
+            saver_calls += 1
+            return await _original(*args, **kwargs)
+        monkeypatch.setattr(saver, name, counted)
+
+    graph = async_chat_graph(saver)
+    config = {"configurable": {"thread_id": "t-async"}}
+    commits = CHECKPOINT_GROUP_COMMIT_CALLS.count()
+    chunked = CHECKPOINT_CHUNKED_BLOBS.value(kind="message")
+    for i in range(8):
+        await graph.ainvoke({"messages": [HumanMessage(content=str(i), id=f"h{i}")]}, config)
+
+    assert executor_calls == []
+    assert CHECKPOINT_GROUP_COMMIT_CALLS.count() - commits < saver_calls  # 동시에 진행 중인 put / put_writes 는 한 번에 커밋
+    assert saver.group_commit.tasks == set()  # 그룹 커밋 태스크는 끝날 때까지만 참조
+    assert CHECKPOINT_CHUNKED_BLOBS.value(kind="message") > chunked
+
+    # 동기 경로로 읽은 결과와 같음 (새 saver: 캐시 / 상태 없이 문서에서 복원)
+    cold = isolated_saver(store, cache_mode="off")
+    latest = await cold.aget_tuple(config)
+    assert [m.id for m in latest.checkpoint["channel_values"]["messages"]][-2:] == ["h7", "a-h7"]
+    assert latest.checkpoint == isolated_saver(store, cache_mode="off").get_tuple(config).checkpoint
+    history = [c async for c in cold.alist(config, limit=25)]
+    assert [c.config for c in history] == [c.config for c in cold.list(config, limit=25)]
+    assert len(history) == 25 and history[0].checkpoint == latest.checkpoint
+    assert executor_calls == []
+
+
+@pytest.mark.anyio
+async def test_group_commit_task_is_held_until_it_finishes() -> None:
+    saver = isolated_saver(MemoryStore(), cache_mode="off")
+    config = {"configurable": {"thread_id": "t-flush", "checkpoint_ns": ""}}
+
+    put = asyncio.create_task(saver.aput(config, create_checkpoint(empty_checkpoint(), {}, 1), {}, {}))
+    while not saver.group_commit.tasks and not put.done():
+        await asyncio.sleep(0)
+    # 커밋 대기 중: 이벤트 루프는 태스크를 약하게 참조하므로 saver 가 강한 참조를 들고 있어야 함
+    assert len(saver.group_commit.tasks) == 1 and not put.done()
+    await put
+    assert saver.group_commit.tasks == set()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("storage", ["full", "incremental"])
+async def test_writes_arriving_before_their_checkpoint_are_kept(storage: str) -> None:
+    # async 실행에서는 다음 단계 태스크의 aput_writes 가 그 체크포인트의 aput 보다 먼저 커밋될 수 있음
+    store = MemoryStore()
+    saver = isolated_saver(store, storage=storage, cache_mode="off")
+    first = empty_checkpoint()
+    first_config = await saver.aput({"configurable": {"thread_id": "t-early", "checkpoint_ns": ""}}, first, {"step": 0}, {})
+    await saver.aput_writes(first_config, [("items", 0)], "task-0")
+    second = create_checkpoint(first, None, 1)
+    await saver.aput_writes({"configurable": {**first_config["configurable"], "checkpoint_id": second["id"]}}, [("items", 1)], "task-1")
+    await saver.aput(first_config, second, {"step": 1}, {})
+
+    cold = isolated_saver(store, storage=storage, cache_mode="off")
+    latest = await cold.aget_tuple({"configurable": {"thread_id": "t-early"}})
+    assert latest.checkpoint["id"] == second["id"]
+    assert latest.pending_writes == [("task-1", "items", 1)]
+    assert (await cold.aget_tuple(first_config)).pending_writes == [("task-0", "items", 0)]
+
+
+@pytest.mark.anyio
+async def test_resolve_reads_documents_needed_by_the_sync_function_together() -> None:
+    store = MemoryStore()
+    db, adb = MemoryFirestoreClient(store), MemoryAsyncFirestoreClient(store)
+    db.collection("c").document("a").set({"next": "b"})
+    db.collection("c").document("b").set({"value": 1})
+    runs = []
+
+    def follow(start: str):
+        runs.append(deferred())
+        first = read_doc(db.collection("c").document(start))
+        second = read_doc(db.collection("c").document(first["next"]))  # 앞 문서를 읽어야 알 수 있는 문서
+        return second["value"]
+
+    store.reset_stats()
+    assert await resolve(adb, follow, "a") == 1
+    assert len(runs) == 3 and store.stats()["reads"] == 2  # 빠진 문서마다 한 번씩 다시 실행, 동기 get 없음
+    assert follow("a") == 1  # resolve 밖에서는 바로 읽음
@@ -0,0 +1,52 @@
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+import pytest
+
+from coach_agent.services.memory_firestore import MemoryStore
+
+from .checkpointer_utils import counter_graph, isolated_saver
+
+
+def test_latest_checkpoint_cache_detects_writes_from_other_workers() -> None:
+    store = MemoryStore()
+    worker_a = isolated_saver(store, cache_mode="verify")
+    worker_b = isolated_saver(store, cache_mode="verify")
+    config = {"configurable": {"thread_id": "t-cache"}}
+    counter_graph(worker_a).invoke({"items": []}, config)
+
+    store.reset_stats()
+    cached = worker_a.get_tuple(config)
+    assert worker_a.stats()["hits"] == 1
+    assert store.stats()["by_operation"]["checkpoint.get_tuple"]["reads"] == 1  # head_token 필드만 읽음
+    assert cached.checkpoint == worker_b.get_tuple(config).checkpoint
+    assert cached.pending_writes == worker_b.get_tuple(config).pending_writes
+
+    counter_graph(worker_b).invoke({"items": []}, config)  # 다른 워커가 다음 턴 처리
+    assert worker_a.get_tuple(config).checkpoint["channel_values"]["items"] == [0, 1]
+    assert worker_a.stats()["stale"] == 1
+
+
+@pytest.mark.anyio
+async def test_trust_mode_serves_head_without_reads_and_is_size_bounded() -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, cache_mode="trust", cache_max_bytes=64 * 1024)
+    graph = counter_graph(saver)
+    for i in range(3):
+        await graph.ainvoke({"items": []}, {"configurable": {"thread_id": f"t-trust-{i}"}})
+
+    store.reset_stats()
+    latest = await saver.aget_tuple({"configurable": {"thread_id": "t-trust-2"}})
+    assert latest.checkpoint["channel_values"]["items"] == [0]
+    assert store.stats()["reads"] == 0
+
+    await graph.ainvoke({"items": [b"x" * 100_000]}, {"configurable": {"thread_id": "t-big"}})  # 캐시 한도보다 큰 항목
+    assert saver.stats()["bytes"] <= 64 * 1024
+    assert (await saver.aget_tuple({"configurable": {"thread_id": "t-big"}})).checkpoint["channel_values"]["items"][0] == b"x" * 100_000
+
+
+def test_unknown_cache_mode_is_rejected() -> None:
+    with pytest.raises(ValueError, match="CHECKPOINT_CACHE_MODE"):
+        isolated_saver(MemoryStore(), cache_mode="always")
@@ -0,0 +1,69 @@
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+import pytest
+from google.api_core.exceptions import InvalidArgument
+from langgraph.graph import END, START, StateGraph
+
+from coach_agent.observability.metrics import CHECKPOINT_CHUNKED_BLOBS
+from coach_agent.services.checkpoint_chunks import CHUNK_PART_BYTES, ChunkStore, chunk_doc_id, collect_chunk_refs, is_chunk_ref
+from coach_agent.services.memory_firestore import MemoryFirestoreClient, MemoryStore
+
+from .checkpointer_utils import CounterState, isolated_saver
+
+
+@pytest.mark.parametrize("storage", ["full", "incremental"])
+def test_oversized_blobs_are_chunked(storage) -> None:
+    big = os.urandom(2_500_000)  # 압축되지 않는 값 -> 문서 1MiB 제한을 넘음
+    builder = StateGraph(CounterState)
+    builder.add_node("append", lambda state: {"items": [big]})
+    builder.add_edge(START, "append")
+    builder.add_edge("append", END)
+    config = {"configurable": {"thread_id": "t-big"}}
+
+    with pytest.raises(InvalidArgument):
+        builder.compile(checkpointer=isolated_saver(MemoryStore(), storage=storage, chunk_bytes=10**9)).invoke({"items": []}, config)
+
+    store = MemoryStore()
+    before = CHECKPOINT_CHUNKED_BLOBS.value(kind="write")
+    builder.compile(checkpointer=isolated_saver(store, storage=storage)).invoke({"items": []}, config)
+    assert CHECKPOINT_CHUNKED_BLOBS.value(kind="write") > before
+
+    cold = isolated_saver(store, storage=storage)  # 청크 캐시 없이 조각 문서에서 다시 조립
+    assert cold.get_tuple(config).checkpoint["channel_values"]["items"] == [big]
+    assert [t.checkpoint["channel_values"].get("items") for t in cold.list(config)][0] == [big]
+
+
+class _Staged:
+    def __init__(self) -> None:
+        self.docs = {}
+
+    def set(self, ref, data) -> None:
+        self.docs[ref.id] = data
+
+
+def test_chunk_store_splits_parts_and_reassembles_from_documents() -> None:
+    chunks = ChunkStore(chunk_bytes=1024, cache_size=1)
+    col = MemoryFirestoreClient(MemoryStore()).collection("chunks")
+    staged = _Staged()
+    small, big, other = b"s" * 1024, os.urandom(CHUNK_PART_BYTES + 10), os.urandom(2048)
+
+    assert chunks.pack(col, small, "write", staged) == small
+    ref = chunks.pack(col, big, "write", staged)
+    assert is_chunk_ref(ref) and ref["chunks"] == 2 and ref["size"] == len(big)
+    assert sorted(staged.docs) == [chunk_doc_id(ref["blob_id"], i) for i in range(2)]
+    refs = {}
+    collect_chunk_refs({"writes": {"k": {"value": ref}}, "items": [small]}, refs)
+    assert refs == {ref["blob_id"]: 2}
+
+    parts = [staged.docs[chunk_doc_id(ref["blob_id"], i)] for i in range(ref["chunks"])]
+    with pytest.raises(ValueError, match="청크가 없습니다"):
+        chunks.assemble("t", ref, [parts[0], None])
+    assert chunks.assemble("t", ref, parts) == big
+    assert chunks.cached(ref["blob_id"]) == big
+
+    other_ref = chunks.pack(col, other, "write", staged)
+    chunks.assemble("t", other_ref, [staged.docs[chunk_doc_id(other_ref["blob_id"], 0)]])
+    assert chunks.cached(ref["blob_id"]) is None  # cache_size 를 넘으면 오래된 blob 부터 버림
@@ -0,0 +1,55 @@
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from coach_agent.services.memory_firestore import MemoryStore
+
+from .checkpointer_utils import flaky_chat_graph, isolated_saver
+
+
+@pytest.mark.parametrize("durability", ["sync", "async", "exit"])
+def test_turn_interrupted_mid_graph_resumes_from_saved_progress(durability: str) -> None:
+    store = MemoryStore()
+    runs, fail = {}, set()
+    graph = flaky_chat_graph(isolated_saver(store), runs, fail)
+    config = {"configurable": {"thread_id": f"t-resume-{durability}"}}
+    graph.invoke({"messages": [HumanMessage(content="hi", id="h0")]}, config, durability=durability)
+
+    fail.add("reply")
+    with pytest.raises(RuntimeError, match="reply crashed"):
+        graph.invoke({"messages": [HumanMessage(content="again", id="h1")]}, config, durability=durability)
+
+    # 다른 워커(새 saver)에서 이어서 실행: 끝난 노드(load, draft)는 다시 실행하지 않음
+    resumed = flaky_chat_graph(isolated_saver(store), runs, fail)
+    assert resumed.get_state(config).next == ("inner",)
+    result = resumed.invoke(None, config, durability=durability)
+
+    assert runs == {"load": 2, "draft": 2, "reply": 3, "progress": 2}
+    assert [m.id for m in result["messages"]] == ["h0", "d-hi", "r-2", "h1", "d-again", "r-5"]
+    assert resumed.get_state(config).next == ()
+
+
+def test_exit_durability_saves_once_per_turn(monkeypatch) -> None:
+    counts = {}
+    for durability in ("sync", "exit"):
+        store = MemoryStore()
+        saver = isolated_saver(store)
+        calls = counts[durability] = {"put": 0, "put_writes": 0}
+        for name in calls:
+            def counted(*args, _name=name, _original=getattr(saver, name), _calls=calls, **kwargs):
+                _calls[_name] += 1
+                return _original(*args, **kwargs)
+            monkeypatch.setattr(saver, name, counted)
+        graph = flaky_chat_graph(saver, {}, set())
+        config = {"configurable": {"thread_id": "t-durability"}}
+        for i in range(3):
+            result = graph.invoke({"messages": [HumanMessage(content=str(i), id=f"h{i}")]}, config, durability=durability)
+        assert len(result["messages"]) == 9
+        assert isolated_saver(store).get_tuple(config).checkpoint["channel_values"]["messages"][-1].id == "r-8"
+
+    assert counts["exit"] == {"put": 3, "put_writes": 0}
+    assert counts["sync"]["put"] > 3 * 4
@@ -0,0 +1,49 @@
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+from coach_agent.services.checkpoint_migrate import migrate_threads
+from coach_agent.services.memory_firestore import MemoryStore
+
+from .checkpointer_utils import counter_graph, isolated_saver
+
+
+def _revert_to_legacy_layout(saver, thread_id: str) -> None:
+    # 예전 구조로 되돌리기: head 없음, 쓰기는 writes 서브컬렉션 문서
+    saver._thread_doc(thread_id).delete()
+    for ref in saver._get_checkpoint_col(thread_id).list_documents():
+        data = ref.get().to_dict()
+        writes = data.pop("pending_writes", {})
+        ref.set({k: data[k] for k in ("checkpoint_id", "checkpoint", "metadata", "created_at")})
+        for key, w in writes.items():
+            ref.collection("writes").document(key).set(w)
+
+
+def test_legacy_thread_layout_is_migrated() -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, storage="full")  # 예전 구조 문서는 체크포인트 전체를 담고 있음
+    config = {"configurable": {"thread_id": "t-legacy"}}
+    graph = counter_graph(saver)
+    graph.invoke({"items": []}, config)
+    latest_id = saver.get_tuple(config).checkpoint["id"]
+
+    _revert_to_legacy_layout(saver, "t-legacy")
+
+    assert migrate_threads(saver) == 1
+    assert migrate_threads(saver) == 0
+    assert saver._thread_doc("t-legacy").get().to_dict()["checkpoint_id"] == latest_id
+    assert graph.invoke({"items": []}, config)["items"] == [0, 1]
+
+
+def test_legacy_thread_is_migrated_on_first_read() -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, storage="full")
+    config = {"configurable": {"thread_id": "t-legacy-read"}}
+    counter_graph(saver).invoke({"items": []}, config)
+    _revert_to_legacy_layout(saver, "t-legacy-read")
+
+    cold = isolated_saver(store, storage="full")
+    assert not cold.is_migrated("t-legacy-read")
+    assert cold.get_tuple(config).checkpoint["channel_values"]["items"] == [0]
+    assert cold.is_migrated("t-legacy-read") and migrate_threads(cold, ["t-legacy-read"]) == 0
@@ -0,0 +1,171 @@
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+import asyncio
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from coach_agent.services.checkpoint_chunks import collect_chunk_refs
+from coach_agent.services.checkpoint_gc import run_checkpoint_gc
+from coach_agent.services.memory_firestore import MemoryAsyncFirestoreClient, MemoryStore
+
+from .checkpointer_utils import async_chat_graph, chat_graph, isolated_saver, root_history, thread_docs
+
+
+@pytest.mark.parametrize("storage", ["full", "incremental"])
+def test_prune_keeps_last_checkpoints_and_drops_unreferenced_values(storage: str) -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, storage=storage, chunk_bytes=512)
+    graph = chat_graph(saver)
+    config = {"configurable": {"thread_id": "t-prune"}}
+    texts = [base64.b64encode(os.urandom(600)).decode() for _ in range(8)]  # 청크로 저장되는 메시지
+    for i, text in enumerate(texts):
+        graph.invoke({"messages": [HumanMessage(content=text, id=f"h{i}")]}, config)
+
+    def contents(s):
+        return [[m.content for m in t.checkpoint["channel_values"].get("messages", [])] for t in s.list(config)]
+    before = contents(saver)
+    docs_before = len(thread_docs(store, saver, "t-prune"))
+
+    assert saver.prune_thread("t-prune", keep=3) > 0
+    assert len(root_history(store, saver, "t-prune")) == 3
+    assert len(thread_docs(store, saver, "t-prune")) < docs_before
+    # 남은 체크포인트는 캐시 없는 인스턴스에서도 그대로 읽히고, 청크 문서는 참조되는 것만 남음
+    assert contents(isolated_saver(store, storage=storage)) == before[:3]
+    docs = thread_docs(store, saver, "t-prune")
+    chunk_prefix = f"{saver.collection}/t-prune/chunks/"
+    refs: dict = {}
+    collect_chunk_refs([d for p, d in docs.items() if not p.startswith(chunk_prefix)], refs)
+    assert {p[len(chunk_prefix):] for p in docs if p.startswith(chunk_prefix)} == {
+        f"{blob_id}-{i:04d}" for blob_id, count in refs.items() for i in range(count)}
+    assert saver.prune_thread("t-prune", keep=3) == 0  # 다시 실행해도 지울 것 없음
+
+    # 세션이 끝나면 head 만: 이후 턴도 정상
+    saver.prune_thread("t-prune", keep=1)
+    assert len(root_history(store, saver, "t-prune")) == 1
+    graph.invoke({"messages": [HumanMessage(content="more", id="h-more")]}, config)
+    latest = isolated_saver(store, storage=storage).get_tuple(config).checkpoint["channel_values"]["messages"]
+    assert [m.content for m in latest][-2:] == ["more", "echo more"]
+
+
+def test_prune_rewrites_folded_log_segments() -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, segment_bytes=1024, cache_mode="off")
+    graph = chat_graph(saver)
+    config = {"configurable": {"thread_id": "t-fold"}}
+    for i in range(12):
+        graph.invoke({"messages": [HumanMessage(content=f"{i} " + "x" * 200, id=f"h{i}")]}, config)
+
+    def contents(s):
+        return [[m.content for m in t.checkpoint["channel_values"].get("messages", [])] for t in s.list(config)]
+
+    def segments():
+        return {ref.id: ref.get().to_dict() for ref in saver._segment_col("t-fold").list_documents()}
+    before = contents(saver)
+    sealed = segments()
+
+    assert saver.prune_thread("t-fold", keep=3) > 0
+    head = saver._thread_doc("t-fold").get().to_dict()
+    after = segments()
+    # 접은 구간(trim 으로 지운 메시지)을 담은 세그먼트는 새 세그먼트로, 끝난 서브그래프 ns 의 세그먼트는 삭제
+    assert set(head["segments"]) == {i for i, d in after.items() if d["checkpoint_ns"] == ""}
+    assert set(sealed) - set(after) and head["folded_upto"] > 0
+    log_entries = sum(len(d["messages"]) for d in after.values() if d["checkpoint_ns"] == "") + len(head.get("messages") or {})
+    assert log_entries < sum(len(d["messages"]) for d in sealed.values() if d["checkpoint_ns"] == "")
+    assert contents(isolated_saver(store, segment_bytes=1024)) == before[:3]
+    assert saver.prune_thread("t-fold", keep=3) == 0
+
+    # 같은 워커 (캐시된 로그 상태) / 새 인스턴스 모두 이후 턴을 이어감
+    graph.invoke({"messages": [HumanMessage(content="more", id="h-more")]}, config)
+    latest = saver.get_tuple(config).checkpoint["channel_values"]["messages"]
+    assert [m.content for m in latest][-2:] == ["more", "echo more"]
+    assert isolated_saver(store).get_tuple(config).checkpoint["channel_values"]["messages"] == latest
+
+
+@pytest.mark.anyio
+async def test_inline_retention_prunes_in_background() -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, keep_last=4, chunk_bytes=512)
+    graph = async_chat_graph(saver)
+    config = {"configurable": {"thread_id": "t-retention"}}
+    for i in range(6):
+        await graph.ainvoke({"messages": [HumanMessage(content=str(i), id=f"h{i}")]}, config, durability="sync")
+    await asyncio.gather(*saver._prune_tasks.values())
+
+    assert 4 <= len(root_history(store, saver, "t-retention")) < 8
+    messages = isolated_saver(store).get_tuple(config).checkpoint["channel_values"]["messages"]
+    assert [m.id for m in messages][-2:] == ["h5", "a-h5"]
+
+
+@pytest.mark.anyio
+async def test_gc_job_deletes_expired_threads_and_prunes_ended_sessions() -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, cache_mode="trust", chunk_bytes=512)
+    graph = async_chat_graph(saver)
+    now = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    sessions = {
+        "t-expired": {"session_type": "WEEKLY", "status": "active", "last_activity_at": now - timedelta(days=30)},
+        "t-general": {"session_type": "GENERAL", "status": "active", "last_activity_at": now - timedelta(days=10)},
+        "t-abandoned": {"session_type": "WEEKLY", "status": "ended", "result": "abandoned",
+                        "ended_at": now - timedelta(days=1), "last_activity_at": now - timedelta(days=2)},
+        "t-done": {"session_type": "WEEKLY", "status": "ended", "completed_at": now - timedelta(hours=3),
+                   "last_activity_at": now - timedelta(hours=3)},
+        "t-active": {"session_type": "WEEKLY", "status": "active", "last_activity_at": now - timedelta(hours=1)},
+    }
+    adb = MemoryAsyncFirestoreClient(store)
+    for thread_id, data in sessions.items():
+        await adb.collection("users").document("u1").collection("sessions").document(thread_id).set(dict(data, id=thread_id))
+        for i in range(2):
+            await graph.ainvoke({"messages": [HumanMessage(content=str(i), id=f"h{i}")]},
+                                {"configurable": {"thread_id": thread_id}}, durability="sync")
+    active_docs = len(thread_docs(store, saver, "t-active"))
+
+    stats = await run_checkpoint_gc(saver, db=adb, now=now)
+    assert (stats["deleted"], stats["pruned"], stats["failed"]) == (3, 1, 0)
+    for thread_id in ("t-expired", "t-general", "t-abandoned"):
+        assert thread_docs(store, saver, thread_id) == {}
+        assert saver.get_tuple({"configurable": {"thread_id": thread_id}}) is None  # trust 캐시도 비움
+    assert len(root_history(store, saver, "t-done")) == 1
+    done = isolated_saver(store).get_tuple({"configurable": {"thread_id": "t-done"}})
+    assert [m.id for m in done.checkpoint["channel_values"]["messages"]][-1] == "a-h1"
+    assert len(thread_docs(store, saver, "t-active")) == active_docs
+
+    # 워터마크 이후 새로 대상이 된 세션이 없으면 아무것도 하지 않음
+    assert await run_checkpoint_gc(saver, db=adb, now=now + timedelta(minutes=5)) == {
+        "deleted": 0, "pruned": 0, "archived": 0, "failed": 0, "rules": {"expired": 0, "general": 0, "abandoned": 0, "completed": 0}}
+
+
+@pytest.mark.anyio
+async def test_gc_job_keeps_active_weekly_thread_while_user_is_still_seen() -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, chunk_bytes=512)
+    graph = async_chat_graph(saver)
+    now = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    adb = MemoryAsyncFirestoreClient(store)
+    users = adb.collection("users")
+    # u-live: 주간 세션은 오래됐지만 GENERAL 대화로 계속 접속 중 / u-gone: 접속도 끊김
+    await users.document("u-live").set({"last_seen_at": now - timedelta(hours=2)})
+    await users.document("u-gone").set({"last_seen_at": now - timedelta(days=30)})
+    for uid in ("u-live", "u-gone"):
+        thread_id = f"t-{uid}"
+        await users.document(uid).collection("sessions").document(thread_id).set(
+            {"id": thread_id, "session_type": "WEEKLY", "status": "active", "last_activity_at": now - timedelta(days=30)})
+        await graph.ainvoke({"messages": [HumanMessage(content="0", id="h0")]},
+                            {"configurable": {"thread_id": thread_id}}, durability="sync")
+
+    stats = await run_checkpoint_gc(saver, db=adb, now=now)
+    assert (stats["deleted"], stats["rules"]["expired"]) == (1, 1)
+    assert thread_docs(store, saver, "t-u-gone") == {}
+    assert saver.get_tuple({"configurable": {"thread_id": "t-u-live"}}) is not None
+
+    # 건너뛴 세션은 워터마크에 묶여 다음 실행에서 다시 확인 -> 유저가 떠난 뒤에는 삭제
+    # (같은 시각의 t-u-gone 도 다시 조회되지만 삭제는 반복해도 같은 결과)
+    await users.document("u-live").set({"last_seen_at": now - timedelta(days=30)})
+    stats = await run_checkpoint_gc(saver, db=adb, now=now + timedelta(minutes=5))
+    assert stats["rules"]["expired"] == 2 and stats["failed"] == 0
+    assert thread_docs(store, saver, "t-u-live") == {}
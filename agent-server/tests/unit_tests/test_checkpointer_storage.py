@@ -0,0 +1,105 @@
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+import base64
+
+from langchain_core.messages import HumanMessage
+
+from coach_agent.services.memory_firestore import MemoryStore
+
+from .checkpointer_utils import chat_graph, counter_graph, isolated_saver
+
+
+def test_latest_checkpoint_is_a_single_document_read() -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store)
+    config = {"configurable": {"thread_id": "t-head"}}
+    counter_graph(saver).invoke({"items": []}, config)
+
+    store.reset_stats()
+    latest = saver.get_tuple(config)
+
+    assert latest.checkpoint["channel_values"]["items"] == [0]
+    assert store.stats()["by_operation"]["checkpoint.get_tuple"] == {"calls": 1, "reads": 1, "writes": 0}
+    assert saver.get_tuple({"configurable": {"thread_id": "t-head", "checkpoint_id": latest.checkpoint["id"]}}).checkpoint == latest.checkpoint
+
+
+def test_incremental_storage_logs_only_changed_messages() -> None:
+    store = MemoryStore()
+    full, incremental = isolated_saver(MemoryStore(), storage="full"), isolated_saver(store, storage="incremental")
+    config = {"configurable": {"thread_id": "t-log"}}
+    for saver in (full, incremental):
+        graph = chat_graph(saver)
+        for i in range(8):
+            graph.invoke({"messages": [HumanMessage(content=str(i), id=f"h{i}")]}, config)
+
+    # 체크포인트 히스토리 전체가 같은 메시지로 복원됨 (RemoveMessage 이전 시점 포함)
+    def contents(saver):
+        return [[m.content for m in t.checkpoint["channel_values"].get("messages", [])] for t in saver.list(config)]
+    assert contents(incremental) == contents(full)
+    latest = incremental.get_tuple(config).checkpoint["channel_values"]["messages"]
+    assert [m.id for m in latest] == [m.id for m in full.get_tuple(config).checkpoint["channel_values"]["messages"]]
+
+    head = incremental._thread_doc("t-log").get().to_dict()
+    log = [e["op"] for _, e in sorted(head["messages"].items())]
+    assert log.count("add") == 16 and "remove" in log  # 메시지마다 한 번씩만 기록 + tombstone
+    for ref in incremental._thread_doc("t-log").collection("heads").list_documents():
+        sub_log = [e["op"] for _, e in sorted(ref.get().to_dict()["messages"].items())]
+        assert sub_log[0] == "base" and sub_log.count("add") <= 2  # 서브그래프는 부모 로그를 이어받음
+
+    # 캐시 없는 새 인스턴스도 head 문서만으로 같은 상태를 복원
+    cold = isolated_saver(store, storage="incremental")
+    assert cold.get_tuple(config).checkpoint["channel_values"]["messages"] == latest
+
+
+def test_incremental_head_seals_log_into_segments_as_session_grows() -> None:
+    store = MemoryStore()
+    saver = isolated_saver(store, storage="incremental", chunk_bytes=256 * 1024, cache_mode="off")
+    graph = chat_graph(saver)
+    config = {"configurable": {"thread_id": "t-long"}}
+    pastes = [base64.b64encode(os.urandom(150_000)).decode() for _ in range(6)]  # 긴 붙여넣기 (값 하나는 청크 기준보다 작음)
+    for i, text in enumerate(pastes):
+        graph.invoke({"messages": [HumanMessage(content=text, id=f"h{i}")]}, config)
+
+    # head 에는 봉인 전 tail + 세그먼트 포인터만 (세션이 길어져도 head 크기는 segment_bytes 근처)
+    head = saver._thread_doc("t-long").get().to_dict()
+    segments = {ref.id: ref.get().to_dict() for ref in saver._segment_col("t-long").list_documents()}
+    assert len(segments) >= 2 and set(head["segments"]) <= set(segments)
+    assert sum(len(e.get("value", b"")) for e in (head.get("messages") or {}).values()) < 2 * saver.segment_bytes
+
+    messages = isolated_saver(store, storage="incremental").get_tuple(config).checkpoint["channel_values"]["messages"]
+    assert [m.content for m in messages if m.type == "human"] == pastes[-3:]
+
+
+def test_latest_read_applies_only_the_tail_after_the_cached_log_state() -> None:
+    store = MemoryStore()
+    full = isolated_saver(MemoryStore(), storage="full")
+    saver = isolated_saver(store, storage="incremental", segment_bytes=1024, cache_mode="off")
+    config = {"configurable": {"thread_id": "t-seg"}}
+    for s in (full, saver):
+        graph = chat_graph(s)
+        for i in range(12):
+            graph.invoke({"messages": [HumanMessage(content=f"{i} " + "x" * 200, id=f"h{i}")]}, config)
+
+    # 같은 워커의 다음 턴: 로그 상태가 캐시되어 있으므로 head 문서 하나만 읽음
+    store.reset_stats()
+    latest = saver.get_tuple(config).checkpoint["channel_values"]["messages"]
+    assert store.stats()["by_operation"]["checkpoint.get_tuple"]["reads"] == 1
+    assert [m.id for m in latest] == [m.id for m in full.get_tuple(config).checkpoint["channel_values"]["messages"]]
+
+    # 캐시 없는 인스턴스는 포인터가 가리키는 세그먼트를 읽어 히스토리 전체를 같은 결과로 복원
+    def contents(s):
+        return [[m.content for m in t.checkpoint["channel_values"].get("messages", [])] for t in s.list(config)]
+    cold = isolated_saver(store, storage="incremental", segment_bytes=1024, cache_mode="off")
+    assert len(saver._thread_doc("t-seg").get().to_dict()["segments"]) > 1
+    assert cold.get_tuple(config).checkpoint["channel_values"]["messages"] == latest
+    assert contents(cold) == contents(full)
+
+    # 다른 워커가 턴을 이어가도 (캐시된 seq 이후 tail / 새 세그먼트만 적용) 같은 결과
+    other = isolated_saver(store, storage="incremental", segment_bytes=1024, cache_mode="off")
+    chat_graph(other).invoke({"messages": [HumanMessage(content="more", id="h-more")]}, config)
+    chat_graph(full).invoke({"messages": [HumanMessage(content="more", id="h-more")]}, config)
+    assert saver.get_tuple(config).checkpoint["channel_values"]["messages"] == \
+        full.get_tuple(config).checkpoint["channel_values"]["messages"]
@@ -0,0 +1,97 @@
+import os
+
+# coach_agent.services 는 import 시점에 저장소를 만들므로 먼저 memory 백엔드로 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+
+import asyncio
+
+import pytest
+
+from coach_agent.services.idempotency import IdempotencyStore
+
+
+class _Turn:
+    """같은 키로 여러 번 불려도 실행 횟수를 셀 수 있는 factory"""
+
+    def __init__(self, result="reply", error=None) -> None:
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return f"{self.result}-{self.calls}"
+
+
+@pytest.mark.anyio
+async def test_retry_joins_in_flight_execution() -> None:
+    store = IdempotencyStore()
+    turn = _Turn()
+
+    first = asyncio.create_task(store.run("k", turn))
+    await asyncio.sleep(0)
+    retry = asyncio.create_task(store.run("k", turn))
+    await asyncio.sleep(0)
+    turn.release.set()
+
+    assert await first == await retry == "reply-1"
+    assert turn.calls == 1
+    assert store.stats()["joined"] == 1 and store.stats()["in_flight"] == 0
+
+
+@pytest.mark.anyio
+async def test_completed_response_is_replayed_until_ttl() -> None:
+    store = IdempotencyStore(ttl_seconds=0.05)
+    turn = _Turn()
+    turn.release.set()
+
+    assert await store.run("k", turn) == "reply-1"
+    assert await store.run("k", turn) == "reply-1"
+    assert turn.calls == 1 and store.stats()["replayed"] == 1
+
+    await asyncio.sleep(0.06)
+    assert await store.run("k", turn) == "reply-2"
+
+
+@pytest.mark.anyio
+async def test_failure_releases_key_and_waiters_see_the_error() -> None:
+    store = IdempotencyStore()
+    turn = _Turn(error=RuntimeError("llm down"))
+
+    first = asyncio.create_task(store.run("k", turn))
+    await asyncio.sleep(0)
+    retry = asyncio.create_task(store.run("k", turn))
+    await asyncio.sleep(0)
+    turn.release.set()
+
+    for task in (first, retry):
+        with pytest.raises(RuntimeError, match="llm down"):
+            await task
+    # 실패는 저장하지 않음 -> 다음 재시도는 새로 실행
+    turn.error = None
+    assert await store.run("k", turn) == "reply-2"
+
+
+@pytest.mark.anyio
+async def test_abandoned_in_flight_key_expires_without_clobbering_new_execution() -> None:
+    store = IdempotencyStore(in_flight_timeout=0.05)
+    stale = store.begin("k")  # 해제 코드가 돌지 못한 요청 (예: 스트림 본문 시작 전 연결 끊김)
+
+    state, fut = store.lookup("k")
+    assert state == "in_flight"
+    with pytest.raises(TimeoutError):
+        await store.wait(fut)  # 영원히 기다리지 않음
+
+    assert store.lookup("k") == ("new", None)
+    assert store.stats()["abandoned"] == 1
+    fresh = store.begin("k")
+
+    # 늦게 끝난 원래 실행은 새 실행의 진행 중 표시를 해제하지 않음
+    store.fail("k", RuntimeError("late"), stale)
+    assert store.lookup("k") == ("in_flight", fresh)
+    store.complete("k", "reply", fresh)
+    assert await fresh == "reply"
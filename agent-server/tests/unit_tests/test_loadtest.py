@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+# benchmarks 패키지는 agent-server 바로 아래
+AGENT_SERVER = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(AGENT_SERVER))
+
+import copy
+import json
+import subprocess
+
+from benchmarks.loadtest import compare_with_baseline
+
+
+def test_loadtest_smoke_run_with_one_user(tmp_path) -> None:
+    """부하 테스트 하네스가 stub 들로 끝까지 도는지 (환경 변수를 바꾸고 main 을 새로 import 하므로 별도 프로세스)"""
+    out = tmp_path / "report.json"
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.loadtest", "--users", "1", "--max-turns", "2",
+         "--llm-latency", "0", "--embed-latency", "0", "--pinecone-latency", "0",
+         "--quiet", "--json-out", str(out)],
+        cwd=AGENT_SERVER, capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["turns"] == 2
+    endpoints = report["endpoints"]
+    assert (endpoints["/session/init"]["count"], endpoints["/session/init"]["errors"]) == (1, 0)
+    assert (endpoints["/chat"]["count"], endpoints["/chat"]["errors"]) == (2, 0)
+    assert report["llm_stub"]["requests"] > 0
+    assert report["firestore"]["writes"] > 0 and "checkpoint.put" in report["firestore"]["by_operation"]
+
+    # 자기 자신과 비교하면 회귀 없음
+    assert compare_with_baseline(report, report, tolerance=0.15) == []
+
+
+def test_compare_with_baseline_flags_regressions_beyond_tolerance() -> None:
+    baseline = {
+        "throughput_rps": 10.0,
+        "endpoints": {"/chat": {"p50_ms": 100.0, "p95_ms": 200.0, "p99_ms": 300.0, "errors": 0}},
+        "event_loop": {"blocked_ms_total": 20.0},
+    }
+    report = copy.deepcopy(baseline)
+    report["endpoints"]["/chat"].update(p50_ms=110.0, p95_ms=260.0, errors=1)
+    report["throughput_rps"] = 8.0
+    report["event_loop"]["blocked_ms_total"] = 60.0  # 기준 + 50ms 이내는 허용
+
+    assert compare_with_baseline(report, baseline, tolerance=0.15) == [
+        "throughput 8.0 < baseline 10.0",
+        "/chat p95_ms 260.0 > baseline 200.0",
+        "/chat errors 1 > baseline 0",
+    ]
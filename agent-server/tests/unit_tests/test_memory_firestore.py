@@ -0,0 +1,131 @@
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+from datetime import datetime, timezone
+
+import pytest
+from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1 import FieldFilter
+
+from coach_agent.observability.metrics import TimedRepo
+from coach_agent.services.async_firestore_repo import AsyncFirestoreRepo
+from coach_agent.services.checkpointer import FirestoreSaver
+from coach_agent.services.memory_firestore import (
+    MemoryAsyncFirestoreClient,
+    MemoryFirestoreClient,
+    MemoryStore,
+)
+
+from .checkpointer_utils import counter_graph
+
+
+def test_document_set_merge_update_and_server_timestamp() -> None:
+    db = MemoryFirestoreClient(MemoryStore())
+    ref = db.collection("users").document("u1").collection("sessions").document("t1")
+
+    ref.set({"week": 1, "checkpoint": {"step_index": 0}, "created_at": firestore.SERVER_TIMESTAMP})
+    ref.set({"status": "active"}, merge=True)
+    ref.update({"checkpoint.step_index": 3})
+
+    data = ref.get().to_dict()
+    assert data["week"] == 1 and data["status"] == "active"
+    assert data["checkpoint"] == {"step_index": 3}
+    assert data["created_at"] is not None and data["created_at"] is not firestore.SERVER_TIMESTAMP
+    assert not db.collection("users").document("nobody").get().exists
+    with pytest.raises(NotFound):
+        db.collection("users").document("nobody").update({"x": 1})
+
+
+def test_query_filters_order_limit_and_start_after() -> None:
+    db = MemoryFirestoreClient(MemoryStore())
+    col = db.collection("users").document("u1").collection("sessions")
+    for i in range(5):
+        col.document(f"s{i}").set({"week": i, "status": "active" if i % 2 == 0 else "ended", "created_at": i})
+
+    q = (col.where(filter=FieldFilter("status", "in", ["active"]))
+         .where(filter=FieldFilter("week", "<=", 3))
+         .order_by("created_at", direction=firestore.Query.DESCENDING))
+    assert [d.id for d in q.stream()] == ["s2", "s0"]
+
+    page = col.order_by("created_at", direction=firestore.Query.DESCENDING).select(["week"]).limit(2)
+    first = list(page.stream())
+    assert [d.id for d in first] == ["s4", "s3"] and first[0].to_dict() == {"week": 4}
+    rest = col.order_by("created_at", direction=firestore.Query.DESCENDING).start_after({"created_at": 3})
+    assert [d.id for d in rest.stream()] == ["s2", "s1", "s0"]
+
+    col.document("s0").collection("messages").add({"user_id": "u1", "created_at": 1})
+    db.collection("users").document("u2").collection("sessions").document("x").collection("messages").add({"user_id": "u2", "created_at": 2})
+    group = db.collection_group("messages").where(filter=FieldFilter("user_id", "==", "u1"))
+    assert len(list(group.stream())) == 1
+
+
+def test_batch_commit_is_counted_per_write() -> None:
+    store = MemoryStore()
+    db = MemoryFirestoreClient(store)
+    batch = db.batch()
+    for i in range(3):
+        batch.set(db.collection("messages").document(f"m{i}"), {"i": i})
+    batch.commit()
+    db.collection("messages").document("m0").get()
+
+    stats = store.stats()
+    assert stats["writes"] == 3 and stats["reads"] == 1
+    assert stats["by_kind"]["batch.commit"] == {"calls": 1, "reads": 0, "writes": 3}
+
+
+@pytest.mark.anyio
+async def test_async_repo_runs_on_memory_client_with_operation_counters() -> None:
+    store = MemoryStore()
+    repo = TimedRepo(AsyncFirestoreRepo(db=MemoryAsyncFirestoreClient(store)), prefix="repo")
+
+    await repo.get_user("u1")
+    await repo.save_session_info("u1", "t1", "WEEKLY", 1)
+    await repo.save_message("u1", "t1", "WEEKLY", 1, "user", "안녕하세요")
+    sessions, cursor = await repo.get_sessions_page("u1", limit=10)
+    active = await repo.get_active_weekly_session("u1", 1)
+
+    assert [s["id"] for s in sessions] == ["t1"] and cursor is None
+    assert active["id"] == "t1"
+    by_op = store.stats()["by_operation"]
+    assert by_op["repo.get_user"] == {"calls": 2, "reads": 1, "writes": 1}  # 신규 유저: get 1 + set 1
+    assert by_op["repo.save_message"]["writes"] == 2  # touch 1 + 메시지 add 1
+
+
+@pytest.mark.anyio
+async def test_async_repo_pages_do_not_skip_rows_with_equal_created_at() -> None:
+    repo = AsyncFirestoreRepo(db=MemoryAsyncFirestoreClient(MemoryStore()))
+    same = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(5):
+        await repo.save_session_info("u1", f"t{i}", "GENERAL", 1, created_at=same)
+    await repo.save_messages_batch([
+        {"id": f"m{i}", "user_id": "u1", "thread_id": "t0", "session_type": "GENERAL", "week": 1,
+         "role": "user", "text": str(i), "created_at": same}
+        for i in range(5)
+    ])
+
+    async def _all(fetch):
+        items, cursor = await fetch(None)
+        pages = [items]
+        while cursor:
+            items, cursor = await fetch(cursor)
+            pages.append(items)
+        return pages
+
+    sessions = await _all(lambda c: repo.get_sessions_page("u1", limit=2, cursor=c))
+    assert [[s["id"] for s in page] for page in sessions] == [["t4", "t3"], ["t2", "t1"], ["t0"]]
+    messages = await _all(lambda c: repo.get_session_messages_page("u1", "t0", limit=2, cursor=c))
+    assert [m["text"] for page in messages for m in page] == ["0", "1", "2", "3", "4"]
+
+
+def test_firestore_saver_round_trip_on_memory_backend() -> None:
+    graph = counter_graph(FirestoreSaver())
+
+    config = {"configurable": {"thread_id": "memory-saver-test"}}
+    graph.invoke({"items": []}, config)
+    result = graph.invoke({"items": []}, config)
+
+    assert result["items"] == [0, 1]
+    assert graph.get_state(config).values["items"] == [0, 1]
@@ -0,0 +1,176 @@
+import os
+
+# coach_agent.services 는 import 시점에 get_db() 를 호출하므로 먼저 memory 백엔드로 지정
+os.environ["REPO_BACKEND"] = "memory"
+
+import asyncio
+import json
+
+import pytest
+
+from coach_agent.services.async_firestore_repo import AsyncFirestoreRepo
+from coach_agent.services.memory_firestore import MemoryAsyncFirestoreClient, MemoryStore
+from coach_agent.services.message_queue import MessageWriteQueue
+
+
+class _RecordingRepo:
+    """AsyncFirestoreRepo(memory) 래퍼: save_messages_batch 호출 기록 + 장애 주입"""
+
+    def __init__(self) -> None:
+        self.inner = AsyncFirestoreRepo(db=MemoryAsyncFirestoreClient(MemoryStore()))
+        self.batches = []
+        self.fail_calls = set()        # 이 번호(1부터)의 호출은 저장 전에 실패
+        self.fail_after_commit = set()  # 이 번호의 호출은 저장은 끝났지만 타임아웃처럼 실패
+        self.delay = 0.0
+
+    async def save_messages_batch(self, messages, ensure_sessions=True):
+        call = len(self.batches) + 1
+        self.batches.append([m["text"] for m in messages])
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if call in self.fail_calls:
+            raise RuntimeError("firestore unavailable")
+        await self.inner.save_messages_batch(messages, ensure_sessions)
+        if call in self.fail_after_commit:
+            raise TimeoutError("deadline exceeded after commit")
+
+    async def texts(self, thread_id="t1"):
+        return [m["text"] for m in await self.inner.get_session_messages("u1", thread_id)]
+
+
+def _queue(repo, tmp_path, **kwargs) -> MessageWriteQueue:
+    kwargs.setdefault("linger_ms", 20)
+    return MessageWriteQueue(repo, spill_path=str(tmp_path / "spill.jsonl"), **kwargs)
+
+
+async def _enqueue(queue, *texts, thread_id="t1"):
+    for text in texts:
+        await queue.enqueue("u1", thread_id, "WEEKLY", 1, "user", text)
+
+
+def _spilled(queue):
+    with open(queue.spill_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.anyio
+async def test_worker_groups_messages_into_batches_and_flushes_on_stop(tmp_path) -> None:
+    repo = _RecordingRepo()
+    queue = _queue(repo, tmp_path, batch_size=3)
+    await queue.start()
+
+    await _enqueue(queue, "m0", "m1", "m2", "m3", "m4")
+    await queue.stop()
+
+    # linger 동안 모인 메시지를 batch_size 단위로 묶음, stop() 은 남은 메시지를 모두 저장
+    assert repo.batches == [["m0", "m1", "m2"], ["m3", "m4"]]
+    assert await repo.texts() == ["m0", "m1", "m2", "m3", "m4"]
+    assert queue.stats()["written"] == 5 and not os.path.exists(queue.spill_path)
+
+
+@pytest.mark.anyio
+async def test_retry_after_committed_write_does_not_duplicate_messages(tmp_path) -> None:
+    repo = _RecordingRepo()
+    repo.fail_after_commit = {1}
+    queue = _queue(repo, tmp_path, max_retries=2)
+    await queue.start()
+
+    await _enqueue(queue, "m0", "m1")
+    await queue.stop()
+
+    assert len(repo.batches) == 2  # 첫 시도(커밋 후 실패) + 재시도
+    assert await repo.texts() == ["m0", "m1"]
+
+
+@pytest.mark.anyio
+async def test_batch_is_spilled_when_retries_are_exhausted(tmp_path) -> None:
+    repo = _RecordingRepo()
+    repo.fail_calls = {1}
+    queue = _queue(repo, tmp_path, max_retries=1)
+    await queue.start()
+
+    await _enqueue(queue, "m0", "m1")
+    await queue.stop()
+
+    rows = _spilled(queue)
+    assert [r["text"] for r in rows] == ["m0", "m1"]
+    assert all(r["id"] for r in rows) and queue.spilled == 2
+    assert await repo.texts() == []
+
+
+@pytest.mark.anyio
+async def test_replay_spill_resends_rest_after_partial_failure_without_duplicates(tmp_path) -> None:
+    repo = _RecordingRepo()
+    repo.fail_calls = {1}
+    queue = _queue(repo, tmp_path, max_retries=1, batch_size=10)
+    await queue.start()
+    await _enqueue(queue, "m0", "m1", "m2", "m3", "m4")
+    await queue.stop()
+    assert len(_spilled(queue)) == 5
+
+    # 재전송: 2건씩, 첫 청크는 저장됐지만 응답이 실패(커밋 후 타임아웃) → 그 청크부터 다시 spill
+    repo.batches.clear()
+    repo.fail_calls, repo.fail_after_commit = set(), {2}
+    queue.batch_size = 2
+    assert await queue.replay_spill() == 2
+    assert [r["text"] for r in _spilled(queue)] == ["m2", "m3", "m4"]
+
+    # 다음 기동 때 나머지 재전송 → 이미 저장된 m2, m3 도 같은 문서 ID 라 중복 없음
+    assert await queue.replay_spill() == 3
+    assert not os.path.exists(queue.spill_path)
+    assert await repo.texts() == ["m0", "m1", "m2", "m3", "m4"]
+
+
+@pytest.mark.anyio
+async def test_stop_timeout_spills_batch_held_by_worker(tmp_path) -> None:
+    repo = _RecordingRepo()
+    repo.delay = 5.0  # 워커가 배치를 꺼낸 뒤 저장 중에 stop() 타임아웃
+    queue = _queue(repo, tmp_path, linger_ms=0)
+    await queue.start()
+
+    await _enqueue(queue, "m0")
+    await asyncio.sleep(0.01)
+    await _enqueue(queue, "m1")
+    await queue.stop(timeout=0.05)
+
+    # 워커가 들고 있던 m0 은 워커가, 큐에 남은 m1 은 stop() 이 spill
+    assert sorted(r["text"] for r in _spilled(queue)) == ["m0", "m1"]
+    assert queue.spilled == 2
+
+
+@pytest.mark.anyio
+async def test_replay_killed_midway_keeps_unsent_messages_for_next_start(tmp_path) -> None:
+    repo = _RecordingRepo()
+    repo.fail_calls = {1}
+    queue = _queue(repo, tmp_path, max_retries=1, batch_size=10)
+    await queue.start()
+    await _enqueue(queue, "m0", "m1", "m2", "m3", "m4")
+    await queue.stop()
+
+    # 재전송: 2건씩, 두 번째 청크 저장 중에 프로세스가 죽음 (취소로 흉내)
+    repo.batches.clear()
+    repo.fail_calls = set()
+    queue.batch_size = 2
+    real_save = repo.save_messages_batch
+
+    async def dying_save(messages, ensure_sessions=True):
+        if len(repo.batches) == 1:
+            raise asyncio.CancelledError()
+        await real_save(messages, ensure_sessions)
+
+    repo.save_messages_batch = dying_save
+    with pytest.raises(asyncio.CancelledError):
+        await queue.replay_spill()
+
+    # 저장된 첫 청크를 뺀 나머지가 재전송 파일에 그대로 남음
+    assert not os.path.exists(queue.spill_path)
+    with open(queue.replaying_path, encoding="utf-8") as f:
+        assert [json.loads(line)["text"] for line in f] == ["m2", "m3", "m4"]
+
+    # 다음 기동: 중단된 재전송 + 그 사이 새로 spill 된 메시지까지 이어서 저장
+    repo.save_messages_batch = real_save
+    queue._spill([{"id": "late", "user_id": "u1", "thread_id": "t1", "session_type": "WEEKLY", "week": 1,
+                   "role": "user", "text": "m5", "created_at": None}])
+    assert await queue.replay_spill() == 4
+    assert not os.path.exists(queue.replaying_path) and not os.path.exists(queue.spill_path)
+    assert await repo.texts() == ["m0", "m1", "m2", "m3", "m4", "m5"]
@@ -0,0 +1,117 @@
+import os
+
+# coach_agent.services 는 import 시점에 저장소를 만들므로 먼저 memory 백엔드로 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+
+import uuid
+from typing import TypedDict
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, START, StateGraph
+
+from coach_agent.observability.metrics import (
+    GRAPH_NODE_DURATION,
+    GRAPH_NODE_ERRORS,
+    LLM_TOKENS,
+    MetricsCallbackHandler,
+    MetricsRegistry,
+)
+
+
+def _lines(registry):
+    return registry.render().splitlines()
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count() -> None:
+    registry = MetricsRegistry()
+    hist = registry.histogram("coach_test_seconds", "test", ["route"], buckets=(1.0, 0.1))
+    for value in (0.05, 0.5, 0.5, 5):
+        hist.observe(value, route="/chat")
+
+    assert _lines(registry) == [
+        "# HELP coach_test_seconds test",
+        "# TYPE coach_test_seconds histogram",
+        'coach_test_seconds_bucket{route="/chat",le="0.1"} 1',
+        'coach_test_seconds_bucket{route="/chat",le="1"} 3',
+        'coach_test_seconds_bucket{route="/chat",le="+Inf"} 4',
+        'coach_test_seconds_sum{route="/chat"} 6.05',
+        'coach_test_seconds_count{route="/chat"} 4',
+    ]
+
+
+def test_counter_and_gauge_escape_label_values() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("coach_test_errors", "test", ["detail"])
+    counter.inc(detail='say "hi"\nC:\\tmp')
+    counter.inc(2, detail='say "hi"\nC:\\tmp')
+    registry.register_gauge("coach_test_depth", "test", lambda: {("t-1",): 3, ("t-0",): 1.5}, ["thread"])
+    registry.register_gauge("coach_test_broken", "test", lambda: 1 / 0)
+
+    assert _lines(registry) == [
+        "# HELP coach_test_errors_total test",
+        "# TYPE coach_test_errors_total counter",
+        'coach_test_errors_total{detail="say \\"hi\\"\\nC:\\\\tmp"} 3',
+        "# HELP coach_test_depth test",
+        "# TYPE coach_test_depth gauge",
+        'coach_test_depth{thread="t-0"} 1.5',
+        'coach_test_depth{thread="t-1"} 3',
+        "# HELP coach_test_broken test",
+        "# TYPE coach_test_broken gauge",  # 읽기 실패: 값 없이 헤더만
+    ]
+
+
+class _State(TypedDict):
+    question: str
+    answer: str
+
+
+def _graph(llm, fail: bool = False):
+    def prepare(state: _State):
+        return {"question": state["question"].strip()}
+
+    def answer(state: _State):
+        if fail:
+            raise RuntimeError("llm down")
+        return {"answer": llm.invoke(state["question"]).content}
+
+    builder = StateGraph(_State)
+    builder.add_node("PrepareCounsel", prepare)
+    builder.add_node("GenerateAnswer", answer)
+    builder.add_edge(START, "PrepareCounsel")
+    builder.add_edge("PrepareCounsel", "GenerateAnswer")
+    builder.add_edge("GenerateAnswer", END)
+    return builder.compile()
+
+
+@pytest.mark.anyio
+async def test_graph_run_records_node_durations_and_tokens_per_session_type_and_week() -> None:
+    # 전역 메트릭이라 다른 테스트와 겹치지 않는 week 라벨 사용
+    week = f"w-{uuid.uuid4().hex[:6]}"
+    labels = {"session_type": "WEEKLY", "week": week}
+    reply = AIMessage(content="좋아요", usage_metadata={"input_tokens": 11, "output_tokens": 7, "total_tokens": 18})
+    llm = GenericFakeChatModel(messages=iter([reply]))
+    handler = MetricsCallbackHandler()
+
+    await _graph(llm).ainvoke(
+        {"question": " 오늘 뭐 하지? "},
+        config={"callbacks": [handler], "metadata": {"session_type": "WEEKLY", "week": week}},
+    )
+
+    assert GRAPH_NODE_DURATION.count(node="PrepareCounsel", **labels) == 1
+    assert GRAPH_NODE_DURATION.count(node="GenerateAnswer", **labels) == 1
+    assert GRAPH_NODE_DURATION.count(node="GenerateAnswer", session_type="GENERAL", week=week) == 0
+    assert GRAPH_NODE_ERRORS.value(node="GenerateAnswer", **labels) == 0
+    model = "unknown"  # fake 모델은 모델명을 넘기지 않음
+    assert LLM_TOKENS.value(model=model, kind="prompt", **labels) == 11
+    assert LLM_TOKENS.value(model=model, kind="completion", **labels) == 7
+    assert handler._runs == {}
+
+    # 노드 예외: 시간은 기록하고 에러 카운터 증가, 라벨이 없으면 UNKNOWN / unknown
+    with pytest.raises(RuntimeError):
+        await _graph(llm, fail=True).ainvoke({"question": "x"}, config={"callbacks": [handler]})
+    unknown = {"session_type": "UNKNOWN", "week": "unknown"}
+    assert GRAPH_NODE_ERRORS.value(node="GenerateAnswer", **unknown) >= 1
+    assert GRAPH_NODE_DURATION.count(node="GenerateAnswer", **unknown) >= 1
+    assert handler._runs == {}
@@ -0,0 +1,84 @@
+import os
+
+# coach_agent.services 는 import 시점에 저장소를 만들므로 먼저 memory 백엔드로 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from coach_agent.services.async_firestore_repo import AsyncFirestoreRepo
+from coach_agent.services.memory_firestore import MemoryAsyncFirestoreClient, MemoryStore
+from coach_agent.services.repo_cache import CachedAsyncRepo
+
+
+def _repo(**kwargs):
+    store = MemoryStore()
+    db = MemoryAsyncFirestoreClient(store)
+    return CachedAsyncRepo(AsyncFirestoreRepo(db=db), **kwargs), db, store
+
+
+@pytest.mark.anyio
+async def test_cached_user_is_served_until_ttl_expires() -> None:
+    repo, db, store = _repo(ttl_seconds=0.05)
+    await repo.get_user("u1")
+    reads = store.stats()["reads"]
+
+    # 캐시를 거치지 않은 변경(다른 워커)은 TTL 동안 보이지 않음
+    await db.collection("users").document("u1").set({"current_week": 3}, merge=True)
+    assert (await repo.get_user("u1"))["current_week"] == 1
+    assert store.stats()["reads"] == reads
+
+    await asyncio.sleep(0.06)
+    assert (await repo.get_user("u1"))["current_week"] == 3
+    assert (repo.stats()["hits"], repo.stats()["misses"]) == (1, 2)
+
+
+@pytest.mark.anyio
+async def test_writes_update_cached_entries_without_rereading() -> None:
+    repo, db, store = _repo()
+    await repo.get_user("u1")
+    await repo.save_session_info("u1", "t1", "WEEKLY", 1)
+    assert (await repo.get_active_weekly_session("u1", 1))["id"] == "t1"
+
+    await repo.upsert_user("u1", {"nickname": "민지"})
+    await repo.update_progress("u1", 1, exit_hit=True)
+    reads = store.stats()["reads"]
+    user = await repo.get_user("u1")
+    session = await repo.get_active_weekly_session("u1", 1)
+
+    assert user["nickname"] == "민지"
+    assert session["exit_hit_last_turn"] is True and session["last_activity_at"] is not None
+    assert store.stats()["reads"] == reads  # 둘 다 캐시에서
+    stored = (await db.collection("users").document("u1").collection("sessions").document("t1").get()).to_dict()
+    assert stored["exit_hit_last_turn"] is True
+
+    # 세션 종료: 주간 세션 / 유저 항목 무효화 -> 다음 읽기는 저장소 상태
+    await repo.mark_session_as_completed("u1", 1, datetime.now(timezone.utc))
+    assert await repo.get_active_weekly_session("u1", 1) is None
+    assert (await repo.get_user("u1"))["current_week"] == 2
+
+
+@pytest.mark.anyio
+async def test_entries_are_cached_per_key_and_evicted_lru() -> None:
+    repo, db, store = _repo(max_size=3)
+    await repo.get_user("u1")
+    await repo.get_user("u2")
+    assert await repo.get_active_weekly_session("u1", 1) is None  # None 도 캐시
+
+    await repo.upsert_user("u2", {"current_week": 5})
+    assert (await repo.get_user("u1"))["current_week"] == 1  # 다른 유저 항목은 그대로
+    assert (await repo.get_user("u2"))["current_week"] == 5
+
+    # 새 WEEKLY 세션은 캐시된 None 을 지움 (다른 주차 항목은 그대로)
+    await repo.get_active_weekly_session("u1", 2)
+    await repo.save_session_info("u1", "t1", "WEEKLY", 1)
+    assert (await repo.get_active_weekly_session("u1", 1))["id"] == "t1"
+    assert repo.stats()["size"] == 3 and repo.stats()["evictions"] >= 1
+
+    # 가장 오래 안 쓴 항목부터 축출 -> 다시 읽으면 miss
+    misses = repo.stats()["misses"]
+    await repo.get_user("u2")
+    await repo.get_user("u1")
+    assert repo.stats()["misses"] > misses
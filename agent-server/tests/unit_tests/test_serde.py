@@ -0,0 +1,60 @@
+import os
+
+# coach_agent.services 는 import 시점에 저장소를 만들므로 자격 증명이 필요 없는 백엔드로 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+
+from datetime import datetime, timezone
+
+import pytest
+from langchain_core.load import dumps as lc_dumps
+from langchain_core.messages import AIMessage, HumanMessage
+
+from coach_agent.services.serde import MAGIC, CheckpointSerializer, blob_format, zstandard
+
+
+def _checkpoint() -> dict:
+    return {
+        "id": "1f0-abc",
+        "channel_values": {
+            "messages": [HumanMessage(content="요즘 잠이 안 와요", id="h1"), AIMessage(content="그러셨군요." * 100, id="a1")],
+            "current_week": 3,
+            "core_task_tags": {"thought_record"},
+            "counsel_completed_at": datetime(2026, 1, 5, tzinfo=timezone.utc),
+        },
+    }
+
+
+@pytest.mark.parametrize("fmt", ["msgpack", "msgpack+zstd"])
+def test_binary_formats_round_trip_messages_and_python_types(fmt) -> None:
+    serde = CheckpointSerializer(fmt)
+    blob = serde.dumps(_checkpoint())
+
+    assert blob[:1] == MAGIC and blob_format(blob) == serde.format
+    values = serde.loads(blob)["channel_values"]
+    assert isinstance(values["messages"][0], HumanMessage) and values["messages"][1].content == "그러셨군요." * 100
+    assert values["core_task_tags"] == {"thought_record"}
+    assert values["counsel_completed_at"] == datetime(2026, 1, 5, tzinfo=timezone.utc)
+
+
+@pytest.mark.skipif(zstandard is None, reason="zstandard 미설치")
+def test_small_values_are_not_compressed() -> None:
+    serde = CheckpointSerializer("msgpack+zstd")
+    assert blob_format(serde.dumps({"step": 1})) == "msgpack"
+    assert blob_format(serde.dumps(_checkpoint())) == "msgpack+zstd"
+
+
+def test_untagged_legacy_json_is_still_readable() -> None:
+    legacy = lc_dumps({"messages": [HumanMessage(content="안녕하세요", id="h1")], "step": 2})
+    serde = CheckpointSerializer("msgpack")
+
+    for raw in (legacy, legacy.encode("utf-8")):
+        assert blob_format(raw) == "json"
+        loaded = serde.loads(raw)
+        assert loaded["step"] == 2 and loaded["messages"][0].content == "안녕하세요"
+
+
+def test_unknown_format_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        CheckpointSerializer("pickle")
+    with pytest.raises(ValueError):
+        CheckpointSerializer().loads(MAGIC + b"pickle\x00payload")
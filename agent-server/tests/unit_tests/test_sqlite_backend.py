@@ -0,0 +1,124 @@
+import os
+
+# coach_agent.services 는 import 시점에 저장소를 만들므로 자격 증명이 필요 없는 백엔드로 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+
+import operator
+from datetime import datetime, timezone
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+
+from coach_agent.services.sqlite_checkpointer import SqliteSaver
+from coach_agent.services.sqlite_db import SqliteDatabase
+from coach_agent.services.sqlite_repo import AsyncSqliteRepo, SqliteRepo
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SqliteDatabase(str(tmp_path / "coach.db"), pool_size=2)
+    yield database
+    database.close()
+
+
+def test_schema_uses_wal_and_indexes(db) -> None:
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = " ".join(str(r) for r in db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT data FROM sessions "
+        "WHERE user_id = 'u1' AND week = 1 AND session_type = 'WEEKLY' AND status IN ('active')"
+    ))
+    assert "idx_sessions_active" in plan
+
+
+def test_weekly_session_lifecycle(db) -> None:
+    repo = SqliteRepo(db)
+    assert repo.get_user("u1")["current_week"] == 1
+
+    repo.save_session_info("u1", "t1", "WEEKLY", 1)
+    repo.save_message("u1", "t1", "WEEKLY", 1, "user", "안녕하세요")
+    repo.update_checkpoint("u1", 1, 3)
+    repo.save_session_summary("u1", 1, "1주차 요약")
+
+    active = repo.get_active_weekly_session("u1", 1)
+    assert active["id"] == "t1" and active["checkpoint"] == {"step_index": 3}
+    assert isinstance(active["created_at"], datetime)
+
+    completed_at = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    repo.mark_session_as_completed("u1", 1, completed_at)
+    user = repo.get_user("u1")
+    assert user["current_week"] == 2 and user["last_weekly_session_completed_at"] == completed_at
+    assert repo.get_active_weekly_session("u1", 1) is None
+    assert repo.get_past_summaries("u1", 2) == [{"week": 1, "summary": "1주차 요약"}]
+    assert [m["text"] for m in repo.get_session_messages("u1", "t1")] == ["안녕하세요"]
+
+    repo.reset_user_progress("u1")
+    assert repo.get_user("u1")["current_week"] == 1
+    assert repo.get_past_summaries("u1", 2) == []
+
+
+@pytest.mark.anyio
+async def test_async_repo_pages_drawer_sessions(db) -> None:
+    repo = AsyncSqliteRepo(SqliteRepo(db))
+    for i in range(3):
+        created = datetime(2026, 1, 1 + i, tzinfo=timezone.utc)
+        await repo.save_session_info("u1", f"t{i}", "GENERAL", 1, created_at=created)
+    await repo.save_session_info("u1", "w1", "WEEKLY", 1, created_at=datetime(2026, 1, 10, tzinfo=timezone.utc))
+    await repo.restart_current_week_session("u1", 1)  # 중도포기 -> 서랍에서 제외
+    await repo.save_messages_batch([
+        {"user_id": "u1", "thread_id": "t0", "session_type": "GENERAL", "week": 1, "role": "user", "text": str(i)}
+        for i in range(3)
+    ])
+
+    first, cursor = await repo.get_sessions_page("u1", limit=2)
+    rest, last_cursor = await repo.get_sessions_page("u1", limit=2, cursor=cursor)
+    assert [s["id"] for s in first] == ["t2", "t1"] and [s["id"] for s in rest] == ["t0"]
+    assert last_cursor is None
+
+    messages, _ = await repo.get_session_messages_page("u1", "t0", limit=10)
+    assert [m["text"] for m in messages] == ["0", "1", "2"]
+
+
+@pytest.mark.anyio
+async def test_async_repo_pages_do_not_skip_rows_with_equal_created_at(db) -> None:
+    repo = AsyncSqliteRepo(SqliteRepo(db))
+    same = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(5):
+        await repo.save_session_info("u1", f"t{i}", "GENERAL", 1, created_at=same)
+    await repo.save_messages_batch([
+        {"user_id": "u1", "thread_id": "t0", "session_type": "GENERAL", "week": 1, "role": "user",
+         "text": str(i), "created_at": same}
+        for i in range(5)
+    ])
+
+    first, cursor = await repo.get_sessions_page("u1", limit=3)
+    rest, last_cursor = await repo.get_sessions_page("u1", limit=3, cursor=cursor)
+    assert [s["id"] for s in first + rest] == ["t4", "t3", "t2", "t1", "t0"] and last_cursor is None
+    first, cursor = await repo.get_session_messages_page("u1", "t0", limit=2)
+    rest, _ = await repo.get_session_messages_page("u1", "t0", limit=10, cursor=cursor)
+    assert [m["text"] for m in first + rest] == ["0", "1", "2", "3", "4"]
+
+
+class _Counter(TypedDict):
+    items: Annotated[list, operator.add]
+
+
+def test_sqlite_saver_round_trip(db) -> None:
+    builder = StateGraph(_Counter)
+    builder.add_node("append", lambda state: {"items": [len(state["items"])]})
+    builder.add_edge(START, "append")
+    builder.add_edge("append", END)
+    saver = SqliteSaver(db=db)
+    graph = builder.compile(checkpointer=saver)
+
+    config = {"configurable": {"thread_id": "sqlite-saver-test"}}
+    graph.invoke({"items": []}, config)
+    result = graph.invoke({"items": []}, config)
+
+    assert result["items"] == [0, 1]
+    assert graph.get_state(config).values["items"] == [0, 1]
+    history = list(saver.list(config))
+    assert len(history) > 2 and history[0].parent_config is not None
+
+    saver.delete_thread("sqlite-saver-test")
+    assert saver.get_tuple(config) is None
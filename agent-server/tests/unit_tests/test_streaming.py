@@ -0,0 +1,82 @@
+import os
+
+# protocol_loader 는 coach_agent.graph 를 거쳐 저장소 / ChatOpenAI 를 만들므로 먼저 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+import json
+
+import pytest
+
+import coach_agent.graph  # noqa: F401  (protocol_loader 를 먼저 import 하면 순환 import)
+from coach_agent.utils.protocol_loader import load_techniques_catalog
+from coach_agent.utils.streaming import ResponseTextExtractor, TechniqueCheckedExtractor, format_sse
+
+
+def _feed_all_with(extractor, fragments):
+    return "".join(extractor.feed(f) for f in fragments)
+
+
+def _feed_all(fragments):
+    return _feed_all_with(ResponseTextExtractor(), fragments)
+
+
+def test_extractor_decodes_response_text_across_fragments() -> None:
+    args = json.dumps({"response_text": "안녕\n\"하세요\"", "reasoning": "x"})
+    assert _feed_all([args[i:i + 3] for i in range(0, len(args), 3)]) == "안녕\n\"하세요\""
+
+
+def test_escaped_emoji_is_joined_into_one_character() -> None:
+    args = json.dumps({"response_text": "hi 😀 ok"})  # ensure_ascii -> 😀
+    assert "\\ud83d\\ude00" in args
+
+    text = _feed_all([args])
+    assert text == "hi 😀 ok"
+    format_sse("token", {"text": text}).encode("utf-8")  # lone surrogate 면 UnicodeEncodeError
+
+
+@pytest.mark.parametrize("split", ["\\ud8", "\\ud83d", "\\ud83d\\", "\\ud83d\\u", "\\ud83d\\ude0"])
+def test_escaped_emoji_split_across_fragments(split) -> None:
+    args = json.dumps({"response_text": "hi 😀 ok"})
+    cut = args.index(split) + len(split)
+    extractor = ResponseTextExtractor()
+
+    first = extractor.feed(args[:cut])
+    assert first == "hi "  # 짝이 올 때까지 high surrogate 를 내보내지 않음
+    assert first + extractor.feed(args[cut:]) == "hi 😀 ok"
+
+
+def test_unpaired_surrogates_become_replacement_characters() -> None:
+    text = _feed_all(['{"response_text": "a\\ud83d b \\ude00\\ud83d"}'])
+    assert text == "a� b ��"
+    format_sse("token", {"text": text}).encode("utf-8")
+
+
+def _fused_args(technique_id, text="좋아요"):
+    return json.dumps({"technique_id": technique_id, "micro_goal": "g", "response_text": text}, ensure_ascii=False)
+
+
+def test_fused_text_is_sent_only_after_a_catalog_technique_is_confirmed() -> None:
+    technique = next(iter(load_techniques_catalog()))
+    args = _fused_args(technique, "그때 어떤 생각이 들었나요?")
+    extractor = TechniqueCheckedExtractor()
+    cut = args.index(technique) + 2  # technique_id 값이 끝나기 전
+
+    assert extractor.feed(args[:cut]) == ""
+    assert "".join(extractor.feed(args[i:i + 4]) for i in range(cut, len(args), 4)) == "그때 어떤 생각이 들었나요?"
+
+
+@pytest.mark.parametrize("technique_id", ["not_in_catalog", "", None])
+def test_fused_text_is_dropped_when_the_technique_is_rejected(technique_id) -> None:
+    args = _fused_args(technique_id)
+    assert _feed_all_with(TechniqueCheckedExtractor(), [args[i:i + 5] for i in range(0, len(args), 5)]) == ""
+
+
+def test_fused_text_written_before_technique_id_is_held_until_it_arrives() -> None:
+    technique = next(iter(load_techniques_catalog()))
+    args = json.dumps({"response_text": "안녕", "technique_id": technique})
+    extractor = TechniqueCheckedExtractor()
+    cut = args.index('"technique_id"')
+
+    assert extractor.feed(args[:cut]) == ""
+    assert extractor.feed(args[cut:]) == "안녕"
@@ -0,0 +1,71 @@
+import os
+
+# coach_agent.services 는 import 시점에 저장소를 만들므로 먼저 memory 백엔드로 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+
+import asyncio
+
+import pytest
+
+from coach_agent.services.thread_scheduler import ThreadTurnScheduler
+
+
+async def _turn(scheduler, thread_id, name, log, hold=0.02):
+    async with scheduler.turn(thread_id):
+        log.append(("start", name))
+        await asyncio.sleep(hold)
+        log.append(("end", name))
+
+
+@pytest.mark.anyio
+async def test_same_thread_turns_run_one_at_a_time_in_arrival_order() -> None:
+    scheduler = ThreadTurnScheduler()
+    log = []
+
+    tasks = []
+    for name in ("a", "b", "c"):
+        tasks.append(asyncio.create_task(_turn(scheduler, "t1", name, log)))
+        await asyncio.sleep(0)  # 도착 순서 고정
+    assert scheduler.queue_depth("t1") == 3
+    await asyncio.gather(*tasks)
+
+    # 앞 턴이 끝나야 다음 턴 시작 (겹침 없음), 들어온 순서대로
+    assert log == [("start", "a"), ("end", "a"), ("start", "b"), ("end", "b"), ("start", "c"), ("end", "c")]
+    stats = scheduler.stats()
+    assert (stats["turns"], stats["contended"], stats["max_queue_depth"]) == (3, 2, 3)
+    assert stats["wait_ms_max"] > 0
+
+
+@pytest.mark.anyio
+async def test_different_threads_run_in_parallel() -> None:
+    scheduler = ThreadTurnScheduler()
+    log = []
+
+    await asyncio.gather(*[_turn(scheduler, f"t{i}", f"t{i}", log, hold=0.05) for i in range(3)])
+
+    # 모든 턴이 첫 종료 전에 시작
+    assert [kind for kind, _ in log] == ["start"] * 3 + ["end"] * 3
+    assert scheduler.stats()["contended"] == 0
+
+
+@pytest.mark.anyio
+async def test_idle_thread_lock_is_evicted_even_after_failure() -> None:
+    scheduler = ThreadTurnScheduler()
+
+    async with scheduler.turn("t1"):
+        assert scheduler.stats()["active_threads"] == 1
+    with pytest.raises(RuntimeError):
+        async with scheduler.turn("t2"):
+            raise RuntimeError("llm down")
+
+    # 대기 중이던 턴이 취소돼도 남은 슬롯 없음
+    holder = asyncio.create_task(_turn(scheduler, "t3", "holder", [], hold=0.05))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(_turn(scheduler, "t3", "waiter", []))
+    await asyncio.sleep(0)
+    assert scheduler.stats()["waiting"] == 1
+    waiter.cancel()
+    await asyncio.gather(holder, waiter, return_exceptions=True)
+
+    assert scheduler.stats()["active_threads"] == 0
+    assert scheduler.queue_depth("t1") == scheduler.queue_depth("t3") == 0
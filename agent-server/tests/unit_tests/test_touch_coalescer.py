@@ -0,0 +1,94 @@
+import os
+
+# coach_agent.services 는 import 시점에 저장소를 만들므로 먼저 memory 백엔드로 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+
+from datetime import datetime, timezone
+
+import pytest
+
+from coach_agent.services.async_firestore_repo import AsyncFirestoreRepo
+from coach_agent.services.memory_firestore import MemoryAsyncFirestoreClient, MemoryStore
+from coach_agent.services.touch_coalescer import TouchCoalescingRepo
+
+
+async def _started(store):
+    db = MemoryAsyncFirestoreClient(store)
+    repo = TouchCoalescingRepo(AsyncFirestoreRepo(db=db), flush_interval=60)
+    await repo.start()
+    await repo.get_user("u1")
+    await repo.save_session_info("u1", "t1", "WEEKLY", 1)  # 새 세션: 바로 생성
+    return repo, db
+
+
+async def _session(db):
+    return (await db.collection("users").document("u1").collection("sessions").document("t1").get()).to_dict()
+
+
+async def _turn(repo):
+    await repo.save_message("u1", "t1", "WEEKLY", 1, "user", "안녕하세요")
+    await repo.last_seen_touch("u1")
+    await repo.update_progress("u1", 1, exit_hit=False)
+
+
+@pytest.mark.anyio
+async def test_touches_within_window_become_one_write_per_doc_at_touch_time() -> None:
+    store = MemoryStore()
+    repo, db = await _started(store)
+    try:
+        writes = store.stats()["writes"]
+        for _ in range(3):
+            await _turn(repo)
+        # 창 안에서는 메시지만 저장, 유저 / 세션 touch 는 최신값만 대기
+        assert store.stats()["writes"] == writes + 3
+        assert repo.touch_stats()["pending_users"] == repo.touch_stats()["pending_sessions"] == 1
+        touched_at = repo._pending_sessions[("u1", "t1")]
+
+        store.reset_stats()
+        assert await repo.flush() == 2
+        # 알고 있는 세션 문서에 바로 기록 (활성 세션 재조회 없음), 시각은 flush 시각이 아닌 touch 시각
+        assert store.stats()["by_kind"].get("query") is None
+        assert (await _session(db))["last_activity_at"] == touched_at
+        assert repo.touch_stats()["pending_sessions"] == 0
+    finally:
+        await repo.stop()
+
+
+@pytest.mark.anyio
+async def test_session_end_flushes_pending_touches_first() -> None:
+    store = MemoryStore()
+    repo, db = await _started(store)
+    try:
+        await _turn(repo)
+        touched_at = repo._pending_sessions[("u1", "t1")]
+
+        # exit_hit 턴: 대기분 대신 즉시 기록
+        await repo.update_progress("u1", 1, exit_hit=True)
+        assert repo.touch_stats()["pending_sessions"] == 0
+        assert (await _session(db))["exit_hit_last_turn"] is True
+
+        await _turn(repo)
+        assert repo.touch_stats()["pending_users"] == 1
+        await repo.mark_session_as_completed("u1", 1, datetime.now(timezone.utc))
+        session = await _session(db)
+        assert session["status"] == "ended" and session["last_activity_at"] > touched_at
+        user = (await db.collection("users").document("u1").get()).to_dict()
+        assert user["last_seen_at"] is not None and user["current_week"] == 2
+        assert repo.touch_stats()["pending_users"] == repo.touch_stats()["pending_sessions"] == 0
+    finally:
+        await repo.stop()
+
+
+@pytest.mark.anyio
+async def test_stop_flushes_and_later_calls_write_through() -> None:
+    store = MemoryStore()
+    repo, db = await _started(store)
+    await _turn(repo)
+    touched_at = repo._pending_sessions[("u1", "t1")]
+
+    await repo.stop()
+    assert (await _session(db))["last_activity_at"] == touched_at
+    assert not repo.running and repo.touch_stats()["pending_sessions"] == 0
+
+    await repo.last_seen_touch("u1")  # 워커가 없으면 바로 기록
+    assert repo.touch_stats()["pending_users"] == 0
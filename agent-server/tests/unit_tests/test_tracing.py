@@ -0,0 +1,129 @@
+import os
+
+# coach_agent.services 는 import 시점에 저장소를 만들므로 먼저 memory 백엔드로 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+
+import json
+from typing import TypedDict
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, START, StateGraph
+
+from coach_agent.observability.tracing import (
+    JsonlSpanExporter,
+    NoopSpanExporter,
+    Tracer,
+    TracingCallbackHandler,
+    build_exporter,
+)
+
+
+class _ListExporter:
+    def __init__(self):
+        self.batches = []
+
+    def export(self, spans):
+        self.batches.append(list(spans))
+
+
+def _tracer():
+    exporter = _ListExporter()
+    return Tracer(exporter), exporter
+
+
+def test_build_exporter_rejects_unknown_kind() -> None:
+    assert isinstance(build_exporter("none", "unused.jsonl"), NoopSpanExporter)
+    with pytest.raises(ValueError, match="TRACE_EXPORTER"):
+        build_exporter("otlp", "unused.jsonl")
+
+
+def test_spans_link_to_parent_and_export_when_root_ends() -> None:
+    tracer, exporter = _tracer()
+    trace_id = tracer.new_trace_id()
+
+    with tracer.start_span("chat.turn", trace_id=trace_id) as root:
+        with tracer.start_span("repo.get_user") as child:
+            with tracer.start_span("firestore.get") as grandchild:
+                tracer.annotate(bytes=12)
+        assert exporter.batches == []  # 루트가 끝나기 전에는 export 하지 않음
+
+    assert len(exporter.batches) == 1
+    spans = {s.name: s for s in exporter.batches[0]}
+    assert set(spans) == {"chat.turn", "repo.get_user", "firestore.get"}
+    assert {s.trace_id for s in spans.values()} == {trace_id}
+    assert root.parent_span_id is None
+    assert child.parent_span_id == root.span_id
+    assert grandchild.parent_span_id == child.span_id
+    assert grandchild.attributes == {"bytes": 12}
+
+
+def test_span_ending_after_its_root_is_exported_alone() -> None:
+    tracer, exporter = _tracer()
+    root = tracer.begin("chat.turn", trace_id=tracer.new_trace_id())
+    late = tracer.begin("repo.save_message", parent=root)
+
+    with pytest.raises(RuntimeError):
+        with tracer.start_span("outside-trace"):  # 트레이스 밖: 기록하지 않음
+            raise RuntimeError("boom")
+    tracer.end(root)
+    tracer.end(late, RuntimeError("timeout"))
+
+    assert [[s.name for s in batch] for batch in exporter.batches] == [["chat.turn"], ["repo.save_message"]]
+    assert late.status == "error" and late.attributes["error"] == "RuntimeError: timeout"
+
+
+class _State(TypedDict):
+    question: str
+    answer: str
+
+
+def _graph(llm):
+    def answer(state: _State):
+        return {"answer": llm.invoke(state["question"]).content}
+
+    builder = StateGraph(_State)
+    builder.add_node("GenerateAnswer", answer)
+    builder.add_edge(START, "GenerateAnswer")
+    builder.add_edge("GenerateAnswer", END)
+    return builder.compile()
+
+
+def test_callback_records_node_and_llm_spans_with_usage() -> None:
+    tracer, exporter = _tracer()
+    reply = AIMessage(content="좋은 질문이에요", usage_metadata={"input_tokens": 11, "output_tokens": 7, "total_tokens": 18})
+    graph = _graph(GenericFakeChatModel(messages=iter([reply])))
+    trace_id = tracer.new_trace_id()
+
+    with tracer.start_span("chat.turn", trace_id=trace_id):
+        graph.invoke(
+            {"question": "오늘 뭐 하지?"},
+            config={"callbacks": [TracingCallbackHandler(tracer)], "metadata": {"trace_id": trace_id}},
+        )
+
+    spans = {s.name: s for s in exporter.batches[0]}
+    root, node, llm = spans["chat.turn"], spans["node.GenerateAnswer"], spans["llm.openai"]
+    assert node.parent_span_id == root.span_id
+    assert llm.parent_span_id == node.span_id
+    assert node.attributes["output_keys"] == ["answer"]
+    assert llm.attributes["node"] == "GenerateAnswer"
+    assert (llm.attributes["prompt_tokens"], llm.attributes["completion_tokens"]) == (11, 7)
+    assert llm.attributes["prompt_chars"] == len("오늘 뭐 하지?")
+    assert llm.attributes["completion_chars"] == len("좋은 질문이에요")
+    assert tracer._run_spans == {}
+
+
+def test_jsonl_exporter_rotates_when_file_exceeds_max_bytes(tmp_path) -> None:
+    path = str(tmp_path / "traces.jsonl")
+    tracer = Tracer(JsonlSpanExporter(path, max_bytes=200))
+
+    for i in range(3):
+        with tracer.start_span("chat.turn", trace_id=tracer.new_trace_id(), turn=i):
+            pass
+
+    # 한 줄이 200바이트를 넘으므로 매 export 마다 교체, 직전 파일 하나만 보관
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["attributes"]["turn"] for line in f] == [2]
+    with open(path + ".1", encoding="utf-8") as f:
+        assert [json.loads(line)["attributes"]["turn"] for line in f] == [1]
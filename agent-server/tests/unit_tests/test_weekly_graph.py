@@ -1 +1,297 @@
-# 
\ No newline at end of file
+import os
+
+# coach_agent.services 는 import 시점에 저장소를, services.llm 은 ChatOpenAI 를 만들므로 먼저 지정
+os.environ.setdefault("REPO_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+import asyncio
+import inspect
+import json
+from typing import Any, List
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.graph import END
+
+from coach_agent.graph.general import nodes as general_nodes
+from coach_agent.graph.state import State
+from coach_agent.graph.weekly import counsel_nodes, exit_nodes, extra_nodes, greeting_nodes, offtopic, speculative
+from coach_agent.graph.weekly.builder import build_weekly_subgraph
+from coach_agent.graph.weekly.edge import after_speculative_router, route_after_fused, route_after_init, route_counsel_mode
+from coach_agent.observability.metrics import SPECULATIVE_COUNSEL_RUNS
+from coach_agent.services.llm_schemas import CounselorTurn, CriterionEvaluation, FusedCounselTurn
+from coach_agent.utils.protocol_loader import load_protocol_spec, load_techniques_catalog
+from coach_agent.utils.streaming import extract_stream_text
+
+
+def _counsel_state(**kwargs) -> State:
+    messages = [HumanMessage(content="__init__"), AIMessage(content="안녕하세요!"),
+                HumanMessage(content="요즘 퇴근하고 나면 스트레스 때문에 자꾸 쇼핑 앱을 열게 돼요.")]
+    return State(session_type="WEEKLY", phase="COUNSEL", messages=messages, **kwargs)
+
+
+def test_weekly_and_general_nodes_are_native_async() -> None:
+    # 동기 노드는 LangGraph 가 스레드 풀(run_in_executor)에서 실행 -> 동시 턴 수가 풀 크기로 제한됨
+    nodes = [
+        extra_nodes.init_weekly_state,
+        extra_nodes.route_phase_node,
+        extra_nodes.should_end_session,
+        offtopic.handle_offtopic,
+        greeting_nodes.greeting,
+        counsel_nodes.counsel_prepare,
+        counsel_nodes.llm_technique_selector,
+        counsel_nodes.llm_technique_applier,
+        counsel_nodes.llm_fused_counsel,
+        counsel_nodes.summarize_and_filter_message,
+        exit_nodes.exit_node,
+        general_nodes.init_general_state,
+        general_nodes.generate_general_answer,
+    ]
+    assert [n.__name__ for n in nodes if not inspect.iscoroutinefunction(n)] == []
+
+
+@pytest.mark.anyio
+async def test_rag_queries_run_concurrently_and_keep_query_order(monkeypatch) -> None:
+    running = 0
+    peak = 0
+
+    async def fake_search(query: str, top_k: int = 5):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        # 앞쪽 쿼리가 더 늦게 끝나도 결과 순서는 쿼리 순서
+        await asyncio.sleep(0.01 * (3 - int(query[-1])))
+        running -= 1
+        if query.endswith("2"):
+            raise RuntimeError("pinecone down")
+        return [Document(page_content=f"{query}-{i}") for i in range(top_k)]
+
+    monkeypatch.setattr(counsel_nodes, "asearch_cbt_corpus", fake_search)
+
+    snippets = await counsel_nodes._retrieve_rag_snippets(["q0", "  ", "q1", "q2"], top_k_per_query=2, max_snippets=3)
+
+    assert peak == 3
+    # 실패한 쿼리는 건너뛰고, max_snippets 로 자름
+    assert snippets == ["q0-0", "q0-1", "q1-0"]
+
+
+def test_speculative_routing_only_for_counsel_turns_that_need_the_offtopic_check() -> None:
+    state = _counsel_state()
+    assert offtopic.offtopic_check_text(state) == state.messages[-1].content
+    assert route_after_init(state) == "SpeculativeCounsel"
+    # 첫 발화 / 짧은 인사는 판별 없음 -> 기존 경로
+    assert route_after_init(State(session_type="WEEKLY", phase="GREETING", messages=[HumanMessage(content="__init__")])) == "HandleOffTopic"
+    assert route_after_init(state.model_copy(update={"messages": state.messages[:2] + [HumanMessage(content="안녕")]})) == "HandleOffTopic"
+
+    assert after_speculative_router(state) == "TechniqueApplier"
+    assert after_speculative_router(state.model_copy(update={"messages": state.messages + [AIMessage(content="안내")]})) == END
+    assert after_speculative_router(state.model_copy(update={"phase": "EXIT"})) == "Exit"
+
+
+@pytest.fixture
+def speculative_stubs(monkeypatch):
+    calls = {"prepare_started": False, "prepare_done": False, "selector_saw": None}
+    verdict = {"offtopic": False, "delay": 0.05, "prepare_delay": 0.0}
+
+    async def fake_check(state, user_text):
+        await asyncio.sleep(verdict["delay"])
+        # 판별 LLM 이 끝나기 전에 준비가 이미 진행 중이어야 함
+        assert calls["prepare_started"]
+        return verdict["offtopic"]
+
+    async def fake_prepare(state):
+        calls["prepare_started"] = True
+        await asyncio.sleep(verdict["prepare_delay"])
+        calls["prepare_done"] = True
+        return {"rag_snippets": ["snippet"], "candidate_techniques": ["t1"]}
+
+    async def fake_selector(state):
+        calls["selector_saw"] = (list(state.rag_snippets), list(state.candidate_techniques))
+        return {"selected_technique_id": "t1", "micro_goal": "goal"}
+
+    monkeypatch.setattr(speculative, "_is_offtopic_for_weekly", fake_check)
+    monkeypatch.setattr(speculative, "counsel_prepare", fake_prepare)
+    monkeypatch.setattr(speculative, "llm_technique_selector", fake_selector)
+    return calls, verdict
+
+
+@pytest.mark.anyio
+async def test_speculative_counsel_commits_prepare_and_selection_when_on_topic(speculative_stubs) -> None:
+    calls, _ = speculative_stubs
+    before = SPECULATIVE_COUNSEL_RUNS.value(outcome="committed")
+
+    updates = await speculative.speculative_counsel(_counsel_state())
+
+    assert updates == {"rag_snippets": ["snippet"], "candidate_techniques": ["t1"],
+                       "selected_technique_id": "t1", "micro_goal": "goal"}
+    # 선택 단계는 준비 결과가 반영된 state 를 봄
+    assert calls["selector_saw"] == (["snippet"], ["t1"])
+    assert SPECULATIVE_COUNSEL_RUNS.value(outcome="committed") == before + 1
+
+
+@pytest.mark.anyio
+async def test_speculative_counsel_cancels_in_flight_work_when_off_topic(speculative_stubs) -> None:
+    calls, verdict = speculative_stubs
+    verdict.update(offtopic=True, prepare_delay=1.0)
+    before = SPECULATIVE_COUNSEL_RUNS.value(outcome="cancelled")
+
+    updates = await speculative.speculative_counsel(_counsel_state())
+
+    # 안내 메시지만 남고 준비 / 선택 결과는 반영되지 않음
+    assert updates == offtopic.offtopic_reply(_counsel_state())
+    assert not calls["prepare_done"] and calls["selector_saw"] is None
+    assert SPECULATIVE_COUNSEL_RUNS.value(outcome="cancelled") == before + 1
+
+
+def test_counsel_mode_routing_and_protocol_default() -> None:
+    state = _counsel_state()
+    assert load_protocol_spec(1)["counsel_mode"] == "split"
+    assert route_counsel_mode(state) == "TechniqueSelector"
+
+    fused = state.model_copy(update={"counsel_mode": "fused"})
+    assert route_counsel_mode(fused) == "FusedCounsel"
+    # SpeculativeCounsel 은 준비만 하고 선택 + 발화는 FusedCounsel 에서
+    assert after_speculative_router(fused) == "FusedCounsel"
+
+
+class _FakeFused:
+    def __init__(self, technique_id: str) -> None:
+        self.technique_id = technique_id
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages[0].content)
+        return FusedCounselTurn(
+            technique_id=self.technique_id, micro_goal="자동사고 한 문장 말하기", reason="r",
+            response_text="그때 어떤 생각이 먼저 들었나요?",
+            criteria_evaluations=[CriterionEvaluation(criterion_id="c1", met=True)],
+        )
+
+
+class _NoSplitCall:
+    async def ainvoke(self, messages):
+        raise AssertionError("fused 모드에서 selector / applier LLM 호출")
+
+
+def _fused_state():
+    candidates = list(load_techniques_catalog())[:2]
+    state = _counsel_state(counsel_mode="fused", candidate_techniques=candidates,
+                           success_criteria=[{"id": "c1", "description": "자동사고 식별"}])
+    return state, candidates
+
+
+@pytest.mark.anyio
+async def test_fused_counsel_selects_and_applies_in_one_call(monkeypatch) -> None:
+    state, candidates = _fused_state()
+    fused = _FakeFused(candidates[1])
+    monkeypatch.setattr(counsel_nodes, "FUSED_COUNSELOR", fused)
+    monkeypatch.setattr(counsel_nodes, "TECHNIQUE_SELECTOR", _NoSplitCall())
+    monkeypatch.setattr(counsel_nodes, "LLM_CHAIN", _NoSplitCall())
+
+    updates = await counsel_nodes.llm_fused_counsel(state)
+
+    assert len(fused.prompts) == 1 and f"'id': '{candidates[0]}'" in fused.prompts[0]
+    assert updates["selected_technique_id"] == candidates[1]
+    assert updates["technique_history"] == [{"technique_id": candidates[1], "micro_goal": "자동사고 한 문장 말하기", "reasoning": ""}]
+    assert updates["criteria_status"] == {"c1": True}
+    assert updates["session_progress"]["turn_count"] == 1
+    assert updates["messages"][0].content == "그때 어떤 생각이 먼저 들었나요?"
+    assert updates["needs_technique_applier"] is False
+
+
+@pytest.mark.anyio
+async def test_fused_counsel_hands_fallback_technique_to_applier_node(monkeypatch) -> None:
+    state, candidates = _fused_state()
+    monkeypatch.setattr(counsel_nodes, "FUSED_COUNSELOR", _FakeFused("not_in_catalog"))
+    monkeypatch.setattr(counsel_nodes, "TECHNIQUE_SELECTOR", _NoSplitCall())
+    monkeypatch.setattr(counsel_nodes, "LLM_CHAIN", _NoSplitCall())
+
+    updates = await counsel_nodes.llm_fused_counsel(state)
+
+    # catalog 에 없는 기법 → 첫 후보로 대체 (selector 와 동일), 받은 발화는 버리고 TechniqueApplier 노드에서 다시 작성
+    assert updates["selected_technique_id"] == candidates[0]
+    assert "[FALLBACK]" in updates["selected_technique_meta"]["llm_reason"]
+    assert "messages" not in updates and "technique_history" not in updates
+    assert route_after_fused(state.model_copy(update=updates)) == "TechniqueApplier"
+    assert route_after_fused(state.model_copy(update={"needs_technique_applier": False})) == "Summarizer"
+    assert route_after_fused(state.model_copy(update={"phase": "EXIT", "needs_technique_applier": True})) == "Exit"
+
+
+class _StreamingToolModel(BaseChatModel):
+    """구조화 출력(function calling) 인자를 몇 글자씩 스트리밍하는 가짜 채팅 모델. 호출마다 responses 에서 하나씩"""
+
+    responses: List[Any]
+
+    @property
+    def _llm_type(self) -> str:
+        return "streaming-tool-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next(self):
+        response = self.responses.pop(0)
+        return type(response).__name__, response.model_dump_json()
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        name, args = self._next()
+        message = AIMessage(content="", tool_calls=[{"name": name, "args": json.loads(args), "id": "call-1"}])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        name, args = self._next()
+        for i in range(0, len(args), 7):
+            chunk = AIMessageChunk(content="", tool_call_chunks=[
+                {"name": name if i == 0 else None, "args": args[i:i + 7], "id": "call-1" if i == 0 else None, "index": 0}])
+            if run_manager:
+                run_manager.on_llm_new_token("", chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+
+@pytest.mark.anyio
+async def test_fused_fallback_streams_only_the_reapplied_reply(monkeypatch) -> None:
+    state, candidates = _fused_state()
+    # CounselPrepare 가 후보를 다시 계산 / 필수 기준 미달이면 ShouldEndSession 이 COUNSEL 유지
+    state = state.model_copy(update={"allowed_techniques": candidates,
+                                     "success_criteria": [{"id": "c1", "description": "자동사고 식별", "required": True}]})
+    rejected = FusedCounselTurn(technique_id="not_in_catalog", micro_goal="g", reason="r",
+                                response_text="버려질 발화예요.",
+                                criteria_evaluations=[CriterionEvaluation(criterion_id="c1", met=True)])
+    reapplied = CounselorTurn(response_text="그 상황을 한 번 떠올려 볼까요?",
+                              criteria_evaluations=[CriterionEvaluation(criterion_id="c1", met=False)])
+    model = _StreamingToolModel(responses=[rejected, reapplied])
+
+    async def on_topic(state, user_text):
+        return False
+
+    async def no_rag(query, top_k=5):
+        return []
+
+    monkeypatch.setattr(offtopic, "_is_offtopic_for_weekly", on_topic)
+    monkeypatch.setattr(counsel_nodes, "asearch_cbt_corpus", no_rag)
+    monkeypatch.setattr(counsel_nodes, "FUSED_COUNSELOR", model.with_structured_output(FusedCounselTurn))
+    monkeypatch.setattr(counsel_nodes, "LLM_CHAIN", model.with_structured_output(CounselorTurn))
+    monkeypatch.setattr(counsel_nodes, "TECHNIQUE_SELECTOR", _NoSplitCall())
+
+    graph = build_weekly_subgraph(speculative=False)
+    streamed, nodes, extractors, final = [], set(), {}, None
+    async for mode, chunk in graph.astream(state, stream_mode=["messages", "values"]):
+        if mode == "values":
+            final = chunk
+            continue
+        msg_chunk, metadata = chunk
+        text = extract_stream_text(msg_chunk, metadata, extractors)
+        if text:
+            streamed.append(text)
+            nodes.add(metadata["langgraph_node"])
+
+    # 버린 fused 발화는 보내지 않고, TechniqueApplier 가 다시 쓴 발화만 (최종 메시지와 같음)
+    assert "".join(streamed) == "그 상황을 한 번 떠올려 볼까요?" and nodes == {"TechniqueApplier"}
+    assert final["messages"][-1].content == "그 상황을 한 번 떠올려 볼까요?"
+    assert final["selected_technique_id"] == candidates[0]
+    assert final["technique_history"][-1]["technique_id"] == candidates[0]
+    assert final["criteria_status"] == {"c1": False}
+    assert model.responses == []